@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'dominial.middleware.CompressaoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -166,6 +167,17 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 25 * 1024 * 1024   # 25MB (form + file)
 # Feature Flags
 DUPLICATA_VERIFICACAO_ENABLED = True
 
+# Exportações em PDF: enfileiradas como ExportacaoJob e geradas pelo worker
+# `python manage.py processar_exportacoes`. Com False (sem worker), o job é
+# processado na própria requisição.
+EXPORTACOES_EM_SEGUNDO_PLANO = os.environ.get('EXPORTACOES_EM_SEGUNDO_PLANO', 'True').lower() == 'true'
+
+# Pool de processos do WeasyPrint (ver RenderizadorPdfService). 0 renderiza no
+# próprio processo; cada renderizador é reciclado após N PDFs.
+PDF_RENDERIZADORES = int(os.environ.get('PDF_RENDERIZADORES', '2'))
+PDF_RENDERIZACOES_POR_PROCESSO = int(os.environ.get('PDF_RENDERIZACOES_POR_PROCESSO', '50'))
+PDF_RENDERIZACAO_TIMEOUT = int(os.environ.get('PDF_RENDERIZACAO_TIMEOUT', '300'))
+
 # ─── Modo de Manutenção ───────────────────────────────────────────
 # Arquivo de flag para o modo de manutenção (deve estar em volume persistente)
 MANUTENCAO_FILE_PATH = os.environ.get('MANUTENCAO_FILE_PATH', os.path.join(BASE_DIR, 'maintenance', '.maintenance.json'))
@@ -80,6 +80,9 @@ CACHES = {
     }
 }
 
+# Sem worker no ambiente de desenvolvimento: exportações geradas na requisição
+EXPORTACOES_EM_SEGUNDO_PLANO = os.environ.get('EXPORTACOES_EM_SEGUNDO_PLANO', 'False').lower() == 'true'
+
 # Configurações de Sessão para desenvolvimento
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
@@ -2,6 +2,7 @@
 Configurações para ambiente de produção
 """
 import os
+from django.core.exceptions import ImproperlyConfigured
 from .settings import *
 
 # Configurações de Segurança
@@ -96,12 +97,35 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 
 # Configurações de Cache
+# O cache precisa ser compartilhado entre os workers do gunicorn: com
+# LocMemCache cada processo tinha sua cópia e uma invalidação feita em um
+# worker não chegava aos demais.
+#   database (padrão): tabela no PostgreSQL (criada por ``createcachetable``)
+#   file: diretório local em CACHE_LOCATION
+#   redis: servidor em CACHE_LOCATION (requer o pacote ``redis``)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'database').lower()
+CACHE_BACKENDS = {
+    'database': ('django.core.cache.backends.db.DatabaseCache', 'cadeia_dominial_cache'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/app/cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://redis:6379/1'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'unique-snowflake'),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND inválido: {CACHE_BACKEND!r} (use {', '.join(sorted(CACHE_BACKENDS))})"
+    )
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        # Vazio (como o docker-compose repassa quando não definido) usa o padrão do backend.
+        'LOCATION': os.environ.get('CACHE_LOCATION') or CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
     }
 }
+if CACHE_BACKEND == 'redis':
+    # RedisCache não aceita MAX_ENTRIES; a política de descarte é do servidor.
+    CACHES['default']['OPTIONS'] = {}
 
 # Configurações de Sessão
 SESSION_COOKIE_SECURE = False  # Mudar para True se usar HTTPS
@@ -12,3 +12,6 @@ DATABASES = {
 
 PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Renderização de PDF no próprio processo, sem pool.
+PDF_RENDERIZADORES = 0
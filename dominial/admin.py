@@ -10,7 +10,8 @@ from django.db.models import Count
 from django.utils.safestring import mark_safe
 from .models import TIs, Cartorios, Pessoas, Imovel, Alteracoes, ImportacaoCartorios, Documento, Lancamento, DocumentoTipo, LancamentoTipo, FimCadeia
 from .models.documento_digital_models import DocumentoDigital
-from .management.commands.importar_cartorios_estado import Command as ImportarCartoriosCommand
+from .models.exportacao_models import ExportacaoJob
+from .services.onr_cartorios_service import OnrCartoriosService
 from django.conf import settings
 
 # Configurações do Admin
@@ -69,6 +70,13 @@ class DocumentoDigitalAdmin(admin.ModelAdmin):
     search_fields = ('nome_original',)
     readonly_fields = ('tamanho_bytes', 'data_upload')
 
+
+@admin.register(ExportacaoJob)
+class ExportacaoJobAdmin(admin.ModelAdmin):
+    list_display = ('tipo', 'imovel', 'status', 'progresso', 'solicitado_por', 'data_criacao', 'data_fim')
+    list_filter = ('tipo', 'status')
+    readonly_fields = ('chave', 'data_criacao', 'data_inicio', 'data_fim')
+
 class NumeroDocumentoFilter(admin.SimpleListFilter):
     title = 'Número do Documento'
     parameter_name = 'numero'
@@ -421,6 +429,9 @@ ESTADOS = [
     ('TO', 'Tocantins'),
 ]
 
+def _nome_estado(sigla):
+    return dict(ESTADOS).get(sigla, sigla)
+
 class ImportacaoCartoriosForm(forms.ModelForm):
     estado = forms.ChoiceField(choices=ESTADOS, label='Estado')
 
@@ -430,10 +441,10 @@ class ImportacaoCartoriosForm(forms.ModelForm):
 
 @admin.register(ImportacaoCartorios)
 class ImportacaoCartoriosAdmin(admin.ModelAdmin):
-    list_display = ['estado', 'data_inicio', 'data_fim', 'total_cartorios', 'status']
+    list_display = ['estado', 'data_inicio', 'data_fim', 'total_cartorios', 'total_cidades', 'status']
     list_filter = ['status', 'estado']
     search_fields = ['estado']
-    readonly_fields = ['data_inicio', 'data_fim', 'total_cartorios', 'status', 'erro']
+    readonly_fields = ['data_inicio', 'data_fim', 'total_cartorios', 'total_cidades', 'status', 'erro']
     actions = ['importar_cartorios']
     form = ImportacaoCartoriosForm
 
@@ -447,49 +458,34 @@ class ImportacaoCartoriosAdmin(admin.ModelAdmin):
         return custom_urls + urls
 
     def iniciar_importacao(self, request, importacao_id):
+        """
+        Coloca a importação na fila do worker (processar_importacoes_cartorios)
+        e responde na hora; o progresso vem de verificar-progresso.
+        """
         try:
             importacao = ImportacaoCartorios.objects.get(id=importacao_id)
-            if importacao.status in ['em_andamento', 'concluido']:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'Importação para {importacao.get_estado_display()} já foi executada.'
-                })
-
-            importacao.status = 'em_andamento'
-            importacao.save()
-
-            # Executar o comando de importação
-            command = ImportarCartoriosCommand()
-            command.handle(estado=importacao.estado)
-
-            # Atualizar status
-            importacao.status = 'concluido'
-            importacao.data_fim = timezone.now()
-            importacao.total_cartorios = importacao.cartorios.count()
-            importacao.save()
+        except ImportacaoCartorios.DoesNotExist:
+            return JsonResponse({'status': 'error', 'message': 'Importação não encontrada'}, status=404)
 
+        if importacao.status == 'em_andamento':
             return JsonResponse({
                 'status': 'success',
-                'message': f'Importação para {importacao.get_estado_display()} concluída com sucesso!'
+                'message': f'Importação para {_nome_estado(importacao.estado)} já está em andamento.'
             })
-        except Exception as e:
-            if importacao:
-                importacao.status = 'erro'
-                importacao.erro = str(e)
-                importacao.save()
+        if not OnrCartoriosService.reenfileirar(importacao):
             return JsonResponse({
                 'status': 'error',
-                'message': f'Erro ao importar cartórios: {str(e)}'
+                'message': f'Importação para {_nome_estado(importacao.estado)} já foi executada.'
             })
+        return JsonResponse({
+            'status': 'success',
+            'message': f'Importação para {_nome_estado(importacao.estado)} enfileirada.'
+        })
 
     def verificar_progresso(self, request, importacao_id):
         try:
             importacao = ImportacaoCartorios.objects.get(id=importacao_id)
-            return JsonResponse({
-                'status': importacao.status,
-                'total_cartorios': importacao.total_cartorios,
-                'erro': importacao.erro
-            })
+            return JsonResponse(OnrCartoriosService.status(importacao))
         except ImportacaoCartorios.DoesNotExist:
             return JsonResponse({'erro': 'Importação não encontrada'}, status=404)
 
@@ -502,9 +498,9 @@ class ImportacaoCartoriosAdmin(admin.ModelAdmin):
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'importacao_id': importacao.id,
-                            'message': f'Importação para {importacao.get_estado_display()} criada com sucesso!'
+                            'message': f'Importação para {_nome_estado(importacao.estado)} criada com sucesso!'
                         })
-                    messages.success(request, f'Importação para {importacao.get_estado_display()} criada com sucesso!')
+                    messages.success(request, f'Importação para {_nome_estado(importacao.estado)} criada com sucesso!')
                     return redirect('..')
         else:
             form = ImportacaoCartoriosForm()
@@ -521,30 +517,12 @@ class ImportacaoCartoriosAdmin(admin.ModelAdmin):
 
     def importar_cartorios(self, request, queryset):
         for importacao in queryset:
-            if importacao.status in ['em_andamento', 'concluido']:
-                messages.warning(request, f'Importação para {importacao.get_estado_display()} já foi executada.')
-                continue
-
-            try:
-                importacao.status = 'em_andamento'
-                importacao.save()
-
-                # Executar o comando de importação
-                command = ImportarCartoriosCommand()
-                command.handle(estado=importacao.estado)
-
-                # Atualizar status
-                importacao.status = 'concluido'
-                importacao.data_fim = timezone.now()
-                importacao.total_cartorios = importacao.cartorios.count()
-                importacao.save()
-
-                messages.success(request, f'Importação para {importacao.get_estado_display()} concluída com sucesso!')
-            except Exception as e:
-                importacao.status = 'erro'
-                importacao.erro = str(e)
-                importacao.save()
-                messages.error(request, f'Erro ao importar cartórios de {importacao.get_estado_display()}: {str(e)}')
+            if importacao.status == 'em_andamento':
+                messages.info(request, f'Importação para {_nome_estado(importacao.estado)} já está em andamento.')
+            elif OnrCartoriosService.reenfileirar(importacao):
+                messages.success(request, f'Importação para {_nome_estado(importacao.estado)} enfileirada.')
+            else:
+                messages.warning(request, f'Importação para {_nome_estado(importacao.estado)} já foi executada.')
 
     importar_cartorios.short_description = 'Importar cartórios do estado selecionado'
 
@@ -0,0 +1,110 @@
+"""
+Exporta em um ZIP as cadeias dominiais de todos os imóveis de uma Terra
+Indígena (mesmo conteúdo da view ``exportar_cadeias_tis``).
+
+Uso:
+    python manage.py exportar_cadeias_tis <id ou código da TI> --saida cadeias.zip
+    python manage.py exportar_cadeias_tis 12 --formatos xlsx,pdf,json --json
+"""
+import json
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dominial.models import TIs
+from dominial.services.exportacao_tis_service import ExportacaoTisService
+
+
+class Command(BaseCommand):
+    help = 'Exporta em um ZIP as cadeias dominiais de todos os imóveis de uma TI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tis', help='ID ou código da Terra Indígena.')
+        parser.add_argument(
+            '--saida',
+            help='Arquivo ZIP de destino (default: cadeias_<código>_<data>.zip).',
+        )
+        parser.add_argument(
+            '--formatos',
+            default='xlsx,json',
+            help='Formatos por imóvel, separados por vírgula: xlsx, pdf, json (default: xlsx,json).',
+        )
+        parser.add_argument(
+            '--incluir-arquivados',
+            action='store_true',
+            help='Inclui também os imóveis arquivados.',
+        )
+        parser.add_argument(
+            '--base-url',
+            help='URL base para recursos referenciados nos PDFs.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas relata quantos imóveis seriam exportados.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Emite o relatório em JSON.',
+        )
+
+    def handle(self, *args, **options):
+        tis = self._obter_tis(options['tis'])
+        try:
+            formatos = ExportacaoTisService.formatos(options['formatos'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        dry_run = options['dry_run']
+        saida = options['saida'] or ExportacaoTisService.nome_arquivo(tis, date.today())
+        relatorio = {
+            'modo': 'dry-run' if dry_run else 'execucao',
+            'tis': tis.codigo,
+            'formatos': list(formatos),
+            'imoveis': ExportacaoTisService.imoveis(
+                tis, options['incluir_arquivados']
+            ).count(),
+            'erros': 0,
+            'arquivo': None if dry_run else saida,
+            'bytes': 0,
+        }
+
+        if not dry_run:
+            resumo = []
+            with open(saida, 'wb') as destino:
+                for bloco in ExportacaoTisService.gerar_zip(
+                    tis,
+                    formatos,
+                    base_url=options['base_url'],
+                    incluir_arquivados=options['incluir_arquivados'],
+                    resumo=resumo,
+                ):
+                    destino.write(bloco)
+            relatorio['erros'] = sum(1 for linha in resumo if linha['situacao'] != 'OK')
+            relatorio['bytes'] = os.path.getsize(saida)
+
+        self._emitir_relatorio(relatorio, options['json'])
+
+    def _obter_tis(self, valor):
+        tis = TIs.objects.filter(codigo=valor).first()
+        if tis is None and valor.isdigit():
+            tis = TIs.objects.filter(id=int(valor)).first()
+        if tis is None:
+            raise CommandError(f'Terra Indígena não encontrada: {valor}')
+        return tis
+
+    def _emitir_relatorio(self, relatorio, como_json):
+        if como_json:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, sort_keys=True))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"TI {relatorio['tis']}: imóveis={relatorio['imoveis']} | "
+                f"erros={relatorio['erros']} | "
+                f"formatos={','.join(relatorio['formatos'])} | "
+                f"arquivo={relatorio['arquivo'] or '-'} ({relatorio['bytes']} bytes)"
+            )
+        )
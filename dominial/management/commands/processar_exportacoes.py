@@ -0,0 +1,101 @@
+"""
+Worker das exportações em PDF (sem broker externo: a fila é a tabela
+``ExportacaoJob``).
+
+Uso:
+    python manage.py processar_exportacoes            # roda continuamente
+    python manage.py processar_exportacoes --uma-vez  # esvazia a fila e sai
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from dominial.models import ExportacaoJob
+from dominial.services.exportacao_service import ExportacaoService
+
+
+# Intervalo entre limpezas de exportações antigas no modo contínuo.
+INTERVALO_LIMPEZA = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de exportações em PDF (ExportacaoJob).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa os jobs pendentes e encerra.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos entre consultas à fila quando ela está vazia (default: 2).',
+        )
+        parser.add_argument(
+            '--reter-dias',
+            type=int,
+            default=7,
+            help='Remove exportações finalizadas há mais de N dias (default: 7).',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Emite o relatório em JSON (com --uma-vez).',
+        )
+
+    def handle(self, *args, **options):
+        relatorio = {
+            'modo': 'uma-vez' if options['uma_vez'] else 'continuo',
+            'processados': 0,
+            'concluidos': 0,
+            'erros': 0,
+            'liberados': ExportacaoService.liberar_abandonados(),
+            'removidos': ExportacaoService.limpar_antigos(options['reter_dias']),
+        }
+        ultima_limpeza = time.monotonic()
+
+        while True:
+            job = ExportacaoService.reservar_proximo()
+            if job is None:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                # Conexões podem expirar durante longos períodos ociosos.
+                close_old_connections()
+                if time.monotonic() - ultima_limpeza > INTERVALO_LIMPEZA:
+                    ExportacaoService.liberar_abandonados()
+                    relatorio['removidos'] += ExportacaoService.limpar_antigos(
+                        options['reter_dias']
+                    )
+                    ultima_limpeza = time.monotonic()
+                continue
+
+            ExportacaoService.processar(job)
+            relatorio['processados'] += 1
+            if job.status == ExportacaoJob.STATUS_CONCLUIDO:
+                relatorio['concluidos'] += 1
+            else:
+                relatorio['erros'] += 1
+            if not options['uma_vez']:
+                self.stdout.write(f"Exportação {job.id}: {job.status}")
+
+        self._emitir_relatorio(relatorio, options['json'])
+
+    def _emitir_relatorio(self, relatorio, como_json):
+        if como_json:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, sort_keys=True))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exportações processadas={relatorio['processados']} | "
+                f"concluídas={relatorio['concluidos']} | "
+                f"erros={relatorio['erros']} | "
+                f"liberadas={relatorio['liberados']} | "
+                f"removidas={relatorio['removidos']}"
+            )
+        )
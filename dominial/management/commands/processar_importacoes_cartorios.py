@@ -0,0 +1,108 @@
+"""
+Worker das importações de cartórios do ONR (sem broker externo: a fila é a
+tabela ``ImportacaoCartorios``, com status ``pendente``).
+
+Uso:
+    python manage.py processar_importacoes_cartorios            # roda continuamente
+    python manage.py processar_importacoes_cartorios --uma-vez  # esvazia a fila e sai
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from dominial.services.onr_cartorios_service import OnrCartoriosService
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de importações de cartórios (ImportacaoCartorios).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa as importações pendentes e encerra.',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5.0,
+            help='Segundos entre consultas à fila quando ela está vazia (default: 5).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Cidades consultadas em paralelo (default: 4).',
+        )
+        parser.add_argument(
+            '--taxa',
+            type=float,
+            default=2.0,
+            help='Máximo de requisições por segundo ao ONR (default: 2).',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Cartórios gravados por upsert (default: 500).',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Emite o relatório em JSON (com --uma-vez).',
+        )
+
+    def handle(self, *args, **options):
+        relatorio = {
+            'modo': 'uma-vez' if options['uma_vez'] else 'continuo',
+            'processados': 0,
+            'concluidos': 0,
+            'erros': 0,
+            'liberados': OnrCartoriosService.liberar_abandonados(),
+        }
+
+        while True:
+            importacao = OnrCartoriosService.reservar_proximo()
+            if importacao is None:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                # Conexões podem expirar durante longos períodos ociosos.
+                close_old_connections()
+                relatorio['liberados'] += OnrCartoriosService.liberar_abandonados()
+                continue
+
+            OnrCartoriosService.processar(
+                importacao,
+                workers=options['workers'],
+                taxa=options['taxa'],
+                tamanho_lote=options['lote'],
+                log=lambda mensagem: None,
+            )
+            relatorio['processados'] += 1
+            if importacao.status == 'concluido':
+                relatorio['concluidos'] += 1
+            else:
+                relatorio['erros'] += 1
+            if not options['uma_vez']:
+                self.stdout.write(
+                    f"Importação {importacao.id} ({importacao.estado}): {importacao.status}"
+                )
+
+        self._emitir_relatorio(relatorio, options['json'])
+
+    def _emitir_relatorio(self, relatorio, como_json):
+        if como_json:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, sort_keys=True))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importações processadas={relatorio['processados']} | "
+                f"concluídas={relatorio['concluidos']} | "
+                f"erros={relatorio['erros']} | "
+                f"liberadas={relatorio['liberados']}"
+            )
+        )
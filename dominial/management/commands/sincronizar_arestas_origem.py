@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dominial.models import DocumentoOrigemAresta, Lancamento
+from dominial.services.cadeia_aresta_service import CadeiaArestaService
+from dominial.services.cadeia_fechamento_service import CadeiaFechamentoService
+
+
+TAMANHO_LOTE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói as arestas materializadas da cadeia dominial '
+        '(DocumentoOrigemAresta) a partir das origens dos lançamentos e o '
+        'fechamento transitivo (DocumentoAncestral) a partir das arestas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas relata quantos lançamentos seriam sincronizados.',
+        )
+        parser.add_argument(
+            '--imovel-id',
+            type=int,
+            help='Restringe a sincronização aos lançamentos de um imóvel.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Emite o relatório em JSON.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        queryset = Lancamento.objects.order_by('id')
+        if options.get('imovel_id'):
+            queryset = queryset.filter(documento__imovel_id=options['imovel_id'])
+
+        ids = list(queryset.values_list('id', flat=True))
+        relatorio = {
+            'modo': 'dry-run' if dry_run else 'execucao',
+            'lancamentos': len(ids),
+            'arestas_antes': DocumentoOrigemAresta.objects.filter(
+                lancamento_id__in=ids
+            ).count(),
+            'arestas_depois': None,
+            'pendentes': 0,
+            'ancestrais': None,
+        }
+
+        if not dry_run:
+            with transaction.atomic():
+                for inicio in range(0, len(ids), TAMANHO_LOTE):
+                    CadeiaArestaService.sincronizar_lancamentos(
+                        ids[inicio:inicio + TAMANHO_LOTE]
+                    )
+                if not options.get('imovel_id'):
+                    # Descarta também linhas órfãs de execuções anteriores.
+                    relatorio['ancestrais'] = CadeiaFechamentoService.reconstruir()
+            arestas = DocumentoOrigemAresta.objects.filter(lancamento_id__in=ids)
+            relatorio['arestas_depois'] = arestas.count()
+            relatorio['pendentes'] = arestas.filter(
+                fim_cadeia=False,
+                documento_pai__isnull=True,
+            ).count()
+
+        self._emitir_relatorio(relatorio, options['json'])
+
+    def _emitir_relatorio(self, relatorio, como_json):
+        if como_json:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, sort_keys=True))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Modo: {relatorio['modo']} | "
+                f"lançamentos={relatorio['lancamentos']} | "
+                f"arestas antes={relatorio['arestas_antes']} | "
+                f"arestas depois={relatorio['arestas_depois']}"
+                + (
+                    f" | ancestrais={relatorio['ancestrais']}"
+                    if relatorio['ancestrais'] is not None
+                    else ''
+                )
+            )
+        )
+        if relatorio['pendentes']:
+            self.stdout.write(
+                f"Origens sem documento correspondente: {relatorio['pendentes']}"
+            )
@@ -112,4 +112,25 @@ class MaintenanceMiddleware:
             'mensagem': mensagem,
             'fim_estimado': fim,
         })
-        return HttpResponse(html, status=503)
\ No newline at end of file
+        return HttpResponse(html, status=503)
+
+
+class CompressaoMiddleware:
+    """
+    Comprime respostas JSON (Brotli/gzip) e HTML (só gzip, com a mitigação
+    de BREACH do ``GZipMiddleware``) grandes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from .services.compressao_service import CompressaoService
+
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            # Variante pré-comprimida servida pela view; o ETag é definido
+            # pelos decorators depois dela.
+            CompressaoService.enfraquecer_etag(response)
+            return response
+        return CompressaoService.comprimir_resposta(request, response)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0056_normaliza_none_textual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoOrigemAresta',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('indice_origem', models.PositiveIntegerField(help_text='Índice da origem no conjunto original do lançamento.')),
+                ('fonte', models.CharField(choices=[('estruturada', 'Estruturada'), ('legada', 'Legada')], max_length=20)),
+                ('fim_cadeia', models.BooleanField(default=False)),
+                ('tipo_documento', models.CharField(blank=True, default='', max_length=20)),
+                ('numero_normalizado', models.CharField(blank=True, default='', max_length=50)),
+                ('cartorio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dominial.cartorios')),
+                ('documento_filho', models.ForeignKey(help_text='Documento do lançamento que declara a origem.', on_delete=django.db.models.deletion.CASCADE, related_name='arestas_origem', to='dominial.documento')),
+                ('documento_pai', models.ForeignKey(blank=True, help_text='Documento de origem resolvido pela identidade completa.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='arestas_destino', to='dominial.documento')),
+                ('lancamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='arestas_origem', to='dominial.lancamento')),
+            ],
+            options={
+                'verbose_name': 'Aresta de Origem',
+                'verbose_name_plural': 'Arestas de Origem',
+                'ordering': ['lancamento_id', 'indice_origem', 'id'],
+                'indexes': [models.Index(fields=['documento_filho', 'fim_cadeia'], name='dom_aresta_filho_idx'), models.Index(fields=['documento_pai'], name='dom_aresta_pai_idx'), models.Index(fields=['tipo_documento', 'numero_normalizado', 'cartorio'], name='dom_aresta_identidade_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lancamento', 'indice_origem', 'fim_cadeia'), name='unique_aresta_origem_lancamento_indice')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0057_documento_origem_aresta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TroncoPrincipal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completo', models.BooleanField(default=False, help_text='Indica se o tronco foi calculado até o fim da cadeia.')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('imovel', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tronco_principal_persistido', to='dominial.imovel')),
+            ],
+            options={
+                'verbose_name': 'Tronco Principal',
+                'verbose_name_plural': 'Troncos Principais',
+            },
+        ),
+        migrations.CreateModel(
+            name='TroncoPrincipalDocumento',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('posicao', models.PositiveIntegerField()),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dominial.documento')),
+                ('tronco', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos', to='dominial.troncoprincipal')),
+            ],
+            options={
+                'verbose_name': 'Documento do Tronco Principal',
+                'verbose_name_plural': 'Documentos do Tronco Principal',
+                'ordering': ['tronco_id', 'posicao'],
+                'indexes': [models.Index(fields=['documento'], name='dom_tronco_documento_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tronco', 'posicao'), name='unique_tronco_principal_posicao')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0058_tronco_principal_persistido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoAncestral',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('profundidade', models.PositiveIntegerField()),
+                ('ancestral', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendentes_fechamento', to='dominial.documento')),
+                ('descendente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestrais_fechamento', to='dominial.documento')),
+            ],
+            options={
+                'verbose_name': 'Ancestral de Documento',
+                'verbose_name_plural': 'Ancestrais de Documentos',
+                'indexes': [models.Index(fields=['ancestral', 'descendente'], name='dom_ancestral_idx')],
+                'constraints': [models.UniqueConstraint(fields=('descendente', 'ancestral'), name='unique_documento_ancestral')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:33
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0059_documento_ancestral'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('cadeia_dominial_pdf', 'PDF da Cadeia Dominial'), ('cadeia_completa_pdf', 'PDF da Cadeia Completa')], max_length=30)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('chave', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('em_andamento', 'Em Andamento'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=20)),
+                ('progresso', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, null=True)),
+                ('arquivo', models.FileField(blank=True, upload_to='exportacoes/%Y/%m/')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_inicio', models.DateTimeField(blank=True, null=True)),
+                ('data_fim', models.DateTimeField(blank=True, null=True)),
+                ('imovel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportacoes', to='dominial.imovel')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Exportação',
+                'verbose_name_plural': 'Exportações',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'data_criacao'], name='dom_exportacao_fila_idx')],
+            },
+        ),
+    ]
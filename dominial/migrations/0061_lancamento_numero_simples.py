@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:46
+
+import dominial.models.ordenacao_expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0060_exportacao_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lancamento',
+            name='numero_simples',
+            field=models.GeneratedField(db_persist=True, expression=dominial.models.ordenacao_expressions.NumeroSimples('numero_lancamento'), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['documento', '-numero_simples', 'id'], name='dom_lanc_doc_num_simples_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['-numero_simples', 'id'], name='dom_lanc_num_simples_idx'),
+        ),
+    ]
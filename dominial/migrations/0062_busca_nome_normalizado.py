@@ -0,0 +1,82 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:51
+
+from django.db import migrations, models
+
+from dominial.models.busca_nome import (
+    criar_indices_busca,
+    indica_cartorio_imoveis,
+    normalizar_busca,
+    remover_indices_busca,
+)
+
+
+def _preencher(queryset, campos, preencher):
+    # Lotes por faixa de ID: no SQLite não se grava na tabela enquanto um
+    # iterator() ainda está lendo dela.
+    ultimo_id = 0
+    while True:
+        lote = list(queryset.filter(id__gt=ultimo_id).order_by('id').only('id', 'nome')[:1000])
+        if not lote:
+            return
+        for objeto in lote:
+            preencher(objeto)
+        queryset.bulk_update(lote, campos)
+        ultimo_id = lote[-1].id
+
+
+def _preencher_cartorio(cartorio):
+    cartorio.nome_busca = normalizar_busca(cartorio.nome)
+    cartorio.eh_cartorio_imoveis = indica_cartorio_imoveis(cartorio.nome_busca)
+
+
+def preencher_nome_busca(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    _preencher(
+        apps.get_model('dominial', 'Pessoas').objects.using(db_alias),
+        ['nome_busca'],
+        lambda pessoa: setattr(pessoa, 'nome_busca', normalizar_busca(pessoa.nome)),
+    )
+    _preencher(
+        apps.get_model('dominial', 'Cartorios').objects.using(db_alias),
+        ['nome_busca', 'eh_cartorio_imoveis'],
+        _preencher_cartorio,
+    )
+
+
+def criar_indices(apps, schema_editor):
+    criar_indices_busca(schema_editor.connection)
+
+
+def remover_indices(apps, schema_editor):
+    remover_indices_busca(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0061_lancamento_numero_simples'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorios',
+            name='eh_cartorio_imoveis',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cartorios',
+            name='nome_busca',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='pessoas',
+            name='nome_busca',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='cartorios',
+            index=models.Index(condition=models.Q(('eh_cartorio_imoveis', True)), fields=['estado', 'cidade', 'nome'], name='dom_cart_imoveis_idx'),
+        ),
+        migrations.RunPython(preencher_nome_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0062_busca_nome_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacaocartorios',
+            name='total_cidades',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ImportacaoCartoriosCidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cidade', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('buscada', 'Buscada no ONR'), ('gravada', 'Gravada'), ('erro', 'Erro')], default='pendente', max_length=10)),
+                ('cartorios', models.IntegerField(default=0)),
+                ('buscada_em', models.DateTimeField(blank=True, null=True)),
+                ('gravada_em', models.DateTimeField(blank=True, null=True)),
+                ('atualizada_em', models.DateTimeField(auto_now=True)),
+                ('erro', models.TextField(blank=True, null=True)),
+                ('importacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cidades', to='dominial.importacaocartorios')),
+            ],
+            options={
+                'verbose_name': 'Cidade da Importação de Cartórios',
+                'verbose_name_plural': 'Cidades da Importação de Cartórios',
+                'constraints': [models.UniqueConstraint(fields=('importacao', 'cidade'), name='unique_importacao_cartorios_cidade')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0063_importacao_cartorios_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacaocartorios',
+            name='data_reserva',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:29
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def marcar_sincronizados(apps, schema_editor):
+    # Quem já tem arestas passou por uma sincronização; os demais lançamentos
+    # com origem são sincronizados uma vez, na próxima leitura da cadeia.
+    db_alias = schema_editor.connection.alias
+    Lancamento = apps.get_model('dominial', 'Lancamento')
+    DocumentoOrigemAresta = apps.get_model('dominial', 'DocumentoOrigemAresta')
+    Lancamento.objects.using(db_alias).filter(
+        Exists(DocumentoOrigemAresta.objects.filter(lancamento=OuterRef('pk')))
+    ).update(arestas_sincronizadas=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0064_importacao_cartorios_fila'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lancamento',
+            name='arestas_sincronizadas',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(marcar_sincronizados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0065_lancamento_arestas_sincronizadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='troncoprincipal',
+            name='versao',
+            field=models.PositiveIntegerField(default=0, help_text='Incrementada a cada truncamento; a leitura só grava o tronco recalculado se a versão não mudou.'),
+        ),
+    ]
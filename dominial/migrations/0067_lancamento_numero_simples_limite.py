@@ -0,0 +1,46 @@
+"""Recria ``Lancamento.numero_simples`` com no máximo 9 dígitos lidos.
+
+Com ``([0-9]+)`` um ``numero_lancamento`` como 'R12345678901' estourava o
+``integer`` do PostgreSQL e a gravação do lançamento falhava. A expressão
+mudou só no SQL gerado (a deconstrução é a mesma), e campos gerados não podem
+ser alterados: o campo e os índices são removidos e recriados, o que
+recalcula os valores já gravados.
+"""
+
+import dominial.models.ordenacao_expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominial', '0066_tronco_principal_versao'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='dom_lanc_doc_num_simples_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='lancamento',
+            name='dom_lanc_num_simples_idx',
+        ),
+        migrations.RemoveField(
+            model_name='lancamento',
+            name='numero_simples',
+        ),
+        migrations.AddField(
+            model_name='lancamento',
+            name='numero_simples',
+            field=models.GeneratedField(db_persist=True, expression=dominial.models.ordenacao_expressions.NumeroSimples('numero_lancamento'), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['documento', '-numero_simples', 'id'], name='dom_lanc_doc_num_simples_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['-numero_simples', 'id'], name='dom_lanc_num_simples_idx'),
+        ),
+    ]
@@ -3,21 +3,25 @@
 # Importar todos os models para manter compatibilidade
 from .tis_models import TIs, TerraIndigenaReferencia, TIs_Imovel
 from .pessoa_models import Pessoas
-from .imovel_models import Imovel, Cartorios, ImportacaoCartorios
+from .imovel_models import Imovel, Cartorios, ImportacaoCartorios, ImportacaoCartoriosCidade
 from .documento_models import Documento, DocumentoTipo
-from .lancamento_models import Lancamento, LancamentoTipo, LancamentoPessoa, OrigemFimCadeia, FimCadeia, LancamentoOrigem
+from .lancamento_models import Lancamento, LancamentoTipo, LancamentoPessoa, OrigemFimCadeia, FimCadeia, LancamentoOrigem, DocumentoOrigemAresta, DocumentoAncestral
 from .alteracao_models import Alteracoes, AlteracoesTipo, RegistroTipo, AverbacoesTipo
 from .documento_importado_models import DocumentoImportado
 from .documento_digital_models import DocumentoDigital
+from .tronco_models import TroncoPrincipal, TroncoPrincipalDocumento
+from .exportacao_models import ExportacaoJob
 
 # Exportar todos os models para uso externo
 __all__ = [
     'TIs', 'TerraIndigenaReferencia', 'TIs_Imovel',
     'Pessoas',
-    'Imovel', 'Cartorios', 'ImportacaoCartorios',
+    'Imovel', 'Cartorios', 'ImportacaoCartorios', 'ImportacaoCartoriosCidade',
     'Documento', 'DocumentoTipo',
-    'Lancamento', 'LancamentoTipo', 'LancamentoPessoa', 'OrigemFimCadeia', 'FimCadeia', 'LancamentoOrigem',
+    'Lancamento', 'LancamentoTipo', 'LancamentoPessoa', 'OrigemFimCadeia', 'FimCadeia', 'LancamentoOrigem', 'DocumentoOrigemAresta', 'DocumentoAncestral',
     'Alteracoes', 'AlteracoesTipo', 'RegistroTipo', 'AverbacoesTipo',
     'DocumentoImportado',
     'DocumentoDigital',
+    'TroncoPrincipal', 'TroncoPrincipalDocumento',
+    'ExportacaoJob',
 ] 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Forma normalizada dos nomes de pessoas e cartórios para a busca do
+autocomplete e os índices que a servem.
+
+``nome_busca`` guarda o nome sem acentos, em maiúsculas e com os espaços
+colapsados. No PostgreSQL a coluna tem um índice GIN de trigramas
+(``pg_trgm``), usado por ``LIKE '%termo%'``; no SQLite uma tabela FTS5 com
+tokenizador de trigramas espelha a coluna por triggers.
+"""
+
+import re
+import unicodedata
+
+TABELAS_BUSCA = ('dominial_pessoas', 'dominial_cartorios')
+
+# Trechos (já normalizados) que identificam um cartório de registro de
+# imóveis: "Imóvel", "Imóveis", "Imobiliário(a)".
+PALAVRAS_CARTORIO_IMOVEIS = ('IMOVEL', 'IMOVEIS', 'IMOBILIARI')
+
+
+def normalizar_busca(texto):
+    """'  Cartório de  Imóveis ' -> 'CARTORIO DE IMOVEIS'."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', sem_acentos).strip().upper()
+
+
+def indica_cartorio_imoveis(nome_busca):
+    return any(palavra in nome_busca for palavra in PALAVRAS_CARTORIO_IMOVEIS)
+
+
+def tabela_fts(tabela):
+    return f'{tabela}_busca'
+
+
+def criar_indices_busca(connection):
+    """
+    Cria (se ainda não existem) os índices de ``nome_busca``. Idempotente:
+    roda na migração e a cada ``migrate``, pois no SQLite a reconstrução de
+    uma tabela por ``AlterField`` descarta os triggers da tabela FTS.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for tabela in TABELAS_BUSCA:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {tabela}_nome_busca_trgm '
+                    f'ON {tabela} USING gin (nome_busca gin_trgm_ops)'
+                )
+        elif connection.vendor == 'sqlite':
+            for tabela in TABELAS_BUSCA:
+                _criar_fts_sqlite(cursor, tabela)
+
+
+def _criar_fts_sqlite(cursor, tabela):
+    fts = tabela_fts(tabela)
+    triggers = {f'{fts}_ai', f'{fts}_ad', f'{fts}_au'}
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [tabela]
+    )
+    faltando = triggers.difference(nome for (nome,) in cursor.fetchall())
+    if not faltando:
+        return
+
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"nome_busca, content='{tabela}', content_rowid='id', tokenize='trigram')"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN '
+        f'INSERT INTO {fts}(rowid, nome_busca) VALUES (new.id, new.nome_busca); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca); "
+        f'END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF nome_busca ON {tabela} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca); "
+        f'INSERT INTO {fts}(rowid, nome_busca) VALUES (new.id, new.nome_busca); END'
+    )
+    # Sem os triggers o índice pode ter ficado para trás: reconstrói a
+    # partir da tabela de conteúdo.
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def remover_indices_busca(connection):
+    with connection.cursor() as cursor:
+        for tabela in TABELAS_BUSCA:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {tabela}_nome_busca_trgm')
+            elif connection.vendor == 'sqlite':
+                fts = tabela_fts(tabela)
+                for sufixo in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{sufixo}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
@@ -0,0 +1,75 @@
+"""
+Exportações geradas fora do ciclo da requisição.
+"""
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class ExportacaoJob(models.Model):
+    """
+    Pedido de exportação (PDF) processado pelo worker
+    ``processar_exportacoes``.
+
+    ``chave`` identifica o conteúdo pedido (tipo, imóvel, geração de cache do
+    imóvel e parâmetros); pedidos iguais reaproveitam o mesmo job e arquivo.
+    """
+
+    TIPO_CADEIA_DOMINIAL_PDF = 'cadeia_dominial_pdf'
+    TIPO_CADEIA_COMPLETA_PDF = 'cadeia_completa_pdf'
+    TIPO_CHOICES = [
+        (TIPO_CADEIA_DOMINIAL_PDF, 'PDF da Cadeia Dominial'),
+        (TIPO_CADEIA_COMPLETA_PDF, 'PDF da Cadeia Completa'),
+    ]
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_EM_ANDAMENTO = 'em_andamento'
+    STATUS_CONCLUIDO = 'concluido'
+    STATUS_ERRO = 'erro'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_EM_ANDAMENTO, 'Em Andamento'),
+        (STATUS_CONCLUIDO, 'Concluído'),
+        (STATUS_ERRO, 'Erro'),
+    ]
+
+    # UUID para que o id não permita adivinhar exportações de outros usuários.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    imovel = models.ForeignKey(
+        'Imovel',
+        on_delete=models.CASCADE,
+        related_name='exportacoes',
+    )
+    parametros = models.JSONField(default=dict, blank=True)
+    chave = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDENTE,
+    )
+    progresso = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True, null=True)
+    arquivo = models.FileField(upload_to='exportacoes/%Y/%m/', blank=True)
+    nome_arquivo = models.CharField(max_length=255, blank=True)
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(null=True, blank=True)
+    data_fim = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Exportação'
+        verbose_name_plural = 'Exportações'
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['status', 'data_criacao'], name='dom_exportacao_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - imóvel {self.imovel_id} ({self.status})"
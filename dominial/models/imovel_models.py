@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 
+from .busca_nome import indica_cartorio_imoveis, normalizar_busca
 from .identidade_expressions import numero_documento_normalizado_expression
 
 
@@ -102,14 +103,33 @@ class Cartorios(models.Model):
         default='CRI',
         verbose_name='Tipo de Cartório'
     )
+    # Nome sem acentos e em maiúsculas para o autocomplete (ver busca_nome)
+    nome_busca = models.CharField(max_length=200, default='', editable=False)
+    # O nome indica um cartório de registro de imóveis
+    eh_cartorio_imoveis = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f"{self.nome} - {self.cidade}/{self.estado}" if self.cidade and self.estado else self.nome
 
+    def save(self, *args, **kwargs):
+        self.nome_busca = normalizar_busca(self.nome)
+        self.eh_cartorio_imoveis = indica_cartorio_imoveis(self.nome_busca)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_busca', 'eh_cartorio_imoveis'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Cartório'
         verbose_name_plural = 'Cartórios'
         ordering = ['tipo', 'estado', 'cidade', 'nome']
+        indexes = [
+            models.Index(
+                fields=['estado', 'cidade', 'nome'],
+                condition=models.Q(eh_cartorio_imoveis=True),
+                name='dom_cart_imoveis_idx',
+            ),
+        ]
 
 
 class ImportacaoCartorios(models.Model):
@@ -128,6 +148,10 @@ class ImportacaoCartorios(models.Model):
         default='pendente'
     )
     erro = models.TextField(blank=True, null=True)
+    # Cidades do estado na última consulta ao ONR (base do percentual)
+    total_cidades = models.IntegerField(default=0)
+    # Quando o worker (ou o comando) assumiu a execução
+    data_reserva = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = 'Importação de Cartórios'
@@ -136,3 +160,75 @@ class ImportacaoCartorios(models.Model):
 
     def __str__(self):
         return f"Importação {self.estado} - {self.status}"
+
+    def progresso(self):
+        """
+        Percentual de cidades gravadas e vazão, a partir dos checkpoints
+        por cidade (``ImportacaoCartoriosCidade``).
+        """
+        por_status = dict(
+            self.cidades.values_list('status').annotate(total=models.Count('id')).order_by()
+        )
+        gravadas = self.cidades.filter(status='gravada').aggregate(
+            inicio=models.Min('buscada_em'),
+            fim=models.Max('gravada_em'),
+            cartorios=models.Sum('cartorios'),
+        )
+        concluidas = por_status.get('gravada', 0)
+        if self.total_cidades:
+            percentual = round(100 * concluidas / self.total_cidades, 1)
+        else:
+            percentual = 100.0 if self.status == 'concluido' else 0.0
+
+        cidades_por_minuto = cartorios_por_minuto = None
+        if gravadas['inicio'] and gravadas['fim'] and gravadas['fim'] > gravadas['inicio']:
+            minutos = (gravadas['fim'] - gravadas['inicio']).total_seconds() / 60
+            cidades_por_minuto = round(concluidas / minutos, 2)
+            cartorios_por_minuto = round((gravadas['cartorios'] or 0) / minutos, 2)
+
+        return {
+            'total_cidades': self.total_cidades,
+            'cidades_concluidas': concluidas,
+            'cidades_com_erro': por_status.get('erro', 0),
+            'cidades_pendentes': por_status.get('pendente', 0) + por_status.get('buscada', 0),
+            'percentual': percentual,
+            'cidades_por_minuto': cidades_por_minuto,
+            'cartorios_por_minuto': cartorios_por_minuto,
+        }
+
+
+class ImportacaoCartoriosCidade(models.Model):
+    """
+    Checkpoint de uma cidade em uma importação: retomar a importação pula
+    as cidades já gravadas.
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('buscada', 'Buscada no ONR'),
+        ('gravada', 'Gravada'),
+        ('erro', 'Erro'),
+    ]
+
+    importacao = models.ForeignKey(
+        ImportacaoCartorios, on_delete=models.CASCADE, related_name='cidades'
+    )
+    cidade = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pendente')
+    # Cartórios de imóveis encontrados na cidade
+    cartorios = models.IntegerField(default=0)
+    buscada_em = models.DateTimeField(null=True, blank=True)
+    gravada_em = models.DateTimeField(null=True, blank=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
+    erro = models.TextField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Cidade da Importação de Cartórios'
+        verbose_name_plural = 'Cidades da Importação de Cartórios'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['importacao', 'cidade'], name='unique_importacao_cartorios_cidade'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.importacao.estado}/{self.cidade} - {self.status}"
@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 
 from ..utils.documento_identidade_utils import normalizar_numero_documento
 from .identidade_expressions import numero_documento_normalizado_expression
+from .ordenacao_expressions import NumeroSimples
 
 
 class LancamentoTipo(models.Model):
@@ -48,6 +49,14 @@ class Lancamento(models.Model):
     documento = models.ForeignKey('Documento', on_delete=models.CASCADE, related_name='lancamentos')
     tipo = models.ForeignKey(LancamentoTipo, on_delete=models.PROTECT)
     numero_lancamento = models.CharField(max_length=50, help_text="Número/código do lançamento gerado pelo cartório", null=True, blank=True)
+    # Chave de ordenação das listagens: "R4M235" -> 4, "AV12M235" -> 12,
+    # início de matrícula -> 0 (por último na ordem decrescente).
+    numero_simples = models.GeneratedField(
+        expression=NumeroSimples('numero_lancamento'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        editable=False,
+    )
     data = models.DateField()
     transmitente = models.ForeignKey('Pessoas', on_delete=models.PROTECT, related_name='transmitente_lancamento', null=True, blank=True)
     adquirente = models.ForeignKey('Pessoas', on_delete=models.PROTECT, related_name='adquirente_lancamento', null=True, blank=True)
@@ -83,14 +92,32 @@ class Lancamento(models.Model):
     
     # Campo para link com documento de origem (para cadeia dominial)
     documento_origem = models.ForeignKey('Documento', on_delete=models.PROTECT, related_name='lancamentos_origem', null=True, blank=True)
-    
+
+    # Marcado quando as arestas da cadeia (DocumentoOrigemAresta) foram
+    # reconstruídas a partir das origens; lançamentos gravados sem signals
+    # (bulk_create) ficam desmarcados até a primeira sincronização.
+    arestas_sincronizadas = models.BooleanField(default=False, editable=False)
+
 
 
 
+    # Ordem das listagens: maior número simples primeiro, depois ID.
+    ORDEM_NUMERO_SIMPLES = ('-numero_simples', 'id')
+
     class Meta:
         verbose_name = "Lançamento"
         verbose_name_plural = "Lançamentos"
         ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['documento', '-numero_simples', 'id'],
+                name='dom_lanc_doc_num_simples_idx',
+            ),
+            models.Index(
+                fields=['-numero_simples', 'id'],
+                name='dom_lanc_num_simples_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.tipo.get_tipo_display()} {self.numero_lancamento} - {self.documento.numero}"
@@ -115,11 +142,17 @@ class Lancamento(models.Model):
 
     @property
     def transmitentes(self):
-        return self.pessoas.filter(tipo='transmitente')
+        return self._pessoas_por_tipo('transmitente')
 
     @property
     def adquirentes(self):
-        return self.pessoas.filter(tipo='adquirente')
+        return self._pessoas_por_tipo('adquirente')
+
+    def _pessoas_por_tipo(self, tipo):
+        # Com ``pessoas`` pré-carregado (ex.: CadeiaGrafo) filtra em memória.
+        if 'pessoas' in getattr(self, '_prefetched_objects_cache', {}):
+            return [pessoa for pessoa in self.pessoas.all() if pessoa.tipo == tipo]
+        return self.pessoas.filter(tipo=tipo)
     
     @property
     def cartorio_transmissao_compat(self):
@@ -217,6 +250,131 @@ class LancamentoOrigem(models.Model):
                 raise ValidationError({'numero': str(erro)}) from erro
 
 
+class DocumentoOrigemAresta(models.Model):
+    """
+    Aresta materializada filho -> pai da cadeia dominial.
+
+    Derivada das origens de cada lançamento (estruturadas ou, na ausência
+    delas, do texto legado) e dos registros de fim de cadeia. É reconstruída
+    pelos signals a cada escrita; não deve ser editada manualmente.
+    """
+
+    FONTE_CHOICES = [
+        ('estruturada', 'Estruturada'),
+        ('legada', 'Legada'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    lancamento = models.ForeignKey(
+        Lancamento,
+        on_delete=models.CASCADE,
+        related_name='arestas_origem',
+    )
+    documento_filho = models.ForeignKey(
+        'Documento',
+        on_delete=models.CASCADE,
+        related_name='arestas_origem',
+        help_text='Documento do lançamento que declara a origem.',
+    )
+    documento_pai = models.ForeignKey(
+        'Documento',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='arestas_destino',
+        help_text='Documento de origem resolvido pela identidade completa.',
+    )
+    indice_origem = models.PositiveIntegerField(
+        help_text='Índice da origem no conjunto original do lançamento.'
+    )
+    fonte = models.CharField(max_length=20, choices=FONTE_CHOICES)
+    fim_cadeia = models.BooleanField(default=False)
+    tipo_documento = models.CharField(max_length=20, blank=True, default='')
+    numero_normalizado = models.CharField(max_length=50, blank=True, default='')
+    cartorio = models.ForeignKey(
+        'Cartorios',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+
+    class Meta:
+        verbose_name = 'Aresta de Origem'
+        verbose_name_plural = 'Arestas de Origem'
+        ordering = ['lancamento_id', 'indice_origem', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['lancamento', 'indice_origem', 'fim_cadeia'],
+                name='unique_aresta_origem_lancamento_indice',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['documento_filho', 'fim_cadeia'],
+                name='dom_aresta_filho_idx',
+            ),
+            models.Index(fields=['documento_pai'], name='dom_aresta_pai_idx'),
+            models.Index(
+                fields=['tipo_documento', 'numero_normalizado', 'cartorio'],
+                name='dom_aresta_identidade_idx',
+            ),
+        ]
+
+    def __str__(self):
+        if self.fim_cadeia:
+            return f'{self.documento_filho_id} -> fim de cadeia'
+        return f'{self.documento_filho_id} -> {self.codigo}'
+
+    @property
+    def codigo(self):
+        prefixo = 'M' if self.tipo_documento == 'matricula' else 'T'
+        return f'{prefixo}{self.numero_normalizado}'
+
+
+class DocumentoAncestral(models.Model):
+    """
+    Fechamento transitivo das arestas de origem: ``ancestral`` é alcançado a
+    partir de ``descendente`` por ``profundidade`` saltos (o menor caminho).
+
+    Mantido por ``CadeiaFechamentoService`` sempre que as arestas mudam;
+    responde "quais cadeias incluem o documento X" e "todos os ancestrais de
+    Y" com uma consulta indexada.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    descendente = models.ForeignKey(
+        'Documento',
+        on_delete=models.CASCADE,
+        related_name='ancestrais_fechamento',
+    )
+    ancestral = models.ForeignKey(
+        'Documento',
+        on_delete=models.CASCADE,
+        related_name='descendentes_fechamento',
+    )
+    profundidade = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'Ancestral de Documento'
+        verbose_name_plural = 'Ancestrais de Documentos'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['descendente', 'ancestral'],
+                name='unique_documento_ancestral',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['ancestral', 'descendente'],
+                name='dom_ancestral_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.descendente_id} -> {self.ancestral_id} ({self.profundidade})'
+
+
 class LancamentoPessoa(models.Model):
     """Modelo para armazenar múltiplas pessoas com percentuais em um lançamento"""
     TIPO_CHOICES = [
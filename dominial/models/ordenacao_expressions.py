@@ -0,0 +1,40 @@
+"""Expressões de banco para a ordenação dos lançamentos."""
+
+from django.db import models
+
+
+class NumeroSimples(models.Func):
+    """
+    Número simples do ``numero_lancamento`` calculado no banco, para ordenação:
+    "R4M235" -> 4, "AV12M235" -> 12, "AV4 M2725" -> 4; início de matrícula
+    ("M235"), valores sem número logo após R/AV e nulos -> 0.
+
+    Só os ``DIGITOS_MAXIMOS`` primeiros dígitos são lidos: o valor sempre
+    cabe no ``integer`` do PostgreSQL, e o SQLite lê o mesmo trecho.
+    """
+
+    DIGITOS_MAXIMOS = 9
+
+    arity = 1
+    output_field = models.IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"COALESCE(CAST(SUBSTRING({sql} FROM "
+            f"'^(?:R|AV)([0-9]{{1,{self.DIGITOS_MAXIMOS}}})') AS integer), 0)",
+            params,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Sem regex no SQLite: GLOB (sensível a maiúsculas, como o prefixo
+        # R/AV) seleciona o formato e o CAST lê os dígitos iniciais.
+        sql, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"CASE WHEN {sql} GLOB 'R[0-9]*' "
+            f"THEN CAST(SUBSTR({sql}, 2, {self.DIGITOS_MAXIMOS}) AS INTEGER) "
+            f"WHEN {sql} GLOB 'AV[0-9]*' "
+            f"THEN CAST(SUBSTR({sql}, 3, {self.DIGITOS_MAXIMOS}) AS INTEGER) "
+            f"ELSE 0 END",
+            (*params, *params, *params, *params),
+        )
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .busca_nome import normalizar_busca
+
 
 class Pessoas(models.Model):
     id = models.AutoField(primary_key=True)
@@ -9,10 +11,19 @@ class Pessoas(models.Model):
     data_nascimento = models.DateField(null=True, blank=True) # Opcional, para data de nascimento
     email = models.EmailField(null=True, blank=True) # Opcional, para email
     telefone = models.CharField(max_length=15, null=True, blank=True) # Opcional, para telefone
+    # Nome sem acentos e em maiúsculas para o autocomplete (ver busca_nome)
+    nome_busca = models.CharField(max_length=255, default='', editable=False)
 
     class Meta:
         verbose_name = "Pessoa"
         verbose_name_plural = "Pessoas"
     
     def __str__(self):
-        return self.nome 
\ No newline at end of file
+        return self.nome
+
+    def save(self, *args, **kwargs):
+        self.nome_busca = normalizar_busca(self.nome)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_busca'}
+        super().save(*args, **kwargs) 
\ No newline at end of file
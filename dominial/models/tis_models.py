@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 
 
@@ -18,13 +20,25 @@ class TIs(models.Model):
     def __str__(self):
         return self.nome
 
+    # Campos copiados da TerraIndigenaReferencia vinculada
+    CAMPOS_DA_REFERENCIA = ('nome', 'codigo', 'etnia', 'estado', 'area')
+
+    @staticmethod
+    def campos_da_referencia(referencia):
+        """Valores que a TI herda da referência (``save`` e importação em lote)."""
+        area = referencia.area_ha
+        return {
+            'nome': referencia.nome,
+            'codigo': referencia.codigo,
+            'etnia': referencia.etnia or '',
+            'estado': referencia.estado,
+            'area': Decimal(str(round(area, 2))) if area is not None else None,
+        }
+
     def save(self, *args, **kwargs):
         if self.terra_referencia:
-            self.nome = self.terra_referencia.nome
-            self.codigo = self.terra_referencia.codigo
-            self.etnia = self.terra_referencia.etnia
-            self.estado = self.terra_referencia.estado
-            self.area = self.terra_referencia.area_ha
+            for campo, valor in self.campos_da_referencia(self.terra_referencia).items():
+                setattr(self, campo, valor)
         super().save(*args, **kwargs)
 
 
@@ -0,0 +1,73 @@
+"""
+Tronco principal persistido da cadeia dominial de cada imóvel.
+"""
+
+from django.db import models
+
+
+class TroncoPrincipal(models.Model):
+    """
+    Tronco principal padrão (sem escolhas de origem da sessão) de um imóvel.
+
+    Os documentos ficam em ``TroncoPrincipalDocumento``, na ordem do tronco.
+    Alterações na cadeia truncam o tronco a partir do ponto afetado e o
+    marcam como incompleto; a próxima leitura recalcula apenas o trecho
+    removido (ver ``TroncoPrincipalService``).
+    """
+
+    imovel = models.OneToOneField(
+        'Imovel',
+        on_delete=models.CASCADE,
+        related_name='tronco_principal_persistido',
+    )
+    completo = models.BooleanField(
+        default=False,
+        help_text='Indica se o tronco foi calculado até o fim da cadeia.',
+    )
+    versao = models.PositiveIntegerField(
+        default=0,
+        help_text='Incrementada a cada truncamento; a leitura só grava o '
+                  'tronco recalculado se a versão não mudou.',
+    )
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tronco Principal'
+        verbose_name_plural = 'Troncos Principais'
+
+    def __str__(self):
+        return f'Tronco principal do imóvel {self.imovel_id}'
+
+
+class TroncoPrincipalDocumento(models.Model):
+    """Documento na posição ``posicao`` do tronco principal de um imóvel."""
+
+    id = models.BigAutoField(primary_key=True)
+    tronco = models.ForeignKey(
+        TroncoPrincipal,
+        on_delete=models.CASCADE,
+        related_name='documentos',
+    )
+    posicao = models.PositiveIntegerField()
+    documento = models.ForeignKey(
+        'Documento',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        verbose_name = 'Documento do Tronco Principal'
+        verbose_name_plural = 'Documentos do Tronco Principal'
+        ordering = ['tronco_id', 'posicao']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tronco', 'posicao'],
+                name='unique_tronco_principal_posicao',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['documento'], name='dom_tronco_documento_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tronco_id}[{self.posicao}] -> {self.documento_id}'
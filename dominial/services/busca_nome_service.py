@@ -0,0 +1,38 @@
+"""
+Service para a busca de pessoas e cartórios pelo nome (autocomplete)
+"""
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from ..models.busca_nome import normalizar_busca, tabela_fts
+
+# Menor termo que o tokenizador de trigramas do FTS5 consegue indexar.
+TAMANHO_MINIMO_FTS = 3
+
+
+class BuscaNomeService:
+    """
+    Busca sem acentos e sem diferenciar maiúsculas sobre ``nome_busca``
+    """
+
+    @staticmethod
+    def filtrar(queryset, termo):
+        """
+        Filtra ``queryset`` (Pessoas ou Cartorios) pelos nomes que contêm
+        ``termo``. No PostgreSQL o ``LIKE`` usa o índice de trigramas; no
+        SQLite a busca passa pela tabela FTS5 espelho.
+        """
+        termo = normalizar_busca(termo)
+        if not termo:
+            return queryset.none()
+
+        connection = connections[queryset.db]
+        if connection.vendor == 'sqlite' and len(termo) >= TAMANHO_MINIMO_FTS:
+            fts = tabela_fts(queryset.model._meta.db_table)
+            # Uma frase entre aspas casa com qualquer trecho do nome.
+            frase = '"' + termo.replace('"', '""') + '"'
+            return queryset.filter(
+                id__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [frase])
+            )
+        return queryset.filter(nome_busca__contains=termo)
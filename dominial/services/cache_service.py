@@ -4,9 +4,11 @@ Service para gerenciamento de cache de queries frequentes
 from django.core.cache import cache
 from django.conf import settings
 from ..models import Documento, Lancamento, TIs, Imovel, Cartorios, Pessoas
+from .cadeia_fechamento_service import CadeiaFechamentoService
 from typing import List, Dict, Any, Optional
 import hashlib
 import json
+import time
 
 
 class CacheService:
@@ -14,8 +16,93 @@ class CacheService:
     Service para gerenciar cache de queries frequentes e otimizar performance
     """
     
-    # Tempo padrão de cache (em segundos)
-    DEFAULT_CACHE_TIME = 300  # 5 minutos
+    # Tempo padrão de cache (em segundos). As entradas são invalidadas pelos
+    # signals da cadeia, então o timeout só limita o tamanho do cache.
+    DEFAULT_CACHE_TIME = getattr(settings, 'CADEIA_CACHE_TIMEOUT', 6 * 60 * 60)  # 6 horas
+
+    # As chaves de cache incluem a geração do imóvel/documento. Invalidar é
+    # apenas incrementar a geração (O(1)): as entradas antigas deixam de ser
+    # lidas em todos os workers e expiram sozinhas pelo timeout.
+    GERACAO_PREFIX = "cadeia_dominial:geracao"
+
+    # Página inicial: invalidada pelos signals de TI/imóvel/referência; o
+    # timeout curto cobre alterações em massa que não disparam signals
+    # (``update()``, importações).
+    HOME_CACHE_TIME = getattr(settings, 'HOME_CACHE_TIMEOUT', 5 * 60)  # 5 minutos
+
+    @staticmethod
+    def _chave_geracao(escopo: str, identificador: int) -> str:
+        return f"{CacheService.GERACAO_PREFIX}:{escopo}:{identificador}"
+
+    @staticmethod
+    def _nova_geracao() -> int:
+        # Base derivada do relógio: se o contador for descartado pelo backend,
+        # a nova geração não coincide com a de entradas antigas ainda válidas.
+        return time.time_ns()
+
+    @staticmethod
+    def obter_geracao(escopo: str, identificador: int) -> int:
+        """
+        Retorna a geração atual de um escopo (``imovel``/``documento``).
+        """
+        chave = CacheService._chave_geracao(escopo, identificador)
+        geracao = cache.get(chave)
+        if geracao is None:
+            # ``add`` só grava se ninguém gravou antes; relê para que todos os
+            # workers usem o mesmo valor.
+            cache.add(chave, CacheService._nova_geracao(), None)
+            geracao = cache.get(chave)
+        return geracao
+
+    @staticmethod
+    def incrementar_geracao(escopo: str, identificador: int) -> int:
+        """
+        Invalida todas as entradas de um escopo incrementando sua geração.
+        """
+        chave = CacheService._chave_geracao(escopo, identificador)
+        try:
+            return cache.incr(chave)
+        except ValueError:
+            # Sem geração registrada ainda não há entradas a invalidar.
+            geracao = CacheService._nova_geracao()
+            cache.add(chave, geracao, None)
+            return geracao
+
+    @staticmethod
+    def invalidar_documentos(documento_ids, imovel_ids=()) -> None:
+        """
+        Invalida os caches de documentos alterados: a geração de cada
+        documento e a de todo imóvel cuja cadeia inclui algum deles, inclusive
+        imóveis que importam o documento. ``imovel_ids`` acrescenta imóveis
+        já conhecidos (ex.: documento excluído, sem fechamento).
+        """
+        documento_ids = {documento_id for documento_id in documento_ids if documento_id}
+        imovel_ids = set(imovel_ids) | CadeiaFechamentoService.imoveis_das_cadeias(
+            documento_ids
+        )
+        for documento_id in documento_ids:
+            CacheService.incrementar_geracao("documento", documento_id)
+        for imovel_id in imovel_ids:
+            CacheService.incrementar_geracao("imovel", imovel_id)
+
+    @staticmethod
+    def chave_imovel(prefix: str, imovel_id: int, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Chave de um artefato derivado da cadeia do imóvel (tronco, árvore,
+        tabela, exportações), versionada pela geração do imóvel.
+        """
+        return CacheService._generate_cache_key(prefix, {
+            **(params or {}),
+            "imovel_id": imovel_id,
+            "geracao": CacheService.obter_geracao("imovel", imovel_id),
+        })
+
+    @staticmethod
+    def _chave_documento(prefix: str, documento_id: int) -> str:
+        return CacheService._generate_cache_key(prefix, {
+            "documento_id": documento_id,
+            "geracao": CacheService.obter_geracao("documento", documento_id),
+        })
     
     @staticmethod
     def _generate_cache_key(prefix: str, params: Dict[str, Any]) -> str:
@@ -40,7 +127,7 @@ class CacheService:
         if not use_cache:
             return None
             
-        cache_key = CacheService._generate_cache_key("documentos_imovel", {"imovel_id": imovel_id})
+        cache_key = CacheService.chave_imovel("documentos_imovel", imovel_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -56,7 +143,7 @@ class CacheService:
         if cache_time is None:
             cache_time = CacheService.DEFAULT_CACHE_TIME
             
-        cache_key = CacheService._generate_cache_key("documentos_imovel", {"imovel_id": imovel_id})
+        cache_key = CacheService.chave_imovel("documentos_imovel", imovel_id)
         cache.set(cache_key, documentos, cache_time)
     
     @staticmethod
@@ -64,8 +151,7 @@ class CacheService:
         """
         Invalida o cache de documentos de um imóvel
         """
-        cache_key = CacheService._generate_cache_key("documentos_imovel", {"imovel_id": imovel_id})
-        cache.delete(cache_key)
+        CacheService.incrementar_geracao("imovel", imovel_id)
     
     @staticmethod
     def get_cached_lancamentos_documento(documento_id: int, use_cache: bool = True) -> Optional[List[Lancamento]]:
@@ -75,7 +161,7 @@ class CacheService:
         if not use_cache:
             return None
             
-        cache_key = CacheService._generate_cache_key("lancamentos_documento", {"documento_id": documento_id})
+        cache_key = CacheService._chave_documento("lancamentos_documento", documento_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -91,7 +177,7 @@ class CacheService:
         if cache_time is None:
             cache_time = CacheService.DEFAULT_CACHE_TIME
             
-        cache_key = CacheService._generate_cache_key("lancamentos_documento", {"documento_id": documento_id})
+        cache_key = CacheService._chave_documento("lancamentos_documento", documento_id)
         cache.set(cache_key, lancamentos, cache_time)
     
     @staticmethod
@@ -99,8 +185,7 @@ class CacheService:
         """
         Invalida o cache de lançamentos de um documento
         """
-        cache_key = CacheService._generate_cache_key("lancamentos_documento", {"documento_id": documento_id})
-        cache.delete(cache_key)
+        CacheService.incrementar_geracao("documento", documento_id)
     
     @staticmethod
     def get_cached_tronco_principal(imovel_id: int, use_cache: bool = True) -> Optional[List[Documento]]:
@@ -110,7 +195,7 @@ class CacheService:
         if not use_cache:
             return None
             
-        cache_key = CacheService._generate_cache_key("tronco_principal", {"imovel_id": imovel_id})
+        cache_key = CacheService.chave_imovel("tronco_principal", imovel_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -126,7 +211,7 @@ class CacheService:
         if cache_time is None:
             cache_time = CacheService.DEFAULT_CACHE_TIME
             
-        cache_key = CacheService._generate_cache_key("tronco_principal", {"imovel_id": imovel_id})
+        cache_key = CacheService.chave_imovel("tronco_principal", imovel_id)
         cache.set(cache_key, tronco, cache_time)
     
     @staticmethod
@@ -134,9 +219,114 @@ class CacheService:
         """
         Invalida o cache do tronco principal de um imóvel
         """
-        cache_key = CacheService._generate_cache_key("tronco_principal", {"imovel_id": imovel_id})
-        cache.delete(cache_key)
+        CacheService.incrementar_geracao("imovel", imovel_id)
     
+    @staticmethod
+    def chave_arvore_imovel(imovel_id: int) -> str:
+        return CacheService.chave_imovel("arvore_imovel", imovel_id)
+
+    # Quem lê e depois grava passa a mesma ``chave`` aos dois: a geração é
+    # lida uma vez, antes de montar o conteúdo. Relida depois, poderia já ter
+    # sido incrementada e o conteúdo antigo ficaria sob a geração nova.
+
+    @staticmethod
+    def get_cached_arvore_imovel(imovel_id: int, chave: Optional[str] = None) -> Optional[str]:
+        """
+        Obtém o JSON serializado da árvore da cadeia dominial de um imóvel
+        """
+        return cache.get(chave or CacheService.chave_arvore_imovel(imovel_id))
+    
+    @staticmethod
+    def set_cached_arvore_imovel(imovel_id: int, conteudo: str, cache_time: int = None,
+                                 chave: Optional[str] = None) -> None:
+        """
+        Armazena o JSON serializado da árvore de um imóvel no cache
+        """
+        if cache_time is None:
+            cache_time = CacheService.DEFAULT_CACHE_TIME
+        
+        cache.set(chave or CacheService.chave_arvore_imovel(imovel_id), conteudo, cache_time)
+    
+    @staticmethod
+    def chave_cadeia_tabela(imovel_id: int, escolhas_origem: Dict[str, str]) -> str:
+        escolhas = json.dumps(sorted((escolhas_origem or {}).items()))
+        return CacheService.chave_imovel("cadeia_tabela", imovel_id, {
+            "escolhas": hashlib.md5(escolhas.encode()).hexdigest(),
+        })
+
+    @staticmethod
+    def get_cached_cadeia_tabela(imovel_id: int, escolhas_origem: Dict[str, str],
+                                 chave: Optional[str] = None) -> Optional[str]:
+        """
+        Obtém o JSON compacto da cadeia em tabela para as escolhas de origem
+        """
+        return cache.get(chave or CacheService.chave_cadeia_tabela(imovel_id, escolhas_origem))
+
+    @staticmethod
+    def set_cached_cadeia_tabela(imovel_id: int, escolhas_origem: Dict[str, str], conteudo: str,
+                                 cache_time: int = None, chave: Optional[str] = None) -> None:
+        """
+        Armazena o JSON compacto da cadeia em tabela para as escolhas de origem
+        """
+        if cache_time is None:
+            cache_time = CacheService.DEFAULT_CACHE_TIME
+
+        cache.set(
+            chave or CacheService.chave_cadeia_tabela(imovel_id, escolhas_origem),
+            conteudo,
+            cache_time,
+        )
+
+    @staticmethod
+    def get_cached_comprimido(chave: str, codificacao: str) -> Optional[bytes]:
+        """
+        Obtém a variante comprimida (``br``/``gzip``) de um conteúdo cacheado
+        """
+        return cache.get(f"{chave}:{codificacao}")
+
+    @staticmethod
+    def set_cached_comprimido(chave: str, codificacao: str, conteudo: bytes, cache_time: int = None) -> None:
+        """
+        Armazena a variante comprimida de um conteúdo cacheado. A chave
+        base já carrega a geração, então a variante expira junto com ele.
+        """
+        if cache_time is None:
+            cache_time = CacheService.DEFAULT_CACHE_TIME
+
+        cache.set(f"{chave}:{codificacao}", conteudo, cache_time)
+
+    @staticmethod
+    def _chave_home_tis(busca: str) -> str:
+        return CacheService._generate_cache_key("home_tis", {
+            "busca": busca,
+            "geracao": CacheService.obter_geracao("home", 0),
+        })
+
+    @staticmethod
+    def get_cached_home_tis(busca: str = '') -> Optional[Dict[str, Any]]:
+        """
+        Obtém os dados das TIs da página inicial para uma busca
+        """
+        return cache.get(CacheService._chave_home_tis(busca))
+
+    @staticmethod
+    def set_cached_home_tis(busca: str, dados: Dict[str, Any], cache_time: int = None) -> None:
+        """
+        Armazena os dados das TIs da página inicial para uma busca
+        """
+        if cache_time is None:
+            cache_time = CacheService.HOME_CACHE_TIME
+
+        cache.set(CacheService._chave_home_tis(busca), dados, cache_time)
+
+    @staticmethod
+    def invalidar_home() -> None:
+        """
+        Invalida os dados da página inicial (TI, imóvel ou terra de
+        referência alterados)
+        """
+        CacheService.incrementar_geracao("home", 0)
+
     @staticmethod
     def clear_all_caches() -> None:
         """
@@ -150,9 +340,14 @@ class CacheService:
         """
         Retorna estatísticas do cache (se disponível)
         """
-        # Esta é uma implementação básica - pode ser expandida conforme necessário
+        backend = getattr(settings, 'CACHES', {}).get('default', {}).get('BACKEND')
         return {
-            "cache_enabled": hasattr(settings, 'CACHES'),
+            "cache_enabled": backend is not None,
             "default_timeout": CacheService.DEFAULT_CACHE_TIME,
-            "cache_backend": getattr(settings, 'CACHE_BACKEND', 'default')
+            "cache_backend": backend or 'default',
+            # LocMemCache é por processo: cada worker do gunicorn tem o seu.
+            "compartilhado_entre_workers": backend not in (
+                None, 'django.core.cache.backends.locmem.LocMemCache',
+                'django.core.cache.backends.dummy.DummyCache',
+            ),
         } 
\ No newline at end of file
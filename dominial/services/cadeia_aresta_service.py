@@ -0,0 +1,339 @@
+"""
+Manutenção e leitura das arestas materializadas da cadeia dominial.
+
+As arestas (``DocumentoOrigemAresta``) são derivadas das origens de cada
+lançamento e reconstruídas a cada escrita, de modo que árvore, tronco e cadeia
+completa leem o grafo com uma consulta indexada em vez de reinterpretar o
+texto de origem a cada requisição.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from ..models import Documento, DocumentoOrigemAresta, Lancamento, LancamentoOrigem
+from ..utils.documento_identidade_utils import DocumentoIdentidade
+from .documento_identidade_service import DocumentoIdentidadeService
+from .lancamento_origem_leitura_service import LancamentoOrigemLeituraService
+from .cadeia_fechamento_service import CadeiaFechamentoService
+from .tronco_principal_service import TroncoPrincipalService
+
+
+_estado = threading.local()
+
+# Limite de segurança da travessia recursiva; cadeias reais raramente passam
+# de algumas dezenas de documentos, e ciclos não podem expandir sem fim.
+PROFUNDIDADE_MAXIMA = 200
+
+
+class CadeiaArestaService:
+    """Sincroniza ``DocumentoOrigemAresta`` com as origens dos lançamentos."""
+
+    @staticmethod
+    @contextmanager
+    def sincronizacao_adiada():
+        """
+        Agrupa as sincronizações pedidas dentro do bloco e executa uma única
+        por lançamento ao final. Blocos aninhados são absorvidos pelo externo.
+        """
+        pendentes = getattr(_estado, 'pendentes', None)
+        if pendentes is not None:
+            yield
+            return
+
+        _estado.pendentes = {}
+        try:
+            yield
+            pendentes = _estado.pendentes
+        finally:
+            _estado.pendentes = None
+        CadeiaArestaService.sincronizar_lancamentos(pendentes.values())
+
+    @staticmethod
+    def agendar_lancamento(lancamento_id):
+        """Sincroniza o lançamento agora ou ao fim do bloco adiado em curso."""
+        pendentes = getattr(_estado, 'pendentes', None)
+        if pendentes is not None:
+            pendentes.setdefault(lancamento_id, lancamento_id)
+            return
+        CadeiaArestaService.sincronizar_lancamentos([lancamento_id])
+
+    @staticmethod
+    def sincronizar_lancamento(lancamento):
+        """Reconstrói as arestas de um lançamento."""
+        CadeiaArestaService.sincronizar_lancamentos([lancamento])
+
+    @staticmethod
+    def sincronizar_lancamentos(lancamentos):
+        """
+        Reconstrói as arestas dos lançamentos informados (instâncias ou IDs).
+
+        As origens documentais são resolvidas em lote; as que ainda não têm
+        documento ficam com ``documento_pai`` vazio e são religadas quando o
+        documento correspondente for gravado.
+        """
+        ids = {
+            lancamento.pk if isinstance(lancamento, Lancamento) else lancamento
+            for lancamento in lancamentos
+        }
+        ids.discard(None)
+        if not ids:
+            return 0
+
+        lancamentos = list(
+            Lancamento.objects.filter(pk__in=ids)
+            .select_related('documento__cartorio', 'cartorio_origem')
+            .prefetch_related('origens_fim_cadeia')
+        )
+
+        identidades = {}
+        origens_por_lancamento = {}
+        for lancamento in lancamentos:
+            origens = LancamentoOrigemLeituraService.obter_origens(lancamento)
+            origens_por_lancamento[lancamento.pk] = origens
+            for origem in origens:
+                identidade = CadeiaArestaService._identidade_da_origem(origem)
+                if identidade is not None:
+                    identidades[identidade] = None
+
+        resultados = DocumentoIdentidadeService.resolver_lote(identidades)
+
+        arestas = []
+        for lancamento in lancamentos:
+            for origem in origens_por_lancamento[lancamento.pk]:
+                identidade = CadeiaArestaService._identidade_da_origem(origem)
+                resultado = resultados.get(identidade) if identidade else None
+                arestas.append(DocumentoOrigemAresta(
+                    lancamento=lancamento,
+                    documento_filho_id=lancamento.documento_id,
+                    documento_pai=(
+                        resultado.documento
+                        if resultado and resultado.status == 'encontrado'
+                        else None
+                    ),
+                    indice_origem=origem.indice_origem,
+                    fonte=origem.fonte,
+                    tipo_documento=origem.tipo_documento,
+                    numero_normalizado=origem.numero_normalizado,
+                    cartorio_id=origem.cartorio_id,
+                ))
+            for origem_fc in lancamento.origens_fim_cadeia.all():
+                if not origem_fc.fim_cadeia or origem_fc.indice_origem < 0:
+                    continue
+                arestas.append(DocumentoOrigemAresta(
+                    lancamento=lancamento,
+                    documento_filho_id=lancamento.documento_id,
+                    indice_origem=origem_fc.indice_origem,
+                    fonte='estruturada',
+                    fim_cadeia=True,
+                ))
+
+        with transaction.atomic():
+            DocumentoOrigemAresta.objects.filter(lancamento_id__in=ids).delete()
+            DocumentoOrigemAresta.objects.bulk_create(arestas)
+            Lancamento.objects.filter(pk__in=ids).update(arestas_sincronizadas=True)
+            documento_ids = {lancamento.documento_id for lancamento in lancamentos}
+            CadeiaFechamentoService.atualizar_documentos(documento_ids)
+            TroncoPrincipalService.invalidar_origens(documento_ids)
+        return len(arestas)
+
+    @staticmethod
+    def religar_documento(documento):
+        """
+        Reaponta as arestas cuja identidade de origem corresponde ao documento
+        e desliga as que apontavam para ele com identidade antiga.
+        """
+        documento = Documento.objects.select_related('tipo').get(pk=documento.pk)
+        mesma_identidade = Q(
+            tipo_documento=documento.tipo.tipo,
+            numero_normalizado=documento.numero_normalizado,
+            cartorio_id=documento.cartorio_id,
+        )
+        desligar = DocumentoOrigemAresta.objects.filter(
+            documento_pai=documento
+        ).exclude(mesma_identidade)
+        ligar = DocumentoOrigemAresta.objects.filter(
+            mesma_identidade, fim_cadeia=False
+        ).exclude(documento_pai=documento)
+        with transaction.atomic():
+            filhos = set(
+                desligar.order_by().values_list('documento_filho_id', flat=True).union(
+                    ligar.order_by().values_list('documento_filho_id', flat=True)
+                )
+            )
+            if filhos:
+                desligar.update(documento_pai=None)
+                ligar.update(documento_pai=documento)
+                CadeiaFechamentoService.atualizar_documentos(filhos)
+                TroncoPrincipalService.invalidar_origens(filhos)
+
+        # Origens legadas sem cartório próprio herdam o do documento filho.
+        desatualizados = (
+            DocumentoOrigemAresta.objects.filter(
+                documento_filho=documento,
+                fonte='legada',
+                lancamento__cartorio_origem__isnull=True,
+            )
+            .exclude(cartorio_id=documento.cartorio_id)
+            .values_list('lancamento_id', flat=True)
+            .distinct()
+        )
+        for lancamento_id in list(desatualizados):
+            CadeiaArestaService.agendar_lancamento(lancamento_id)
+
+    @staticmethod
+    def arestas_por_documento(documento_ids):
+        """
+        Retorna ``{documento_id: [aresta, ...]}`` com as origens documentais
+        dos documentos informados, na ordem dos lançamentos e das origens.
+
+        Lançamentos gravados sem passar pelos signals (``bulk_create``) ainda
+        não foram sincronizados; são sincronizados aqui, uma única vez, na
+        primeira leitura. As leituras seguintes não gravam nada.
+        """
+        documento_ids = list(dict.fromkeys(documento_ids))
+        if not documento_ids:
+            return {}
+
+        CadeiaArestaService._sincronizar_pendentes(documento_ids)
+        arestas = CadeiaArestaService._consultar(
+            DocumentoOrigemAresta.objects.filter(documento_filho_id__in=documento_ids)
+        )
+        return CadeiaArestaService._agrupar(arestas, documento_ids)
+
+    @staticmethod
+    def consulta_recursiva_disponivel():
+        """A travessia em uma única consulta é usada somente no PostgreSQL."""
+        return connection.vendor == 'postgresql'
+
+    @staticmethod
+    def ancestrais(documento_id):
+        """
+        Retorna ``{documento_id: nivel}`` de todos os ancestrais do documento
+        (ele próprio no nível 0) com uma consulta ``WITH RECURSIVE``, ou
+        ``None`` quando o banco não é PostgreSQL.
+        """
+        if not CadeiaArestaService.consulta_recursiva_disponivel():
+            return None
+        sql, params = CadeiaArestaService._sql_ancestrais([documento_id])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{sql} SELECT documento_id, MIN(nivel) FROM cadeia GROUP BY documento_id',
+                params,
+            )
+            return dict(cursor.fetchall())
+
+    @staticmethod
+    def arestas_da_cadeia(documento_id):
+        """
+        Retorna ``{documento_id: [aresta, ...]}`` para o documento e todos os
+        seus ancestrais, lidos com uma única consulta recursiva, ou ``None``
+        quando o banco não é PostgreSQL (os chamadores seguem salto a salto).
+        """
+        return CadeiaArestaService.arestas_das_cadeias([documento_id])
+
+    @staticmethod
+    def arestas_das_cadeias(documento_ids):
+        """Versão de ``arestas_da_cadeia`` que parte de vários documentos."""
+        if not CadeiaArestaService.consulta_recursiva_disponivel():
+            return None
+        return CadeiaArestaService._arestas_da_cadeia_recursiva(documento_ids)
+
+    @staticmethod
+    def _arestas_da_cadeia_recursiva(documento_ids):
+        documento_ids = list(dict.fromkeys(documento_ids))
+        if not documento_ids:
+            return {}
+        while True:
+            sql, params = CadeiaArestaService._sql_ancestrais(documento_ids)
+            arestas = CadeiaArestaService._consultar(
+                DocumentoOrigemAresta.objects.filter(
+                    documento_filho_id__in=RawSQL(
+                        f'{sql} SELECT documento_id FROM cadeia', params
+                    )
+                )
+            )
+            alcancados = list(documento_ids)
+            for aresta in arestas:
+                alcancados.append(aresta.documento_filho_id)
+                if aresta.documento_pai_id:
+                    alcancados.append(aresta.documento_pai_id)
+            alcancados = list(dict.fromkeys(alcancados))
+
+            # Lançamentos ainda não sincronizados podem ampliar o conjunto de
+            # ancestrais; depois de sincronizá-los a travessia é refeita.
+            if not CadeiaArestaService._sincronizar_pendentes(alcancados):
+                return CadeiaArestaService._agrupar(arestas, alcancados)
+
+    @staticmethod
+    def _sql_ancestrais(documento_ids):
+        tabela = connection.ops.quote_name(DocumentoOrigemAresta._meta.db_table)
+        tabela_documento = connection.ops.quote_name(Documento._meta.db_table)
+        marcadores = ', '.join(['%s'] * len(documento_ids))
+        sql = (
+            'WITH RECURSIVE cadeia(documento_id, nivel) AS ('
+            f' SELECT documento.id, 0 FROM {tabela_documento} documento'
+            f' WHERE documento.id IN ({marcadores})'
+            ' UNION'
+            ' SELECT aresta.documento_pai_id, cadeia.nivel + 1'
+            f' FROM {tabela} aresta'
+            ' INNER JOIN cadeia ON aresta.documento_filho_id = cadeia.documento_id'
+            ' WHERE aresta.documento_pai_id IS NOT NULL'
+            ' AND aresta.fim_cadeia = %s'
+            ' AND cadeia.nivel < %s'
+            ')'
+        )
+        return sql, [*documento_ids, False, PROFUNDIDADE_MAXIMA]
+
+    @staticmethod
+    def _consultar(queryset):
+        return list(
+            queryset.filter(fim_cadeia=False)
+            .select_related('cartorio', 'documento_pai__tipo', 'documento_pai__cartorio')
+            .order_by('lancamento_id', 'indice_origem', 'id')
+        )
+
+    @staticmethod
+    def _agrupar(arestas, documento_ids):
+        agrupadas = defaultdict(list)
+        for aresta in arestas:
+            agrupadas[aresta.documento_filho_id].append(aresta)
+        return {documento_id: agrupadas[documento_id] for documento_id in documento_ids}
+
+    @staticmethod
+    def _sincronizar_pendentes(documento_ids):
+        """
+        Sincroniza os lançamentos dos documentos que nunca passaram por
+        ``sincronizar_lancamentos``. A marca ``arestas_sincronizadas`` (e não
+        a ausência de arestas) define o pendente: origens que não geram
+        arestas, como os fins de cadeia, não voltam a ser sincronizadas.
+        """
+        pendentes = list(
+            Lancamento.objects.filter(
+                documento_id__in=documento_ids, arestas_sincronizadas=False
+            )
+            .filter(
+                Exists(LancamentoOrigem.objects.filter(lancamento=OuterRef('pk')))
+                | (Q(origem__isnull=False) & ~Q(origem=''))
+            )
+            .values_list('pk', flat=True)
+        )
+        if not pendentes:
+            return 0
+        return CadeiaArestaService.sincronizar_lancamentos(pendentes)
+
+    @staticmethod
+    def _identidade_da_origem(origem):
+        if not origem.cartorio_id:
+            return None
+        try:
+            return DocumentoIdentidade(
+                origem.tipo_documento,
+                origem.codigo,
+                origem.cartorio_id,
+            )
+        except (TypeError, ValueError):
+            return None
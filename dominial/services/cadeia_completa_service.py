@@ -2,11 +2,12 @@
 Service para gerar a cadeia dominial completa
 """
 
-import re
 from django.shortcuts import get_object_or_404
 from ..models import TIs, Imovel, Documento, Lancamento
 from ..services.hierarquia_service import HierarquiaService
 from ..services.documento_identidade_service import DocumentoIdentidadeService
+from ..services.cadeia_aresta_service import CadeiaArestaService
+from ..services.cadeia_grafo_service import CadeiaGrafo
 from ..services.lancamento_origem_leitura_service import LancamentoOrigemLeituraService
 from ..utils.documento_identidade_utils import DocumentoIdentidade
 
@@ -19,34 +20,19 @@ class CadeiaCompletaService:
     def __init__(self):
         self.hierarquia_service = HierarquiaService()
         self.imovel_atual = None
+        self.grafo = None
     
-    @staticmethod
-    def _extrair_numero_simples(numero_lancamento):
-        """
-        Extrai o número simples do numero_lancamento para ordenação
-        Ex: "R4M235" -> 4, "AV12M235" -> 12, "AV4 M2725" -> 4, "M235" -> 0 (início de matrícula)
-        """
-        if not numero_lancamento:
-            return 0
-        
-        # Para início de matrícula, retornar 0 para ficar por último
-        if not numero_lancamento.startswith(('R', 'AV')):
-            return 0
-        
-        # Extrair número após R ou AV (com ou sem espaço)
-        match = re.search(r'^(R|AV)(\d+)', numero_lancamento)
-        if match:
-            return int(match.group(2))
-        
-        return 0
-    
-    def get_cadeia_completa(self, tis_id, imovel_id):
+    def get_cadeia_completa(self, tis_id, imovel_id, grafo=None):
         """
         Obtém a cadeia dominial completa organizada hierarquicamente
+
+        ``grafo``: CadeiaGrafo já carregado para o imóvel (opcional)
         """
         tis = get_object_or_404(TIs, id=tis_id)
         imovel = get_object_or_404(Imovel, id=imovel_id)
         self.imovel_atual = imovel
+        # Documentos, lançamentos e origens da cadeia carregados uma vez só
+        self.grafo = grafo if grafo is not None else CadeiaGrafo.carregar(imovel)
         
         # 1. Obter tronco principal completo
         tronco_principal = self._obter_tronco_principal_completo(imovel)
@@ -72,11 +58,18 @@ class CadeiaCompletaService:
         Usa a mesma lógica da página ver-cadeia-dominial para garantir a sequência correta
         """
         # 1. Obter o tronco principal na sequência correta (como na página ver-cadeia-dominial)
-        tronco_principal = self.hierarquia_service.obter_tronco_principal(imovel)
+        tronco_principal = [
+            self.grafo.obter(documento)
+            for documento in self.hierarquia_service.obter_tronco_principal(
+                imovel, grafo=self.grafo
+            )
+        ]
         
         # 2. Usar HierarquiaArvoreService para obter TODOS os documentos da cadeia
         from .hierarquia_arvore_service import HierarquiaArvoreService
-        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(imovel)
+        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+            imovel, grafo=self.grafo
+        )
         
         # 3. Extrair todos os documentos da árvore
         todos_documentos = []
@@ -88,7 +81,9 @@ class CadeiaCompletaService:
             # (issue #146).
             if doc_node.get('is_fim_cadeia'):
                 continue
-            documento = Documento.objects.get(id=doc_node['id'])
+            documento = self.grafo.documento(doc_node['id'])
+            if documento is None:
+                documento = Documento.objects.get(id=doc_node['id'])
             todos_documentos.append(documento)
         
         # 4. Organizar: tronco principal primeiro, depois todos os outros documentos
@@ -125,12 +120,8 @@ class CadeiaCompletaService:
         return []
     
     @staticmethod
-    def _resolver_documento_por_codigo(codigo, cartorio):
-        """
-        Resolve um documento pela identidade completa (tipo, número
-        normalizado e cartório), nunca por número isolado. Sem cartório, com
-        tipo incompatível ou com identidade ambígua, não seleciona documento.
-        """
+    def _identidade_do_codigo(codigo, cartorio):
+        """Monta a identidade completa de um código M/T no cartório informado."""
         if not cartorio or not codigo:
             return None
         primeiro = codigo.strip()[:1].upper()
@@ -141,9 +132,20 @@ class CadeiaCompletaService:
         else:
             return None
         try:
-            identidade = DocumentoIdentidade(tipo, codigo, cartorio.pk)
+            return DocumentoIdentidade(tipo, codigo, cartorio.pk)
         except (TypeError, ValueError):
             return None
+
+    @staticmethod
+    def _resolver_documento_por_codigo(codigo, cartorio):
+        """
+        Resolve um documento pela identidade completa (tipo, número
+        normalizado e cartório), nunca por número isolado. Sem cartório, com
+        tipo incompatível ou com identidade ambígua, não seleciona documento.
+        """
+        identidade = CadeiaCompletaService._identidade_do_codigo(codigo, cartorio)
+        if identidade is None:
+            return None
         resultado = DocumentoIdentidadeService.resolver(identidade)
         return resultado.documento if resultado.status == 'encontrado' else None
 
@@ -156,26 +158,22 @@ class CadeiaCompletaService:
 
         documentos_origem = []
 
-        # Buscar lançamentos com origens
-        lancamentos = documento.lancamentos.all()
+        # Origens de todos os lançamentos, já resolvidas nas arestas
+        arestas = CadeiaArestaService.arestas_por_documento([documento.id])
 
-        for lancamento in lancamentos:
-            for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                # Resolver documento de origem pela identidade completa
-                doc_origem = CadeiaCompletaService._resolver_documento_por_codigo(
-                    origem.codigo, origem.cartorio
-                )
+        for aresta in arestas[documento.id]:
+            doc_origem = aresta.documento_pai
 
-                if doc_origem and doc_origem.id not in documentos_processados:
-                    documentos_origem.append(doc_origem)
-                    documentos_processados.add(doc_origem.id)
+            if doc_origem and doc_origem.id not in documentos_processados:
+                documentos_origem.append(doc_origem)
+                documentos_processados.add(doc_origem.id)
 
-                    # Recursivamente expandir origens deste documento
-                    sub_origens = self._expandir_todas_origens_documento(doc_origem, documentos_processados)
-                    for sub_origem in sub_origens:
-                        if sub_origem.id not in documentos_processados:
-                            documentos_origem.append(sub_origem)
-                            documentos_processados.add(sub_origem.id)
+                # Recursivamente expandir origens deste documento
+                sub_origens = self._expandir_todas_origens_documento(doc_origem, documentos_processados)
+                for sub_origem in sub_origens:
+                    if sub_origem.id not in documentos_processados:
+                        documentos_origem.append(sub_origem)
+                        documentos_processados.add(sub_origem.id)
         
         return documentos_origem
     
@@ -213,28 +211,9 @@ class CadeiaCompletaService:
         documentos_processados = []
         
         for documento in documentos:
-            # Carregar lançamentos
-            lancamentos = documento.lancamentos.select_related('tipo').prefetch_related(
-                'pessoas__pessoa'
-            ).order_by('id')
-            
-            # Ordenar por número simples em Python
-            lancamentos_list = list(lancamentos)
-            lancamentos_list.sort(key=lambda x: (
-                -self._extrair_numero_simples(x.numero_lancamento),
-                x.id
-            ))
-            lancamentos = lancamentos_list
-            
-            # Verificar se é importado
-            is_importado = documento.imovel != self.imovel_atual
-            
-            documentos_processados.append({
-                'documento': documento,
-                'lancamentos': lancamentos,
-                'is_importado': is_importado,
-                'origens_disponiveis': self._obter_origens_documento(documento)
-            })
+            documentos_processados.append(
+                self._processar_documento_para_template(documento)
+            )
         
         return documentos_processados
     
@@ -242,21 +221,19 @@ class CadeiaCompletaService:
         """
         Processa um único documento para o formato do template
         """
-        # Carregar lançamentos
-        lancamentos = documento.lancamentos.select_related('tipo').prefetch_related(
-            'pessoas__pessoa'
-        ).order_by('id')
-        
-        # Ordenar por número simples em Python
-        lancamentos_list = list(lancamentos)
-        lancamentos_list.sort(key=lambda x: (
-            -CadeiaCompletaService._extrair_numero_simples(x.numero_lancamento),
-            x.id
-        ))
-        lancamentos = lancamentos_list
+        # Carregar lançamentos por número simples (do grafo, quando já carregado)
+        if self.grafo is not None:
+            documento = self.grafo.obter(documento)
+            lancamentos = self.grafo.lancamentos_por_numero_simples(documento)
+        else:
+            lancamentos = list(
+                documento.lancamentos.select_related('tipo')
+                .prefetch_related('pessoas__pessoa')
+                .order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
+            )
         
         # Verificar se é importado
-        is_importado = documento.imovel != self.imovel_atual if self.imovel_atual else False
+        is_importado = documento.imovel_id != self.imovel_atual.id if self.imovel_atual else False
         
         return {
             'documento': documento,
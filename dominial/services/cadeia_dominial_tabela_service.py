@@ -6,6 +6,7 @@ import re
 from django.shortcuts import get_object_or_404
 from ..models import TIs, Imovel, Documento, Lancamento, DocumentoImportado
 from ..services.hierarquia_service import HierarquiaService
+from ..services.cadeia_grafo_service import CadeiaGrafo
 from ..services.documento_identidade_service import DocumentoIdentidadeService
 from ..services.lancamento_origem_leitura_service import LancamentoOrigemLeituraService
 from ..services.keyword_alerta_service import buscar_keyword
@@ -19,27 +20,8 @@ class CadeiaDominialTabelaService:
     
     def __init__(self):
         self.hierarquia_service = HierarquiaService()
+        self.grafo = None
     
-    @staticmethod
-    def _extrair_numero_simples(numero_lancamento):
-        """
-        Extrai o número simples do numero_lancamento para ordenação
-        Ex: "R4M235" -> 4, "AV12M235" -> 12, "AV4 M2725" -> 4, "M235" -> 0 (início de matrícula)
-        """
-        if not numero_lancamento:
-            return 0
-        
-        # Para início de matrícula, retornar 0 para ficar por último
-        if not numero_lancamento.startswith(('R', 'AV')):
-            return 0
-        
-        # Extrair número após R ou AV (com ou sem espaço)
-        match = re.search(r'^(R|AV)(\d+)', numero_lancamento)
-        if match:
-            return int(match.group(2))
-
-        return 0
-
     @staticmethod
     def _tipo_do_codigo(codigo):
         """Deduz o tipo documental (matricula/transcricao) do prefixo M/T de um código."""
@@ -53,24 +35,97 @@ class CadeiaDominialTabelaService:
         return None
 
     @staticmethod
-    def _resolver_documento_por_codigo(codigo, cartorio):
-        """
-        Resolve um documento de origem pela identidade completa (tipo, número
-        normalizado e cartório), nunca por número isolado. Sem cartório, com
-        tipo incompatível ou com identidade ambígua, não seleciona nenhum documento.
-        """
+    def _identidade_do_codigo(codigo, cartorio):
+        """Monta a identidade completa de um código M/T no cartório informado."""
         if not cartorio:
             return None
         tipo = CadeiaDominialTabelaService._tipo_do_codigo(codigo)
         if not tipo:
             return None
         try:
-            identidade = DocumentoIdentidade(tipo, codigo, cartorio.pk)
+            return DocumentoIdentidade(tipo, codigo, cartorio.pk)
         except (TypeError, ValueError):
             return None
+
+    @staticmethod
+    def _resolver_documento_por_codigo(codigo, cartorio):
+        """
+        Resolve um documento de origem pela identidade completa (tipo, número
+        normalizado e cartório), nunca por número isolado. Sem cartório, com
+        tipo incompatível ou com identidade ambígua, não seleciona nenhum documento.
+        """
+        identidade = CadeiaDominialTabelaService._identidade_do_codigo(codigo, cartorio)
+        if identidade is None:
+            return None
         resultado = DocumentoIdentidadeService.resolver(identidade)
         return resultado.documento if resultado.status == 'encontrado' else None
 
+    @staticmethod
+    def _resolver_documentos_por_codigo(pares):
+        """
+        Versão em lote de ``_resolver_documento_por_codigo``.
+
+        Recebe pares ``(codigo, cartorio)``, resolve todos com uma única
+        consulta e retorna ``{(codigo, cartorio_id): documento}`` apenas para
+        as identidades encontradas sem ambiguidade.
+        """
+        identidades = {}
+        for codigo, cartorio in pares:
+            identidade = CadeiaDominialTabelaService._identidade_do_codigo(codigo, cartorio)
+            if identidade is not None:
+                identidades[(codigo, cartorio.pk)] = identidade
+
+        resultados = DocumentoIdentidadeService.resolver_lote(identidades.values())
+        return {
+            chave: resultados[identidade].documento
+            for chave, identidade in identidades.items()
+            if resultados[identidade].status == 'encontrado'
+        }
+
+    def _lancamentos_documento(self, documento):
+        """Lançamentos do documento, do grafo da cadeia quando já carregado."""
+        if self.grafo is not None:
+            return self.grafo.lancamentos(documento)
+        return documento.lancamentos.select_related('tipo').prefetch_related(
+            'pessoas__pessoa'
+        ).order_by('id')
+
+    def _lancamentos_por_numero_simples(self, documento):
+        """Lançamentos do documento na ordem de exibição (número simples)."""
+        if self.grafo is not None:
+            return self.grafo.lancamentos_por_numero_simples(documento)
+        return list(
+            documento.lancamentos.select_related('tipo')
+            .prefetch_related('pessoas__pessoa')
+            .order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
+        )
+
+    def _origens_documento(self, documento):
+        """Lista as origens de todos os lançamentos de um documento, em ordem."""
+        lancamentos = (
+            self.grafo.lancamentos(documento)
+            if self.grafo is not None
+            else documento.lancamentos.all()
+        )
+        return [
+            origem
+            for lancamento in lancamentos
+            for origem in LancamentoOrigemLeituraService.obter_origens(lancamento)
+        ]
+
+    def _documentos_origem(self, documento, origens):
+        """
+        Resolve as origens de ``documento`` em ``{(codigo, cartorio_id): documento}``.
+
+        Com o grafo carregado, usa as arestas já resolvidas pela mesma
+        identidade completa; caso contrário, resolve em lote.
+        """
+        if self.grafo is not None and documento.id in self.grafo.arestas:
+            return self.grafo.documentos_origem(documento)
+        return self._resolver_documentos_por_codigo(
+            (origem.codigo, origem.cartorio) for origem in origens
+        )
+
     def get_cadeia_dominial_tabela(self, tis_id, imovel_id, session=None, escolhas_origem_param=None):
         """
         Obtém dados da cadeia dominial em formato de tabela
@@ -90,8 +145,16 @@ class CadeiaDominialTabelaService:
         if escolhas_origem_param:
             escolhas_origem = escolhas_origem_param
         
+        # Documentos, lançamentos e origens da cadeia carregados uma vez só
+        self.grafo = CadeiaGrafo.carregar(imovel)
+
         # Obter tronco principal considerando escolhas
-        tronco_principal = self.hierarquia_service.obter_tronco_principal(imovel, escolhas_origem)
+        tronco_principal = [
+            self.grafo.obter(documento)
+            for documento in self.hierarquia_service.obter_tronco_principal(
+                imovel, escolhas_origem, grafo=self.grafo
+            )
+        ]
         
         # Expandir tronco principal com documentos importados referenciados
         tronco_expandido = self._expandir_tronco_com_importados(imovel, tronco_principal, escolhas_origem)
@@ -104,19 +167,9 @@ class CadeiaDominialTabelaService:
         documentos_ordenados = tronco_expandido
         for documento in documentos_ordenados:
             # Carregar lançamentos e ordenar por número simples (decrescente)
-            lancamentos = documento.lancamentos.select_related('tipo').prefetch_related(
-                'pessoas__pessoa'
-            ).order_by('id')
-            
-            # Ordenar por número simples em Python
-            lancamentos_list = list(lancamentos)
-            lancamentos_list.sort(key=lambda x: (
-                -self._extrair_numero_simples(x.numero_lancamento),
-                x.id
-            ))
-            for lanc in lancamentos_list:
+            lancamentos = self._lancamentos_por_numero_simples(documento)
+            for lanc in lancamentos:
                 lanc.keyword_encontrada = buscar_keyword(lanc.observacoes)
-            lancamentos = lancamentos_list
             
             # Verificar se tem múltiplas origens
             origens_disponiveis = self._obter_origens_documento(documento, lancamentos)
@@ -250,7 +303,13 @@ class CadeiaDominialTabelaService:
         
         # Usar o HierarquiaService para obter apenas o TRONCO PRINCIPAL
         from .hierarquia_service import HierarquiaService
-        todos_documentos = HierarquiaService.obter_tronco_principal(imovel, escolhas_origem)
+        self.grafo = CadeiaGrafo.carregar(imovel)
+        todos_documentos = [
+            self.grafo.obter(documento)
+            for documento in HierarquiaService.obter_tronco_principal(
+                imovel, escolhas_origem, grafo=self.grafo
+            )
+        ]
         
         # Ordenar documentos por data para manter a ordem cronológica
         todos_documentos.sort(key=lambda x: x.data)
@@ -258,19 +317,9 @@ class CadeiaDominialTabelaService:
         cadeia_completa = []
         for documento in todos_documentos:
             # Carregar lançamentos com pessoas
-            lancamentos = documento.lancamentos.select_related('tipo').prefetch_related(
-                'pessoas__pessoa'
-            ).order_by('id')
-            
-            # Ordenar por número simples em Python
-            lancamentos_list = list(lancamentos)
-            lancamentos_list.sort(key=lambda x: (
-                -CadeiaDominialTabelaService._extrair_numero_simples(x.numero_lancamento),
-                x.id
-            ))
-            for lanc in lancamentos_list:
+            lancamentos = self._lancamentos_por_numero_simples(documento)
+            for lanc in lancamentos:
                 lanc.keyword_encontrada = buscar_keyword(lanc.observacoes)
-            lancamentos = lancamentos_list
             
             # Verificar se tem múltiplas origens
             tem_multiplas_origens = False
@@ -321,10 +370,12 @@ class CadeiaDominialTabelaService:
     @staticmethod
     def _origens_disponiveis_lancamento(lancamento):
         origens = []
-        for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-            documento = CadeiaDominialTabelaService._resolver_documento_por_codigo(
-                origem.codigo, origem.cartorio
-            )
+        origens_lancamento = LancamentoOrigemLeituraService.obter_origens(lancamento)
+        documentos = CadeiaDominialTabelaService._resolver_documentos_por_codigo(
+            (origem.codigo, origem.cartorio) for origem in origens_lancamento
+        )
+        for origem in origens_lancamento:
+            documento = documentos.get((origem.codigo, origem.cartorio_id))
             if documento:
                 origens.append({
                     'numero': origem.codigo,
@@ -360,20 +411,25 @@ class CadeiaDominialTabelaService:
         # Dividir por ponto e vírgula se houver múltiplas origens
         origens_split = [o.strip() for o in origem_texto.split(';') if o.strip()]
 
-        for origem in origens_split:
-            # Extrair códigos de matrícula/transcrição
-            codigos = re.findall(r'[MT]\d+', origem)
+        # Extrair códigos de matrícula/transcrição
+        codigos = [
+            codigo
+            for origem in origens_split
+            for codigo in re.findall(r'[MT]\d+', origem)
+        ]
+        documentos = CadeiaDominialTabelaService._resolver_documentos_por_codigo(
+            (codigo, cartorio_origem) for codigo in codigos
+        )
+        cartorio_origem_id = cartorio_origem.pk if cartorio_origem else None
 
-            for codigo in codigos:
-                doc_existente = CadeiaDominialTabelaService._resolver_documento_por_codigo(
-                    codigo, cartorio_origem
-                )
-                if doc_existente:
-                    origens.append({
-                        'numero': codigo,
-                        'documento': doc_existente,
-                        'escolhida': False  # Será definida pelo contexto
-                    })
+        for codigo in codigos:
+            doc_existente = documentos.get((codigo, cartorio_origem_id))
+            if doc_existente:
+                origens.append({
+                    'numero': codigo,
+                    'documento': doc_existente,
+                    'escolhida': False  # Será definida pelo contexto
+                })
 
         # Ordenar do maior para o menor número
         if origens:
@@ -398,22 +454,21 @@ class CadeiaDominialTabelaService:
                 documentos_processados.add(documento.id)
 
             # Verificar se este documento tem lançamentos com origens importadas
-            lancamentos = documento.lancamentos.all()
+            origens = self._origens_documento(documento)
+
+            # Resolver os documentos importados pela identidade completa
+            # (tipo, número normalizado e cartório do lançamento), em lote
+            documentos_origem = self._documentos_origem(documento, origens)
 
             # Lista temporária para documentos importados deste documento
             docs_importados_temp = []
 
-            for lancamento in lancamentos:
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    # Resolver o documento importado pela identidade completa
-                    # (tipo, número normalizado e cartório do lançamento)
-                    doc_importado = self._resolver_documento_por_codigo(
-                        origem.codigo, origem.cartorio
-                    )
+            for origem in origens:
+                doc_importado = documentos_origem.get((origem.codigo, origem.cartorio_id))
 
-                    if doc_importado and doc_importado.id not in documentos_processados:
-                        docs_importados_temp.append(doc_importado)
-                        documentos_processados.add(doc_importado.id)
+                if doc_importado and doc_importado.id not in documentos_processados:
+                    docs_importados_temp.append(doc_importado)
+                    documentos_processados.add(doc_importado.id)
 
             # Adicionar documentos importados após o documento atual
             tronco_expandido.extend(docs_importados_temp)
@@ -457,37 +512,35 @@ class CadeiaDominialTabelaService:
         Resolve a origem escolhida explicitamente (sessão do usuário), usando o
         cartório do lançamento de `documento` que efetivamente referencia esse código.
         """
-        lancamentos = documento.lancamentos.all()
-
-        for lancamento in lancamentos:
-            for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                if codigo_escolhido != origem.codigo:
-                    continue
-                doc_origem = self._resolver_documento_por_codigo(
-                    origem.codigo, origem.cartorio
-                )
-                if doc_origem:
-                    return doc_origem
+        origens = [
+            origem
+            for origem in self._origens_documento(documento)
+            if origem.codigo == codigo_escolhido
+        ]
+        documentos_origem = self._documentos_origem(documento, origens)
+        for origem in origens:
+            doc_origem = documentos_origem.get((origem.codigo, origem.cartorio_id))
+            if doc_origem:
+                return doc_origem
         return None
 
     def _obter_documento_origem_mais_alto(self, documento):
         """
         Obtém o documento de origem de nível mais alto (maior número) de um documento
         """
-        # Buscar lançamentos com origens
-        lancamentos = documento.lancamentos.all()
+        # Buscar origens de todos os lançamentos
+        origens = self._origens_documento(documento)
+
+        # Resolver documentos de origem pela identidade completa, em lote
+        documentos_origem = self._documentos_origem(documento, origens)
 
         origens_encontradas = []
 
-        for lancamento in lancamentos:
-            for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                # Resolver documento de origem pela identidade completa
-                doc_origem = self._resolver_documento_por_codigo(
-                    origem.codigo, origem.cartorio
-                )
+        for origem in origens:
+            doc_origem = documentos_origem.get((origem.codigo, origem.cartorio_id))
 
-                if doc_origem:
-                    origens_encontradas.append(doc_origem)
+            if doc_origem:
+                origens_encontradas.append(doc_origem)
 
         # Retornar o documento com maior número (nível mais alto)
         if origens_encontradas:
@@ -513,7 +566,7 @@ class CadeiaDominialTabelaService:
         cadeia_expandida = []
 
         # Buscar lançamentos com origens
-        lancamentos = documento.lancamentos.all()
+        lancamentos = self._lancamentos_documento(documento)
 
         # Coletar todas as origens possíveis, associadas ao lançamento que as
         # informou (cada uma tem seu próprio cartório de origem)
@@ -576,7 +629,12 @@ class CadeiaDominialTabelaService:
         if origem_escolhida:
             contexto_origem = origem_para_contexto.get(origem_escolhida)
             cartorio_origem = contexto_origem.cartorio if contexto_origem else None
-            doc_origem = self._resolver_documento_por_codigo(origem_escolhida, cartorio_origem)
+            if self.grafo is not None and documento.id in self.grafo.arestas:
+                doc_origem = self.grafo.documentos_origem(documento).get(
+                    (origem_escolhida, cartorio_origem.pk if cartorio_origem else None)
+                )
+            else:
+                doc_origem = self._resolver_documento_por_codigo(origem_escolhida, cartorio_origem)
             if doc_origem and doc_origem.id not in documentos_processados:
                 cadeia_expandida.append(doc_origem)
                 documentos_processados.add(doc_origem.id)
@@ -592,20 +650,22 @@ class CadeiaDominialTabelaService:
         documentos_incluidos = set(doc.id for doc in documentos_atuais)
         documentos_para_adicionar = []
         
-        # Para cada documento atual, verificar suas origens
-        for documento in documentos_atuais:
-            lancamentos = documento.lancamentos.all()
-            
-            for lancamento in lancamentos:
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    # Resolver documento de origem pela identidade completa
-                    doc_origem = self._resolver_documento_por_codigo(
-                        origem.codigo, origem.cartorio
-                    )
+        # Coletar as origens de todos os documentos atuais
+        origens = [
+            origem
+            for documento in documentos_atuais
+            for origem in self._origens_documento(documento)
+        ]
+
+        # Resolver documentos de origem pela identidade completa, em lote
+        documentos_origem = self._documentos_origem(documento, origens)
+
+        for origem in origens:
+            doc_origem = documentos_origem.get((origem.codigo, origem.cartorio_id))
 
-                    if doc_origem and doc_origem.id not in documentos_incluidos:
-                        documentos_para_adicionar.append(doc_origem)
-                        documentos_incluidos.add(doc_origem.id)
+            if doc_origem and doc_origem.id not in documentos_incluidos:
+                documentos_para_adicionar.append(doc_origem)
+                documentos_incluidos.add(doc_origem.id)
         
         # Adicionar documentos encontrados
         if documentos_para_adicionar:
@@ -0,0 +1,196 @@
+"""
+Geração da planilha Excel da cadeia dominial em modo write-only.
+
+As linhas são produzidas sob demanda a partir da cadeia e gravadas direto no
+arquivo, com estilos nomeados compartilhados; a memória não cresce com o
+número de documentos e lançamentos.
+"""
+from datetime import date
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from ..utils import normalizar_texto_opcional
+
+
+TOTAL_COLUNAS = 16
+LARGURAS_COLUNAS = [12, 8, 8, 20, 12, 20, 20, 15, 15, 20, 8, 8, 12, 12, 20, 30]
+
+CABECALHOS_DETALHADOS = [
+    'Nº', 'L', 'Fls.', 'Cartório', 'Data',  # Matrícula
+    'Transmitente', 'Adquirente',  # Pessoas
+    'Forma', 'Título', 'Cartório', 'L', 'Fls.', 'Data',  # Transmissão
+    'Área (ha)', 'Origem', 'Observações',
+]
+
+
+def _estilos():
+    borda_fina = Side(style='thin')
+    borda = Border(left=borda_fina, right=borda_fina, top=borda_fina, bottom=borda_fina)
+    centro = Alignment(horizontal='center', vertical='center')
+    cabecalho_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    return [
+        NamedStyle(name='cadeia_titulo', font=Font(bold=True, size=16), alignment=centro),
+        NamedStyle(
+            name='cadeia_documento',
+            font=Font(bold=True, size=12),
+            fill=PatternFill(start_color='e3f2fd', end_color='e3f2fd', fill_type='solid'),
+            alignment=centro,
+        ),
+        NamedStyle(
+            name='cadeia_grupo',
+            font=Font(bold=True, color='FFFFFF'),
+            fill=cabecalho_fill,
+            alignment=centro,
+        ),
+        NamedStyle(
+            name='cadeia_cabecalho',
+            font=Font(bold=True, color='FFFFFF'),
+            fill=cabecalho_fill,
+            border=borda,
+            alignment=centro,
+        ),
+        NamedStyle(name='cadeia_celula', border=borda),
+        NamedStyle(
+            name='cadeia_estatisticas',
+            font=Font(bold=True, size=14, color='FFFFFF'),
+            fill=PatternFill(start_color='28a745', end_color='28a745', fill_type='solid'),
+            alignment=centro,
+        ),
+        NamedStyle(name='cadeia_rotulo', font=Font(bold=True)),
+    ]
+
+
+class CadeiaExcelService:
+    """Planilha da cadeia dominial geral (mesma estrutura do PDF completo)."""
+
+    @staticmethod
+    def gerar(tis, imovel, context, destino):
+        """Grava em ``destino`` (arquivo ou caminho) a planilha da cadeia."""
+        wb = Workbook(write_only=True)
+        for estilo in _estilos():
+            wb.add_named_style(estilo)
+        ws = wb.create_sheet("Cadeia Dominial Geral")
+        for indice, largura in enumerate(LARGURAS_COLUNAS, 1):
+            ws.column_dimensions[get_column_letter(indice)].width = largura
+
+        for numero_linha, (valores, mesclar) in enumerate(
+            CadeiaExcelService._linhas(tis, imovel, context), 1
+        ):
+            ws.append([
+                CadeiaExcelService._celula(ws, valor) for valor in valores
+            ])
+            for inicio, fim in mesclar:
+                ws.merged_cells.add(
+                    f'{get_column_letter(inicio)}{numero_linha}:'
+                    f'{get_column_letter(fim)}{numero_linha}'
+                )
+        wb.save(destino)
+
+    @staticmethod
+    def _celula(ws, valor):
+        """``valor`` ou ``(valor, estilo)``."""
+        if isinstance(valor, tuple):
+            valor, estilo = valor
+            celula = WriteOnlyCell(ws, value=valor)
+            celula.style = estilo
+            return celula
+        return valor
+
+    @staticmethod
+    def _linhas(tis, imovel, context):
+        """
+        Gera ``(valores, mesclagens)`` para cada linha da planilha, na ordem;
+        mesclagens são pares ``(coluna_inicial, coluna_final)``.
+        """
+        yield [(f"CADEIA DOMINIAL GERAL - {imovel.nome}", 'cadeia_titulo')], [(1, TOTAL_COLUNAS)]
+        yield [], []
+
+        # Informações do imóvel
+        yield ["TIS:", tis.nome], []
+        yield ["Matrícula:", imovel.matricula], []
+        yield ["Nome:", imovel.nome], []
+        yield ["Proprietário:", imovel.proprietario.nome if imovel.proprietario else ""], []
+        yield ["Cartório:", imovel.cartorio.nome if imovel.cartorio else ""], []
+        yield ["Data de Exportação:", date.today().strftime('%d/%m/%Y')], []
+        yield [], []
+        yield [], []
+
+        for tronco in context['cadeia_completa']:
+            for item in tronco['documentos']:
+                yield from CadeiaExcelService._linhas_documento(item)
+
+        if 'estatisticas' in context:
+            estatisticas = context['estatisticas']
+            yield [], []
+            yield [("📊 ESTATÍSTICAS", 'cadeia_estatisticas')], [(1, TOTAL_COLUNAS)]
+            for chave, rotulo in (
+                ('total_documentos', "Total de Documentos:"),
+                ('total_lancamentos', "Total de Lançamentos:"),
+                ('documentos_compartilhados', "Documentos Compartilhados:"),
+            ):
+                if chave in estatisticas:
+                    yield [(rotulo, 'cadeia_rotulo'), (estatisticas[chave], 'cadeia_celula')], []
+
+    @staticmethod
+    def _linhas_documento(item):
+        from ..templatetags.dominial_extras import numero_documento_criado
+
+        documento = item['documento']
+        prefixo_importado = "📥 " if item.get('is_importado', False) else ""
+        yield [(
+            f"{prefixo_importado}{documento.tipo.get_tipo_display()}: {documento.numero}",
+            'cadeia_documento',
+        )], [(1, TOTAL_COLUNAS)]
+
+        # Cabeçalho da tabela de lançamentos (igual ao template): primeira
+        # linha com os agrupamentos, segunda com as colunas.
+        grupos = [("MATRÍCULA", 'cadeia_grupo')] + [None] * 4
+        grupos += [("", 'cadeia_grupo'), None]
+        grupos += [("TRANSMISSÃO", 'cadeia_grupo')] + [None] * 5
+        grupos += [
+            ("Área (ha)", 'cadeia_grupo'),
+            ("Origem", 'cadeia_grupo'),
+            ("Observações", 'cadeia_grupo'),
+        ]
+        yield grupos, [(1, 5), (6, 7), (8, 13)]
+        yield [(cabecalho, 'cadeia_cabecalho') for cabecalho in CABECALHOS_DETALHADOS], []
+
+        for lancamento in item['lancamentos']:
+            transmitentes = [p.pessoa.nome for p in lancamento.transmitentes]
+            adquirentes = [p.pessoa.nome for p in lancamento.adquirentes]
+            valores = [
+                numero_documento_criado(lancamento),
+                # L, Fls., Cartório (do documento)
+                documento.livro or "-",
+                "-" if documento.tipo and documento.tipo.tipo == 'matricula' else (documento.folha or "-"),
+                documento.cartorio.nome if documento.cartorio else "-",
+                lancamento.data.strftime('%d/%m/%Y') if lancamento.data else "-",
+                ", ".join(transmitentes) if transmitentes else "-",
+                ", ".join(adquirentes) if adquirentes else "-",
+            ]
+            mesclar = []
+            if lancamento.tipo.tipo == 'averbacao':
+                # Para averbação, mesclar colunas e mostrar descrição
+                valores += [lancamento.descricao or "-"] + [None] * 5
+                mesclar.append((8, 13))
+            else:
+                valores += [
+                    lancamento.forma or "-",
+                    normalizar_texto_opcional(lancamento.titulo, "-"),
+                    lancamento.cartorio_transmissao_compat.nome if lancamento.cartorio_transmissao_compat else "-",
+                    lancamento.livro_transacao or "-",
+                    lancamento.folha_transacao or "-",
+                    lancamento.data_transacao.strftime('%d/%m/%Y') if lancamento.data_transacao else "-",
+                ]
+            valores += [
+                lancamento.area if lancamento.area is not None else "-",
+                lancamento.origem or "-",
+                lancamento.observacoes or "-",
+            ]
+            yield [(valor, 'cadeia_celula') for valor in valores], mesclar
+
+        # Linha em branco entre documentos
+        yield [], []
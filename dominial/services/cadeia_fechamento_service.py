@@ -0,0 +1,218 @@
+"""
+Manutenção e leitura do fechamento transitivo da cadeia dominial.
+
+``DocumentoAncestral`` guarda, para cada documento, todos os documentos
+alcançados pelas suas origens. Quando as arestas de um documento mudam, só
+ele e seus descendentes têm o fechamento recalculado; os ancestrais fora
+desse conjunto continuam válidos e são reaproveitados.
+"""
+from collections import defaultdict, deque
+
+from django.db import transaction
+from django.db.models import Q
+
+from ..models import Documento, DocumentoAncestral, DocumentoOrigemAresta, Imovel
+
+
+class CadeiaFechamentoService:
+    """Mantém ``DocumentoAncestral`` a partir de ``DocumentoOrigemAresta``."""
+
+    @staticmethod
+    def atualizar_documentos(documento_ids):
+        """
+        Recalcula o fechamento dos documentos cujas arestas mudaram e de todos
+        os seus descendentes, com um número fixo de consultas.
+        """
+        documento_ids = set(documento_ids)
+        documento_ids.discard(None)
+        if not documento_ids:
+            return 0
+
+        afetados = documento_ids | set(
+            DocumentoAncestral.objects.filter(ancestral_id__in=documento_ids)
+            .values_list('descendente_id', flat=True)
+        )
+        pais = CadeiaFechamentoService._pais(afetados)
+        fronteira = {
+            pai
+            for filho in afetados
+            for pai in pais.get(filho, ())
+            if pai not in afetados
+        }
+        ancestrais_fronteira = CadeiaFechamentoService.ancestrais_em_lote(fronteira)
+
+        linhas = []
+        for documento_id in afetados:
+            for ancestral_id, profundidade in CadeiaFechamentoService._calcular(
+                documento_id, pais, afetados, ancestrais_fronteira
+            ).items():
+                linhas.append(DocumentoAncestral(
+                    descendente_id=documento_id,
+                    ancestral_id=ancestral_id,
+                    profundidade=profundidade,
+                ))
+
+        with transaction.atomic():
+            DocumentoAncestral.objects.filter(descendente_id__in=afetados).delete()
+            DocumentoAncestral.objects.bulk_create(linhas, batch_size=1000)
+        return len(linhas)
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula o fechamento de todos os documentos com arestas."""
+        documento_ids = set(
+            DocumentoOrigemAresta.objects.filter(
+                fim_cadeia=False, documento_pai__isnull=False
+            ).values_list('documento_filho_id', flat=True)
+        )
+        with transaction.atomic():
+            DocumentoAncestral.objects.exclude(descendente_id__in=documento_ids).delete()
+            return CadeiaFechamentoService.atualizar_documentos(documento_ids)
+
+    @staticmethod
+    def ancestrais(documento_id):
+        """``{ancestral_id: profundidade}`` de um documento."""
+        return CadeiaFechamentoService.ancestrais_em_lote([documento_id]).get(
+            documento_id, {}
+        )
+
+    @staticmethod
+    def ancestrais_em_lote(documento_ids):
+        """``{documento_id: {ancestral_id: profundidade}}`` em uma consulta."""
+        ancestrais = defaultdict(dict)
+        if documento_ids:
+            for descendente_id, ancestral_id, profundidade in (
+                DocumentoAncestral.objects.filter(descendente_id__in=documento_ids)
+                .values_list('descendente_id', 'ancestral_id', 'profundidade')
+            ):
+                ancestrais[descendente_id][ancestral_id] = profundidade
+        return ancestrais
+
+    @staticmethod
+    def documentos_importados(imovel):
+        """
+        Documentos de outros imóveis alcançados pela cadeia do imóvel, do
+        mais próximo ao mais distante.
+        """
+        from .cadeia_aresta_service import CadeiaArestaService
+
+        documento_ids = list(
+            Documento.objects.filter(imovel=imovel).values_list('id', flat=True)
+        )
+        while True:
+            linhas = list(
+                DocumentoAncestral.objects.filter(descendente_id__in=documento_ids)
+                .values_list('ancestral_id', 'ancestral__imovel_id', 'profundidade')
+            )
+            # Lançamentos nunca sincronizados (gravados sem signals) ainda
+            # não têm arestas nem fechamento; sincronizados, a leitura é refeita.
+            alcancados = set(documento_ids) | {linha[0] for linha in linhas}
+            if not CadeiaArestaService._sincronizar_pendentes(alcancados):
+                break
+
+        profundidades = {}
+        for ancestral_id, imovel_id, profundidade in linhas:
+            if imovel_id == imovel.id:
+                continue
+            profundidades[ancestral_id] = min(
+                profundidade, profundidades.get(ancestral_id, profundidade)
+            )
+        documentos = Documento.objects.filter(id__in=profundidades).select_related(
+            'tipo', 'cartorio', 'imovel'
+        )
+        return sorted(
+            documentos,
+            key=lambda documento: (profundidades[documento.id], documento.id),
+        )
+
+    @staticmethod
+    def imoveis_por_documento(documentos):
+        """
+        ``{documento_id: [imóvel, ...]}``: imóveis cujas cadeias incluem cada
+        documento, inclusive o imóvel ao qual o documento pertence.
+        """
+        imovel_ids = defaultdict(set)
+        for documento in documentos:
+            if documento.imovel_id:
+                imovel_ids[documento.id].add(documento.imovel_id)
+        for ancestral_id, imovel_id in (
+            DocumentoAncestral.objects.filter(
+                ancestral_id__in=[documento.id for documento in documentos]
+            )
+            .values_list('ancestral_id', 'descendente__imovel_id')
+            .distinct()
+        ):
+            imovel_ids[ancestral_id].add(imovel_id)
+
+        imoveis = Imovel.objects.in_bulk(
+            {imovel_id for ids in imovel_ids.values() for imovel_id in ids}
+        )
+        return {
+            documento_id: sorted(
+                (imoveis[imovel_id] for imovel_id in ids if imovel_id in imoveis),
+                key=lambda imovel: imovel.id,
+            )
+            for documento_id, ids in imovel_ids.items()
+        }
+
+    @staticmethod
+    def imoveis_das_cadeias(documento_ids):
+        """
+        Ids dos imóveis cujas cadeias incluem algum dos documentos: os
+        imóveis dos próprios documentos e os dos seus descendentes.
+        """
+        documento_ids = set(documento_ids)
+        documento_ids.discard(None)
+        if not documento_ids:
+            return set()
+        return set(
+            Documento.objects.filter(
+                Q(id__in=documento_ids)
+                | Q(ancestrais_fechamento__ancestral_id__in=documento_ids)
+            )
+            .exclude(imovel_id__isnull=True)
+            .values_list('imovel_id', flat=True)
+            .distinct()
+        )
+
+    @staticmethod
+    def _pais(documento_ids):
+        pais = defaultdict(set)
+        for filho_id, pai_id in DocumentoOrigemAresta.objects.filter(
+            documento_filho_id__in=documento_ids,
+            fim_cadeia=False,
+            documento_pai__isnull=False,
+        ).values_list('documento_filho_id', 'documento_pai_id'):
+            pais[filho_id].add(pai_id)
+        return pais
+
+    @staticmethod
+    def _calcular(documento_id, pais, afetados, ancestrais_fronteira):
+        """
+        Menor profundidade de cada ancestral. Dentro do conjunto afetado a
+        busca segue as arestas; ao sair dele, usa o fechamento já gravado do
+        documento de fronteira (que não depende das arestas alteradas).
+        """
+        distancias = {}
+        fila = deque([(documento_id, 0)])
+        visitados = {documento_id}
+        while fila:
+            atual, nivel = fila.popleft()
+            for pai in pais.get(atual, ()):
+                if pai in visitados:
+                    continue
+                visitados.add(pai)
+                distancias[pai] = nivel + 1
+                if pai in afetados:
+                    fila.append((pai, nivel + 1))
+
+        resultado = dict(distancias)
+        for fronteira, distancia in distancias.items():
+            if fronteira in afetados:
+                continue
+            for ancestral, profundidade in ancestrais_fronteira.get(fronteira, {}).items():
+                total = distancia + profundidade
+                if total < resultado.get(ancestral, total + 1):
+                    resultado[ancestral] = total
+        resultado.pop(documento_id, None)
+        return resultado
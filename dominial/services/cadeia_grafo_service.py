@@ -0,0 +1,205 @@
+"""
+Grafo da cadeia dominial de um imóvel carregado uma única vez por requisição.
+
+Árvore, tabela, cadeia completa e exportações consomem o mesmo ``CadeiaGrafo``
+em vez de recarregar documento a documento e lançamento a lançamento.
+"""
+from django.db.models import Prefetch, prefetch_related_objects
+
+from ..models import Documento, Lancamento
+from .cadeia_aresta_service import CadeiaArestaService
+from .cadeia_fechamento_service import CadeiaFechamentoService
+
+
+class CadeiaGrafo:
+    """
+    Documentos, lançamentos, pessoas, origens e fins de cadeia de um imóvel e
+    de todos os documentos alcançados pelas suas origens, além dos imóveis
+    cujas cadeias incluem cada documento.
+
+    O carregamento usa um número fixo de consultas; no SQLite a travessia das
+    arestas custa uma consulta por nível da cadeia (ver
+    ``CadeiaArestaService.arestas_das_cadeias``).
+    """
+
+    def __init__(self, imovel, documentos, arestas, imoveis_por_documento=None):
+        self.imovel = imovel
+        self.documentos = documentos
+        self.arestas = arestas
+        self.imoveis_por_documento = imoveis_por_documento or {}
+
+    @classmethod
+    def carregar(cls, imovel, documentos_resolvidos=None):
+        """
+        ``documentos_resolvidos`` (opcional) é um dict ``{id: Documento}``
+        compartilhado entre carregamentos de vários imóveis: documentos já
+        presentes são reaproveitados, com lançamentos e pessoas, e os novos
+        são acrescentados a ele.
+        """
+        documento_ids = list(
+            Documento.objects.filter(imovel=imovel).values_list('id', flat=True)
+        )
+        arestas = cls._carregar_arestas(documento_ids)
+        if documentos_resolvidos is None:
+            documentos_resolvidos = {}
+
+        documentos = list(
+            Documento.objects.filter(
+                id__in=[
+                    documento_id
+                    for documento_id in arestas
+                    if documento_id not in documentos_resolvidos
+                ]
+            )
+            .select_related('tipo', 'cartorio', 'imovel')
+        )
+        prefetch_related_objects(
+            documentos,
+            Prefetch(
+                'lancamentos',
+                queryset=Lancamento.objects.select_related(
+                    'tipo',
+                    'cartorio_origem',
+                    'cartorio_transacao',
+                    'cartorio_transmissao',
+                ).order_by('id'),
+            ),
+        )
+        lancamentos = [
+            lancamento
+            for documento in documentos
+            for lancamento in documento.lancamentos.all()
+        ]
+        prefetch_related_objects(
+            lancamentos,
+            'pessoas__pessoa',
+            'origens_fim_cadeia',
+            'origens_estruturadas__cartorio',
+        )
+
+        documentos_resolvidos.update(
+            (documento.id, documento) for documento in documentos
+        )
+        documentos = {
+            documento_id: documentos_resolvidos[documento_id]
+            for documento_id in arestas
+            if documento_id in documentos_resolvidos
+        }
+        # As arestas apontam para os mesmos objetos já pré-carregados.
+        for arestas_documento in arestas.values():
+            for aresta in arestas_documento:
+                if aresta.documento_pai_id in documentos:
+                    aresta.documento_pai = documentos[aresta.documento_pai_id]
+        imoveis_por_documento = CadeiaFechamentoService.imoveis_por_documento(
+            list(documentos.values())
+        )
+        return cls(imovel, documentos, arestas, imoveis_por_documento)
+
+    @staticmethod
+    def _carregar_arestas(documento_ids):
+        arestas = CadeiaArestaService.arestas_das_cadeias(documento_ids)
+        if arestas is not None:
+            return arestas
+
+        arestas = {}
+        camada = documento_ids
+        while camada:
+            carregadas = CadeiaArestaService.arestas_por_documento(camada)
+            arestas.update(carregadas)
+            camada = list(dict.fromkeys(
+                aresta.documento_pai_id
+                for arestas_documento in carregadas.values()
+                for aresta in arestas_documento
+                if aresta.documento_pai_id and aresta.documento_pai_id not in arestas
+            ))
+        return arestas
+
+    def documento(self, documento_id):
+        return self.documentos.get(documento_id)
+
+    def obter(self, documento):
+        """Troca um documento pela instância pré-carregada do grafo, se houver."""
+        return self.documentos.get(documento.id, documento)
+
+    def documentos_do_imovel(self):
+        """Documentos do próprio imóvel em ordem de data."""
+        return sorted(
+            (
+                documento
+                for documento in self.documentos.values()
+                if documento.imovel_id == self.imovel.id
+            ),
+            key=lambda documento: (documento.data, documento.id),
+        )
+
+    def documentos_importados(self):
+        """
+        Documentos de outros imóveis alcançados pelas origens, na mesma ordem
+        de ``identificar_documentos_importados``.
+        """
+        importados = []
+        vistos = set()
+        camada = [documento.id for documento in self.documentos_do_imovel()]
+        while camada:
+            arestas = sorted(
+                (
+                    aresta
+                    for documento_id in camada
+                    for aresta in self.arestas.get(documento_id, [])
+                ),
+                key=lambda aresta: (aresta.lancamento_id, aresta.indice_origem),
+            )
+            proxima_camada = []
+            for aresta in arestas:
+                documento = aresta.documento_pai
+                if (
+                    documento
+                    and documento.imovel_id != self.imovel.id
+                    and documento.id not in vistos
+                ):
+                    importados.append(documento)
+                    vistos.add(documento.id)
+                    proxima_camada.append(documento.id)
+            camada = proxima_camada
+        return importados
+
+    def documentos_origem(self, documento):
+        """Documentos de origem já resolvidos, por ``(código, cartório_id)``."""
+        return {
+            (aresta.codigo, aresta.cartorio_id): aresta.documento_pai
+            for aresta in self.arestas.get(documento.id, [])
+            if aresta.documento_pai
+        }
+
+    def lancamentos(self, documento):
+        """Lançamentos do documento em ordem de ID, com pessoas e origens."""
+        documento = self.obter(documento)
+        if 'lancamentos' in getattr(documento, '_prefetched_objects_cache', {}):
+            return list(documento.lancamentos.all())
+        return list(
+            documento.lancamentos.select_related('tipo')
+            .prefetch_related('pessoas__pessoa')
+            .order_by('id')
+        )
+
+    def lancamentos_por_numero_simples(self, documento):
+        """
+        Lançamentos do documento na ordem das listagens: maior número simples
+        primeiro (início de matrícula por último), depois ID.
+        """
+        return sorted(
+            self.lancamentos(documento),
+            key=lambda lancamento: (-lancamento.numero_simples, lancamento.id),
+        )
+
+    def origens_fim_cadeia(self, documento):
+        """Pares ``(lancamento, origem)`` de fim de cadeia ativos do documento."""
+        return [
+            (lancamento, origem)
+            for lancamento in self.lancamentos(documento)
+            for origem in sorted(
+                lancamento.origens_fim_cadeia.all(),
+                key=lambda origem: origem.indice_origem,
+            )
+            if origem.fim_cadeia
+        ]
@@ -0,0 +1,139 @@
+"""
+Service para serializar a cadeia dominial em tabela no formato compacto
+consumido pela atualização AJAX da tabela
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ..utils import normalizar_texto_opcional
+from .cache_service import CacheService
+from .cadeia_dominial_tabela_service import CadeiaDominialTabelaService
+
+
+def _formatar_data(data):
+    return data.strftime('%d/%m/%Y') if data else None
+
+
+class CadeiaTabelaSerializerService:
+    """
+    Serializa a cadeia da tabela com tabelas de consulta: cartórios, pessoas
+    e rótulos de tipo aparecem uma vez em ``cartorios``/``pessoas``/``tipos``
+    e os itens da cadeia os referenciam por id (ou pelo código do tipo).
+
+    Os documentos e lançamentos vêm do grafo da cadeia, carregado de uma vez
+    pelo ``CadeiaDominialTabelaService``; a serialização não consulta o banco.
+    """
+
+    @staticmethod
+    def obter_cadeia(tis_id, imovel, escolhas_origem):
+        """Itens da cadeia em tabela, com ou sem escolhas de origem."""
+        service = CadeiaDominialTabelaService()
+        if escolhas_origem:
+            return service.get_cadeia_dominial_tabela(
+                tis_id, imovel.id, escolhas_origem_param=escolhas_origem
+            )['cadeia']
+        # Sem escolhas, o tronco principal simples
+        return service.obter_cadeia_tabela(imovel, escolhas_origem)
+
+    @staticmethod
+    def serializar(cadeia):
+        """
+        Converte os itens da cadeia no dicionário compacto:
+
+        ``{'cartorios': {id: nome}, 'pessoas': {id: nome},
+        'tipos': {tipo: rótulo}, 'cadeia': [...]}``
+        """
+        cartorios = {}
+        pessoas = {}
+        tipos = {}
+
+        def _cartorio(cartorio):
+            if cartorio is None:
+                return None
+            cartorios[cartorio.id] = cartorio.nome
+            return cartorio.id
+
+        def _tipo(tipo):
+            if tipo is None:
+                return ''
+            tipos[tipo.tipo] = tipo.get_tipo_display()
+            return tipo.tipo
+
+        cadeia_serializada = []
+        for idx, item in enumerate(cadeia):
+            documento = item['documento']
+            # Issue #120: data apenas no primeiro documento da cadeia
+            documento_serializado = {
+                'id': documento.id,
+                'numero': documento.numero,
+                'data': _formatar_data(documento.data_exibicao) if idx == 0 else None,
+                'tipo': _tipo(documento.tipo),
+                'cartorio': _cartorio(documento.cartorio),
+                'livro': documento.livro,
+                'folha': documento.folha,
+            }
+
+            lancamentos_serializados = []
+            for lancamento in item['lancamentos']:
+                pessoas_lancamento = []
+                for lancamento_pessoa in lancamento.pessoas.all():
+                    pessoas[lancamento_pessoa.pessoa_id] = lancamento_pessoa.pessoa.nome
+                    pessoas_lancamento.append([lancamento_pessoa.pessoa_id, lancamento_pessoa.tipo])
+
+                lancamentos_serializados.append({
+                    'id': lancamento.id,
+                    'tipo': _tipo(lancamento.tipo),
+                    'numero_lancamento': normalizar_texto_opcional(lancamento.numero_lancamento),
+                    'data': _formatar_data(lancamento.data) or '',
+                    'forma': normalizar_texto_opcional(lancamento.forma),
+                    'titulo': normalizar_texto_opcional(lancamento.titulo),
+                    'descricao': normalizar_texto_opcional(lancamento.descricao),
+                    'area': lancamento.area,
+                    'origem': normalizar_texto_opcional(lancamento.origem),
+                    'observacoes': normalizar_texto_opcional(lancamento.observacoes),
+                    'keyword_encontrada': getattr(lancamento, 'keyword_encontrada', None),
+                    'cartorio_transmissao': _cartorio(lancamento.cartorio_transmissao_compat),
+                    'cartorio_origem': _cartorio(lancamento.cartorio_origem),
+                    'livro_transacao': normalizar_texto_opcional(lancamento.livro_transacao),
+                    'folha_transacao': normalizar_texto_opcional(lancamento.folha_transacao),
+                    'data_transacao': _formatar_data(lancamento.data_transacao),
+                    'pessoas': pessoas_lancamento,
+                })
+
+            cadeia_serializada.append({
+                'documento': documento_serializado,
+                'lancamentos': lancamentos_serializados,
+                'origens_disponiveis': item.get('origens_disponiveis', []),
+                'tem_multiplas_origens': item.get('tem_multiplas_origens', False),
+                'escolha_atual': item.get('escolha_atual'),
+                'is_compartilhado': item.get('is_compartilhado', False),
+            })
+
+        return {
+            'cartorios': cartorios,
+            'pessoas': pessoas,
+            'tipos': tipos,
+            'cadeia': cadeia_serializada,
+        }
+
+    @staticmethod
+    def serializar_json(tis_id, imovel, escolhas_origem, chave=None):
+        """
+        JSON da resposta da API, do cache quando a cadeia do imóvel e as
+        escolhas de origem não mudaram. ``chave`` (de
+        ``CacheService.chave_cadeia_tabela``) é calculada uma vez e usada
+        na leitura e na gravação.
+        """
+        chave = chave or CacheService.chave_cadeia_tabela(imovel.id, escolhas_origem)
+        conteudo = CacheService.get_cached_cadeia_tabela(imovel.id, escolhas_origem, chave=chave)
+        if conteudo is None:
+            cadeia = CadeiaTabelaSerializerService.obter_cadeia(tis_id, imovel, escolhas_origem)
+            conteudo = json.dumps(
+                {'success': True, **CadeiaTabelaSerializerService.serializar(cadeia)},
+                cls=DjangoJSONEncoder,
+                separators=(',', ':'),
+            )
+            CacheService.set_cached_cadeia_tabela(imovel.id, escolhas_origem, conteudo, chave=chave)
+        return conteudo
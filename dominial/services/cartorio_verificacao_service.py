@@ -1,6 +1,5 @@
-from django.core.management import call_command
-from django.db import transaction
 from ..models import Cartorios
+from .onr_cartorios_service import OnrCartoriosService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,40 +42,28 @@ class CartorioVerificacaoService:
     @staticmethod
     def importar_cartorios_estado(estado):
         """
-        Importa cartórios de um estado específico
+        Enfileira a importação de cartórios de um estado; o worker
+        ``processar_importacoes_cartorios`` a executa fora da requisição.
         
         Args:
             estado (str): Sigla do estado
             
         Returns:
-            dict: Dicionário com resultado da importação
+            dict: Dicionário com a execução enfileirada (acompanhar por ``importacao_id``)
         """
         try:
-            logger.info(f"Iniciando importação de cartórios para o estado: {estado}")
+            logger.info(f"Enfileirando importação de cartórios para o estado: {estado}")
+            importacao = OnrCartoriosService.enfileirar(estado)
             
-            # Contar cartórios antes da importação
-            cartorios_antes = Cartorios.objects.filter(estado=estado).count()
-            logger.info(f"Cartórios antes da importação: {cartorios_antes}")
-            
-            with transaction.atomic():
-                # Executa o comando de importação
-                logger.info(f"Executando comando importar_cartorios_estado para {estado}")
-                call_command('importar_cartorios_estado', estado)
-                
-                # Conta quantos cartórios foram importados
-                cartorios_depois = Cartorios.objects.filter(estado=estado).count()
-                cartorios_importados = cartorios_depois - cartorios_antes
-                
-                logger.info(f"Cartórios após importação: {cartorios_depois}")
-                logger.info(f"Cartórios importados: {cartorios_importados}")
-                
-                return {
-                    'success': True,
-                    'message': f'Cartórios do estado {estado} importados com sucesso!',
-                    'total_cartorios': cartorios_depois,
-                    'cartorios_importados': cartorios_importados,
-                    'estado': estado
-                }
+            return {
+                'success': True,
+                'em_fila': True,
+                'message': f'Importação de cartórios do estado {estado} enfileirada.',
+                'importacao_id': importacao.id,
+                'status': importacao.status,
+                'total_cartorios': Cartorios.objects.filter(estado=estado).count(),
+                'estado': estado
+            }
         except Exception as e:
             logger.error(f"Erro ao importar cartórios para {estado}: {str(e)}")
             return {
@@ -0,0 +1,171 @@
+"""
+Service para compressão (Brotli/gzip) das respostas JSON e HTML grandes
+"""
+import gzip
+import re
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .cache_service import CacheService
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional: sem a biblioteca, só gzip
+    brotli = None
+
+
+class CompressaoService:
+    """
+    Escolhe a codificação aceita pelo cliente e comprime respostas acima de
+    ``TAMANHO_MINIMO``. Conteúdos já cacheados (árvore, tabela da cadeia)
+    guardam a variante comprimida no cache, junto da original: a compressão
+    roda uma vez por geração do imóvel, e não a cada requisição.
+    """
+
+    # Abaixo disso o ganho não compensa o custo da compressão
+    TAMANHO_MINIMO = getattr(settings, 'COMPRESSAO_TAMANHO_MINIMO', 1024)
+
+    TIPOS_COMPRIMIVEIS = ('application/json', 'text/html')
+
+    # O HTML traz o token CSRF ao lado de texto vindo da requisição (busca,
+    # formulários): contra o BREACH vai só em gzip, com o preenchimento
+    # aleatório de cabeçalho do ``GZipMiddleware`` do Django. O JSON das
+    # APIs não carrega segredos e pode usar Brotli.
+    TIPOS_COM_SEGREDOS = ('text/html',)
+
+    # Na resposta dinâmica a compressão roda a cada requisição: nível
+    # rápido. A variante cacheada roda uma vez: nível alto.
+    NIVEIS = {
+        'br': {'dinamico': 5, 'cache': 9},
+        'gzip': {'dinamico': 6, 'cache': 9},
+    }
+
+    _RE_ETAG_FORTE = re.compile(r'^\s*"')
+
+    @staticmethod
+    def codificacoes_suportadas():
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    @staticmethod
+    def escolher_codificacao(accept_encoding: str, suportadas=None) -> Optional[str]:
+        """
+        Melhor codificação suportada em ``Accept-Encoding`` (Brotli antes de
+        gzip), ignorando as recusadas com ``q=0``. ``suportadas`` restringe
+        as candidatas.
+        """
+        aceitas = set()
+        for item in (accept_encoding or '').split(','):
+            nome, _, parametros = item.partition(';')
+            nome = nome.strip().lower()
+            qualidade = re.search(r'q\s*=\s*([0-9.]+)', parametros)
+            try:
+                if qualidade and float(qualidade.group(1)) <= 0:
+                    continue
+            except ValueError:
+                continue
+            aceitas.add(nome)
+
+        for codificacao in suportadas or CompressaoService.codificacoes_suportadas():
+            if codificacao in aceitas:
+                return codificacao
+        return None
+
+    @staticmethod
+    def comprimir(conteudo: bytes, codificacao: str, nivel: str = 'dinamico') -> bytes:
+        qualidade = CompressaoService.NIVEIS[codificacao][nivel]
+        if codificacao == 'br':
+            return brotli.compress(conteudo, mode=brotli.MODE_TEXT, quality=qualidade)
+        # mtime fixo: o mesmo conteúdo gera sempre os mesmos bytes
+        return gzip.compress(conteudo, compresslevel=qualidade, mtime=0)
+
+    @staticmethod
+    def _tipo(response) -> str:
+        return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+    @staticmethod
+    def _comprimivel(response) -> bool:
+        return (
+            not response.streaming
+            and response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and CompressaoService._tipo(response) in CompressaoService.TIPOS_COMPRIMIVEIS
+            and len(response.content) >= CompressaoService.TAMANHO_MINIMO
+        )
+
+    @staticmethod
+    def _marcar_codificada(response, codificacao: str) -> None:
+        response['Content-Encoding'] = codificacao
+        response['Content-Length'] = str(len(response.content))
+        CompressaoService.enfraquecer_etag(response)
+
+    @staticmethod
+    def enfraquecer_etag(response) -> None:
+        """
+        A resposta comprimida não é idêntica byte a byte à original: o ETag
+        forte vira fraco (mesmo critério do ``GZipMiddleware`` do Django).
+        """
+        etag = response.get('ETag')
+        if etag and CompressaoService._RE_ETAG_FORTE.match(etag):
+            response.headers['ETag'] = 'W/' + etag.strip()
+
+    @staticmethod
+    def comprimir_resposta(request, response):
+        """Comprime ``response`` na hora, se valer a pena."""
+        if not CompressaoService._comprimivel(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        com_segredos = CompressaoService._tipo(response) in CompressaoService.TIPOS_COM_SEGREDOS
+        codificacao = CompressaoService.escolher_codificacao(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            ('gzip',) if com_segredos else None,
+        )
+        if codificacao is None:
+            return response
+
+        if com_segredos:
+            comprimido = compress_string(
+                response.content, max_random_bytes=GZipMiddleware.max_random_bytes
+            )
+        else:
+            comprimido = CompressaoService.comprimir(response.content, codificacao)
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        CompressaoService._marcar_codificada(response, codificacao)
+        return response
+
+    @staticmethod
+    def resposta_cacheada(request, conteudo, chave_cache: str,
+                          content_type: str = 'application/json') -> HttpResponse:
+        """
+        Resposta para um conteúdo já cacheado sob ``chave_cache``. A variante
+        comprimida fica no cache com a mesma chave (e portanto a mesma
+        geração) acrescida da codificação.
+        """
+        corpo = conteudo.encode() if isinstance(conteudo, str) else conteudo
+        response = HttpResponse(corpo, content_type=content_type)
+        if len(corpo) < CompressaoService.TAMANHO_MINIMO:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        codificacao = CompressaoService.escolher_codificacao(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if codificacao is None:
+            return response
+
+        comprimido = CacheService.get_cached_comprimido(chave_cache, codificacao)
+        if comprimido is None:
+            comprimido = CompressaoService.comprimir(corpo, codificacao, nivel='cache')
+            CacheService.set_cached_comprimido(chave_cache, codificacao, comprimido)
+
+        response.content = comprimido
+        CompressaoService._marcar_codificada(response, codificacao)
+        return response
@@ -1,7 +1,9 @@
 """Resolução central e inequívoca de documentos pela identidade registral."""
 
 from dataclasses import dataclass
-from typing import Literal
+from typing import Iterable, Literal
+
+from django.db.models import Q
 
 from ..models import Documento
 from ..utils.documento_identidade_utils import (
@@ -12,6 +14,10 @@ from ..utils.documento_identidade_utils import (
 
 StatusResolucao = Literal['nao_encontrado', 'encontrado', 'ambiguo']
 
+# Cada identidade ocupa três parâmetros na consulta; o bloco mantém o total
+# abaixo do limite de variáveis do SQLite.
+TAMANHO_LOTE_RESOLUCAO = 250
+
 
 @dataclass(frozen=True, slots=True)
 class ResultadoResolucaoDocumento:
@@ -44,6 +50,61 @@ class DocumentoIdentidadeService:
             numero_normalizado=identidade.numero_normalizado,
         ).select_related('tipo', 'cartorio', 'imovel').order_by('pk'))
 
+        return DocumentoIdentidadeService._classificar(identidade, candidatos_banco)
+
+    @staticmethod
+    def resolver_lote(
+        identidades: Iterable[DocumentoIdentidade],
+    ) -> dict[DocumentoIdentidade, ResultadoResolucaoDocumento]:
+        """Resolve várias identidades com uma consulta por bloco.
+
+        Cada identidade recebe exatamente o mesmo resultado que ``resolver``
+        devolveria para ela isoladamente; identidades repetidas são
+        resolvidas uma única vez.
+        """
+        identidades = tuple(dict.fromkeys(identidades))
+        for identidade in identidades:
+            if not isinstance(identidade, DocumentoIdentidade):
+                raise TypeError('A resolução exige um DocumentoIdentidade completo.')
+
+        candidatos_por_chave = {}
+        for inicio in range(0, len(identidades), TAMANHO_LOTE_RESOLUCAO):
+            bloco = identidades[inicio:inicio + TAMANHO_LOTE_RESOLUCAO]
+            filtro = Q()
+            for identidade in bloco:
+                filtro |= Q(
+                    tipo__tipo=identidade.tipo,
+                    cartorio_id=identidade.cartorio_id,
+                    numero_normalizado=identidade.numero_normalizado,
+                )
+            candidatos_banco = Documento.objects.filter(filtro).select_related(
+                'tipo', 'cartorio', 'imovel'
+            ).order_by('pk')
+            for candidato in candidatos_banco:
+                chave = (
+                    candidato.tipo.tipo,
+                    candidato.cartorio_id,
+                    candidato.numero_normalizado,
+                )
+                candidatos_por_chave.setdefault(chave, []).append(candidato)
+
+        return {
+            identidade: DocumentoIdentidadeService._classificar(
+                identidade,
+                candidatos_por_chave.get(
+                    (
+                        identidade.tipo,
+                        identidade.cartorio_id,
+                        identidade.numero_normalizado,
+                    ),
+                    (),
+                ),
+            )
+            for identidade in identidades
+        }
+
+    @staticmethod
+    def _classificar(identidade, candidatos_banco) -> ResultadoResolucaoDocumento:
         candidatos = []
         candidatos_invalidos = []
         for candidato in candidatos_banco:
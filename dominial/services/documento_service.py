@@ -180,19 +180,11 @@ class DocumentoService:
         """
         Obtém documentos que são compartilhados com o imóvel
         """
-        # Buscar documentos que são referenciados como origem em lançamentos deste imóvel
-        from ..models import Lancamento
-        
-        lancamentos = Lancamento.objects.filter(
-            documento__imovel=imovel
-        ).select_related('documento_origem')
-        
-        documentos_compartilhados = []
-        for lancamento in lancamentos:
-            if lancamento.documento_origem and lancamento.documento_origem.imovel != imovel:
-                documentos_compartilhados.append(lancamento.documento_origem)
-        
-        return list(set(documentos_compartilhados))  # Remove duplicatas
+        # Documentos de outros imóveis alcançados pela cadeia deste imóvel,
+        # lidos do fechamento transitivo das arestas de origem
+        from .cadeia_fechamento_service import CadeiaFechamentoService
+
+        return CadeiaFechamentoService.documentos_importados(imovel)
     
     @staticmethod
     def obter_info_compartilhamento(documento, imovel_atual):
@@ -40,24 +40,57 @@ class DuplicataVerificacaoService:
         return None
 
     @staticmethod
-    def _resolver_documento(codigo, cartorio_id):
-        """
-        Resolve um documento pela identidade completa (tipo, número normalizado
-        e cartório), nunca por número isolado. Sem cartório, com tipo
-        incompatível ou com identidade ambígua, não seleciona nenhum documento.
-        """
+    def _identidade_do_codigo(codigo, cartorio_id):
+        """Monta a identidade completa de um código no cartório informado."""
         if not codigo or not cartorio_id:
             return None
         tipo = DuplicataVerificacaoService._tipo_do_codigo(codigo)
         if not tipo:
             return None
         try:
-            identidade = DocumentoIdentidade(tipo, codigo, cartorio_id)
+            return DocumentoIdentidade(tipo, codigo, cartorio_id)
         except (TypeError, ValueError):
             return None
+
+    @staticmethod
+    def _resolver_documento(codigo, cartorio_id):
+        """
+        Resolve um documento pela identidade completa (tipo, número normalizado
+        e cartório), nunca por número isolado. Sem cartório, com tipo
+        incompatível ou com identidade ambígua, não seleciona nenhum documento.
+        """
+        identidade = DuplicataVerificacaoService._identidade_do_codigo(codigo, cartorio_id)
+        if identidade is None:
+            return None
         resultado = DocumentoIdentidadeService.resolver(identidade)
         return resultado.documento if resultado.status == 'encontrado' else None
 
+    @staticmethod
+    def _resolver_origens_documento(documento):
+        """
+        Resolve, com uma única consulta, os documentos de origem citados pelos
+        lançamentos de ``documento``, preservando a ordem das origens.
+        """
+        origens = [
+            origem
+            for lancamento in Lancamento.objects.filter(documento=documento)
+            for origem in LancamentoOrigemLeituraService.obter_origens(lancamento)
+        ]
+        identidades = [
+            DuplicataVerificacaoService._identidade_do_codigo(
+                origem.codigo, origem.cartorio_id
+            )
+            for origem in origens
+        ]
+        resultados = DocumentoIdentidadeService.resolver_lote(
+            identidade for identidade in identidades if identidade is not None
+        )
+        return [
+            resultados[identidade].documento
+            for identidade in identidades
+            if identidade is not None and resultados[identidade].status == 'encontrado'
+        ]
+
     @staticmethod
     def verificar_duplicata_origem(origem: str, cartorio_id: int, imovel_atual_id: int) -> Dict[str, Any]:
         """
@@ -118,27 +151,19 @@ class DuplicataVerificacaoService:
 
             documentos_processados.add(documento.id)
 
-            lancamentos_do_documento = Lancamento.objects.filter(
-                documento=documento
-            )
-
-            for lancamento in lancamentos_do_documento:
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    # Resolver documento de origem pela identidade completa
-                    # (tipo, número normalizado e cartório de cada origem)
-                    documento_anterior = DuplicataVerificacaoService._resolver_documento(
-                        origem.codigo, origem.cartorio_id
-                    )
-
-                    if documento_anterior:
-                        # Verificar se já não foi importado
-                        if not DocumentoImportado.objects.filter(
-                            documento=documento_anterior,
-                            imovel_origem=documento_origem.imovel
-                        ).exists():
-                            documentos_importaveis.append(documento_anterior)
-                            # Buscar recursivamente as origens deste documento
-                            buscar_cadeia_recursiva(documento_anterior)
+            # Resolver documentos de origem pela identidade completa
+            # (tipo, número normalizado e cartório de cada origem)
+            for documento_anterior in DuplicataVerificacaoService._resolver_origens_documento(
+                documento
+            ):
+                # Verificar se já não foi importado
+                if not DocumentoImportado.objects.filter(
+                    documento=documento_anterior,
+                    imovel_origem=documento_origem.imovel
+                ).exists():
+                    documentos_importaveis.append(documento_anterior)
+                    # Buscar recursivamente as origens deste documento
+                    buscar_cadeia_recursiva(documento_anterior)
         
         # Iniciar busca recursiva a partir do documento origem
         buscar_cadeia_recursiva(documento_origem)
@@ -172,21 +197,13 @@ class DuplicataVerificacaoService:
                 'lancamentos': list(documento.lancamentos.all())
             })
             
-            # Buscar origens deste documento
-            lancamentos_do_documento = Lancamento.objects.filter(
-                documento=documento
-            )
-            
-            for lancamento in lancamentos_do_documento:
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    # Resolver documento de origem pela identidade completa
-                    documento_anterior = DuplicataVerificacaoService._resolver_documento(
-                        origem.codigo, origem.cartorio_id
-                    )
-
-                    if documento_anterior and documento_anterior.id not in documentos_processados:
-                        # Recursivamente adicionar o documento anterior
-                        adicionar_documento_e_origens(documento_anterior)
+            # Buscar origens deste documento pela identidade completa
+            for documento_anterior in DuplicataVerificacaoService._resolver_origens_documento(
+                documento
+            ):
+                if documento_anterior.id not in documentos_processados:
+                    # Recursivamente adicionar o documento anterior
+                    adicionar_documento_e_origens(documento_anterior)
         
         # Iniciar a busca recursiva
         adicionar_documento_e_origens(documento_origem)
@@ -0,0 +1,226 @@
+"""
+Fila de exportações em PDF processada fora das requisições.
+
+As views enfileiram um ``ExportacaoJob`` e devolvem seu id; o worker
+``processar_exportacoes`` gera o arquivo em MEDIA_ROOT e o navegador acompanha
+o status até o download. Pedidos idênticos para a mesma geração de cache do
+imóvel reaproveitam o job existente.
+"""
+import hashlib
+import json
+import logging
+from datetime import date, timedelta
+
+from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import ExportacaoJob
+from .cache_service import CacheService
+from .renderizador_pdf_service import RenderizadorPdfService
+
+logger = logging.getLogger(__name__)
+
+# Jobs em andamento há mais tempo que isso são considerados abandonados
+# (worker reiniciado no meio da geração) e voltam para a fila.
+TEMPO_MAXIMO_PROCESSAMENTO = timedelta(minutes=30)
+
+
+class ExportacaoService:
+    """Enfileira, processa e renderiza as exportações em PDF."""
+
+    @staticmethod
+    def enfileirar(tipo, imovel, parametros=None, usuario=None, base_url=None):
+        """
+        Retorna o job do pedido: um existente com a mesma chave (pendente, em
+        andamento ou concluído) ou um novo, pendente.
+        """
+        parametros = parametros or {}
+        chave = ExportacaoService._chave(tipo, imovel.id, parametros)
+        existente = (
+            ExportacaoJob.objects.filter(chave=chave)
+            .exclude(status=ExportacaoJob.STATUS_ERRO)
+            .order_by('-data_criacao')
+            .first()
+        )
+        if existente is not None and (
+            existente.status != ExportacaoJob.STATUS_CONCLUIDO
+            or ExportacaoService._arquivo_existe(existente)
+        ):
+            return existente
+
+        return ExportacaoJob.objects.create(
+            tipo=tipo,
+            imovel=imovel,
+            parametros={**parametros, 'base_url': base_url},
+            chave=chave,
+            solicitado_por=usuario if getattr(usuario, 'pk', None) else None,
+        )
+
+    @staticmethod
+    def reservar_proximo():
+        """
+        Marca como em andamento o job pendente mais antigo e o retorna. A
+        reserva é um UPDATE condicional, seguro com vários workers.
+        """
+        pendentes = (
+            ExportacaoJob.objects.filter(status=ExportacaoJob.STATUS_PENDENTE)
+            .order_by('data_criacao')
+            .values_list('id', flat=True)[:10]
+        )
+        for job_id in pendentes:
+            if ExportacaoService.reservar(job_id):
+                return ExportacaoJob.objects.get(pk=job_id)
+        return None
+
+    @staticmethod
+    def reservar(job_id):
+        return ExportacaoJob.objects.filter(
+            pk=job_id, status=ExportacaoJob.STATUS_PENDENTE
+        ).update(
+            status=ExportacaoJob.STATUS_EM_ANDAMENTO,
+            data_inicio=timezone.now(),
+            progresso=0,
+        ) == 1
+
+    @staticmethod
+    def processar(job):
+        """Gera o arquivo de um job já reservado."""
+        try:
+            ExportacaoService._progresso(job, 10)
+            conteudo, nome_arquivo = ExportacaoService._renderizar(job)
+            job.arquivo.save(f'{job.id}.pdf', ContentFile(conteudo), save=False)
+            job.nome_arquivo = nome_arquivo
+            job.status = ExportacaoJob.STATUS_CONCLUIDO
+            job.progresso = 100
+            job.erro = None
+        except Exception as e:
+            logger.exception("Erro ao processar exportação %s", job.id)
+            job.status = ExportacaoJob.STATUS_ERRO
+            job.erro = str(e)
+        job.data_fim = timezone.now()
+        job.save(update_fields=[
+            'arquivo', 'nome_arquivo', 'status', 'progresso', 'erro', 'data_fim',
+        ])
+        return job
+
+    @staticmethod
+    def liberar_abandonados():
+        """Devolve à fila jobs em andamento há mais que o tempo máximo."""
+        return ExportacaoJob.objects.filter(
+            status=ExportacaoJob.STATUS_EM_ANDAMENTO,
+            data_inicio__lt=timezone.now() - TEMPO_MAXIMO_PROCESSAMENTO,
+        ).update(status=ExportacaoJob.STATUS_PENDENTE, progresso=0)
+
+    @staticmethod
+    def limpar_antigos(dias):
+        """Remove jobs finalizados há mais de ``dias`` dias e seus arquivos."""
+        removidos = 0
+        for job in ExportacaoJob.objects.filter(
+            status__in=[ExportacaoJob.STATUS_CONCLUIDO, ExportacaoJob.STATUS_ERRO],
+            data_fim__lt=timezone.now() - timedelta(days=dias),
+        ):
+            if job.arquivo:
+                job.arquivo.delete(save=False)
+            job.delete()
+            removidos += 1
+        return removidos
+
+    @staticmethod
+    def status(job):
+        """Representação do job consumida pelo polling da interface."""
+        return {
+            'id': str(job.id),
+            'tipo': job.tipo,
+            'status': job.status,
+            'progresso': job.progresso,
+            'erro': job.erro,
+            'concluido': job.status == ExportacaoJob.STATUS_CONCLUIDO,
+        }
+
+    @staticmethod
+    def renderizar_cadeia_dominial_pdf(tis_id, imovel_id, escolhas_origem=None, base_url=None,
+                                       ao_progredir=None):
+        """PDF da cadeia em tabela, com as escolhas de origem informadas."""
+        from .cadeia_dominial_tabela_service import CadeiaDominialTabelaService
+
+        service = CadeiaDominialTabelaService()
+        context = service.get_cadeia_dominial_tabela(
+            tis_id, imovel_id, escolhas_origem_param=escolhas_origem or None
+        )
+        if context['cadeia']:
+            context['estatisticas'] = service.get_estatisticas_cadeia(context['cadeia'])
+
+        html_string = render_to_string('dominial/cadeia_dominial_pdf.html', context)
+        if ao_progredir:
+            ao_progredir(40)
+        return ExportacaoService._write_pdf(html_string, 'cadeia_dominial_pdf.css', base_url)
+
+    @staticmethod
+    def renderizar_cadeia_completa_pdf(tis_id, imovel_id, sequencia=None, base_url=None,
+                                       ao_progredir=None):
+        """PDF da cadeia completa, na sequência padrão ou na personalizada."""
+        from .cadeia_completa_service import CadeiaCompletaService
+
+        service = CadeiaCompletaService()
+        if sequencia:
+            context = service.get_cadeia_completa_com_sequencia_personalizada(
+                tis_id, imovel_id, sequencia
+            )
+        else:
+            context = service.get_cadeia_completa(tis_id, imovel_id)
+
+        html_string = render_to_string('dominial/cadeia_completa_pdf.html', context)
+        if ao_progredir:
+            ao_progredir(40)
+        return ExportacaoService._write_pdf(html_string, 'cadeia_completa_pdf.css', base_url)
+
+    @staticmethod
+    def _renderizar(job):
+        parametros = job.parametros
+        imovel = job.imovel
+        ao_progredir = lambda progresso: ExportacaoService._progresso(job, progresso)
+        hoje = date.today().strftime('%Y%m%d')
+        if job.tipo == ExportacaoJob.TIPO_CADEIA_COMPLETA_PDF:
+            conteudo = ExportacaoService.renderizar_cadeia_completa_pdf(
+                imovel.terra_indigena_id_id,
+                imovel.id,
+                parametros.get('sequencia'),
+                parametros.get('base_url'),
+                ao_progredir,
+            )
+            return conteudo, f"cadeia_completa_{imovel.matricula}_{hoje}.pdf"
+        conteudo = ExportacaoService.renderizar_cadeia_dominial_pdf(
+            imovel.terra_indigena_id_id,
+            imovel.id,
+            parametros.get('escolhas_origem'),
+            parametros.get('base_url'),
+            ao_progredir,
+        )
+        return conteudo, f"cadeia_dominial_{imovel.matricula}_{hoje}.pdf"
+
+    @staticmethod
+    def _write_pdf(html_string, css_nome, base_url):
+        return RenderizadorPdfService.renderizar(html_string, css_nome, base_url)
+
+    @staticmethod
+    def _chave(tipo, imovel_id, parametros):
+        conteudo = json.dumps(
+            {
+                'tipo': tipo,
+                'imovel_id': imovel_id,
+                'geracao': CacheService.obter_geracao('imovel', imovel_id),
+                'parametros': parametros,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(conteudo.encode()).hexdigest()
+
+    @staticmethod
+    def _progresso(job, progresso):
+        job.progresso = progresso
+        ExportacaoJob.objects.filter(pk=job.pk).update(progresso=progresso)
+
+    @staticmethod
+    def _arquivo_existe(job):
+        return bool(job.arquivo) and job.arquivo.storage.exists(job.arquivo.name)
@@ -0,0 +1,256 @@
+"""
+Exportação das cadeias dominiais de todos os imóveis de uma Terra Indígena em
+um único ZIP.
+
+Os imóveis são percorridos um a um com um cache comum de documentos já
+resolvidos (``CadeiaGrafo.carregar(..., documentos_resolvidos)``): documentos
+ancestrais compartilhados são carregados uma vez só e descartados assim que
+todos os imóveis da TI cujas cadeias os incluem foram exportados. O ZIP é
+produzido em blocos, imóvel a imóvel, e termina com a planilha de resumo.
+"""
+import logging
+import shutil
+import tempfile
+import zipfile
+
+from django.template.loader import render_to_string
+from django.utils.text import get_valid_filename
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from ..models import Imovel
+from .cache_service import CacheService
+from .cadeia_completa_service import CadeiaCompletaService
+from .cadeia_excel_service import CadeiaExcelService
+from .cadeia_grafo_service import CadeiaGrafo
+from .hierarquia_arvore_service import HierarquiaArvoreService
+from .renderizador_pdf_service import RenderizadorPdfService
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ('xlsx', 'pdf', 'json')
+# O PDF é o formato mais caro de gerar; entra no ZIP só quando pedido.
+FORMATOS_PADRAO = ('xlsx', 'json')
+
+COLUNAS_RESUMO = [
+    ('matricula', 'Matrícula'),
+    ('imovel', 'Imóvel'),
+    ('proprietario', 'Proprietário'),
+    ('cartorio', 'Cartório'),
+    ('documentos', 'Documentos'),
+    ('lancamentos', 'Lançamentos'),
+    ('documentos_importados', 'Documentos importados'),
+    ('arquivos', 'Arquivos'),
+    ('situacao', 'Situação'),
+]
+
+
+class _SaidaZip:
+    """
+    Destino sem ``seek`` para o ``ZipFile`` (que passa a usar data
+    descriptors); guarda os bytes escritos até serem lidos com ``ler``.
+    """
+
+    def __init__(self):
+        self._blocos = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._blocos.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def ler(self):
+        dados = b''.join(self._blocos)
+        self._blocos = []
+        return dados
+
+
+class ExportacaoTisService:
+    """ZIP com as cadeias (XLSX/PDF/JSON) de cada imóvel de uma TI e um resumo."""
+
+    @staticmethod
+    def formatos(valor=None):
+        """
+        Normaliza ``'xlsx,pdf'`` (ou uma lista) para a tupla de formatos, na
+        ordem de ``FORMATOS``. Levanta ``ValueError`` para formato desconhecido.
+        """
+        if not valor:
+            return FORMATOS_PADRAO
+        if isinstance(valor, str):
+            valor = valor.split(',')
+        pedidos = {formato.strip().lower() for formato in valor if formato.strip()}
+        desconhecidos = pedidos.difference(FORMATOS)
+        if desconhecidos:
+            raise ValueError(
+                f"Formato(s) inválido(s): {', '.join(sorted(desconhecidos))}. "
+                f"Use: {', '.join(FORMATOS)}."
+            )
+        return tuple(formato for formato in FORMATOS if formato in pedidos) or FORMATOS_PADRAO
+
+    @staticmethod
+    def imoveis(tis, incluir_arquivados=False):
+        imoveis = (
+            Imovel.objects.filter(terra_indigena_id=tis)
+            .select_related('proprietario', 'cartorio')
+            .order_by('matricula', 'id')
+        )
+        if not incluir_arquivados:
+            imoveis = imoveis.filter(arquivado=False)
+        return imoveis
+
+    @staticmethod
+    def nome_arquivo(tis, data):
+        return get_valid_filename(f"cadeias_{tis.codigo}_{data.strftime('%Y%m%d')}.zip")
+
+    @staticmethod
+    def gerar_zip(tis, formatos=FORMATOS_PADRAO, base_url=None, incluir_arquivados=False,
+                  resumo=None):
+        """
+        Gera o ZIP em blocos de bytes, um por imóvel, e por fim o resumo.
+        ``resumo`` (lista opcional) recebe as linhas da planilha de resumo.
+        """
+        resumo = resumo if resumo is not None else []
+        saida = _SaidaZip()
+        with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+            for linha, arquivos in ExportacaoTisService._exportar_imoveis(
+                tis, formatos, base_url, incluir_arquivados
+            ):
+                for nome, conteudo in arquivos:
+                    ExportacaoTisService._gravar(arquivo_zip, nome, conteudo)
+                resumo.append(linha)
+                yield saida.ler()
+
+            planilha = tempfile.TemporaryFile()
+            ExportacaoTisService._gerar_resumo(tis, resumo, planilha)
+            ExportacaoTisService._gravar(arquivo_zip, 'resumo.xlsx', planilha)
+        yield saida.ler()
+
+    @staticmethod
+    def _exportar_imoveis(tis, formatos, base_url, incluir_arquivados):
+        """Gera ``(linha_do_resumo, arquivos)`` para cada imóvel da TI."""
+        imoveis = list(ExportacaoTisService.imoveis(tis, incluir_arquivados))
+        pendentes = {imovel.id for imovel in imoveis}
+        documentos_resolvidos = {}
+
+        for imovel in imoveis:
+            linha = {
+                'matricula': imovel.matricula,
+                'imovel': imovel.nome,
+                'proprietario': imovel.proprietario.nome if imovel.proprietario else '',
+                'cartorio': imovel.cartorio.nome if imovel.cartorio else '',
+                'documentos': 0,
+                'lancamentos': 0,
+                'documentos_importados': 0,
+                'arquivos': '',
+                'situacao': 'OK',
+            }
+            grafo = None
+            arquivos = []
+            try:
+                grafo = CadeiaGrafo.carregar(imovel, documentos_resolvidos)
+                estatisticas, arquivos = ExportacaoTisService._arquivos_imovel(
+                    tis, imovel, grafo, formatos, base_url
+                )
+                linha['documentos'] = estatisticas['total_documentos']
+                linha['lancamentos'] = estatisticas['total_lancamentos']
+                linha['documentos_importados'] = estatisticas['documentos_importados']
+                linha['arquivos'] = ', '.join(nome for nome, _ in arquivos)
+            except Exception as e:
+                logger.exception(
+                    "Erro ao exportar a cadeia do imóvel %s (tis_id=%s)", imovel.id, tis.id
+                )
+                linha['situacao'] = f'Erro: {e}'
+
+            pendentes.discard(imovel.id)
+            if grafo is not None:
+                ExportacaoTisService._descartar_resolvidos(
+                    documentos_resolvidos, grafo, pendentes
+                )
+            yield linha, arquivos
+
+    @staticmethod
+    def _arquivos_imovel(tis, imovel, grafo, formatos, base_url):
+        """Estatísticas da cadeia e os pares ``(nome, conteúdo)`` do imóvel."""
+        base = 'imoveis/' + get_valid_filename(f'{imovel.matricula}_{imovel.id}')
+        context = CadeiaCompletaService().get_cadeia_completa(tis.id, imovel.id, grafo=grafo)
+
+        arquivos = []
+        try:
+            if 'xlsx' in formatos:
+                planilha = tempfile.TemporaryFile()
+                arquivos.append((f'{base}.xlsx', planilha))
+                CadeiaExcelService.gerar(tis, imovel, context, planilha)
+            if 'pdf' in formatos:
+                html_string = render_to_string('dominial/cadeia_completa_pdf.html', context)
+                arquivos.append((
+                    f'{base}.pdf',
+                    RenderizadorPdfService.renderizar(
+                        html_string, 'cadeia_completa_pdf.css', base_url
+                    ),
+                ))
+            if 'json' in formatos:
+                # Mesmo conteúdo de cadeia_dominial_arvore, reaproveitando o
+                # cache por geração do imóvel.
+                chave = CacheService.chave_arvore_imovel(imovel.id)
+                arvore = CacheService.get_cached_arvore_imovel(imovel.id, chave=chave)
+                if arvore is None:
+                    arvore = HierarquiaArvoreService.serializar_arvore(imovel, grafo=grafo)
+                    CacheService.set_cached_arvore_imovel(imovel.id, arvore, chave=chave)
+                arquivos.append((f'{base}.json', arvore))
+        except Exception:
+            for _, conteudo in arquivos:
+                if hasattr(conteudo, 'close'):
+                    conteudo.close()
+            raise
+        return context['estatisticas'], arquivos
+
+    @staticmethod
+    def _descartar_resolvidos(documentos_resolvidos, grafo, pendentes):
+        """
+        Remove do cache os documentos que nenhum imóvel ainda pendente usa,
+        limitando a memória ao que os próximos imóveis vão reaproveitar.
+        """
+        for documento_id in grafo.documentos:
+            imoveis = grafo.imoveis_por_documento.get(documento_id, [])
+            if not any(imovel.id in pendentes for imovel in imoveis):
+                documentos_resolvidos.pop(documento_id, None)
+
+    @staticmethod
+    def _gravar(arquivo_zip, nome, conteudo):
+        """Grava bytes, texto ou um arquivo temporário (fechado em seguida)."""
+        if isinstance(conteudo, (bytes, str)):
+            arquivo_zip.writestr(nome, conteudo)
+            return
+        try:
+            conteudo.seek(0)
+            with arquivo_zip.open(nome, 'w', force_zip64=True) as destino:
+                shutil.copyfileobj(conteudo, destino)
+        finally:
+            conteudo.close()
+
+    @staticmethod
+    def _gerar_resumo(tis, linhas, destino):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Resumo')
+        titulo = WriteOnlyCell(ws, value=f'{tis.nome} ({tis.codigo})')
+        titulo.font = Font(bold=True, size=14)
+        ws.append([titulo])
+        ws.append([])
+
+        cabecalhos = []
+        for _, rotulo in COLUNAS_RESUMO:
+            celula = WriteOnlyCell(ws, value=rotulo)
+            celula.font = Font(bold=True)
+            cabecalhos.append(celula)
+        ws.append(cabecalhos)
+        for linha in linhas:
+            ws.append([linha[chave] for chave, _ in COLUNAS_RESUMO])
+        wb.save(destino)
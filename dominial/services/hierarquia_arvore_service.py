@@ -8,12 +8,17 @@ from ..models import Documento, Lancamento
 from .hierarquia_origem_service import HierarquiaOrigemService
 from .documento_service import DocumentoService
 from .documento_identidade_service import DocumentoIdentidadeService
-from .lancamento_origem_leitura_service import LancamentoOrigemLeituraService
+from .cadeia_aresta_service import CadeiaArestaService
+from .cadeia_fechamento_service import CadeiaFechamentoService
+from .cadeia_grafo_service import CadeiaGrafo
 from .hierarquia_arvore_niveis_helper import recalcular_niveis
+from .keyword_alerta_service import buscar_keyword_prioritaria
 from ..utils.documento_identidade_utils import DocumentoIdentidade
+import json
 import re
 from collections import deque
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
 
@@ -24,7 +29,7 @@ class HierarquiaArvoreService:
     """
     
     @staticmethod
-    def construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos=False):
+    def construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos=False, grafo=None):
         """
         Constrói a estrutura de árvore da cadeia dominial para visualização
         Lógica corrigida: filho -> pai (esquerda -> direita)
@@ -32,9 +37,12 @@ class HierarquiaArvoreService:
         Args:
             imovel: Objeto Imovel
             criar_documentos_automaticos: Se True, cria documentos automaticamente para origens identificadas
+            grafo: CadeiaGrafo já carregado para o imóvel (opcional)
         """
         # 1. Identificar documento principal do imóvel
-        documento_principal = HierarquiaArvoreService._identificar_documento_principal(imovel)
+        documento_principal = HierarquiaArvoreService._identificar_documento_principal(
+            imovel, grafo=grafo
+        )
         
         if not documento_principal:
             return {
@@ -52,17 +60,73 @@ class HierarquiaArvoreService:
         
         # 2. Construir árvore a partir do documento principal
         arvore = HierarquiaArvoreService._construir_arvore_a_partir_documento(
-            documento_principal, imovel, criar_documentos_automaticos
+            documento_principal, imovel, criar_documentos_automaticos, grafo=grafo
         )
         
         return arvore
     
     @staticmethod
-    def _identificar_documento_principal(imovel):
+    def serializar_arvore(imovel, grafo=None):
+        """
+        JSON da árvore consumido pelo D3, com a keyword de maior prioridade de
+        cada documento. Não cria documentos fantasma ao carregar a árvore.
+        """
+        if grafo is None:
+            grafo = CadeiaGrafo.carregar(imovel)
+        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+            imovel, criar_documentos_automaticos=False, grafo=grafo
+        )
+
+        nos = [
+            documento_node
+            for documento_node in arvore.get('documentos', [])
+            if not documento_node.get('is_fim_cadeia')
+        ]
+        fora_do_grafo = {
+            documento.id: documento
+            for documento in Documento.objects.filter(
+                id__in=[no['id'] for no in nos if grafo.documento(no['id']) is None]
+            ).prefetch_related('lancamentos')
+        }
+        for documento_node in arvore.get('documentos', []):
+            documento_node['keyword_encontrada'] = None
+        for documento_node in nos:
+            documento = grafo.documento(documento_node['id'])
+            if documento is not None:
+                lancamentos = grafo.lancamentos(documento)
+            elif documento_node['id'] in fora_do_grafo:
+                lancamentos = fora_do_grafo[documento_node['id']].lancamentos.all()
+            else:
+                continue
+            documento_node['keyword_encontrada'] = buscar_keyword_prioritaria(lancamentos)
+        return json.dumps(arvore, cls=DjangoJSONEncoder)
+
+    @staticmethod
+    def _identificar_documento_principal(imovel, grafo=None):
         """
         Identifica o documento principal do imóvel
         Prioridade: 1) Documento com número igual à matrícula, 2) Primeiro documento do imóvel
         """
+        if grafo is not None:
+            # Mesma prioridade, sobre os documentos já carregados no grafo
+            # (ordem padrão de Documento: data e id decrescentes).
+            documentos = sorted(
+                grafo.documentos_do_imovel(),
+                key=lambda documento: (documento.data, documento.id),
+                reverse=True,
+            )
+            identidade = next(
+                (
+                    documento
+                    for documento in documentos
+                    if documento.tipo.tipo == imovel.tipo_documento_principal
+                    and documento.numero_normalizado == imovel.matricula_normalizada
+                    and documento.cartorio_id == imovel.cartorio_id
+                ),
+                None,
+            )
+            return identidade or next(iter(documentos), None)
+
         # Primeiro, tentar encontrar a identidade registral exata do imóvel.
         documento_principal = Documento.objects.filter(
             imovel=imovel,
@@ -80,7 +144,9 @@ class HierarquiaArvoreService:
         return documento_principal
     
     @staticmethod
-    def _construir_arvore_a_partir_documento(documento_principal, imovel, criar_documentos_automaticos):
+    def _construir_arvore_a_partir_documento(
+        documento_principal, imovel, criar_documentos_automaticos, grafo=None
+    ):
         """
         Constrói a árvore a partir do documento principal
         """
@@ -97,13 +163,32 @@ class HierarquiaArvoreService:
             'conexoes': []
         }
         
-        # Otimização: prefetch_related para evitar N+1 queries (issue #93)
-        documento_principal = Documento.objects.select_related(
-            'tipo', 'cartorio'
-        ).prefetch_related(
-            'lancamentos__tipo',
-            'lancamentos__origens_fim_cadeia'
-        ).get(id=documento_principal.id)
+        # A criação automática de documentos altera o grafo durante a
+        # travessia e por isso segue sempre salto a salto, sem snapshot.
+        if criar_documentos_automaticos:
+            grafo = None
+
+        arestas_cadeia = None
+        if grafo is not None:
+            # Documentos, lançamentos e arestas já carregados em lote.
+            documento_principal = grafo.obter(documento_principal)
+            arestas_cadeia = grafo.arestas
+        else:
+            # Otimização: prefetch_related para evitar N+1 queries (issue #93)
+            documento_principal = Documento.objects.select_related(
+                'tipo', 'cartorio'
+            ).prefetch_related(
+                'lancamentos__tipo',
+                'lancamentos__origens_fim_cadeia'
+            ).get(id=documento_principal.id)
+
+            # No PostgreSQL, todas as arestas da cadeia são lidas de uma vez
+            # com uma consulta recursiva; nos demais bancos, uma consulta por
+            # salto.
+            if not criar_documentos_automaticos:
+                arestas_cadeia = CadeiaArestaService.arestas_da_cadeia(
+                    documento_principal.id
+                )
 
         # Usar busca em largura para construir a árvore
         documentos_processados = set()
@@ -125,26 +210,24 @@ class HierarquiaArvoreService:
             arvore['documentos'].append(doc_node)
 
             # Injetar nós de fim de cadeia (issue #85)
-            for lanc_fc in documento_atual.lancamentos.filter(
-                origens_fim_cadeia__fim_cadeia=True
-            ).distinct():
-                for origem_fc in lanc_fc.origens_fim_cadeia.filter(
-                    fim_cadeia=True
-                ).order_by('indice_origem'):
-                    no_fc = HierarquiaArvoreService._criar_no_fim_cadeia(
-                        documento_atual, lanc_fc, origem_fc)
-                    arvore['documentos'].append(no_fc)
-                    arvore['conexoes'].append({
-                        'from': documento_atual.id,
-                        'to': no_fc['id'],
-                        'from_numero': documento_atual.numero,
-                        'to_numero': 'Fim de Cadeia',
-                        'tipo': 'fim_cadeia',
-                    })
+            for lanc_fc, origem_fc in HierarquiaArvoreService._origens_fim_cadeia(
+                documento_atual, grafo
+            ):
+                no_fc = HierarquiaArvoreService._criar_no_fim_cadeia(
+                    documento_atual, lanc_fc, origem_fc)
+                arvore['documentos'].append(no_fc)
+                arvore['conexoes'].append({
+                    'from': documento_atual.id,
+                    'to': no_fc['id'],
+                    'from_numero': documento_atual.numero,
+                    'to_numero': 'Fim de Cadeia',
+                    'tipo': 'fim_cadeia',
+                })
 
             # Buscar documentos pais (origens) deste documento
             documentos_pais = HierarquiaArvoreService._buscar_documentos_pais(
-                documento_atual, imovel, criar_documentos_automaticos
+                documento_atual, imovel, criar_documentos_automaticos,
+                arestas_cadeia=arestas_cadeia,
             )
             
             # Adicionar conexões diretas e documentos pais à fila
@@ -168,6 +251,8 @@ class HierarquiaArvoreService:
                 if doc_pai.id not in documentos_processados:
                     fila.append((doc_pai, nivel + 1))
         
+        HierarquiaArvoreService._preencher_cadeias_compartilhadas(arvore, imovel, grafo)
+
         # Recalcular níveis baseado na hierarquia real
         HierarquiaArvoreService._recalcular_niveis(arvore, documento_principal.id)
 
@@ -187,12 +272,8 @@ class HierarquiaArvoreService:
         return arvore
     
     @staticmethod
-    def _resolver_documento_por_codigo(codigo, cartorio):
-        """
-        Resolve um documento pela identidade completa (tipo, número
-        normalizado e cartório), nunca por número isolado. Sem cartório, com
-        tipo incompatível ou com identidade ambígua, não seleciona documento.
-        """
+    def _identidade_do_codigo(codigo, cartorio):
+        """Monta a identidade completa de um código M/T no cartório informado."""
         if not cartorio or not codigo:
             return None
         primeiro = codigo.strip()[:1].upper()
@@ -203,20 +284,35 @@ class HierarquiaArvoreService:
         else:
             return None
         try:
-            identidade = DocumentoIdentidade(tipo, codigo, cartorio.pk)
+            return DocumentoIdentidade(tipo, codigo, cartorio.pk)
         except (TypeError, ValueError):
             return None
+
+    @staticmethod
+    def _resolver_documento_por_codigo(codigo, cartorio):
+        """
+        Resolve um documento pela identidade completa (tipo, número
+        normalizado e cartório), nunca por número isolado. Sem cartório, com
+        tipo incompatível ou com identidade ambígua, não seleciona documento.
+        """
+        identidade = HierarquiaArvoreService._identidade_do_codigo(codigo, cartorio)
+        if identidade is None:
+            return None
         resultado = DocumentoIdentidadeService.resolver(identidade)
         return resultado.documento if resultado.status == 'encontrado' else None
 
     @staticmethod
-    def _buscar_documentos_pais(documento, imovel, criar_documentos_automaticos):
+    def _buscar_documentos_pais(
+        documento, imovel, criar_documentos_automaticos, arestas_cadeia=None
+    ):
         """
         Busca documentos pais (origens) de um documento
         CORREÇÃO: Para o documento do imóvel atual, buscar apenas origens diretas
+
+        ``arestas_cadeia`` é o resultado de ``CadeiaArestaService.arestas_da_cadeia``
+        já carregado para toda a cadeia, quando disponível.
         """
         documentos_pais = []
-        documentos_processados = set()
 
         # CORREÇÃO: Verificar se é o documento principal do imóvel atual
         is_documento_principal = (
@@ -226,54 +322,27 @@ class HierarquiaArvoreService:
             and documento.cartorio_id == imovel.cartorio_id
         )
 
-        # Buscar lançamentos com origens
-        lancamentos = documento.lancamentos.all()
-
-        for lancamento in lancamentos:
-            # CORREÇÃO: Para documento principal, buscar apenas origens diretas
-            if is_documento_principal:
-                # Para o documento principal, buscar apenas documentos que são origens diretas
-                # (documentos que estão no mesmo imóvel e são citados como origem)
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    chave = (origem.codigo, origem.cartorio_id)
-                    if chave in documentos_processados:
-                        continue
-
-                    documentos_processados.add(chave)
-
-                    # Resolver documento pela identidade completa
-                    doc_pai = HierarquiaArvoreService._resolver_documento_por_codigo(
-                        origem.codigo, origem.cartorio
-                    )
-
-                    if doc_pai:
-                        # Adicionar como origem direta do documento principal
-                        documentos_pais.append(doc_pai)
-            else:
-                # Para outros documentos, usar lógica normal
-                for origem in LancamentoOrigemLeituraService.obter_origens(lancamento):
-                    chave = (origem.codigo, origem.cartorio_id)
-                    if chave in documentos_processados:
-                        continue
-
-                    documentos_processados.add(chave)
-
-                    # Resolver documento pela identidade completa
-                    doc_pai = HierarquiaArvoreService._resolver_documento_por_codigo(
-                        origem.codigo, origem.cartorio
-                    )
-
-                    if doc_pai:
-                        documentos_pais.append(doc_pai)
-                    elif criar_documentos_automaticos:
-                        # Criar documento automaticamente se solicitado, sempre
-                        # com o cartório da própria origem (nunca um cartório
-                        # arbitrário).
-                        doc_pai = HierarquiaArvoreService._criar_documento_automatico(
-                            origem.codigo, origem.cartorio, imovel
-                        )
-                        if doc_pai:
-                            documentos_pais.append(doc_pai)
+        # Arestas materializadas do documento, sem repetir a mesma identidade.
+        origens = {}
+        if arestas_cadeia is None:
+            arestas_cadeia = CadeiaArestaService.arestas_por_documento([documento.id])
+        for aresta in arestas_cadeia.get(documento.id, []):
+            origens.setdefault((aresta.codigo, aresta.cartorio_id), aresta)
+
+        for aresta in origens.values():
+            doc_pai = aresta.documento_pai
+            if doc_pai:
+                documentos_pais.append(doc_pai)
+            elif criar_documentos_automaticos and not is_documento_principal:
+                # CORREÇÃO: o documento principal só recebe origens diretas
+                # já existentes. Para os demais, criar o documento sempre
+                # com o cartório da própria origem (nunca um cartório
+                # arbitrário).
+                doc_pai = HierarquiaArvoreService._criar_documento_automatico(
+                    aresta.codigo, aresta.cartorio, imovel
+                )
+                if doc_pai:
+                    documentos_pais.append(doc_pai)
 
         return documentos_pais
     
@@ -366,6 +435,56 @@ class HierarquiaArvoreService:
             'total_cadeias': 0
         }
     
+    @staticmethod
+    def _preencher_cadeias_compartilhadas(arvore, imovel, grafo=None):
+        """
+        Preenche, a partir do fechamento transitivo, os imóveis cujas cadeias
+        incluem cada documento da árvore.
+        """
+        if grafo is not None:
+            imoveis_por_documento = grafo.imoveis_por_documento
+        else:
+            documentos = Documento.objects.filter(
+                id__in=[
+                    no['id'] for no in arvore['documentos'] if not no.get('is_fim_cadeia')
+                ]
+            ).only('id', 'imovel_id')
+            imoveis_por_documento = CadeiaFechamentoService.imoveis_por_documento(
+                documentos
+            )
+
+        for no in arvore['documentos']:
+            if no.get('is_fim_cadeia'):
+                continue
+            imoveis = imoveis_por_documento.get(no['id'], [])
+            no['cadeias_dominiais'] = [
+                {
+                    'imovel_id': outro.id,
+                    'imovel_matricula': outro.matricula,
+                    'imovel_nome': outro.nome,
+                }
+                for outro in imoveis
+            ]
+            no['total_cadeias'] = len(imoveis)
+            no['imoveis_compartilhando'] = [
+                outro.matricula for outro in imoveis if outro.id != imovel.id
+            ]
+
+    @staticmethod
+    def _origens_fim_cadeia(documento, grafo=None):
+        """Pares ``(lançamento, origem)`` de fim de cadeia ativos do documento."""
+        if grafo is not None:
+            return grafo.origens_fim_cadeia(documento)
+        return [
+            (lanc_fc, origem_fc)
+            for lanc_fc in documento.lancamentos.filter(
+                origens_fim_cadeia__fim_cadeia=True
+            ).distinct()
+            for origem_fc in lanc_fc.origens_fim_cadeia.filter(
+                fim_cadeia=True
+            ).order_by('indice_origem')
+        ]
+
     @staticmethod
     def _criar_no_fim_cadeia(documento, lancamento_fc, origem_fc):
         """Cria um nó especial de fim de cadeia para a árvore D3 (issue #85)."""
@@ -5,7 +5,6 @@ Service especializado para processamento de origens na hierarquia
 from ..models import Documento, Lancamento, Cartorios, DocumentoTipo
 from ..utils.documento_identidade_utils import DocumentoIdentidade
 from .documento_identidade_service import DocumentoIdentidadeService
-from .cache_service import CacheService
 from .cri_service import CRIService
 from .lancamento_origem_leitura_service import LancamentoOrigemLeituraService
 from django.utils import timezone
@@ -156,10 +155,6 @@ class HierarquiaOrigemService:
                 imovel, dados_documento, cri_origem=cartorio_origem
             )
             
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
-            
             # Retornar origem identificada criada
             return HierarquiaOrigemService._criar_origem_identificada(
                 lancamento, origem_info, documento_criado.id, True
@@ -7,6 +7,7 @@ from ..utils.hierarquia_utils import identificar_tronco_principal, identificar_t
 from .cache_service import CacheService
 from .hierarquia_arvore_service import HierarquiaArvoreService
 from .hierarquia_origem_service import HierarquiaOrigemService
+from .tronco_principal_service import TroncoPrincipalService
 
 
 class HierarquiaService:
@@ -18,7 +19,7 @@ class HierarquiaService:
     # ==================== TRONCO PRINCIPAL ====================
     
     @staticmethod
-    def obter_tronco_principal(imovel, escolhas_origem=None):
+    def obter_tronco_principal(imovel, escolhas_origem=None, grafo=None):
         """
         Obtém o tronco principal da cadeia dominial com cache
         """
@@ -31,8 +32,9 @@ class HierarquiaService:
             if cached_tronco:
                 return cached_tronco
         
-        # Calcular tronco considerando escolhas de origem
-        tronco = identificar_tronco_principal(imovel, escolhas_origem)
+        # Tronco padrão persistido; com escolhas, recalcula apenas a partir
+        # do primeiro documento com escolha de origem
+        tronco = TroncoPrincipalService.obter(imovel, escolhas_origem, grafo=grafo)
         
         # Armazenar em cache apenas se não houver escolhas
         if not escolhas_origem:
@@ -119,11 +121,13 @@ class HierarquiaService:
     # ==================== ÁRVORE D3 ====================
     
     @staticmethod
-    def construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos=False):
+    def construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos=False, grafo=None):
         """
         Constrói a estrutura de árvore da cadeia dominial para visualização
         """
-        return HierarquiaArvoreService.construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos)
+        return HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+            imovel, criar_documentos_automaticos, grafo=grafo
+        )
     
     # ==================== ORIGENS ====================
     
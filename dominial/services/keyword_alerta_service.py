@@ -33,3 +33,24 @@ def buscar_keyword(observacoes):
             if encontrada is None or kw['priority'] < encontrada['priority']:
                 encontrada = kw
     return encontrada
+
+
+def buscar_keyword_prioritaria(lancamentos):
+    """
+    Keyword de maior prioridade entre as observações dos lançamentos
+    (instâncias ou dicts), ou None.
+    """
+    keyword_doc = None
+    for lancamento in lancamentos:
+        observacoes = (
+            lancamento.get('observacoes', '')
+            if isinstance(lancamento, dict)
+            else lancamento.observacoes
+        )
+        keyword = buscar_keyword(observacoes)
+        if keyword and (
+            keyword_doc is None
+            or keyword['priority'] < keyword_doc['priority']
+        ):
+            keyword_doc = keyword
+    return keyword_doc
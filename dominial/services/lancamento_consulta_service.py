@@ -3,9 +3,7 @@ Service especializado para consultas e filtros de lançamentos
 """
 
 from django.db.models import Q, Case, When, IntegerField, Value
-from django.core.paginator import Paginator
 from ..models import Lancamento, DocumentoTipo, LancamentoTipo
-import re
 
 
 class LancamentoConsultaService:
@@ -14,37 +12,26 @@ class LancamentoConsultaService:
     """
     
     @staticmethod
-    def _extrair_numero_simples(numero_lancamento):
+    def ordenados_por_numero_simples(queryset):
         """
-        Extrai o número simples do numero_lancamento para ordenação
-        Ex: "R4M235" -> 4, "AV12M235" -> 12, "AV4 M2725" -> 4, "M235" -> 0 (início de matrícula)
+        Ordena no banco por número simples (decrescente, início de matrícula
+        por último) e ID.
         """
-        if not numero_lancamento:
-            return 0
-        
-        # Para início de matrícula, retornar 0 para ficar por último
-        if not numero_lancamento.startswith(('R', 'AV')):
-            return 0
-        
-        # Extrair número após R ou AV (com ou sem espaço)
-        match = re.search(r'^(R|AV)(\d+)', numero_lancamento)
-        if match:
-            return int(match.group(2))
-        
-        return 0
-    
+        return queryset.order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
+
     @staticmethod
-    def filtrar_lancamentos(filtros=None, pagina=None, itens_por_pagina=10):
+    def filtrar_lancamentos(filtros=None, depois=None, antes=None, itens_por_pagina=10):
         """
-        Filtra lançamentos com base nos parâmetros fornecidos
+        Filtra lançamentos com paginação por cursor (keyset)
         
         Args:
             filtros: Dicionário com filtros (tipo_documento, tipo_lancamento, busca)
-            pagina: Número da página para paginação
+            depois: Cursor do último item da página anterior (próxima página)
+            antes: Cursor do primeiro item da página seguinte (página anterior)
             itens_por_pagina: Quantidade de itens por página
             
         Returns:
-            dict: Dicionário com lançamentos paginados e metadados
+            dict: Lançamentos da página, total e cursores das páginas vizinhas
         """
         # Iniciar queryset com otimizações
         lancamentos = Lancamento.objects.select_related(
@@ -54,31 +41,63 @@ class LancamentoConsultaService:
         # Aplicar filtros se fornecidos
         if filtros:
             lancamentos = LancamentoConsultaService._aplicar_filtros(lancamentos, filtros)
-        
-        # Ordenar por ID primeiro, depois aplicar ordenação por número simples em Python
-        lancamentos = lancamentos.order_by('id')
-        
-        # Converter para lista e ordenar por número simples em Python (decrescente)
-        lancamentos_list = list(lancamentos)
-        lancamentos_list.sort(key=lambda x: (
-            -LancamentoConsultaService._extrair_numero_simples(x.numero_lancamento),
-            x.id
-        ))
-        
-        # Paginação manual
-        total_registros = len(lancamentos_list)
-        total_paginas = (total_registros + itens_por_pagina - 1) // itens_por_pagina
-        pagina_atual = int(pagina) if pagina else 1
-        inicio = (pagina_atual - 1) * itens_por_pagina
-        fim = inicio + itens_por_pagina
-        lancamentos_paginados = lancamentos_list[inicio:fim]
-        
+        total_registros = lancamentos.count()
+        lancamentos = LancamentoConsultaService.ordenados_por_numero_simples(lancamentos)
+
+        # A página é lida a partir da posição do cursor na ordenação
+        # (numero_simples desc, id asc): o custo não depende de quantas
+        # páginas vêm antes. Um item a mais indica se há outra página.
+        cursor_depois = LancamentoConsultaService._ler_cursor(depois)
+        cursor_antes = None if cursor_depois else LancamentoConsultaService._ler_cursor(antes)
+        if cursor_antes:
+            numero, lancamento_id = cursor_antes
+            pagina = list(
+                lancamentos.filter(
+                    Q(numero_simples__gt=numero)
+                    | Q(numero_simples=numero, id__lt=lancamento_id)
+                ).order_by('numero_simples', '-id')[:itens_por_pagina + 1]
+            )
+            ha_anterior = len(pagina) > itens_por_pagina
+            pagina = pagina[:itens_por_pagina][::-1]
+            ha_proxima = True
+            # Voltando até o início, mostra a primeira página completa.
+            if not ha_anterior:
+                cursor_antes = None
+        if not cursor_antes:
+            if cursor_depois:
+                numero, lancamento_id = cursor_depois
+                lancamentos = lancamentos.filter(
+                    Q(numero_simples__lt=numero)
+                    | Q(numero_simples=numero, id__gt=lancamento_id)
+                )
+            pagina = list(lancamentos[:itens_por_pagina + 1])
+            ha_proxima = len(pagina) > itens_por_pagina
+            pagina = pagina[:itens_por_pagina]
+            ha_anterior = cursor_depois is not None
+
         return {
-            'lancamentos': lancamentos_paginados,
+            'lancamentos': pagina,
             'total_registros': total_registros,
-            'total_paginas': total_paginas,
-            'pagina_atual': pagina_atual,
+            'cursor_anterior': (
+                LancamentoConsultaService._cursor(pagina[0]) if ha_anterior and pagina else None
+            ),
+            'cursor_proximo': (
+                LancamentoConsultaService._cursor(pagina[-1]) if ha_proxima and pagina else None
+            ),
         }
+
+    @staticmethod
+    def _cursor(lancamento):
+        return f"{lancamento.numero_simples}_{lancamento.id}"
+
+    @staticmethod
+    def _ler_cursor(valor):
+        """``'<numero_simples>_<id>'`` -> tupla de inteiros; inválido -> None."""
+        try:
+            numero, lancamento_id = (valor or '').split('_')
+            return int(numero), int(lancamento_id)
+        except ValueError:
+            return None
     
     @staticmethod
     def _aplicar_filtros(queryset, filtros):
@@ -143,12 +162,7 @@ class LancamentoConsultaService:
             lancamentos = lancamentos.order_by('numero_lancamento', 'id')
         elif ordenacao == 'numero_simples':
             # Ordenar por número simples (decrescente), com início de matrícula por último
-            lancamentos_list = list(lancamentos)
-            lancamentos_list.sort(key=lambda x: (
-                -LancamentoConsultaService._extrair_numero_simples(x.numero_lancamento),
-                x.id
-            ))
-            return lancamentos_list
+            lancamentos = LancamentoConsultaService.ordenados_por_numero_simples(lancamentos)
         else:
             lancamentos = lancamentos.order_by('id')
         
@@ -176,12 +190,7 @@ class LancamentoConsultaService:
             lancamentos = lancamentos.order_by('numero_lancamento', 'id')
         elif ordenacao == 'numero_simples':
             # Ordenar por número simples (decrescente), com início de matrícula por último
-            lancamentos_list = list(lancamentos)
-            lancamentos_list.sort(key=lambda x: (
-                -LancamentoConsultaService._extrair_numero_simples(x.numero_lancamento),
-                x.id
-            ))
-            return lancamentos_list
+            lancamentos = LancamentoConsultaService.ordenados_por_numero_simples(lancamentos)
         else:
             lancamentos = lancamentos.order_by('id')
         
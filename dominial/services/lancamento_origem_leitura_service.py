@@ -38,11 +38,20 @@ class LancamentoOrigemLeituraService:
 
     @classmethod
     def obter_origens(cls, lancamento):
-        estruturadas = list(
-            lancamento.origens_estruturadas.select_related('cartorio').order_by(
-                'indice_origem', 'id'
+        prefetched = getattr(lancamento, '_prefetched_objects_cache', {})
+        if 'origens_estruturadas' in prefetched:
+            # Já carregadas em lote (ex.: CadeiaGrafo); evita uma consulta
+            # por lançamento.
+            estruturadas = sorted(
+                lancamento.origens_estruturadas.all(),
+                key=lambda origem: (origem.indice_origem, origem.id),
+            )
+        else:
+            estruturadas = list(
+                lancamento.origens_estruturadas.select_related('cartorio').order_by(
+                    'indice_origem', 'id'
+                )
             )
-        )
         if estruturadas:
             return tuple(
                 OrigemLancamentoLeitura(
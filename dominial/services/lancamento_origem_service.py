@@ -11,7 +11,7 @@ from django.utils import timezone
 from ..utils.hierarquia_utils import processar_origens_para_documentos
 from ..models import Cartorios, Documento, DocumentoTipo, LancamentoOrigem
 from ..services.cri_service import CRIService
-from ..services.cache_service import CacheService
+from ..services.cadeia_aresta_service import CadeiaArestaService
 from ..services.documento_identidade_service import DocumentoIdentidadeService
 from ..utils.documento_identidade_utils import (
     DocumentoIdentidade,
@@ -166,7 +166,8 @@ class LancamentoOrigemService:
                 'folha': folha,
             })
 
-        with transaction.atomic():
+        # Uma única reconstrução das arestas da cadeia ao final.
+        with CadeiaArestaService.sincronizacao_adiada(), transaction.atomic():
             existentes = list(
                 LancamentoOrigem.objects.select_for_update().filter(
                     lancamento=lancamento
@@ -353,10 +354,6 @@ class LancamentoOrigemService:
             imovel, dados_documento, cri_origem=cartorio_atual
         )
         
-        # Invalidar cache do imóvel
-        CacheService.invalidate_documentos_imovel(imovel.id)
-        CacheService.invalidate_tronco_principal(imovel.id)
-        
         return f'Documento de fim de cadeia criado: {documento_criado.numero} ({documento_criado.tipo.get_tipo_display()}) com classificação "{classificacao}"'
     
     @staticmethod
@@ -540,10 +537,6 @@ class LancamentoOrigemService:
                 imovel, dados_documento, cri_origem=cartorio_origem
             )
 
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
-
             return documento_criado
 
         except DocumentoTipo.DoesNotExist:
@@ -624,10 +617,6 @@ class LancamentoOrigemService:
                 imovel, dados_documento, cri_origem=cartorio_origem
             )
             
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
-            
             return documento_criado
             
         except DocumentoTipo.DoesNotExist:
@@ -188,11 +188,13 @@ class LancamentoService:
     # ==================== CONSULTAS ====================
     
     @staticmethod
-    def filtrar_lancamentos(filtros=None, pagina=None, itens_por_pagina=10):
+    def filtrar_lancamentos(filtros=None, depois=None, antes=None, itens_por_pagina=10):
         """
-        Filtra lançamentos com paginação
+        Filtra lançamentos com paginação por cursor
         """
-        return LancamentoConsultaService.filtrar_lancamentos(filtros, pagina, itens_por_pagina)
+        return LancamentoConsultaService.filtrar_lancamentos(
+            filtros, depois, antes, itens_por_pagina
+        )
     
     @staticmethod
     def obter_lancamentos_por_documento(documento, ordenacao='id'):
@@ -0,0 +1,526 @@
+"""
+Service para importar cartórios de registro de imóveis do ONR
+(registrodeimoveis.org.br)
+"""
+
+import html
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from ..models import Cartorios, ImportacaoCartorios, ImportacaoCartoriosCidade
+from ..models.busca_nome import indica_cartorio_imoveis, normalizar_busca
+
+logger = logging.getLogger(__name__)
+
+URL_CONSULTA = 'https://www.registrodeimoveis.org.br/includes/consulta-cartorios.php'
+
+# Conexão e leitura da resposta (segundos)
+TIMEOUT_ONR = (10, 60)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0',
+    'Accept': '*/*',
+    'Accept-Language': 'pt-BR,pt;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-origin',
+    'Priority': 'u=0',
+    'Referer': 'https://www.registrodeimoveis.org.br/cartorios'
+}
+
+PALAVRAS_IMOVEIS = (
+    'imovel', 'imoveis', 'imóveis', 'imobiliario', 'imobiliária',
+    'registro de imóveis', 'registro de imoveis'
+)
+
+# Execuções em andamento sem checkpoint novo há mais tempo que isso são
+# consideradas abandonadas (worker reiniciado) e voltam para a fila; as
+# cidades já gravadas são puladas na retomada.
+TEMPO_MAXIMO_INATIVIDADE = timedelta(minutes=10)
+
+CAMPOS_ATUALIZADOS = (
+    'nome', 'endereco', 'telefone', 'email', 'estado', 'cidade',
+    'nome_busca', 'eh_cartorio_imoveis',
+)
+
+
+class LimitadorTaxa:
+    """
+    Token bucket compartilhado pelas threads: no máximo ``taxa`` requisições
+    por segundo, com rajadas de até ``capacidade``. ``pausar`` suspende
+    todas as threads (backoff após 403 do ONR).
+    """
+
+    def __init__(self, taxa, capacidade=1, relogio=time.monotonic, dormir=time.sleep):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self.relogio = relogio
+        self.dormir = dormir
+        self._tokens = self.capacidade
+        self._atualizado_em = relogio()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._lock:
+                agora = self.relogio()
+                if agora < self._pausado_ate:
+                    espera = self._pausado_ate - agora
+                else:
+                    self._tokens = min(
+                        self.capacidade,
+                        self._tokens + (agora - self._atualizado_em) * self.taxa,
+                    )
+                    self._atualizado_em = agora
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    espera = (1 - self._tokens) / self.taxa
+            self.dormir(espera)
+
+    def pausar(self, segundos):
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, self.relogio() + segundos)
+
+
+class OnrCartoriosService:
+    """
+    Busca as cidades de um estado em paralelo (pool de threads limitado,
+    uma ``requests.Session`` com pool de conexões) e grava os cartórios em
+    lotes de upsert por ``cns``. As gravações ficam na thread principal.
+    """
+
+    MAX_TENTATIVAS = 2
+    # Espera após um 403, multiplicada pela tentativa (com 2 tentativas,
+    # uma única repetição após 3s)
+    ESPERA_403 = 3
+
+    @staticmethod
+    def criar_sessao(workers):
+        sessao = requests.Session()
+        sessao.headers.update(HEADERS)
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+        sessao.mount('https://', adaptador)
+        sessao.mount('http://', adaptador)
+        return sessao
+
+    @staticmethod
+    def is_cartorio_imoveis(nome):
+        """Verifica se o cartório é de registro de imóveis"""
+        nome_lower = nome.lower()
+        return any(palavra in nome_lower for palavra in PALAVRAS_IMOVEIS)
+
+    @staticmethod
+    def buscar_cidades(sessao, estado):
+        response = sessao.post(URL_CONSULTA, data={'estado': estado}, timeout=TIMEOUT_ONR)
+        response.raise_for_status()
+        cidades = []
+        for cidade_dict in response.json():
+            # Tratar caso onde cidade_dict pode ser string ou dicionário
+            cidade = cidade_dict if isinstance(cidade_dict, str) else cidade_dict.get('value')
+            if cidade:
+                cidades.append(cidade)
+        return cidades
+
+    @staticmethod
+    def buscar_cartorios_cidade(sessao, limitador, estado, cidade):
+        """
+        Cartórios de uma cidade. Um 403 é repetido até ``MAX_TENTATIVAS``
+        vezes, pausando todas as threads; outros erros não são repetidos.
+        """
+        for tentativa in range(OnrCartoriosService.MAX_TENTATIVAS):
+            limitador.aguardar()
+            try:
+                response = sessao.post(
+                    URL_CONSULTA, data={'estado': estado, 'cidade': cidade}, timeout=TIMEOUT_ONR
+                )
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.HTTPError as e:
+                ultima = tentativa == OnrCartoriosService.MAX_TENTATIVAS - 1
+                if e.response is None or e.response.status_code != 403 or ultima:
+                    raise
+                limitador.pausar((tentativa + 1) * OnrCartoriosService.ESPERA_403)
+
+    @staticmethod
+    def dados_cartorio(cartorio, estado, cidade):
+        """Campos de ``Cartorios`` a partir do registro do ONR, ou None."""
+        cns = cartorio.get('codigo_cns', '')
+        nome = html.unescape(cartorio.get('nome_serventia', ''))
+        if not nome or not cns:
+            return None
+        partes = (
+            ('descricao_tipo_logradouro', ' '),
+            ('endereco_logradouro', ', '),
+            ('endereco_numero', ' '),
+            ('endereco_complemento', ' '),
+            ('endereco_bairro', ' '),
+            ('endereco_cep', ''),
+        )
+        endereco = ''.join(
+            cartorio[campo] + separador for campo, separador in partes if cartorio.get(campo)
+        )
+        return OnrCartoriosService.ajustar_campos({
+            'cns': cns,
+            'nome': nome,
+            'endereco': html.unescape(endereco.strip()),
+            'telefone': html.unescape(cartorio.get('telefone_1', '')),
+            'email': html.unescape(cartorio.get('publico_email', '')),
+            'estado': estado,
+            'cidade': cidade,
+        })
+
+    @staticmethod
+    def ajustar_campos(linha):
+        """
+        Corta os textos no ``max_length`` de ``Cartorios`` (ex.: vários
+        telefones em ``telefone_1``), para que uma linha longa não derrube o
+        lote no PostgreSQL. Retorna None se o ``cns`` não cabe.
+        """
+        if len(linha['cns']) > Cartorios._meta.get_field('cns').max_length:
+            return None
+        ajustada = dict(linha)
+        for campo, valor in linha.items():
+            limite = Cartorios._meta.get_field(campo).max_length
+            if isinstance(valor, str) and limite and len(valor) > limite:
+                ajustada[campo] = valor[:limite].rstrip()
+        return ajustada
+
+    @staticmethod
+    def gravar_lote(linhas):
+        """
+        Upsert de um lote por ``cns`` em uma consulta. ``bulk_create`` não
+        passa por ``save()``: os campos de busca são calculados aqui.
+
+        Se o lote falha no banco, as linhas são regravadas uma a uma e só
+        as rejeitadas ficam de fora. Retorna quantos cartórios foram gravados.
+        """
+        por_cns = {linha['cns']: linha for linha in linhas}
+        limite_busca = Cartorios._meta.get_field('nome_busca').max_length
+        cartorios = []
+        for linha in por_cns.values():
+            nome_busca = normalizar_busca(linha['nome'])[:limite_busca]
+            cartorios.append(Cartorios(
+                **linha,
+                nome_busca=nome_busca,
+                eh_cartorio_imoveis=indica_cartorio_imoveis(nome_busca),
+            ))
+        try:
+            OnrCartoriosService._upsert(cartorios)
+            return len(cartorios)
+        except DatabaseError as e:
+            logger.warning(f'Lote de {len(cartorios)} cartórios rejeitado ({e}); gravando um a um')
+
+        gravados = 0
+        for cartorio in cartorios:
+            try:
+                OnrCartoriosService._upsert([cartorio])
+                gravados += 1
+            except DatabaseError as e:
+                logger.error(f'Cartório {cartorio.cns} ({cartorio.nome}) não gravado: {e}')
+        return gravados
+
+    @staticmethod
+    def _upsert(cartorios):
+        # Savepoint próprio: no PostgreSQL a falha não invalida a transação externa.
+        with transaction.atomic():
+            Cartorios.objects.bulk_create(
+                cartorios,
+                update_conflicts=True,
+                unique_fields=['cns'],
+                update_fields=list(CAMPOS_ATUALIZADOS),
+            )
+
+    @staticmethod
+    def _registrar_cidades(importacao, cidades):
+        """
+        Cria os checkpoints das cidades ainda não registradas e retorna as
+        já gravadas em execuções anteriores.
+        """
+        ImportacaoCartoriosCidade.objects.bulk_create(
+            [ImportacaoCartoriosCidade(importacao=importacao, cidade=cidade) for cidade in cidades],
+            ignore_conflicts=True,
+        )
+        importacao.total_cidades = len(cidades)
+        importacao.save(update_fields=['total_cidades'])
+        return set(
+            importacao.cidades.filter(status='gravada').values_list('cidade', flat=True)
+        )
+
+    @staticmethod
+    def importar_estado(estado, sessao, limitador, workers=4, tamanho_lote=500,
+                        dry_run=False, log=None, importacao=None):
+        """
+        Importa os cartórios de imóveis de todas as cidades do estado.
+        ``log`` recebe as mensagens de progresso. Com ``importacao``, cada
+        cidade tem seu checkpoint e as já gravadas são puladas. Retorna o
+        relatório.
+        """
+        log = log or logger.info
+        cidades = list(dict.fromkeys(OnrCartoriosService.buscar_cidades(sessao, estado)))
+        log(f'Cidades encontradas: {len(cidades)}')
+
+        checkpoints = None
+        gravadas = set()
+        if importacao is not None and not dry_run:
+            checkpoints = importacao.cidades
+            gravadas = OnrCartoriosService._registrar_cidades(importacao, cidades)
+            if gravadas:
+                log(f'Retomando: {len(gravadas)} cidades já gravadas serão puladas')
+        pendentes = [cidade for cidade in cidades if cidade not in gravadas]
+
+        relatorio = {
+            'estado': estado,
+            'modo': 'dry-run' if dry_run else 'importacao',
+            'cidades': len(cidades),
+            'cidades_puladas': len(gravadas),
+            'cidades_com_erro': 0,
+            'cartorios_imoveis': 0,
+            'ignorados': 0,
+            'gravados': 0,
+            'rejeitados': 0,
+            'lotes': 0,
+        }
+        buffer = []
+        cidades_no_buffer = []
+
+        def _descarregar():
+            if not dry_run:
+                if buffer:
+                    gravados = OnrCartoriosService.gravar_lote(buffer)
+                    relatorio['gravados'] += gravados
+                    relatorio['rejeitados'] += len({linha['cns'] for linha in buffer}) - gravados
+                    relatorio['lotes'] += 1
+                if checkpoints is not None and cidades_no_buffer:
+                    agora = timezone.now()
+                    checkpoints.filter(cidade__in=cidades_no_buffer).update(
+                        status='gravada', gravada_em=agora, atualizada_em=agora, erro=None
+                    )
+            buffer.clear()
+            cidades_no_buffer.clear()
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futuros = {
+                executor.submit(
+                    OnrCartoriosService.buscar_cartorios_cidade, sessao, limitador, estado, cidade
+                ): cidade
+                for cidade in pendentes
+            }
+            try:
+                for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+                    cidade = futuros[futuro]
+                    try:
+                        cartorios = futuro.result()
+                    except Exception as e:
+                        relatorio['cidades_com_erro'] += 1
+                        logger.error(f'Erro ao buscar cartórios de {cidade}: {str(e)}')
+                        log(f'  ❌ Erro ao buscar cartórios de {cidade}: {str(e)} ({concluidas}/{len(pendentes)})')
+                        if checkpoints is not None:
+                            checkpoints.filter(cidade=cidade).update(
+                                status='erro', erro=str(e) or type(e).__name__,
+                                atualizada_em=timezone.now(),
+                            )
+                        continue
+
+                    filtrados = [
+                        cartorio for cartorio in cartorios
+                        if OnrCartoriosService.is_cartorio_imoveis(
+                            html.unescape(cartorio.get('nome_serventia', ''))
+                        )
+                    ]
+                    encontrados = 0
+                    for cartorio in filtrados:
+                        dados = OnrCartoriosService.dados_cartorio(cartorio, estado, cidade)
+                        if dados is None:
+                            relatorio['ignorados'] += 1
+                            continue
+                        buffer.append(dados)
+                        encontrados += 1
+                    relatorio['cartorios_imoveis'] += encontrados
+                    cidades_no_buffer.append(cidade)
+                    if checkpoints is not None:
+                        agora = timezone.now()
+                        checkpoints.filter(cidade=cidade).update(
+                            status='buscada', cartorios=encontrados, buscada_em=agora,
+                            atualizada_em=agora, erro=None,
+                        )
+                    log(
+                        f'{cidade}: {len(filtrados)} cartórios de imóveis '
+                        f'(de {len(cartorios)} total) ({concluidas}/{len(pendentes)})'
+                    )
+                    if len(buffer) >= tamanho_lote or len(cidades_no_buffer) >= tamanho_lote:
+                        _descarregar()
+            except BaseException:
+                # Um erro ao gravar não espera as cidades restantes: as
+                # ainda não iniciadas são canceladas.
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        _descarregar()
+        return relatorio
+
+    @staticmethod
+    def obter_importacao(estado, importacao_id=None, retomar=False):
+        """
+        Execução a usar: a indicada, a última não concluída do estado
+        (``retomar``) ou uma nova. Retorna None se, ao retomar, a última
+        execução do estado já foi concluída.
+        """
+        if importacao_id is not None:
+            return ImportacaoCartorios.objects.get(id=importacao_id, estado=estado)
+        if retomar:
+            ultima = ImportacaoCartorios.objects.filter(estado=estado).order_by('-data_inicio', '-id').first()
+            if ultima is not None:
+                return None if ultima.status == 'concluido' else ultima
+        return ImportacaoCartorios.objects.create(estado=estado)
+
+    @staticmethod
+    def executar_importacao(importacao, sessao, limitador, **opcoes):
+        """
+        Roda ``importar_estado`` com checkpoints e atualiza o status da
+        execução. Cidades com erro deixam a execução em ``erro``, pronta
+        para ser retomada.
+        """
+        importacao.status = 'em_andamento'
+        importacao.erro = None
+        importacao.data_fim = None
+        importacao.data_reserva = timezone.now()
+        importacao.save(update_fields=['status', 'erro', 'data_fim', 'data_reserva'])
+        try:
+            relatorio = OnrCartoriosService.importar_estado(
+                importacao.estado, sessao, limitador, importacao=importacao, **opcoes
+            )
+        except Exception as e:
+            importacao.status = 'erro'
+            importacao.erro = str(e)
+            importacao.save(update_fields=['status', 'erro'])
+            raise
+
+        importacao.total_cartorios = (
+            importacao.cidades.filter(status='gravada').aggregate(total=Sum('cartorios'))['total'] or 0
+        )
+        if relatorio['cidades_com_erro']:
+            importacao.status = 'erro'
+            importacao.erro = f"{relatorio['cidades_com_erro']} cidade(s) com erro; retome a importação"
+        else:
+            importacao.status = 'concluido'
+            importacao.data_fim = timezone.now()
+        importacao.save(update_fields=['status', 'erro', 'data_fim', 'total_cartorios'])
+        relatorio['importacao_id'] = importacao.id
+        return relatorio
+
+    @staticmethod
+    def enfileirar(estado):
+        """
+        Retorna a execução do estado que está na fila ou em andamento, ou
+        cria uma nova, pendente. O worker ``processar_importacoes_cartorios``
+        a executa fora da requisição.
+        """
+        existente = (
+            ImportacaoCartorios.objects.filter(estado=estado, status__in=['pendente', 'em_andamento'])
+            .order_by('-data_inicio', '-id')
+            .first()
+        )
+        if existente is not None:
+            return existente
+        return ImportacaoCartorios.objects.create(estado=estado)
+
+    @staticmethod
+    def reenfileirar(importacao):
+        """
+        Devolve à fila uma execução com erro (retomada a partir dos
+        checkpoints). Retorna False se ela já terminou ou está rodando.
+        """
+        if importacao.status == 'pendente':
+            return True
+        atualizadas = ImportacaoCartorios.objects.filter(pk=importacao.pk, status='erro').update(
+            status='pendente', erro=None, data_fim=None
+        )
+        if atualizadas:
+            importacao.status = 'pendente'
+            importacao.erro = None
+        return atualizadas == 1
+
+    @staticmethod
+    def reservar_proximo():
+        """
+        Marca como em andamento a execução pendente mais antiga e a retorna.
+        A reserva é um UPDATE condicional, seguro com vários workers.
+        """
+        pendentes = (
+            ImportacaoCartorios.objects.filter(status='pendente')
+            .order_by('data_inicio', 'id')
+            .values_list('id', flat=True)[:10]
+        )
+        for importacao_id in pendentes:
+            if OnrCartoriosService.reservar(importacao_id):
+                return ImportacaoCartorios.objects.get(pk=importacao_id)
+        return None
+
+    @staticmethod
+    def reservar(importacao_id):
+        return ImportacaoCartorios.objects.filter(
+            pk=importacao_id, status='pendente'
+        ).update(
+            status='em_andamento',
+            data_reserva=timezone.now(),
+            data_fim=None,
+            erro=None,
+        ) == 1
+
+    @staticmethod
+    def processar(importacao, workers=4, taxa=2.0, tamanho_lote=500, log=None):
+        """Executa uma importação já reservada; erros ficam na execução."""
+        sessao = OnrCartoriosService.criar_sessao(workers)
+        limitador = LimitadorTaxa(taxa, capacidade=workers)
+        try:
+            OnrCartoriosService.executar_importacao(
+                importacao, sessao, limitador,
+                workers=workers, tamanho_lote=tamanho_lote, log=log,
+            )
+        except Exception:
+            logger.exception('Erro ao processar importação de cartórios %s', importacao.id)
+        finally:
+            sessao.close()
+        return importacao
+
+    @staticmethod
+    def liberar_abandonados():
+        """
+        Devolve à fila execuções em andamento sem atividade (reserva ou
+        checkpoint) há mais que o tempo máximo.
+        """
+        limite = timezone.now() - TEMPO_MAXIMO_INATIVIDADE
+        ativas = ImportacaoCartoriosCidade.objects.filter(
+            importacao=OuterRef('pk'), atualizada_em__gte=limite
+        )
+        return (
+            ImportacaoCartorios.objects.filter(status='em_andamento')
+            .filter(Q(data_reserva__lt=limite) | Q(data_reserva__isnull=True))
+            .exclude(Exists(ativas))
+            .update(status='pendente')
+        )
+
+    @staticmethod
+    def status(importacao):
+        """Representação da execução consumida pelo polling da interface."""
+        return {
+            'id': importacao.id,
+            'estado': importacao.estado,
+            'status': importacao.status,
+            'total_cartorios': importacao.total_cartorios,
+            'erro': importacao.erro,
+            'concluido': importacao.status == 'concluido',
+            **importacao.progresso(),
+        }
@@ -0,0 +1,127 @@
+"""
+Renderização dos PDFs (WeasyPrint) em um pool de processos de longa duração.
+
+Cada processo do pool carrega uma única vez a configuração de fontes e as
+folhas de estilo dos PDFs; depois recebe apenas o HTML e devolve os bytes do
+PDF. Os processos são reciclados após ``PDF_RENDERIZACOES_POR_PROCESSO``
+renderizações para limitar o crescimento de memória, e uma renderização que
+exceda ``PDF_RENDERIZACAO_TIMEOUT`` derruba só o pool, recriado no pedido
+seguinte — nunca o processo que pediu o PDF.
+
+Com ``PDF_RENDERIZADORES = 0`` a renderização acontece no próprio processo,
+ainda reaproveitando as folhas de estilo já carregadas.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+
+from django.conf import settings
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
+
+FOLHAS_DE_ESTILO = ('cadeia_dominial_pdf.css', 'cadeia_completa_pdf.css')
+
+# Estado de cada processo renderizador (e do processo atual, no modo inline).
+_fontes = None
+_folhas = {}
+
+# Pool do processo atual, criado sob demanda.
+_pool = None
+_trava = threading.Lock()
+
+
+def _caminhos_css():
+    """Localiza as folhas de estilo em STATIC_ROOT ou em STATICFILES_DIRS."""
+    bases = [settings.STATIC_ROOT, *settings.STATICFILES_DIRS]
+    caminhos = {}
+    for nome in FOLHAS_DE_ESTILO:
+        for base in bases:
+            if not base:
+                continue
+            caminho = os.path.join(base, 'dominial', 'css', nome)
+            if os.path.exists(caminho):
+                caminhos[nome] = caminho
+                break
+    return caminhos
+
+
+def _carregar_estilos(caminhos):
+    """Inicializador dos processos: fontes e CSS são lidos uma única vez."""
+    global _fontes, _folhas
+    _fontes = FontConfiguration()
+    _folhas = {
+        nome: CSS(filename=caminho, font_config=_fontes)
+        for nome, caminho in caminhos.items()
+    }
+
+
+def _renderizar(html_string, css_nome, base_url):
+    if _fontes is None:
+        _carregar_estilos(_caminhos_css())
+    folha = _folhas.get(css_nome)
+    return HTML(string=html_string, base_url=base_url).write_pdf(
+        stylesheets=[folha] if folha is not None else None,
+        font_config=_fontes,
+    )
+
+
+class RenderizadorPdfService:
+    """Converte HTML em PDF fora do processo da requisição ou do worker."""
+
+    @staticmethod
+    def renderizar(html_string, css_nome, base_url=None):
+        """
+        Retorna os bytes do PDF de ``html_string`` com a folha de estilo
+        ``css_nome``. Levanta ``TimeoutError`` se a renderização exceder
+        ``PDF_RENDERIZACAO_TIMEOUT`` segundos.
+        """
+        processos = getattr(settings, 'PDF_RENDERIZADORES', 2)
+        if not processos:
+            return _renderizar(html_string, css_nome, base_url)
+
+        timeout = getattr(settings, 'PDF_RENDERIZACAO_TIMEOUT', 300)
+        resultado = RenderizadorPdfService._obter_pool(processos).apply_async(
+            _renderizar, (html_string, css_nome, base_url)
+        )
+        try:
+            return resultado.get(timeout=timeout)
+        except multiprocessing.TimeoutError:
+            # O processo travado (ou morto no meio da renderização) não
+            # devolve a tarefa; descarta o pool inteiro.
+            logger.error("Renderização de PDF excedeu %ss; recriando o pool", timeout)
+            RenderizadorPdfService.encerrar()
+            raise TimeoutError(f"A renderização do PDF excedeu {timeout} segundos.")
+
+    @staticmethod
+    def encerrar():
+        """Finaliza o pool e descarta os estilos carregados neste processo."""
+        global _pool, _fontes, _folhas
+        with _trava:
+            if _pool is not None:
+                _pool.terminate()
+                _pool.join()
+                _pool = None
+            _fontes = None
+            _folhas = {}
+
+    @staticmethod
+    def _obter_pool(processos):
+        global _pool
+        with _trava:
+            if _pool is None:
+                # fork: os processos herdam o Django já configurado e não
+                # tocam no banco de dados.
+                _pool = multiprocessing.get_context('fork').Pool(
+                    processes=processos,
+                    initializer=_carregar_estilos,
+                    initargs=(_caminhos_css(),),
+                    maxtasksperchild=getattr(settings, 'PDF_RENDERIZACOES_POR_PROCESSO', 50),
+                )
+            return _pool
+
+
+atexit.register(RenderizadorPdfService.encerrar)
@@ -0,0 +1,260 @@
+"""
+Service para os snapshots locais dos dados de referência: cartórios por
+estado (JSONL) e terras indígenas (GeoJSON). Permitem popular um ambiente
+sem acesso ao ONR nem ao GeoServer da FUNAI.
+"""
+
+import gzip
+import itertools
+import json
+import logging
+import os
+
+from django.utils import timezone
+
+from ..models import Cartorios, TerraIndigenaReferencia
+from ..utils.geojson_stream_utils import iterar_features, ler_blocos
+from .onr_cartorios_service import OnrCartoriosService
+from .terra_indigena_referencia_service import TerraIndigenaReferenciaService
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato gravada no cabeçalho; snapshots de versão maior são recusados.
+VERSAO_SNAPSHOT = 1
+
+FORMATO_CARTORIOS = 'cadeia-dominial/cartorios'
+FORMATO_TERRAS_INDIGENAS = 'cadeia-dominial/terras-indigenas'
+
+CAMPOS_CARTORIO = ('cns', 'nome', 'endereco', 'telefone', 'email', 'estado', 'cidade')
+
+
+class SnapshotService:
+    """
+    Exporta e ingere snapshots versionados. A ingestão lê o arquivo sob
+    demanda (linha a linha ou feature a feature) e grava em lotes de
+    upsert, relatando o que foi inserido, atualizado ou já estava igual.
+    """
+
+    @staticmethod
+    def caminho_cartorios(caminho, estado):
+        """Arquivo do estado; em um diretório, ``cartorios_<UF>.jsonl``."""
+        if os.path.isdir(caminho):
+            return os.path.join(caminho, f'cartorios_{estado.upper()}.jsonl')
+        return caminho
+
+    @staticmethod
+    def caminho_terras_indigenas(caminho):
+        if os.path.isdir(caminho):
+            return os.path.join(caminho, 'terras_indigenas.geojson')
+        return caminho
+
+    @staticmethod
+    def _abrir(caminho, modo):
+        """Abre em texto UTF-8; arquivos ``.gz`` são (des)comprimidos."""
+        if caminho.endswith('.gz'):
+            return gzip.open(caminho, modo + 't', encoding='utf-8')
+        return open(caminho, modo, encoding='utf-8')
+
+    @staticmethod
+    def _cabecalho(formato, **extras):
+        return {
+            'formato': formato,
+            'versao': VERSAO_SNAPSHOT,
+            'gerado_em': timezone.now().isoformat(),
+            **extras,
+        }
+
+    @staticmethod
+    def _validar_cabecalho(cabecalho, formato):
+        if cabecalho.get('formato') != formato:
+            raise ValueError(f'Arquivo não é um snapshot {formato}')
+        versao = cabecalho.get('versao')
+        if not isinstance(versao, int) or versao > VERSAO_SNAPSHOT:
+            raise ValueError(
+                f'Versão de snapshot não suportada: {versao} (suportada até {VERSAO_SNAPSHOT})'
+            )
+
+    @staticmethod
+    def _lotes(linhas, tamanho_lote):
+        lote = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    # Cartórios
+
+    @staticmethod
+    def exportar_cartorios(estado, caminho):
+        """Grava os cartórios do estado em JSONL: cabeçalho e um cartório por linha."""
+        caminho = SnapshotService.caminho_cartorios(caminho, estado)
+        registros = 0
+        with SnapshotService._abrir(caminho, 'w') as arquivo:
+            cabecalho = SnapshotService._cabecalho(FORMATO_CARTORIOS, estado=estado)
+            arquivo.write(json.dumps(cabecalho, ensure_ascii=False) + '\n')
+            cartorios = (
+                Cartorios.objects.filter(estado=estado)
+                .order_by('cns')
+                .values_list(*CAMPOS_CARTORIO)
+                .iterator(chunk_size=2000)
+            )
+            for valores in cartorios:
+                arquivo.write(json.dumps(dict(zip(CAMPOS_CARTORIO, valores)), ensure_ascii=False) + '\n')
+                registros += 1
+        return {'estado': estado, 'modo': 'exportacao', 'arquivo': caminho, 'registros': registros}
+
+    @staticmethod
+    def ler_cartorios(arquivo, estado, cabecalho=None):
+        """Gera os cartórios do JSONL, validando o cabeçalho contra ``estado``."""
+        primeira = arquivo.readline()
+        try:
+            dados = json.loads(primeira) if primeira.strip() else {}
+        except ValueError:
+            dados = {}
+        SnapshotService._validar_cabecalho(dados, FORMATO_CARTORIOS)
+        if dados.get('estado') != estado:
+            raise ValueError(f"Snapshot é do estado {dados.get('estado')}, não de {estado}")
+        if cabecalho is not None:
+            cabecalho.update(dados)
+        for numero, linha in enumerate(arquivo, start=2):
+            if not linha.strip():
+                continue
+            try:
+                yield json.loads(linha)
+            except ValueError as e:
+                raise ValueError(f'Linha {numero} inválida no snapshot: {e}') from e
+
+    @staticmethod
+    def diff_cartorios(linhas):
+        """
+        Separa um lote (já normalizado) em inseridos, atualizados e
+        inalterados, comparando com o banco por ``cns``.
+        """
+        por_cns = {linha['cns']: linha for linha in linhas}
+        existentes = {
+            valores[0]: valores[1:]
+            for valores in Cartorios.objects.filter(cns__in=por_cns).values_list(*CAMPOS_CARTORIO)
+        }
+        diff = {'inseridos': [], 'atualizados': [], 'inalterados': []}
+        for cns, linha in por_cns.items():
+            atual = existentes.get(cns)
+            if atual is None:
+                diff['inseridos'].append(linha)
+            elif atual != tuple(linha[campo] for campo in CAMPOS_CARTORIO[1:]):
+                diff['atualizados'].append(linha)
+            else:
+                diff['inalterados'].append(linha)
+        return diff
+
+    @staticmethod
+    def importar_cartorios(caminho, estado, tamanho_lote=500, dry_run=False, log=None):
+        """
+        Ingestão do snapshot de cartórios do estado. Só os cartórios novos
+        ou alterados são gravados (upsert por ``cns``). Retorna o relatório.
+        """
+        log = log or logger.info
+        caminho = SnapshotService.caminho_cartorios(caminho, estado)
+        relatorio = {
+            'estado': estado,
+            'modo': 'snapshot-dry-run' if dry_run else 'snapshot',
+            'arquivo': caminho,
+            'linhas': 0,
+            'ignorados': 0,
+            'inseridos': 0,
+            'atualizados': 0,
+            'inalterados': 0,
+            'gravados': 0,
+            'rejeitados': 0,
+            'lotes': 0,
+        }
+        cabecalho = {}
+
+        def _normalizados(linhas):
+            for linha in linhas:
+                relatorio['linhas'] += 1
+                if not linha.get('cns') or not linha.get('nome'):
+                    relatorio['ignorados'] += 1
+                    continue
+                ajustada = OnrCartoriosService.ajustar_campos(
+                    {campo: linha.get(campo) for campo in CAMPOS_CARTORIO}
+                )
+                if ajustada is None:
+                    relatorio['ignorados'] += 1
+                    continue
+                yield ajustada
+
+        with SnapshotService._abrir(caminho, 'r') as arquivo:
+            linhas = SnapshotService.ler_cartorios(arquivo, estado, cabecalho)
+            for lote in SnapshotService._lotes(_normalizados(linhas), tamanho_lote):
+                diff = SnapshotService.diff_cartorios(lote)
+                for chave, itens in diff.items():
+                    relatorio[chave] += len(itens)
+                gravar = diff['inseridos'] + diff['atualizados']
+                if gravar and not dry_run:
+                    gravados = OnrCartoriosService.gravar_lote(gravar)
+                    relatorio['gravados'] += gravados
+                    relatorio['rejeitados'] += len(gravar) - gravados
+                    relatorio['lotes'] += 1
+                log(
+                    f"Lote: {len(diff['inseridos'])} novos, {len(diff['atualizados'])} atualizados, "
+                    f"{len(diff['inalterados'])} inalterados"
+                )
+        relatorio['versao'] = cabecalho.get('versao')
+        relatorio['gerado_em'] = cabecalho.get('gerado_em')
+        return relatorio
+
+    # Terras indígenas
+
+    @staticmethod
+    def exportar_terras_indigenas(caminho):
+        """
+        Grava as referências como FeatureCollection com as propriedades da
+        FUNAI e sem geometria (o sistema não usa os polígonos).
+        """
+        caminho = SnapshotService.caminho_terras_indigenas(caminho)
+        registros = 0
+        cabecalho = SnapshotService._cabecalho(FORMATO_TERRAS_INDIGENAS)
+        with SnapshotService._abrir(caminho, 'w') as arquivo:
+            inicio = json.dumps({'type': 'FeatureCollection', **cabecalho}, ensure_ascii=False)
+            arquivo.write(inicio[:-1] + ', "features": [\n')
+            for referencia in TerraIndigenaReferencia.objects.order_by('codigo').iterator(chunk_size=2000):
+                feature = {
+                    'type': 'Feature',
+                    'id': referencia.codigo,
+                    'geometry': None,
+                    'properties': TerraIndigenaReferenciaService.propriedades(referencia),
+                }
+                arquivo.write((',\n' if registros else '') + json.dumps(feature, ensure_ascii=False))
+                registros += 1
+            arquivo.write('\n]}\n')
+        return {'modo': 'exportacao', 'arquivo': caminho, 'registros': registros}
+
+    @staticmethod
+    def importar_terras_indigenas(caminho, tamanho_lote=500, criar_tis=True, dry_run=False, log=None):
+        """
+        Ingestão do snapshot de terras indígenas. Aceita também o GeoJSON
+        bruto do WFS da FUNAI salvo em disco (sem cabeçalho de versão).
+        """
+        caminho = SnapshotService.caminho_terras_indigenas(caminho)
+        cabecalho = {}
+        with SnapshotService._abrir(caminho, 'r') as arquivo:
+            features = iterar_features(ler_blocos(arquivo), cabecalho, ignorar=('geometry',))
+            # O cabeçalho é preenchido ao ler a primeira feature.
+            primeira = next(features, None)
+            if 'formato' in cabecalho:
+                SnapshotService._validar_cabecalho(cabecalho, FORMATO_TERRAS_INDIGENAS)
+            if primeira is not None:
+                features = itertools.chain([primeira], features)
+
+            relatorio = TerraIndigenaReferenciaService.importar(
+                features, tamanho_lote=tamanho_lote, criar_tis=criar_tis,
+                dry_run=dry_run, log=log,
+            )
+        relatorio['modo'] = 'snapshot-dry-run' if dry_run else 'snapshot'
+        relatorio['arquivo'] = caminho
+        relatorio['versao'] = cabecalho.get('versao')
+        relatorio['gerado_em'] = cabecalho.get('gerado_em')
+        return relatorio
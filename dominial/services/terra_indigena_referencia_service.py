@@ -0,0 +1,242 @@
+"""
+Service para importar as terras indígenas de referência (WFS da FUNAI ou
+snapshot local) em lotes de upsert por ``codigo``
+"""
+
+import logging
+from datetime import datetime
+
+import requests
+from django.db import transaction
+
+from ..models import TerraIndigenaReferencia, TIs
+from ..utils.geojson_stream_utils import TAMANHO_BLOCO, iterar_features
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+URL_WFS = 'https://geoserver.funai.gov.br/geoserver/wfs'
+
+PARAMETROS_WFS = {
+    'service': 'WFS',
+    'version': '1.1.0',
+    'request': 'GetFeature',
+    'typeName': 'Funai:tis_poligonais_portarias',
+    'outputFormat': 'application/json',
+    'srsName': 'EPSG:4674',
+}
+
+# Conexão e intervalo máximo entre blocos da resposta (segundos)
+TIMEOUT_WFS = (30, 300)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Campo de TerraIndigenaReferencia -> propriedade da feature da FUNAI
+PROPRIEDADES_FUNAI = {
+    'nome': 'terrai_nome',
+    'etnia': 'etnia_nome',
+    'estado': 'uf_sigla',
+    'area_ha': 'superficie_perimetro_ha',
+    'municipio': 'municipio_nome',
+    'fase': 'fase_ti',
+    'modalidade': 'modalidade_ti',
+    'coordenacao_regional': 'cr',
+    'data_regularizada': 'data_regularizada',
+    'data_homologada': 'data_homologada',
+    'data_declarada': 'data_declarada',
+    'data_delimitada': 'data_delimitada',
+    'data_em_estudo': 'data_em_estudo',
+}
+
+CAMPOS_REFERENCIA = tuple(PROPRIEDADES_FUNAI)
+CAMPOS_DATA = tuple(campo for campo in CAMPOS_REFERENCIA if campo.startswith('data_'))
+
+
+class TerraIndigenaReferenciaService:
+    """
+    Converte as features da FUNAI e grava ``TerraIndigenaReferencia`` em
+    lotes, com o diff de cada lote: cria as TIs que ainda não existem e
+    propaga as alterações às TIs vinculadas.
+    """
+
+    @staticmethod
+    def limpar_data(data_str):
+        """Data 'YYYY-MM-DD' (com ou sem o Z final) ou None"""
+        if not data_str:
+            return None
+        try:
+            return datetime.strptime(str(data_str).rstrip('Z')[:10], '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def dados_referencia(properties):
+        """
+        Campos de ``TerraIndigenaReferencia`` a partir da feature, ou None
+        (sem código/nome ou com área inválida: a feature é ignorada).
+        """
+        codigo = properties.get('terrai_codigo')
+        codigo = str(codigo) if codigo not in (None, '') else ''
+        nome = properties.get('terrai_nome') or ''
+        if not nome or not codigo:
+            return None
+        dados = {'codigo': codigo}
+        for campo, propriedade in PROPRIEDADES_FUNAI.items():
+            valor = properties.get(propriedade)
+            if campo in CAMPOS_DATA:
+                valor = TerraIndigenaReferenciaService.limpar_data(valor)
+            elif campo == 'area_ha':
+                try:
+                    valor = float(valor) if valor not in (None, '') else None
+                except (TypeError, ValueError):
+                    logger.warning(f'Terra indígena {codigo}: área inválida {valor!r}; ignorada')
+                    return None
+            dados[campo] = valor
+        return dados
+
+    @staticmethod
+    def propriedades(referencia):
+        """Propriedades no formato da FUNAI (inverso de ``dados_referencia``)."""
+        properties = {'terrai_codigo': referencia.codigo}
+        for campo, propriedade in PROPRIEDADES_FUNAI.items():
+            valor = getattr(referencia, campo)
+            properties[propriedade] = valor.isoformat() if campo in CAMPOS_DATA and valor else valor
+        return properties
+
+    @staticmethod
+    def gravar_lote(linhas, criar_tis=True, dry_run=False):
+        """
+        Upsert de um lote por ``codigo``. Só as referências novas ou
+        alteradas são gravadas e as TIs vinculadas às alteradas recebem os
+        novos valores em um ``bulk_update`` (sem o ``save`` linha a linha).
+        Com ``criar_tis``, cria as TIs que ainda não existem. Retorna o
+        diff do lote.
+
+        As gravações em lote não disparam os signals: a página inicial é
+        invalidada aqui, uma vez por lote que gravou algo.
+        """
+        por_codigo = {linha['codigo']: linha for linha in linhas}
+        existentes = {
+            valores[0]: valores[1:]
+            for valores in TerraIndigenaReferencia.objects.filter(
+                codigo__in=por_codigo
+            ).values_list('codigo', *CAMPOS_REFERENCIA)
+        }
+        diff = {
+            'inseridos': 0, 'atualizados': 0, 'inalterados': 0,
+            'tis_criadas': 0, 'tis_atualizadas': 0,
+        }
+        gravar = []
+        atualizados = []
+        for codigo, linha in por_codigo.items():
+            atual = existentes.get(codigo)
+            if atual is None:
+                diff['inseridos'] += 1
+            elif atual != tuple(linha[campo] for campo in CAMPOS_REFERENCIA):
+                diff['atualizados'] += 1
+                atualizados.append(codigo)
+            else:
+                diff['inalterados'] += 1
+                continue
+            gravar.append(TerraIndigenaReferencia(**linha))
+
+        vinculadas = TIs.objects.filter(terra_referencia__codigo__in=atualizados)
+        tis_existentes = set()
+        if criar_tis:
+            tis_existentes = set(
+                TIs.objects.filter(codigo__in=por_codigo).values_list('codigo', flat=True)
+            )
+            diff['tis_criadas'] = len(por_codigo.keys() - tis_existentes)
+        if dry_run:
+            diff['tis_atualizadas'] = vinculadas.count() if atualizados else 0
+            return diff
+
+        if gravar:
+            TerraIndigenaReferencia.objects.bulk_create(
+                gravar,
+                update_conflicts=True,
+                unique_fields=['codigo'],
+                update_fields=[*CAMPOS_REFERENCIA, 'updated_at'],
+            )
+        if atualizados:
+            tis = list(vinculadas.select_related('terra_referencia'))
+            for ti in tis:
+                for campo, valor in TIs.campos_da_referencia(ti.terra_referencia).items():
+                    setattr(ti, campo, valor)
+            TIs.objects.bulk_update(tis, TIs.CAMPOS_DA_REFERENCIA, batch_size=500)
+            diff['tis_atualizadas'] = len(tis)
+        if diff['tis_criadas']:
+            referencias = TerraIndigenaReferencia.objects.filter(
+                codigo__in=por_codigo.keys() - tis_existentes
+            )
+            TIs.objects.bulk_create([
+                TIs(terra_referencia=referencia, **TIs.campos_da_referencia(referencia))
+                for referencia in referencias
+            ])
+        if gravar or diff['tis_criadas']:
+            transaction.on_commit(CacheService.invalidar_home)
+        return diff
+
+    @staticmethod
+    def importar(features, tamanho_lote=500, criar_tis=True, dry_run=False, log=None):
+        """
+        Consome ``features`` (um iterável, lido sob demanda) gravando em
+        lotes de ``tamanho_lote``. Retorna o relatório com o diff total.
+        """
+        log = log or logger.info
+        relatorio = {
+            'modo': 'dry-run' if dry_run else 'importacao',
+            'features': 0,
+            'ignoradas': 0,
+            'inseridos': 0,
+            'atualizados': 0,
+            'inalterados': 0,
+            'tis_criadas': 0,
+            'tis_atualizadas': 0,
+            'lotes': 0,
+        }
+        lote = []
+
+        def _descarregar():
+            if not lote:
+                return
+            diff = TerraIndigenaReferenciaService.gravar_lote(lote, criar_tis, dry_run)
+            for chave, valor in diff.items():
+                relatorio[chave] += valor
+            relatorio['lotes'] += 1
+            log(
+                f"Lote {relatorio['lotes']}: {diff['inseridos']} novas, "
+                f"{diff['atualizados']} atualizadas, {diff['inalterados']} inalteradas"
+            )
+            lote.clear()
+
+        for feature in features:
+            relatorio['features'] += 1
+            dados = TerraIndigenaReferenciaService.dados_referencia(feature.get('properties') or {})
+            if dados is None:
+                relatorio['ignoradas'] += 1
+                continue
+            lote.append(dados)
+            if len(lote) >= tamanho_lote:
+                _descarregar()
+        _descarregar()
+        return relatorio
+
+    @staticmethod
+    def features_wfs(sessao=requests):
+        """
+        Features do WFS da FUNAI lidas em streaming. As geometrias (a maior
+        parte da resposta) são descartadas durante a leitura.
+        """
+        response = sessao.get(
+            URL_WFS, params=PARAMETROS_WFS, headers=HEADERS, stream=True, timeout=TIMEOUT_WFS
+        )
+        try:
+            response.raise_for_status()
+            yield from iterar_features(
+                response.iter_content(chunk_size=TAMANHO_BLOCO), ignorar=('geometry',)
+            )
+        finally:
+            response.close()
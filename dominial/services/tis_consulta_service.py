@@ -0,0 +1,67 @@
+"""
+Service para as consultas de Terras Indígenas da página inicial
+"""
+
+from django.db.models import Count, Exists, OuterRef, Q
+
+from ..models import TIs, TerraIndigenaReferencia
+from .cache_service import CacheService
+
+
+class TisConsultaService:
+    """
+    Consultas agregadas das TIs cadastradas e das terras de referência
+    """
+
+    @staticmethod
+    def _filtro_busca(busca):
+        return Q(nome__icontains=busca) | Q(etnia__icontains=busca) | Q(codigo__icontains=busca)
+
+    @staticmethod
+    def tis_com_total_imoveis(busca=''):
+        """
+        TIs com o número de imóveis anotado (``total_imoveis``), ordenadas
+        pelas que têm mais imóveis e, no empate, pelo nome (decrescente).
+        """
+        tis = TIs.objects.select_related('terra_referencia').annotate(
+            total_imoveis=Count('imovel')
+        )
+        if busca:
+            tis = tis.filter(TisConsultaService._filtro_busca(busca))
+        return tis.order_by('-total_imoveis', '-nome')
+
+    @staticmethod
+    def terras_referencia_nao_cadastradas(busca=''):
+        """
+        Terras de referência sem TI cadastrada com o mesmo código (anti-join
+        no banco), ordenadas pelo nome.
+        """
+        tis = TIs.objects.filter(codigo=OuterRef('codigo'))
+        terras = TerraIndigenaReferencia.objects.all()
+        if busca:
+            tis = tis.filter(TisConsultaService._filtro_busca(busca))
+            terras = terras.filter(TisConsultaService._filtro_busca(busca))
+        return terras.filter(~Exists(tis)).order_by('nome')
+
+    @staticmethod
+    def dados_home(busca=''):
+        """
+        Contexto da página inicial: as TIs (uma consulta agregada), os imóveis
+        por TI e o total de terras de referência não cadastradas. O resultado
+        fica em cache até alguma TI, imóvel ou terra de referência mudar.
+        """
+        dados = CacheService.get_cached_home_tis(busca)
+        if dados is not None:
+            return dados
+
+        terras_indigenas = list(TisConsultaService.tis_com_total_imoveis(busca))
+        dados = {
+            'terras_indigenas': terras_indigenas,
+            'tis_com_imoveis': {tis.id: tis.total_imoveis for tis in terras_indigenas},
+            'total_tis_cadastradas': len(terras_indigenas),
+            'total_terras_referencia': (
+                TisConsultaService.terras_referencia_nao_cadastradas(busca).count()
+            ),
+        }
+        CacheService.set_cached_home_tis(busca, dados)
+        return dados
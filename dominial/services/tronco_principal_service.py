@@ -0,0 +1,192 @@
+"""
+Persistência e recálculo incremental do tronco principal de cada imóvel.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+
+from ..models import TroncoPrincipal, TroncoPrincipalDocumento
+from .cache_service import CacheService
+
+
+class TroncoPrincipalService:
+    """
+    Mantém em ``TroncoPrincipal`` o tronco padrão de cada imóvel.
+
+    Alterações na cadeia não apagam o tronco inteiro: ele é truncado a partir
+    do documento afetado e a próxima leitura continua a travessia do ponto de
+    corte. Escolhas de origem da sessão reaproveitam o prefixo persistido até
+    o primeiro documento com escolha.
+
+    A leitura grava o tronco recalculado sob ``select_for_update`` e só se a
+    ``versao`` lida não mudou: um truncamento concorrente (ou outra leitura
+    que já gravou) vence e o resultado da leitura é apenas devolvido.
+    """
+
+    @staticmethod
+    def obter(imovel, escolhas_origem=None, grafo=None):
+        from ..utils.hierarquia_utils import identificar_tronco_principal
+
+        registro, documentos = TroncoPrincipalService._carregar(imovel)
+        if registro is None or not registro.completo:
+            documentos = identificar_tronco_principal(
+                imovel, grafo=grafo, prefixo=documentos
+            )
+            TroncoPrincipalService._gravar(
+                imovel, documentos, registro.versao if registro else None
+            )
+
+        if escolhas_origem:
+            # Até o primeiro documento com escolha, o tronco coincide com o
+            # padrão; dali em diante a travessia segue as escolhas.
+            divergencia = next(
+                (
+                    posicao
+                    for posicao, documento in enumerate(documentos)
+                    if str(documento.id) in escolhas_origem
+                ),
+                None,
+            )
+            if divergencia is not None:
+                documentos = identificar_tronco_principal(
+                    imovel,
+                    escolhas_origem,
+                    grafo=grafo,
+                    prefixo=documentos[:divergencia + 1],
+                )
+        return documentos
+
+    @staticmethod
+    def invalidar_imovel(imovel_id):
+        """Descarta o tronco inteiro do imóvel (ex.: mudou a raiz)."""
+        TroncoPrincipalService._truncar({imovel_id: 0})
+
+    @staticmethod
+    def invalidar_documento(documento):
+        """
+        O próprio documento mudou: descarta-o dos troncos em que aparece e
+        recalcula desde o documento anterior. O tronco do imóvel do documento
+        é descartado inteiro quando a raiz pode ter mudado.
+        """
+        cortes = TroncoPrincipalService._posicoes([documento.pk])
+        if documento.imovel_id and TroncoPrincipalService._pode_mudar_raiz(documento):
+            cortes[documento.imovel_id] = 0
+        TroncoPrincipalService._truncar(cortes)
+
+    @staticmethod
+    def invalidar_origens(documento_ids):
+        """
+        As origens dos documentos mudaram: mantém cada documento no tronco e
+        descarta somente o trecho posterior a ele.
+        """
+        cortes = {
+            imovel_id: posicao + 1
+            for imovel_id, posicao in TroncoPrincipalService._posicoes(
+                documento_ids
+            ).items()
+        }
+        TroncoPrincipalService._truncar(cortes)
+
+    @staticmethod
+    def _pode_mudar_raiz(documento):
+        """
+        A raiz só muda se o documento for a identidade registral do imóvel ou
+        se a raiz atual não for essa identidade (escolha por data/tipo).
+        """
+        imovel = documento.imovel
+        raiz = (
+            TroncoPrincipalDocumento.objects.filter(
+                tronco__imovel_id=imovel.pk, posicao=0
+            )
+            .select_related('documento__tipo')
+            .first()
+        )
+        if raiz is None:
+            return True
+        return (
+            raiz.documento_id == documento.pk
+            or TroncoPrincipalService._e_identidade_do_imovel(documento, imovel)
+            or not TroncoPrincipalService._e_identidade_do_imovel(
+                raiz.documento, imovel
+            )
+        )
+
+    @staticmethod
+    def _e_identidade_do_imovel(documento, imovel):
+        return (
+            documento.imovel_id == imovel.pk
+            and documento.tipo.tipo == imovel.tipo_documento_principal
+            and documento.numero_normalizado == imovel.matricula_normalizada
+            and documento.cartorio_id == imovel.cartorio_id
+        )
+
+    @staticmethod
+    def _carregar(imovel):
+        registro = TroncoPrincipal.objects.filter(imovel=imovel).first()
+        if registro is None:
+            return None, []
+        documentos = [
+            item.documento
+            for item in TroncoPrincipalDocumento.objects.filter(tronco=registro)
+            .select_related('documento__tipo', 'documento__cartorio', 'documento__imovel')
+            .order_by('posicao')
+        ]
+        return registro, documentos
+
+    @staticmethod
+    def _gravar(imovel, documentos, versao):
+        """
+        Persiste o tronco calculado a partir da ``versao`` lida (None se não
+        havia registro). Devolve False quando o registro mudou desde a
+        leitura e nada foi gravado.
+        """
+        try:
+            with transaction.atomic():
+                if versao is None:
+                    registro = TroncoPrincipal.objects.create(
+                        imovel=imovel, completo=True
+                    )
+                else:
+                    registro = (
+                        TroncoPrincipal.objects.select_for_update()
+                        .filter(imovel=imovel, versao=versao, completo=False)
+                        .first()
+                    )
+                    if registro is None:
+                        return False
+                    registro.completo = True
+                    registro.save(update_fields=['completo', 'atualizado_em'])
+                TroncoPrincipalDocumento.objects.filter(tronco=registro).delete()
+                TroncoPrincipalDocumento.objects.bulk_create(
+                    TroncoPrincipalDocumento(
+                        tronco=registro, posicao=posicao, documento=documento
+                    )
+                    for posicao, documento in enumerate(documentos)
+                )
+        except IntegrityError:
+            # Outra leitura criou o registro primeiro.
+            return False
+        return True
+
+    @staticmethod
+    def _posicoes(documento_ids):
+        """Menor posição de qualquer dos documentos em cada tronco, por imóvel."""
+        return dict(
+            TroncoPrincipalDocumento.objects.filter(documento_id__in=documento_ids)
+            .values('tronco__imovel_id')
+            .annotate(posicao=Min('posicao'))
+            .values_list('tronco__imovel_id', 'posicao')
+        )
+
+    @staticmethod
+    def _truncar(cortes):
+        """Remove de cada tronco os documentos a partir da posição de corte."""
+        for imovel_id, posicao in cortes.items():
+            TroncoPrincipalDocumento.objects.filter(
+                tronco__imovel_id=imovel_id, posicao__gte=posicao
+            ).delete()
+            TroncoPrincipal.objects.filter(imovel_id=imovel_id).update(
+                completo=False, versao=F('versao') + 1
+            )
+            transaction.on_commit(
+                lambda imovel_id=imovel_id: CacheService.invalidate_tronco_principal(imovel_id)
+            )
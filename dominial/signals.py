@@ -1,9 +1,28 @@
 """
 Signals Django para processamento automático
 """
-from django.db.models.signals import post_save
+from django.db.models import Q, QuerySet
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Lancamento
+from .models import (
+    Cartorios,
+    Documento,
+    Imovel,
+    Lancamento,
+    LancamentoOrigem,
+    LancamentoPessoa,
+    OrigemFimCadeia,
+    Pessoas,
+    TerraIndigenaReferencia,
+    TIs,
+)
+from .models.busca_nome import criar_indices_busca
+from .services.cache_service import CacheService
+from .services.cadeia_aresta_service import CadeiaArestaService
+from .services.cadeia_fechamento_service import CadeiaFechamentoService
+from .services.tronco_principal_service import TroncoPrincipalService
 from .services.lancamento_origem_service import LancamentoOrigemService
 import logging
 
@@ -18,14 +37,228 @@ def processar_origens_automaticas_signal(sender, instance, created, **kwargs):
     if not instance.documento or not instance.documento.imovel:
         return
     
-    try:
-        # Processar origens para criar documentos automáticos
-        resultado = LancamentoOrigemService.processar_origens_automaticas(
-            instance, instance.origem or '', instance.documento.imovel
-        )
-        
-        if resultado:
-            logger.info(f"Signal: {resultado} (Lançamento {instance.id})")
-        
-    except Exception as e:
-        logger.error(f"Erro ao processar origens automaticamente para lançamento {instance.id}: {e}")
+    # Processar origens para criar documentos automáticos. As arestas da
+    # cadeia são reconstruídas uma única vez ao final, mesmo em caso de erro.
+    with CadeiaArestaService.sincronizacao_adiada():
+        CadeiaArestaService.agendar_lancamento(instance.pk)
+        try:
+            resultado = LancamentoOrigemService.processar_origens_automaticas(
+                instance, instance.origem or '', instance.documento.imovel
+            )
+
+            if resultado:
+                logger.info(f"Signal: {resultado} (Lançamento {instance.id})")
+
+        except Exception as e:
+            logger.error(f"Erro ao processar origens automaticamente para lançamento {instance.id}: {e}")
+
+def _exclusao_em_cascata(instance, origin):
+    """Indica se a exclusão veio do lançamento/documento pai, já em remoção."""
+    if isinstance(origin, QuerySet):
+        return origin.model is not type(instance)
+    return origin is not None and not isinstance(origin, type(instance))
+
+
+def _invalidar_apos_commit(invalidar, *args, **kwargs):
+    """
+    Incrementa as gerações só depois do commit: antes dele, uma leitura
+    concorrente ainda vê os dados antigos e os gravaria no cache sob a
+    geração nova. Fora de transação executa na hora.
+    """
+    transaction.on_commit(lambda: invalidar(*args, **kwargs))
+
+
+@receiver(post_save, sender=LancamentoOrigem)
+@receiver(post_save, sender=OrigemFimCadeia)
+def sincronizar_arestas_origem_signal(sender, instance, **kwargs):
+    """Mantém as arestas materializadas ao gravar uma origem."""
+    CadeiaArestaService.agendar_lancamento(instance.lancamento_id)
+
+
+@receiver(post_delete, sender=LancamentoOrigem)
+@receiver(post_delete, sender=OrigemFimCadeia)
+def remover_arestas_origem_signal(sender, instance, origin=None, **kwargs):
+    """Mantém as arestas materializadas ao excluir uma origem."""
+    if _exclusao_em_cascata(instance, origin):
+        return
+    CadeiaArestaService.agendar_lancamento(instance.lancamento_id)
+
+
+@receiver(post_save, sender=Documento)
+def religar_arestas_documento_signal(sender, instance, raw=False, **kwargs):
+    """Liga as origens pendentes ao documento recém-gravado e invalida troncos afetados."""
+    if raw:
+        return
+    CadeiaArestaService.religar_documento(instance)
+    TroncoPrincipalService.invalidar_documento(instance)
+
+
+@receiver(pre_delete, sender=Documento)
+def invalidar_tronco_documento_excluido_signal(sender, instance, **kwargs):
+    """Recalcula os troncos que passavam pelo documento excluído."""
+    TroncoPrincipalService.invalidar_documento(instance)
+    # Guardados para recalcular o fechamento depois que as arestas que
+    # apontavam para o documento ficarem sem pai.
+    instance._descendentes_fechamento = list(
+        instance.descendentes_fechamento.values_list('descendente_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Documento)
+def atualizar_fechamento_documento_excluido_signal(sender, instance, **kwargs):
+    """Os descendentes do documento excluído deixam de alcançá-lo."""
+    descendentes = getattr(instance, '_descendentes_fechamento', None)
+    if descendentes:
+        CadeiaFechamentoService.atualizar_documentos(descendentes)
+
+
+@receiver(post_delete, sender=Lancamento)
+def invalidar_tronco_lancamento_excluido_signal(sender, instance, origin=None, **kwargs):
+    """As arestas do lançamento saem em cascata; o tronco segue sem elas."""
+    if _exclusao_em_cascata(instance, origin):
+        return
+    CadeiaFechamentoService.atualizar_documentos([instance.documento_id])
+    TroncoPrincipalService.invalidar_origens([instance.documento_id])
+
+
+@receiver(post_save, sender=Imovel)
+def invalidar_tronco_imovel_signal(sender, instance, created=False, raw=False, **kwargs):
+    """Matrícula ou cartório alterados podem mudar a raiz do tronco."""
+    if raw or created:
+        return
+    TroncoPrincipalService.invalidar_imovel(instance.pk)
+    # Nome e matrícula aparecem nas árvores dos imóveis que importam os
+    # documentos deste.
+    _invalidar_apos_commit(
+        CacheService.invalidar_documentos,
+        list(Documento.objects.filter(imovel=instance).values_list('id', flat=True)),
+        imovel_ids=[instance.pk],
+    )
+
+
+# Invalidação do cache: toda alteração em um documento ou em algo que ele
+# contém incrementa a geração dos imóveis cujas cadeias o incluem. Os
+# receivers abaixo rodam depois dos que mantêm arestas e fechamento.
+
+@receiver(post_save, sender=Documento)
+def invalidar_cache_documento_signal(sender, instance, raw=False, **kwargs):
+    """Documento criado ou alterado."""
+    if raw:
+        return
+    _invalidar_apos_commit(CacheService.invalidar_documentos, [instance.pk])
+
+
+@receiver(pre_delete, sender=Documento)
+def guardar_imoveis_documento_excluido_signal(sender, instance, **kwargs):
+    """Depois da exclusão o fechamento do documento não existe mais."""
+    instance._imoveis_cache = CadeiaFechamentoService.imoveis_das_cadeias([instance.pk])
+
+
+@receiver(post_delete, sender=Documento)
+def invalidar_cache_documento_excluido_signal(sender, instance, **kwargs):
+    _invalidar_apos_commit(
+        CacheService.invalidar_documentos,
+        [instance.pk],
+        imovel_ids=getattr(instance, '_imoveis_cache', ()),
+    )
+
+
+@receiver(post_save, sender=Lancamento)
+@receiver(post_delete, sender=Lancamento)
+def invalidar_cache_lancamento_signal(sender, instance, raw=False, origin=None, **kwargs):
+    """Lançamento gravado ou excluído fora da exclusão do documento."""
+    if raw or _exclusao_em_cascata(instance, origin):
+        return
+    _invalidar_apos_commit(CacheService.invalidar_documentos, [instance.documento_id])
+
+
+@receiver(post_save, sender=LancamentoOrigem)
+@receiver(post_save, sender=LancamentoPessoa)
+@receiver(post_save, sender=OrigemFimCadeia)
+@receiver(post_delete, sender=LancamentoOrigem)
+@receiver(post_delete, sender=LancamentoPessoa)
+@receiver(post_delete, sender=OrigemFimCadeia)
+def invalidar_cache_item_lancamento_signal(sender, instance, raw=False, origin=None, **kwargs):
+    """Origens e pessoas do lançamento fazem parte da cadeia exibida."""
+    if raw or _exclusao_em_cascata(instance, origin):
+        return
+    documento_id = (
+        Lancamento.objects.filter(pk=instance.lancamento_id)
+        .values_list('documento_id', flat=True)
+        .first()
+    )
+    _invalidar_apos_commit(CacheService.invalidar_documentos, [documento_id])
+
+
+@receiver(post_save, sender=Pessoas)
+def invalidar_cache_pessoa_signal(sender, instance, created=False, raw=False, **kwargs):
+    """O nome da pessoa aparece nos lançamentos e no proprietário do imóvel."""
+    if raw or created:
+        return
+    documento_ids = set(
+        Lancamento.objects.filter(
+            Q(transmitente=instance) | Q(adquirente=instance)
+        ).values_list('documento_id', flat=True)
+    )
+    documento_ids.update(
+        LancamentoPessoa.objects.filter(pessoa=instance)
+        .values_list('lancamento__documento_id', flat=True)
+    )
+    _invalidar_apos_commit(
+        CacheService.invalidar_documentos,
+        documento_ids,
+        imovel_ids=list(Imovel.objects.filter(proprietario=instance).values_list('id', flat=True)),
+    )
+
+
+@receiver(post_save, sender=Cartorios)
+def invalidar_cache_cartorio_signal(sender, instance, created=False, raw=False, **kwargs):
+    """O nome do cartório aparece nos documentos, lançamentos e origens."""
+    if raw or created:
+        return
+    documento_ids = set(
+        Documento.objects.filter(
+            Q(cartorio=instance) | Q(cri_atual=instance) | Q(cri_origem=instance)
+        ).values_list('id', flat=True)
+    )
+    documento_ids.update(
+        Lancamento.objects.filter(
+            Q(cartorio_origem=instance) | Q(cartorio_transacao=instance) | Q(cartorio_transmissao=instance)
+        ).values_list('documento_id', flat=True)
+    )
+    documento_ids.update(
+        LancamentoOrigem.objects.filter(cartorio=instance)
+        .values_list('lancamento__documento_id', flat=True)
+    )
+    _invalidar_apos_commit(
+        CacheService.invalidar_documentos,
+        documento_ids,
+        imovel_ids=list(Imovel.objects.filter(cartorio=instance).values_list('id', flat=True)),
+    )
+
+
+@receiver(post_save, sender=TIs)
+@receiver(post_save, sender=Imovel)
+@receiver(post_save, sender=TerraIndigenaReferencia)
+@receiver(post_delete, sender=TIs)
+@receiver(post_delete, sender=Imovel)
+@receiver(post_delete, sender=TerraIndigenaReferencia)
+def invalidar_cache_home_signal(sender, instance, raw=False, **kwargs):
+    """A página inicial lista as TIs e conta seus imóveis."""
+    if raw:
+        return
+    _invalidar_apos_commit(CacheService.invalidar_home)
+
+
+@receiver(post_migrate)
+def garantir_indices_busca_signal(sender, using='default', plan=None, **kwargs):
+    """
+    No SQLite, migrações que reconstroem pessoas/cartórios descartam os
+    triggers da tabela FTS de ``nome_busca``; recria-os após cada migrate.
+    """
+    if sender.name != 'dominial' or not plan:
+        return
+    connection = connections[using]
+    aplicadas = MigrationRecorder(connection).applied_migrations()
+    if ('dominial', '0062_busca_nome_normalizado') in aplicadas:
+        criar_indices_busca(connection)
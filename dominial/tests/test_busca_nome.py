@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.models import Cartorios, Pessoas
+from dominial.models.busca_nome import criar_indices_busca, normalizar_busca
+from dominial.services.busca_nome_service import BuscaNomeService
+
+
+class BuscaNomeTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user(username='busca', password='busca12345'))
+        self.joao = Pessoas.objects.create(nome='João  Ávila', cpf='10000000001')
+        self.maria = Pessoas.objects.create(nome='Maria Conceição', cpf='10000000002')
+        self.cri = Cartorios.objects.create(
+            nome='Cartório de Registro de Imóveis de Cáceres', cns='730001',
+            cidade='Cáceres', estado='MT',
+        )
+        self.notas = Cartorios.objects.create(
+            nome='Tabelionato de Notas de Cáceres', cns='730002', cidade='Cáceres', estado='MT',
+        )
+
+    def _nomes(self, queryset):
+        return sorted(queryset.values_list('nome', flat=True))
+
+    def test_normalizacao(self):
+        self.assertEqual(normalizar_busca('  Cartório de  Imóveis '), 'CARTORIO DE IMOVEIS')
+        self.assertEqual(normalizar_busca(None), '')
+        self.assertEqual(self.joao.nome_busca, 'JOAO AVILA')
+        self.assertTrue(self.cri.eh_cartorio_imoveis)
+        self.assertFalse(self.notas.eh_cartorio_imoveis)
+
+    def test_busca_ignora_acentos_e_maiusculas(self):
+        for termo in ('joao', 'JOÃO', 'ão ávi', 'avila'):
+            self.assertEqual(
+                self._nomes(BuscaNomeService.filtrar(Pessoas.objects.all(), termo)),
+                ['João  Ávila'],
+                termo,
+            )
+        self.assertEqual(
+            self._nomes(BuscaNomeService.filtrar(Cartorios.objects.all(), 'caceres')),
+            [self.cri.nome, self.notas.nome],
+        )
+        # Termos curtos demais para os trigramas também funcionam.
+        self.assertEqual(
+            self._nomes(BuscaNomeService.filtrar(Pessoas.objects.all(), 'ma')), ['Maria Conceição']
+        )
+        self.assertFalse(BuscaNomeService.filtrar(Pessoas.objects.all(), '"').exists())
+
+    def test_indice_acompanha_alteracoes(self):
+        self.maria.nome = 'Mariana Souza'
+        self.maria.save(update_fields=['nome'])
+        self.assertFalse(BuscaNomeService.filtrar(Pessoas.objects.all(), 'conceicao').exists())
+        self.assertEqual(
+            list(BuscaNomeService.filtrar(Pessoas.objects.all(), 'souza')), [self.maria]
+        )
+
+        self.joao.delete()
+        self.assertFalse(BuscaNomeService.filtrar(Pessoas.objects.all(), 'avila').exists())
+
+    def test_indices_recriados_sao_reconstruidos(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Tabela FTS5 apenas no SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER dominial_pessoas_busca_ai')
+        Pessoas.objects.create(nome='Pessoa Sem Trigger', cpf='10000000003')
+
+        criar_indices_busca(connection)
+
+        self.assertTrue(BuscaNomeService.filtrar(Pessoas.objects.all(), 'sem trigger').exists())
+
+    def test_autocompletes(self):
+        resposta = self.client.get(reverse('pessoa-autocomplete'), {'q': 'joao'})
+        self.assertEqual([p['id'] for p in resposta.json()['results']], [self.joao.id])
+
+        resposta = self.client.get(reverse('cartorio-autocomplete'), {'q': 'caceres'})
+        self.assertEqual(len(resposta.json()['results']), 2)
+
+        resposta = self.client.get(reverse('cartorio-imoveis-autocomplete'), {'q': 'caceres'})
+        self.assertEqual([c['id'] for c in resposta.json()], [self.cri.id])
+
+    def test_busca_de_cartorios_de_imoveis_por_cidade(self):
+        resposta = self.client.post(
+            reverse('buscar_cartorios'), {'estado': 'MT', 'cidade': 'Cáceres'}
+        )
+        self.assertEqual([c['id'] for c in resposta.json()], [self.cri.id])
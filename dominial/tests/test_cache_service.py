@@ -0,0 +1,192 @@
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from dominial.models import Cartorios, Documento, Imovel, Lancamento, LancamentoPessoa, Pessoas
+from dominial.services import cache_service
+from dominial.services.cache_service import CacheService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+CACHE_BANCO = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cadeia_dominial_cache_teste',
+    }
+}
+
+
+@override_settings(CACHES=CACHE_BANCO)
+class CacheServiceCompartilhadoTest(TestCase):
+    """Dois workers com instâncias próprias do backend sobre a mesma tabela."""
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        self.worker_a = caches.create_connection('default')
+        self.worker_b = caches.create_connection('default')
+
+    def _no_worker(self, worker):
+        return patch.object(cache_service, 'cache', worker)
+
+    def test_invalidacao_em_um_worker_vale_para_os_outros(self):
+        with self._no_worker(self.worker_a):
+            CacheService.set_cached_tronco_principal(7, ['M1', 'T2'])
+        with self._no_worker(self.worker_b):
+            self.assertEqual(CacheService.get_cached_tronco_principal(7), ['M1', 'T2'])
+            CacheService.invalidate_tronco_principal(7)
+        with self._no_worker(self.worker_a):
+            self.assertIsNone(CacheService.get_cached_tronco_principal(7))
+
+    def test_invalidacao_incrementa_geracao_sem_apagar_chaves(self):
+        with self._no_worker(self.worker_a):
+            CacheService.set_cached_documentos_imovel(7, ['M1'])
+            CacheService.set_cached_lancamentos_documento(3, ['L1'])
+            geracao = CacheService.obter_geracao('imovel', 7)
+
+            with patch.object(self.worker_a, 'delete') as delete:
+                CacheService.invalidate_documentos_imovel(7)
+            delete.assert_not_called()
+
+            self.assertEqual(CacheService.obter_geracao('imovel', 7), geracao + 1)
+            self.assertIsNone(CacheService.get_cached_documentos_imovel(7))
+            # Gerações são independentes por imóvel/documento.
+            self.assertEqual(CacheService.get_cached_lancamentos_documento(3), ['L1'])
+
+    def test_geracao_perdida_nao_reaproveita_entradas_antigas(self):
+        with self._no_worker(self.worker_a):
+            CacheService.set_cached_tronco_principal(7, ['M1'])
+            self.worker_a.delete(CacheService._chave_geracao('imovel', 7))
+
+            self.assertIsNone(CacheService.get_cached_tronco_principal(7))
+
+    def test_estatisticas_indicam_backend_compartilhado(self):
+        estatisticas = CacheService.get_cache_stats()
+
+        self.assertEqual(
+            estatisticas['cache_backend'],
+            'django.core.cache.backends.db.DatabaseCache',
+        )
+        self.assertTrue(estatisticas['compartilhado_entre_workers'])
+
+
+class InvalidacaoPorSignalsTest(ArestaTestMixin, TestCase):
+    """M500 -> T10 no imóvel principal; T10 -> T11 com T11 em outro imóvel."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.outro_imovel = Imovel.objects.create(
+            terra_indigena_id=self.imovel.terra_indigena_id,
+            nome='Imóvel Vizinho',
+            proprietario=self.imovel.proprietario,
+            matricula='11',
+            tipo_documento_principal='transcricao',
+            cartorio=self.cartorio_b,
+        )
+        self.t11 = Documento.objects.create(
+            imovel=self.outro_imovel,
+            tipo=self.tipo_transcricao,
+            numero='T11',
+            data=timezone.now().date(),
+            cartorio=self.cartorio_b,
+        )
+        self._criar_origem(self._criar_lancamento(), numero='T10')
+        self._criar_origem(
+            Lancamento.objects.create(
+                documento=self.documento_pai,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+            ),
+            numero='T11',
+        )
+        self.lancamento_t11 = Lancamento.objects.create(
+            documento=self.t11, tipo=self.tipo_registro, data=timezone.now().date()
+        )
+
+    def _geracoes(self):
+        return (
+            CacheService.obter_geracao('imovel', self.imovel.id),
+            CacheService.obter_geracao('imovel', self.outro_imovel.id),
+        )
+
+    def test_pessoa_em_documento_importado_invalida_os_dois_imoveis(self):
+        principal, vizinho = self._geracoes()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LancamentoPessoa.objects.create(
+                lancamento=self.lancamento_t11,
+                pessoa=Pessoas.objects.create(nome='Transmitente'),
+                tipo='transmitente',
+            )
+
+        novo_principal, novo_vizinho = self._geracoes()
+        self.assertGreater(novo_principal, principal)
+        self.assertGreater(novo_vizinho, vizinho)
+
+    def test_pessoa_renomeada_invalida_as_cadeias_que_a_exibem(self):
+        pessoa = Pessoas.objects.create(nome='Transmitente')
+        LancamentoPessoa.objects.create(lancamento=self.lancamento_t11, pessoa=pessoa, tipo='transmitente')
+        principal, vizinho = self._geracoes()
+
+        pessoa.nome = 'Transmitente Corrigido'
+        with self.captureOnCommitCallbacks(execute=True):
+            pessoa.save()
+
+        novo_principal, novo_vizinho = self._geracoes()
+        self.assertGreater(novo_principal, principal)
+        self.assertGreater(novo_vizinho, vizinho)
+
+    def test_cartorio_renomeado_invalida_as_cadeias_que_o_exibem(self):
+        cartorio = Cartorios.objects.create(nome='Cartório C', cns='710003', cidade='C', estado='AC')
+        self.lancamento_t11.cartorio_transmissao = cartorio
+        self.lancamento_t11.save()
+        avulso = Cartorios.objects.create(nome='Cartório Avulso', cns='710004', cidade='D', estado='AC')
+        principal, vizinho = self._geracoes()
+
+        avulso.nome = 'Cartório Avulso Corrigido'
+        with self.captureOnCommitCallbacks(execute=True):
+            avulso.save()
+        self.assertEqual(self._geracoes(), (principal, vizinho))
+
+        cartorio.nome = 'Cartório C Corrigido'
+        with self.captureOnCommitCallbacks(execute=True):
+            cartorio.save()
+
+        novo_principal, novo_vizinho = self._geracoes()
+        self.assertGreater(novo_principal, principal)
+        self.assertGreater(novo_vizinho, vizinho)
+
+    def test_alteracao_no_imovel_principal_nao_invalida_o_vizinho(self):
+        principal, vizinho = self._geracoes()
+
+        self.documento.observacoes = 'Revisado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documento.save()
+
+        novo_principal, novo_vizinho = self._geracoes()
+        self.assertGreater(novo_principal, principal)
+        self.assertEqual(novo_vizinho, vizinho)
+
+    def test_geracao_so_muda_depois_do_commit(self):
+        geracoes = self._geracoes()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.documento.observacoes = 'Revisado'
+            self.documento.save()
+            # Uma leitura dentro da transação ainda usa a geração antiga.
+            self.assertEqual(self._geracoes(), geracoes)
+
+        for callback in callbacks:
+            callback()
+        self.assertGreater(self._geracoes()[0], geracoes[0])
+
+    def test_exclusao_de_documento_importado(self):
+        CacheService.set_cached_tronco_principal(self.imovel.id, ['em cache'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.t11.delete()
+
+        self.assertIsNone(CacheService.get_cached_tronco_principal(self.imovel.id))
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.services.cache_service import CacheService
+from dominial.services.hierarquia_arvore_service import HierarquiaArvoreService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class CadeiaArvoreEtagTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(
+            User.objects.create_user(username='arvore', password='arvore123')
+        )
+        self._criar_origem(self._criar_lancamento(), numero='T10')
+        self.url = reverse('cadeia_dominial_arvore', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+        })
+
+    def _construcoes(self):
+        return patch.object(
+            HierarquiaArvoreService,
+            'construir_arvore_cadeia_dominial',
+            wraps=HierarquiaArvoreService.construir_arvore_cadeia_dominial,
+        )
+
+    def test_reabertura_usa_cache_e_responde_304(self):
+        primeira = self.client.get(self.url)
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(primeira['Cache-Control'], 'private, no-cache')
+        etag = primeira['ETag']
+        self.assertIn(self.documento_pai.id, [no['id'] for no in primeira.json()['documentos']])
+
+        with self._construcoes() as construir:
+            nao_modificada = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            sem_etag = self.client.get(self.url)
+        construir.assert_not_called()
+
+        self.assertEqual(nao_modificada.status_code, 304)
+        self.assertEqual(sem_etag.status_code, 200)
+        self.assertEqual(sem_etag.content, primeira.content)
+
+    def test_alteracao_na_cadeia_gera_novo_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lancamento = self.documento_pai.lancamentos.create(
+                tipo=self.tipo_registro,
+                data=self.documento_pai.data,
+                observacoes='PENDENTE: conferir',
+            )
+
+        with self._construcoes() as construir:
+            resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        construir.assert_called_once()
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        no_pai = next(
+            no for no in resposta.json()['documentos'] if no['id'] == lancamento.documento_id
+        )
+        self.assertEqual(no_pai['keyword_encontrada']['slug'], 'pendente')
+
+    def test_geracao_incrementada_durante_a_montagem_nao_cacheia_sob_a_nova(self):
+        serializar = HierarquiaArvoreService.serializar_arvore
+
+        def serializar_concorrente(imovel, **kwargs):
+            conteudo = serializar(imovel, **kwargs)
+            # Um escritor confirma uma alteração enquanto a árvore é montada.
+            CacheService.incrementar_geracao('imovel', imovel.id)
+            return conteudo
+
+        with patch.object(
+            HierarquiaArvoreService, 'serializar_arvore', side_effect=serializar_concorrente
+        ):
+            etag = self.client.get(self.url)['ETag']
+
+        with self._construcoes() as construir:
+            resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        construir.assert_called_once()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
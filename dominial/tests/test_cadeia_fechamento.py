@@ -0,0 +1,134 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from dominial.models import (
+    Documento,
+    DocumentoAncestral,
+    Imovel,
+    Lancamento,
+)
+from dominial.services.cadeia_fechamento_service import CadeiaFechamentoService
+from dominial.services.cadeia_grafo_service import CadeiaGrafo
+from dominial.services.hierarquia_arvore_service import HierarquiaArvoreService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+from dominial.utils.hierarquia_utils import identificar_documentos_importados
+
+
+class CadeiaFechamentoTest(ArestaTestMixin, TestCase):
+    """Cadeia M500 -> T10 -> T11 -> T12, com T11 e T12 em outro imóvel."""
+
+    def setUp(self):
+        super().setUp()
+        self.outro_imovel = Imovel.objects.create(
+            terra_indigena_id=self.imovel.terra_indigena_id,
+            nome='Imóvel Vizinho',
+            proprietario=self.imovel.proprietario,
+            matricula='11',
+            tipo_documento_principal='transcricao',
+            cartorio=self.cartorio_b,
+        )
+        self.t11 = self._criar_documento_em(self.outro_imovel, 'T11')
+        self.t12 = self._criar_documento_em(self.outro_imovel, 'T12')
+        self.lancamento_m500 = self._ligar(self.documento, 'T10')
+        self._ligar(self.documento_pai, 'T11')
+        self.lancamento_t11 = self._ligar(self.t11, 'T12')
+
+    def _criar_documento_em(self, imovel, numero):
+        return Documento.objects.create(
+            imovel=imovel,
+            tipo=self.tipo_transcricao,
+            numero=numero,
+            data=timezone.now().date(),
+            cartorio=self.cartorio_b,
+        )
+
+    def _ligar(self, filho, numero):
+        lancamento = Lancamento.objects.create(
+            documento=filho,
+            tipo=self.tipo_registro,
+            data=timezone.now().date(),
+        )
+        self._criar_origem(lancamento, numero=numero)
+        return lancamento
+
+    def _fechamento(self):
+        return set(
+            DocumentoAncestral.objects.values_list(
+                'descendente_id', 'ancestral_id', 'profundidade'
+            )
+        )
+
+    def test_fechamento_mantido_pelas_arestas(self):
+        m500, t10, t11, t12 = self.documento.id, self.documento_pai.id, self.t11.id, self.t12.id
+        self.assertEqual(
+            self._fechamento(),
+            {
+                (m500, t10, 1), (m500, t11, 2), (m500, t12, 3),
+                (t10, t11, 1), (t10, t12, 2),
+                (t11, t12, 1),
+            },
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                CadeiaFechamentoService.ancestrais(m500), {t10: 1, t11: 2, t12: 3}
+            )
+
+    def test_nova_origem_no_topo_propaga_para_descendentes(self):
+        t13 = self._criar_documento_em(self.outro_imovel, 'T13')
+        self._ligar(self.t12, 'T13')
+
+        self.assertEqual(CadeiaFechamentoService.ancestrais(self.documento.id)[t13.id], 4)
+        self.assertEqual(CadeiaFechamentoService.ancestrais(self.t11.id)[t13.id], 2)
+
+    def test_atalho_reduz_profundidade_e_exclusao_restaura(self):
+        atalho = self._ligar(self.documento, 'T12')
+
+        self.assertEqual(CadeiaFechamentoService.ancestrais(self.documento.id)[self.t12.id], 1)
+
+        atalho.delete()
+        self.assertEqual(CadeiaFechamentoService.ancestrais(self.documento.id)[self.t12.id], 3)
+
+    def test_remocao_de_origem_e_de_documento(self):
+        self.lancamento_t11.origens_estruturadas.all().delete()
+        self.assertNotIn(self.t12.id, CadeiaFechamentoService.ancestrais(self.documento.id))
+
+        self.documento_pai.delete()
+        self.assertEqual(CadeiaFechamentoService.ancestrais(self.documento.id), {})
+
+    def test_imoveis_que_incluem_cada_documento(self):
+        imoveis = CadeiaFechamentoService.imoveis_por_documento(
+            [self.documento, self.t11]
+        )
+
+        self.assertEqual(imoveis[self.documento.id], [self.imovel])
+        self.assertEqual(imoveis[self.t11.id], [self.imovel, self.outro_imovel])
+        self.assertEqual(identificar_documentos_importados(self.imovel), [self.t11, self.t12])
+
+    def test_arvore_preenche_cadeias_compartilhadas(self):
+        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(self.imovel)
+        arvore_grafo = HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+            self.imovel, grafo=CadeiaGrafo.carregar(self.imovel)
+        )
+
+        no_t11 = next(no for no in arvore['documentos'] if no['id'] == self.t11.id)
+        self.assertEqual(no_t11['imoveis_compartilhando'], ['11'])
+        self.assertEqual(no_t11['total_cadeias'], 2)
+        self.assertEqual(
+            [cadeia['imovel_id'] for cadeia in no_t11['cadeias_dominiais']],
+            [self.imovel.id, self.outro_imovel.id],
+        )
+        self.assertEqual(arvore_grafo, arvore)
+
+    def test_reconstrucao_equivale_a_manutencao_incremental(self):
+        incremental = self._fechamento()
+        DocumentoAncestral.objects.all().delete()
+
+        saida = StringIO()
+        call_command('sincronizar_arestas_origem', '--json', stdout=saida)
+
+        self.assertEqual(json.loads(saida.getvalue())['ancestrais'], len(incremental))
+        self.assertEqual(self._fechamento(), incremental)
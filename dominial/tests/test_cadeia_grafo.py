@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dominial.models import Lancamento, LancamentoPessoa, OrigemFimCadeia
+from dominial.services.cadeia_completa_service import CadeiaCompletaService
+from dominial.services.cadeia_dominial_tabela_service import CadeiaDominialTabelaService
+from dominial.services.cadeia_grafo_service import CadeiaGrafo
+from dominial.services.hierarquia_arvore_service import HierarquiaArvoreService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+from dominial.utils.hierarquia_utils import identificar_tronco_principal
+
+
+class CadeiaGrafoTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.pessoa = self.imovel.proprietario
+        self.cadeia = [self.documento, self.documento_pai]
+
+    def _estender_cadeia(self, tamanho):
+        inicio = len(self.cadeia) - 1 if len(self.cadeia) == 2 else len(self.cadeia)
+        while len(self.cadeia) < tamanho:
+            numero = len(self.cadeia) + 9
+            self.cadeia.append(self._criar_documento(f'T{numero}', self.cartorio_b))
+        for filho, pai in zip(self.cadeia[inicio - 1:], self.cadeia[inicio:]):
+            lancamento = Lancamento.objects.create(
+                documento=filho,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+            )
+            self._criar_origem(lancamento, numero=pai.numero)
+            LancamentoPessoa.objects.create(
+                lancamento=lancamento, pessoa=self.pessoa, tipo='transmitente'
+            )
+        ultimo = Lancamento.objects.create(
+            documento=self.cadeia[-1],
+            tipo=self.tipo_registro,
+            data=timezone.now().date(),
+        )
+        OrigemFimCadeia.objects.create(
+            lancamento=ultimo,
+            indice_origem=0,
+            fim_cadeia=True,
+            tipo_fim_cadeia='sem_origem',
+            classificacao_fim_cadeia='sem_origem',
+        )
+
+    def _contar_consultas_cadeia_completa(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            CadeiaCompletaService().get_cadeia_completa(
+                self.imovel.terra_indigena_id_id, self.imovel.id
+            )
+        return len(consultas)
+
+    def test_carrega_documentos_lancamentos_e_arestas(self):
+        self._estender_cadeia(4)
+
+        grafo = CadeiaGrafo.carregar(self.imovel)
+
+        self.assertEqual(set(grafo.documentos), {doc.id for doc in self.cadeia})
+        with self.assertNumQueries(0):
+            for filho, pai in zip(self.cadeia, self.cadeia[1:]):
+                [lancamento] = grafo.lancamentos(filho)
+                self.assertEqual(
+                    [p.pessoa for p in lancamento.transmitentes], [self.pessoa]
+                )
+                self.assertEqual(
+                    [aresta.documento_pai for aresta in grafo.arestas[filho.id]], [pai]
+                )
+            [(_, origem)] = grafo.origens_fim_cadeia(self.cadeia[-1])
+            self.assertEqual(origem.tipo_fim_cadeia, 'sem_origem')
+
+    def test_arvore_e_tronco_com_grafo_equivalem_ao_caminho_sem_grafo(self):
+        self._estender_cadeia(4)
+        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(self.imovel)
+        tronco = identificar_tronco_principal(self.imovel)
+
+        grafo = CadeiaGrafo.carregar(self.imovel)
+        with self.assertNumQueries(0):
+            arvore_grafo = HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+                self.imovel, grafo=grafo
+            )
+            tronco_grafo = identificar_tronco_principal(self.imovel, grafo=grafo)
+
+        self.assertEqual(arvore_grafo, arvore)
+        self.assertEqual(tronco_grafo, tronco)
+
+    def test_tabela_com_grafo_mantem_documentos_e_lancamentos(self):
+        self._estender_cadeia(4)
+
+        tabela = CadeiaDominialTabelaService().obter_cadeia_tabela(self.imovel)
+
+        self.assertEqual([item['documento'] for item in tabela], self.cadeia)
+        self.assertTrue(all(item['lancamentos'] for item in tabela))
+
+    def test_consultas_da_cadeia_completa_nao_crescem_com_os_documentos(self):
+        self._estender_cadeia(3)
+        curta = self._contar_consultas_cadeia_completa()
+
+        self._estender_cadeia(8)
+        longa = self._contar_consultas_cadeia_completa()
+
+        # No SQLite a travessia custa uma consulta por nível da cadeia; as
+        # demais cargas (documentos, lançamentos, pessoas, origens) são fixas.
+        self.assertLessEqual(longa - curta, 8 - 3)
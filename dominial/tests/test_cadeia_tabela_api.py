@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dominial.models import LancamentoPessoa, Pessoas
+from dominial.services.cadeia_tabela_serializer_service import CadeiaTabelaSerializerService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class CadeiaTabelaApiTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username='tabela', password='tabela123'))
+        self.transmitente = Pessoas.objects.create(nome='Transmitente Tabela', cpf='30000000001')
+        self.adquirente = Pessoas.objects.create(nome='Adquirente Tabela', cpf='30000000002')
+        self.url = reverse('get_cadeia_dominial_atualizada', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+        })
+
+    def _criar_lancamento_com_pessoas(self, numero):
+        lancamento = self._criar_lancamento(
+            numero_lancamento=f'R{numero}',
+            cartorio_origem=self.cartorio_b,
+            cartorio_transmissao=self.cartorio_a,
+        )
+        LancamentoPessoa.objects.create(lancamento=lancamento, pessoa=self.transmitente, tipo='transmitente')
+        LancamentoPessoa.objects.create(lancamento=lancamento, pessoa=self.adquirente, tipo='adquirente')
+        return lancamento
+
+    def _consultas(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(consultas)
+
+    def test_formato_compacto_com_tabelas_de_consulta(self):
+        lancamento = self._criar_lancamento_com_pessoas(1)
+
+        dados = self.client.get(self.url).json()
+
+        self.assertTrue(dados['success'])
+        self.assertEqual(dados['tipos'], {'matricula': 'Matrícula', 'registro': 'Registro'})
+        self.assertEqual(dados['cartorios'], {
+            str(self.cartorio_a.id): self.cartorio_a.nome,
+            str(self.cartorio_b.id): self.cartorio_b.nome,
+        })
+        self.assertEqual(dados['pessoas'], {
+            str(self.transmitente.id): self.transmitente.nome,
+            str(self.adquirente.id): self.adquirente.nome,
+        })
+
+        item = dados['cadeia'][0]
+        self.assertEqual(item['documento']['cartorio'], self.cartorio_a.id)
+        self.assertEqual(item['documento']['tipo'], 'matricula')
+        self.assertIsNotNone(item['documento']['data'])
+        serializado = item['lancamentos'][0]
+        self.assertEqual(serializado['id'], lancamento.id)
+        self.assertEqual(serializado['tipo'], 'registro')
+        self.assertEqual(serializado['cartorio_transmissao'], self.cartorio_a.id)
+        self.assertEqual(serializado['cartorio_origem'], self.cartorio_b.id)
+        self.assertCountEqual(serializado['pessoas'], [
+            [self.transmitente.id, 'transmitente'],
+            [self.adquirente.id, 'adquirente'],
+        ])
+        self.assertNotIn('cartorio_transmissao_nome', serializado)
+
+    def test_consultas_nao_crescem_com_os_lancamentos(self):
+        self._criar_lancamento_com_pessoas(1)
+        self._consultas()  # persiste o tronco principal
+        consultas_um = self._consultas()
+
+        for numero in range(2, 8):
+            self._criar_lancamento_com_pessoas(numero)
+        self._consultas()
+
+        self.assertEqual(self._consultas(), consultas_um)
+
+    def test_cache_por_geracao_do_imovel_e_escolhas(self):
+        self._criar_lancamento_com_pessoas(1)
+        primeira = self.client.get(self.url)
+
+        obter_cadeia = patch.object(
+            CadeiaTabelaSerializerService,
+            'obter_cadeia',
+            wraps=CadeiaTabelaSerializerService.obter_cadeia,
+        )
+        with obter_cadeia as obter:
+            repetida = self.client.get(self.url)
+        obter.assert_not_called()
+        self.assertEqual(repetida.content, primeira.content)
+
+        sessao = self.client.session
+        sessao[f'origem_documento_{self.documento.id}'] = 'T10'
+        sessao.save()
+        with obter_cadeia as obter:
+            self.client.get(self.url)
+            self.client.get(self.url)
+        obter.assert_called_once()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._criar_lancamento_com_pessoas(2)
+        with obter_cadeia as obter:
+            resposta = self.client.get(self.url).json()
+        obter.assert_called_once()
+        self.assertEqual(len(resposta['cadeia'][0]['lancamentos']), 2)
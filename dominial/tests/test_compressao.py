@@ -0,0 +1,106 @@
+import gzip
+from unittest.mock import patch
+
+import brotli
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.services.compressao_service import CompressaoService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class EscolhaCodificacaoTest(TestCase):
+    def test_prefere_brotli_e_respeita_q_zero(self):
+        escolher = CompressaoService.escolher_codificacao
+        self.assertEqual(escolher('gzip, deflate, br'), 'br')
+        self.assertEqual(escolher('gzip;q=1.0, br;q=0'), 'gzip')
+        self.assertEqual(escolher('GZIP'), 'gzip')
+        self.assertIsNone(escolher('identity'))
+        self.assertIsNone(escolher(''))
+
+
+class CompressaoRespostasTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username='compressao', password='compressao123'))
+        self._criar_origem(self._criar_lancamento(), numero='T10')
+        self.url_arvore = reverse('cadeia_dominial_arvore', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+        })
+
+    def test_html_grande_comprimido_na_hora(self):
+        original = self.client.get(reverse('home'))
+        comprimida = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', original)
+        self.assertEqual(comprimida['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimida['Vary'])
+        self.assertEqual(int(comprimida['Content-Length']), len(comprimida.content))
+        self.assertLess(len(comprimida.content), len(original.content))
+        self.assertEqual(gzip.decompress(comprimida.content), original.content)
+
+    def test_html_so_em_gzip_com_preenchimento_aleatorio(self):
+        original = self.client.get(reverse('home')).content
+
+        respostas = [
+            self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='br, gzip')
+            for _ in range(5)
+        ]
+
+        self.assertEqual({resposta['Content-Encoding'] for resposta in respostas}, {'gzip'})
+        for resposta in respostas:
+            self.assertEqual(gzip.decompress(resposta.content), original)
+        # O tamanho varia a cada resposta (cabeçalho gzip com bytes aleatórios).
+        self.assertGreater(len({len(resposta.content) for resposta in respostas}), 1)
+        self.assertNotIn(
+            'Content-Encoding',
+            self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='br'),
+        )
+
+    def test_resposta_pequena_nao_e_comprimida(self):
+        with patch.object(CompressaoService, 'TAMANHO_MINIMO', 10 ** 9):
+            resposta = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='br')
+        self.assertNotIn('Content-Encoding', resposta)
+
+    def test_variante_comprimida_cacheada_por_geracao(self):
+        comprimir = patch.object(
+            CompressaoService, 'comprimir', wraps=CompressaoService.comprimir
+        )
+        with patch.object(CompressaoService, 'TAMANHO_MINIMO', 64), comprimir as chamada:
+            original = self.client.get(self.url_arvore).content
+            primeira = self.client.get(self.url_arvore, HTTP_ACCEPT_ENCODING='br')
+            segunda = self.client.get(self.url_arvore, HTTP_ACCEPT_ENCODING='br')
+            nao_modificada = self.client.get(
+                self.url_arvore, HTTP_ACCEPT_ENCODING='br', HTTP_IF_NONE_MATCH=primeira['ETag']
+            )
+        self.assertEqual(chamada.call_count, 1)
+        self.assertEqual(primeira['Content-Encoding'], 'br')
+        self.assertTrue(primeira['ETag'].startswith('W/'))
+        self.assertEqual(segunda.content, primeira.content)
+        self.assertEqual(brotli.decompress(primeira.content), original)
+        self.assertEqual(nao_modificada.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documento_pai.lancamentos.create(
+                tipo=self.tipo_registro, data=self.documento_pai.data, observacoes='PENDENTE'
+            )
+        with patch.object(CompressaoService, 'TAMANHO_MINIMO', 64), comprimir as chamada:
+            self.client.get(self.url_arvore, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(chamada.call_count, 1)
+
+    def test_cadeia_tabela_comprimida(self):
+        url = reverse('get_cadeia_dominial_atualizada', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+        })
+        original = self.client.get(url).content
+
+        with patch.object(CompressaoService, 'TAMANHO_MINIMO', 64):
+            resposta = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(resposta['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(resposta.content), original)
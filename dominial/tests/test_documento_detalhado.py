@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class DocumentoDetalhadoViewTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(
+            User.objects.create_user(username='detalhe', password='detalhe123')
+        )
+        self.url = reverse('documento_detalhado', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+            'documento_id': self.documento.id,
+        })
+
+    def test_documento_com_lancamentos_e_renderizado(self):
+        self._criar_lancamento(observacoes='Atenção: conferir a área')
+        self._criar_lancamento()
+
+        resposta = self.client.get(self.url)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.context['tem_lancamentos'])
+        alertas = [lanc.keyword_encontrada for lanc in resposta.context['lancamentos']]
+        self.assertIn('atencao', [alerta['slug'] for alerta in alertas if alerta])
+        self.assertIn(None, alertas)
@@ -0,0 +1,344 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dominial.models import (
+    Cartorios,
+    Documento,
+    DocumentoOrigemAresta,
+    DocumentoTipo,
+    Imovel,
+    Lancamento,
+    LancamentoOrigem,
+    LancamentoTipo,
+    OrigemFimCadeia,
+    Pessoas,
+    TIs,
+)
+from dominial.services.cadeia_aresta_service import CadeiaArestaService
+from dominial.services.cadeia_fechamento_service import CadeiaFechamentoService
+from dominial.services.hierarquia_arvore_service import HierarquiaArvoreService
+from dominial.utils.hierarquia_utils import identificar_tronco_principal
+
+
+class ArestaTestMixin:
+    def setUp(self):
+        tis = TIs.objects.create(nome='TI Arestas', codigo='ARE01', etnia='Teste')
+        pessoa = Pessoas.objects.create(nome='Pessoa Arestas', cpf='99988877766')
+        self.cartorio_a = Cartorios.objects.create(
+            nome='Cartório A Arestas', cns='710001', cidade='A', estado='SP'
+        )
+        self.cartorio_b = Cartorios.objects.create(
+            nome='Cartório B Arestas', cns='710002', cidade='B', estado='MS'
+        )
+        self.tipo_matricula = DocumentoTipo.objects.create(tipo='matricula')
+        self.tipo_transcricao = DocumentoTipo.objects.create(tipo='transcricao')
+        self.tipo_registro = LancamentoTipo.objects.create(tipo='registro')
+
+        self.imovel = Imovel.objects.create(
+            terra_indigena_id=tis,
+            nome='Imóvel Arestas',
+            proprietario=pessoa,
+            matricula='500',
+            tipo_documento_principal='matricula',
+            cartorio=self.cartorio_a,
+        )
+        self.documento = self._criar_documento('M500', self.cartorio_a)
+        self.documento_pai = self._criar_documento('T10', self.cartorio_b)
+
+    def _criar_documento(self, numero, cartorio):
+        tipo = self.tipo_matricula if numero.startswith('M') else self.tipo_transcricao
+        return Documento.objects.create(
+            imovel=self.imovel,
+            tipo=tipo,
+            numero=numero,
+            data=timezone.now().date(),
+            cartorio=cartorio,
+        )
+
+    def _criar_lancamento(self, **campos):
+        return Lancamento.objects.create(
+            documento=self.documento,
+            tipo=self.tipo_registro,
+            data=timezone.now().date(),
+            **campos,
+        )
+
+    def _criar_origem(self, lancamento, numero='T10', indice=0, cartorio=None):
+        return LancamentoOrigem.objects.create(
+            lancamento=lancamento,
+            indice_origem=indice,
+            tipo_documento='transcricao' if numero.startswith('T') else 'matricula',
+            numero=numero,
+            cartorio=cartorio or self.cartorio_b,
+        )
+
+
+class DocumentoOrigemArestaTest(ArestaTestMixin, TestCase):
+    def test_origem_estruturada_gera_aresta_resolvida(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+
+        aresta = DocumentoOrigemAresta.objects.get(lancamento=lancamento)
+        self.assertEqual(aresta.documento_filho, self.documento)
+        self.assertEqual(aresta.documento_pai, self.documento_pai)
+        self.assertEqual(aresta.fonte, 'estruturada')
+        self.assertFalse(aresta.fim_cadeia)
+        self.assertEqual(aresta.codigo, 'T10')
+
+    def test_origem_sem_documento_e_religada_quando_documento_e_criado(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento, numero='T77')
+
+        aresta = DocumentoOrigemAresta.objects.get(lancamento=lancamento)
+        self.assertIsNone(aresta.documento_pai)
+
+        novo = self._criar_documento('T77', self.cartorio_b)
+
+        aresta.refresh_from_db()
+        self.assertEqual(aresta.documento_pai, novo)
+
+    def test_documento_com_identidade_alterada_e_desligado(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+
+        self.documento_pai.cartorio = self.cartorio_a
+        self.documento_pai.save()
+
+        aresta = DocumentoOrigemAresta.objects.get(lancamento=lancamento)
+        self.assertIsNone(aresta.documento_pai)
+
+    def test_exclusao_da_origem_remove_aresta(self):
+        lancamento = self._criar_lancamento()
+        origem = self._criar_origem(lancamento)
+
+        origem.delete()
+
+        self.assertFalse(
+            DocumentoOrigemAresta.objects.filter(lancamento=lancamento).exists()
+        )
+
+    def test_exclusao_do_lancamento_remove_arestas_em_cascata(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+        OrigemFimCadeia.objects.create(
+            lancamento=lancamento,
+            indice_origem=1,
+            fim_cadeia=True,
+            tipo_fim_cadeia='sem_origem',
+            classificacao_fim_cadeia='sem_origem',
+        )
+
+        lancamento.delete()
+
+        self.assertFalse(DocumentoOrigemAresta.objects.exists())
+
+    def test_fim_de_cadeia_gera_aresta_sem_pai(self):
+        lancamento = self._criar_lancamento()
+        OrigemFimCadeia.objects.create(
+            lancamento=lancamento,
+            indice_origem=0,
+            fim_cadeia=True,
+            tipo_fim_cadeia='destacamento_publico',
+            classificacao_fim_cadeia='origem_lidima',
+        )
+
+        aresta = DocumentoOrigemAresta.objects.get(lancamento=lancamento)
+        self.assertTrue(aresta.fim_cadeia)
+        self.assertIsNone(aresta.documento_pai)
+        self.assertEqual(
+            CadeiaArestaService.arestas_por_documento([self.documento.id]),
+            {self.documento.id: []},
+        )
+
+    def test_lancamento_gravado_sem_signals_e_sincronizado_na_leitura(self):
+        [lancamento] = Lancamento.objects.bulk_create([
+            Lancamento(
+                documento=self.documento,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+                origem='T10',
+                cartorio_origem=self.cartorio_b,
+            )
+        ])
+
+        arestas = CadeiaArestaService.arestas_por_documento([self.documento.id])
+
+        [aresta] = arestas[self.documento.id]
+        self.assertEqual(aresta.lancamento_id, lancamento.id)
+        self.assertEqual(aresta.fonte, 'legada')
+        self.assertEqual(aresta.documento_pai, self.documento_pai)
+
+    def test_origem_sem_arestas_nao_e_sincronizada_a_cada_leitura(self):
+        Lancamento.objects.bulk_create([
+            Lancamento(
+                documento=self.documento,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+                origem='Destacamento Público: INCRA',
+            )
+        ])
+        self.assertEqual(
+            CadeiaArestaService.arestas_por_documento([self.documento.id]),
+            {self.documento.id: []},
+        )
+
+        with CaptureQueriesContext(connection) as consultas:
+            CadeiaArestaService.arestas_por_documento([self.documento.id])
+            CadeiaFechamentoService.documentos_importados(self.imovel)
+
+        self.assertEqual(
+            [c['sql'] for c in consultas.captured_queries if not c['sql'].startswith('SELECT')],
+            [],
+        )
+
+    def test_leitura_sincronizada_nao_reinterpreta_origens(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+
+        with self.assertNumQueries(2):
+            arestas = CadeiaArestaService.arestas_por_documento([self.documento.id])
+            self.assertEqual(
+                [aresta.documento_pai for aresta in arestas[self.documento.id]],
+                [self.documento_pai],
+            )
+
+    def test_comando_reconstroi_arestas(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+        DocumentoOrigemAresta.objects.all().delete()
+
+        saida = StringIO()
+        call_command('sincronizar_arestas_origem', '--json', stdout=saida)
+
+        relatorio = json.loads(saida.getvalue())
+        self.assertEqual(relatorio['arestas_antes'], 0)
+        self.assertEqual(relatorio['arestas_depois'], 1)
+        self.assertEqual(relatorio['pendentes'], 0)
+        self.assertEqual(
+            DocumentoOrigemAresta.objects.get(lancamento=lancamento).documento_pai,
+            self.documento_pai,
+        )
+
+    def test_comando_dry_run_nao_grava(self):
+        lancamento = self._criar_lancamento()
+        self._criar_origem(lancamento)
+        DocumentoOrigemAresta.objects.all().delete()
+
+        saida = StringIO()
+        call_command('sincronizar_arestas_origem', '--dry-run', '--json', stdout=saida)
+
+        relatorio = json.loads(saida.getvalue())
+        self.assertEqual(relatorio['modo'], 'dry-run')
+        self.assertEqual(relatorio['lancamentos'], 1)
+        self.assertFalse(DocumentoOrigemAresta.objects.exists())
+
+
+class CadeiaArestaTravessiaRecursivaTest(ArestaTestMixin, TestCase):
+    """Travessia ``WITH RECURSIVE``; o SQL também roda no SQLite dos testes."""
+
+    def setUp(self):
+        super().setUp()
+        self.cadeia = [self.documento, self.documento_pai]
+        for numero in range(11, 16):
+            self.cadeia.append(self._criar_documento(f'T{numero}', self.cartorio_b))
+        for filho, pai in zip(self.cadeia, self.cadeia[1:]):
+            lancamento = Lancamento.objects.create(
+                documento=filho,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+            )
+            self._criar_origem(lancamento, numero=pai.numero)
+
+    def test_fora_do_postgresql_usa_caminho_por_salto(self):
+        self.assertIsNone(CadeiaArestaService.ancestrais(self.documento.id))
+        self.assertIsNone(CadeiaArestaService.arestas_da_cadeia(self.documento.id))
+
+    def test_ancestrais_retorna_niveis(self):
+        with patch.object(
+            CadeiaArestaService, 'consulta_recursiva_disponivel', return_value=True
+        ), self.assertNumQueries(1):
+            ancestrais = CadeiaArestaService.ancestrais(self.documento.id)
+
+        self.assertEqual(
+            ancestrais,
+            {documento.id: nivel for nivel, documento in enumerate(self.cadeia)},
+        )
+
+    def test_arestas_da_cadeia_em_uma_consulta(self):
+        with patch.object(
+            CadeiaArestaService, 'consulta_recursiva_disponivel', return_value=True
+        ), self.assertNumQueries(2):
+            arestas = CadeiaArestaService.arestas_da_cadeia(self.documento.id)
+
+        self.assertEqual(set(arestas), {documento.id for documento in self.cadeia})
+        for filho, pai in zip(self.cadeia, self.cadeia[1:]):
+            self.assertEqual(
+                [aresta.documento_pai for aresta in arestas[filho.id]], [pai]
+            )
+        self.assertEqual(arestas[self.cadeia[-1].id], [])
+
+    def test_ciclo_nao_impede_a_travessia(self):
+        lancamento = Lancamento.objects.create(
+            documento=self.cadeia[-1],
+            tipo=self.tipo_registro,
+            data=timezone.now().date(),
+        )
+        self._criar_origem(lancamento, numero='M500', cartorio=self.cartorio_a)
+
+        with patch.object(
+            CadeiaArestaService, 'consulta_recursiva_disponivel', return_value=True
+        ):
+            ancestrais = CadeiaArestaService.ancestrais(self.documento.id)
+            arestas = CadeiaArestaService.arestas_da_cadeia(self.documento.id)
+
+        self.assertEqual(ancestrais[self.documento.id], 0)
+        self.assertEqual(
+            [aresta.documento_pai for aresta in arestas[self.cadeia[-1].id]],
+            [self.documento],
+        )
+
+    def test_travessia_recursiva_sincroniza_lancamentos_sem_arestas(self):
+        extra = self._criar_documento('T90', self.cartorio_b)
+        Lancamento.objects.bulk_create([
+            Lancamento(
+                documento=self.cadeia[-1],
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+                origem='T90',
+                cartorio_origem=self.cartorio_b,
+            )
+        ])
+
+        with patch.object(
+            CadeiaArestaService, 'consulta_recursiva_disponivel', return_value=True
+        ):
+            arestas = CadeiaArestaService.arestas_da_cadeia(self.documento.id)
+
+        self.assertEqual(
+            [aresta.documento_pai for aresta in arestas[self.cadeia[-1].id]],
+            [extra],
+        )
+        self.assertIn(extra.id, arestas)
+
+    def test_arvore_e_tronco_equivalem_ao_caminho_por_salto(self):
+        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(self.imovel)
+        tronco = identificar_tronco_principal(self.imovel)
+
+        with patch.object(
+            CadeiaArestaService, 'consulta_recursiva_disponivel', return_value=True
+        ):
+            arvore_recursiva = HierarquiaArvoreService.construir_arvore_cadeia_dominial(
+                self.imovel
+            )
+            tronco_recursivo = identificar_tronco_principal(self.imovel)
+
+        self.assertEqual(arvore_recursiva, arvore)
+        self.assertEqual(tronco_recursivo, tronco)
+        self.assertEqual(tronco, self.cadeia)
@@ -21,7 +21,9 @@ from dominial.models import (
     Pessoas,
     TIs,
 )
+from dominial.services import exportacao_service, renderizador_pdf_service
 from dominial.services.cadeia_completa_service import CadeiaCompletaService
+from dominial.services.exportacao_service import ExportacaoService
 from dominial.services.hierarquia_arvore_service import HierarquiaArvoreService
 from dominial.views import cadeia_dominial_views
 
@@ -122,7 +124,7 @@ class ExportacaoCadeiaParidadeTest(SimpleTestCase):
         )
 
     def test_weasyprint_instalado_gera_pdf_real(self):
-        pdf = cadeia_dominial_views.HTML(
+        pdf = renderizador_pdf_service.HTML(
             string='<meta charset="utf-8"><h1>Teste de geração PDF</h1>'
         ).write_pdf()
 
@@ -151,27 +153,21 @@ class ExportacaoCadeiaParidadeTest(SimpleTestCase):
         self.assertEqual(estatisticas["total_documentos"], 2)
 
     @patch("dominial.services.cadeia_completa_service.CadeiaCompletaService")
-    @patch.object(cadeia_dominial_views, "get_object_or_404")
-    @patch.object(cadeia_dominial_views, "render_to_string")
-    @patch.object(cadeia_dominial_views, "HTML")
-    @patch.object(cadeia_dominial_views.os.path, "exists", return_value=True)
+    @patch.object(exportacao_service, "render_to_string")
+    @patch.object(
+        exportacao_service.RenderizadorPdfService, "renderizar", return_value=b"%PDF-teste"
+    )
     def test_pdf_completo_recebe_contexto_e_ordem_do_servico(
         self,
-        _exists,
-        html_mock,
+        renderizar_mock,
         render_to_string_mock,
-        get_object_mock,
         service_class_mock,
     ):
-        get_object_mock.side_effect = [self.tis, self.imovel]
         service = service_class_mock.return_value
         service.get_cadeia_completa.return_value = self.contexto_completo
         render_to_string_mock.return_value = "<html></html>"
-        html_mock.return_value.write_pdf.return_value = b"%PDF-teste"
 
-        response = cadeia_dominial_views.exportar_cadeia_completa_pdf.__wrapped__(
-            self._request("/pdf/"), self.tis.id, self.imovel.id
-        )
+        pdf = ExportacaoService.renderizar_cadeia_completa_pdf(self.tis.id, self.imovel.id)
 
         service.get_cadeia_completa.assert_called_once_with(self.tis.id, self.imovel.id)
         render_to_string_mock.assert_called_once_with(
@@ -184,7 +180,10 @@ class ExportacaoCadeiaParidadeTest(SimpleTestCase):
             for item in tronco["documentos"]
         ]
         self.assertEqual(ids_pdf, [101, 202])
-        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(pdf, b"%PDF-teste")
+        renderizar_mock.assert_called_once_with(
+            "<html></html>", "cadeia_completa_pdf.css", None
+        )
 
     @patch("dominial.services.cadeia_completa_service.CadeiaCompletaService")
     @patch.object(cadeia_dominial_views, "get_object_or_404")
@@ -200,7 +199,7 @@ class ExportacaoCadeiaParidadeTest(SimpleTestCase):
         )
 
         service.get_cadeia_completa.assert_called_once_with(self.tis.id, self.imovel.id)
-        workbook = load_workbook(BytesIO(response.content))
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
         valores_coluna_a = [cell.value for cell in workbook.active["A"]]
         titulos_esperados = ["Matrícula: M100", "📥 Transcrição: T90"]
         titulos_documentos = [valor for valor in valores_coluna_a if valor in titulos_esperados]
@@ -211,29 +210,23 @@ class ExportacaoCadeiaParidadeTest(SimpleTestCase):
         )
 
     @patch("dominial.services.cadeia_completa_service.CadeiaCompletaService")
-    @patch.object(cadeia_dominial_views, "get_object_or_404")
-    @patch.object(cadeia_dominial_views, "render_to_string", return_value="<html></html>")
-    @patch.object(cadeia_dominial_views, "HTML")
-    @patch.object(cadeia_dominial_views.os.path, "exists", return_value=True)
+    @patch.object(exportacao_service, "render_to_string", return_value="<html></html>")
+    @patch.object(
+        exportacao_service.RenderizadorPdfService, "renderizar", return_value=b"%PDF-teste"
+    )
     def test_pdf_com_sequencia_preserva_fluxo_personalizado(
         self,
-        _exists,
-        html_mock,
+        _renderizar_mock,
         _render_to_string_mock,
-        get_object_mock,
         service_class_mock,
     ):
-        get_object_mock.side_effect = [self.tis, self.imovel]
         service = service_class_mock.return_value
         service.get_cadeia_completa_com_sequencia_personalizada.return_value = (
             self.contexto_completo
         )
-        html_mock.return_value.write_pdf.return_value = b"%PDF-teste"
 
-        cadeia_dominial_views.exportar_cadeia_completa_pdf.__wrapped__(
-            self._request("/pdf/", {"sequencia": "202,101"}),
-            self.tis.id,
-            self.imovel.id,
+        ExportacaoService.renderizar_cadeia_completa_pdf(
+            self.tis.id, self.imovel.id, "202,101"
         )
 
         service.get_cadeia_completa_com_sequencia_personalizada.assert_called_once_with(
@@ -447,7 +440,7 @@ class ExportacaoCadeiaComFimCadeiaTest(TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
-        workbook = load_workbook(BytesIO(response.content))
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
         valores_coluna_a = [cell.value for cell in workbook.active["A"]]
 
         titulos_esperados = ["Matrícula: M500", "Transcrição: T90"]
@@ -464,3 +457,28 @@ class ExportacaoCadeiaComFimCadeiaTest(TestCase):
                 for valor in valores_coluna_a
             )
         )
+
+    def test_excel_e_enviado_em_streaming_com_estilos_nomeados(self):
+        """
+        A planilha write-only é enviada em blocos e mantém a estrutura:
+        título mesclado, cabeçalhos agrupados e linhas de lançamento.
+        """
+        response = cadeia_dominial_views.exportar_cadeia_dominial_excel.__wrapped__(
+            self._request("/excel/"), self.tis.id, self.imovel.id
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+
+        planilha = load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        self.assertEqual(planilha.title, "Cadeia Dominial Geral")
+        self.assertIn("A1:P1", {str(faixa) for faixa in planilha.merged_cells.ranges})
+        self.assertEqual(planilha["A1"].style, "cadeia_titulo")
+        self.assertEqual(planilha["B4"].value, self.imovel.matricula)
+
+        linha_lancamento = next(
+            linha
+            for linha in planilha.iter_rows(min_row=11)
+            if linha[3].value == self.cartorio.nome
+        )
+        self.assertEqual(linha_lancamento[0].style, "cadeia_celula")
+        self.assertEqual(planilha.column_dimensions["P"].width, 30)
@@ -0,0 +1,132 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from dominial.models import ExportacaoJob
+from dominial.services.exportacao_service import ExportacaoService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class ExportacaoJobTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client.force_login(
+            User.objects.create_user(username='exportacao', password='exportacao123')
+        )
+        self._criar_origem(self._criar_lancamento(), numero='T10')
+        self.url = reverse('exportar_cadeia_completa_pdf', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+        })
+        pdf = patch.object(ExportacaoService, '_write_pdf', return_value=b'%PDF-teste')
+        self.write_pdf = pdf.start()
+        self.addCleanup(pdf.stop)
+
+    def _pedir(self, **params):
+        return self.client.get(self.url, {**params, 'formato': 'json'})
+
+    def _processar_fila(self):
+        saida = StringIO()
+        call_command('processar_exportacoes', '--uma-vez', '--json', stdout=saida)
+        return json.loads(saida.getvalue())
+
+    def test_pedido_enfileira_e_worker_gera_o_arquivo(self):
+        resposta = self._pedir()
+        self.assertEqual(resposta.status_code, 202)
+        job_id = resposta.json()['id']
+        self.assertEqual(resposta.json()['status'], ExportacaoJob.STATUS_PENDENTE)
+        self.write_pdf.assert_not_called()
+
+        relatorio = self._processar_fila()
+        self.assertEqual((relatorio['processados'], relatorio['concluidos']), (1, 1))
+
+        status = self.client.get(reverse('exportacao_status', kwargs={'job_id': job_id})).json()
+        self.assertTrue(status['concluido'])
+        self.assertEqual(status['progresso'], 100)
+
+        download = self.client.get(status['download_url'])
+        self.assertEqual(b''.join(download.streaming_content), b'%PDF-teste')
+        self.assertIn('cadeia_completa_500_', download['Content-Disposition'])
+
+    def test_pedidos_identicos_reaproveitam_o_job(self):
+        primeiro = self._pedir().json()['id']
+        self.assertEqual(self._pedir().json()['id'], primeiro)
+        self.assertNotEqual(self._pedir(sequencia='1,2').json()['id'], primeiro)
+
+        self._processar_fila()
+        resposta = self._pedir()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['id'], primeiro)
+        self.assertEqual(self.write_pdf.call_count, 2)
+
+    def test_alteracao_na_cadeia_gera_novo_job(self):
+        primeiro = self._pedir().json()['id']
+        self._processar_fila()
+
+        self.documento.observacoes = 'Revisado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documento.save()
+
+        self.assertNotEqual(self._pedir().json()['id'], primeiro)
+
+    def test_erro_fica_registrado_e_novo_pedido_tenta_de_novo(self):
+        self.write_pdf.side_effect = RuntimeError('falha no WeasyPrint')
+        primeiro = self._pedir().json()['id']
+
+        relatorio = self._processar_fila()
+
+        self.assertEqual(relatorio['erros'], 1)
+        job = ExportacaoJob.objects.get(pk=primeiro)
+        self.assertEqual(job.status, ExportacaoJob.STATUS_ERRO)
+        self.assertEqual(job.erro, 'falha no WeasyPrint')
+        self.assertNotEqual(self._pedir().json()['id'], primeiro)
+
+    def test_navegador_e_redirecionado_para_acompanhamento(self):
+        resposta = self.client.get(self.url)
+
+        job = ExportacaoJob.objects.get()
+        self.assertRedirects(
+            resposta, reverse('exportacao_acompanhar', kwargs={'job_id': job.id})
+        )
+        pagina = self.client.get(resposta.url)
+        self.assertContains(pagina, reverse('exportacao_status', kwargs={'job_id': job.id}))
+
+    @override_settings(EXPORTACOES_EM_SEGUNDO_PLANO=False)
+    def test_sem_worker_o_job_e_processado_na_requisicao(self):
+        resposta = self.client.get(self.url)
+
+        job = ExportacaoJob.objects.get()
+        self.assertEqual(job.status, ExportacaoJob.STATUS_CONCLUIDO)
+        self.assertRedirects(
+            resposta,
+            reverse('exportacao_download', kwargs={'job_id': job.id}),
+            fetch_redirect_response=False,
+        )
+
+    def test_job_abandonado_volta_para_a_fila(self):
+        job_id = self._pedir().json()['id']
+        self.assertTrue(ExportacaoService.reservar(job_id))
+        ExportacaoJob.objects.filter(pk=job_id).update(
+            data_inicio=timezone.now() - timedelta(hours=1)
+        )
+
+        relatorio = self._processar_fila()
+
+        self.assertEqual((relatorio['liberados'], relatorio['concluidos']), (1, 1))
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from dominial.models import Documento, Imovel, Lancamento, LancamentoOrigem
+from dominial.services import exportacao_tis_service
+from dominial.services.cadeia_grafo_service import CadeiaGrafo
+from dominial.services.exportacao_tis_service import ExportacaoTisService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+class ExportacaoTisTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tis = self.imovel.terra_indigena_id
+        self._criar_origem(self._criar_lancamento(), numero='T10')
+
+        # Segundo imóvel cuja cadeia também passa pela T10 do primeiro.
+        self.imovel_vizinho = Imovel.objects.create(
+            terra_indigena_id=self.tis,
+            nome='Imóvel Vizinho',
+            proprietario=self.imovel.proprietario,
+            matricula='600',
+            tipo_documento_principal='matricula',
+            cartorio=self.cartorio_a,
+        )
+        self.documento_vizinho = Documento.objects.create(
+            imovel=self.imovel_vizinho,
+            tipo=self.tipo_matricula,
+            numero='M600',
+            data=timezone.now().date(),
+            cartorio=self.cartorio_a,
+        )
+        LancamentoOrigem.objects.create(
+            lancamento=Lancamento.objects.create(
+                documento=self.documento_vizinho,
+                tipo=self.tipo_registro,
+                data=timezone.now().date(),
+            ),
+            indice_origem=0,
+            tipo_documento='transcricao',
+            numero='T10',
+            cartorio=self.cartorio_b,
+        )
+
+    def _zip(self, **kwargs):
+        resumo = []
+        conteudo = b''.join(ExportacaoTisService.gerar_zip(self.tis, resumo=resumo, **kwargs))
+        return zipfile.ZipFile(BytesIO(conteudo)), resumo
+
+    def test_zip_tem_arquivos_de_cada_imovel_e_resumo(self):
+        arquivo_zip, resumo = self._zip()
+
+        self.assertEqual(
+            sorted(arquivo_zip.namelist()),
+            sorted([
+                f'imoveis/500_{self.imovel.id}.json',
+                f'imoveis/500_{self.imovel.id}.xlsx',
+                f'imoveis/600_{self.imovel_vizinho.id}.json',
+                f'imoveis/600_{self.imovel_vizinho.id}.xlsx',
+                'resumo.xlsx',
+            ]),
+        )
+        arvore = json.loads(arquivo_zip.read(f'imoveis/600_{self.imovel_vizinho.id}.json'))
+        self.assertIn('T10', [documento['numero'] for documento in arvore['documentos']])
+
+        planilha = load_workbook(BytesIO(arquivo_zip.read('resumo.xlsx'))).active
+        linhas = [linha for linha in planilha.iter_rows(min_row=4, values_only=True)]
+        self.assertEqual([linha[0] for linha in linhas], ['500', '600'])
+        self.assertEqual([linha[-1] for linha in linhas], ['OK', 'OK'])
+        self.assertEqual([linha['documentos'] for linha in resumo], [2, 2])
+
+    def test_documentos_compartilhados_sao_resolvidos_uma_vez(self):
+        carregar = CadeiaGrafo.carregar
+        grafos = []
+        caches = []
+
+        def espiar(imovel, documentos_resolvidos=None):
+            caches.append(documentos_resolvidos)
+            grafos.append(carregar(imovel, documentos_resolvidos))
+            return grafos[-1]
+
+        with patch.object(exportacao_tis_service.CadeiaGrafo, 'carregar', side_effect=espiar):
+            self._zip(formatos=('json',))
+
+        self.assertIs(caches[0], caches[1])
+        self.assertIs(
+            grafos[0].documento(self.documento_pai.id),
+            grafos[1].documento(self.documento_pai.id),
+        )
+        # Ao final nenhum imóvel pendente precisa dos documentos em cache.
+        self.assertEqual(caches[0], {})
+
+    def test_erro_em_um_imovel_nao_interrompe_a_exportacao(self):
+        gerar = exportacao_tis_service.CadeiaExcelService.gerar
+
+        def gerar_com_falha(tis, imovel, context, destino):
+            if imovel.id == self.imovel.id:
+                raise RuntimeError('planilha corrompida')
+            return gerar(tis, imovel, context, destino)
+
+        with patch.object(
+            exportacao_tis_service.CadeiaExcelService, 'gerar', side_effect=gerar_com_falha
+        ), self.assertLogs(exportacao_tis_service.logger, 'ERROR'):
+            arquivo_zip, resumo = self._zip()
+
+        self.assertEqual(resumo[0]['situacao'], 'Erro: planilha corrompida')
+        self.assertEqual(resumo[1]['situacao'], 'OK')
+        self.assertNotIn(f'imoveis/500_{self.imovel.id}.json', arquivo_zip.namelist())
+        self.assertIn(f'imoveis/600_{self.imovel_vizinho.id}.xlsx', arquivo_zip.namelist())
+
+    @patch.object(
+        exportacao_tis_service.RenderizadorPdfService, 'renderizar', return_value=b'%PDF-teste'
+    )
+    def test_pdf_entra_quando_pedido(self, renderizar_mock):
+        arquivo_zip, _ = self._zip(formatos=ExportacaoTisService.formatos('pdf'))
+
+        self.assertEqual(
+            arquivo_zip.read(f'imoveis/500_{self.imovel.id}.pdf'), b'%PDF-teste'
+        )
+        self.assertEqual(renderizar_mock.call_count, 2)
+        self.assertNotIn(f'imoveis/500_{self.imovel.id}.xlsx', arquivo_zip.namelist())
+
+    def test_imoveis_arquivados_ficam_de_fora_por_padrao(self):
+        Imovel.objects.filter(pk=self.imovel_vizinho.pk).update(arquivado=True)
+
+        _, resumo = self._zip()
+        self.assertEqual([linha['matricula'] for linha in resumo], ['500'])
+
+        _, resumo = self._zip(incluir_arquivados=True)
+        self.assertEqual([linha['matricula'] for linha in resumo], ['500', '600'])
+
+    def test_formatos_invalidos(self):
+        with self.assertRaisesMessage(ValueError, 'docx'):
+            ExportacaoTisService.formatos('xlsx,docx')
+
+    def test_view_envia_zip_em_blocos(self):
+        self.client.force_login(User.objects.create_user(username='tis', password='tis12345'))
+        url = reverse('exportar_cadeias_tis', kwargs={'tis_id': self.tis.id})
+
+        resposta = self.client.get(url)
+
+        self.assertTrue(resposta.streaming)
+        self.assertEqual(resposta['Content-Type'], 'application/zip')
+        self.assertIn('cadeias_ARE01_', resposta['Content-Disposition'])
+        arquivo_zip = zipfile.ZipFile(BytesIO(b''.join(resposta.streaming_content)))
+        self.assertIn('resumo.xlsx', arquivo_zip.namelist())
+        self.assertEqual(self.client.get(url, {'formatos': 'doc'}).status_code, 400)
+
+    @patch.object(exportacao_tis_service.RenderizadorPdfService, 'renderizar')
+    def test_view_recusa_pdf(self, renderizar_mock):
+        self.client.force_login(User.objects.create_user(username='tis', password='tis12345'))
+        url = reverse('exportar_cadeias_tis', kwargs={'tis_id': self.tis.id})
+
+        resposta = self.client.get(url, {'formatos': 'xlsx,pdf'})
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn(b'exportar_cadeias_tis', resposta.content)
+        renderizar_mock.assert_not_called()
+
+    def test_comando_grava_o_zip(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            destino = os.path.join(diretorio, 'cadeias.zip')
+            saida = StringIO()
+            call_command(
+                'exportar_cadeias_tis', 'ARE01', '--saida', destino, '--json', stdout=saida
+            )
+
+            relatorio = json.loads(saida.getvalue())
+            self.assertEqual((relatorio['imoveis'], relatorio['erros']), (2, 0))
+            self.assertEqual(relatorio['bytes'], os.path.getsize(destino))
+            self.assertEqual(len(zipfile.ZipFile(destino).namelist()), 5)
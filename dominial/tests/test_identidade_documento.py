@@ -614,6 +614,42 @@ class DocumentoIdentidadeServiceTest(IdentidadeDocumentoFixture):
         with self.assertRaisesMessage(TypeError, "DocumentoIdentidade completo"):
             DocumentoIdentidadeService.resolver("matricula:123:1")
 
+    def test_resolver_lote_equivale_a_resolver_com_uma_consulta(self):
+        imovel_a = self.criar_imovel("123", self.cartorio_a, nome="Imóvel A")
+        imovel_b = self.criar_imovel("123", self.cartorio_b, nome="Imóvel B")
+        documento_a = self.criar_documento(imovel_a, self.tipo_matricula, "M123", self.cartorio_a)
+        documento_b = self.criar_documento(imovel_b, self.tipo_matricula, "123", self.cartorio_b)
+        documento_invalido = self.criar_documento(
+            imovel_a, self.tipo_matricula, "T456", self.cartorio_a
+        )
+        identidades = [
+            DocumentoIdentidade("matricula", "123", self.cartorio_a.pk),
+            DocumentoIdentidade("matricula", "M123", self.cartorio_b.pk),
+            DocumentoIdentidade("transcricao", "123", self.cartorio_a.pk),
+            DocumentoIdentidade("matricula", "456", self.cartorio_a.pk),
+            DocumentoIdentidade("matricula", "M 123", self.cartorio_a.pk),
+        ]
+
+        with self.assertNumQueries(1):
+            resultados = DocumentoIdentidadeService.resolver_lote(identidades)
+
+        self.assertEqual(len(resultados), 4)
+        for identidade in identidades:
+            self.assertEqual(resultados[identidade], DocumentoIdentidadeService.resolver(identidade))
+        self.assertEqual(resultados[identidades[0]].documento, documento_a)
+        self.assertEqual(resultados[identidades[1]].documento, documento_b)
+        self.assertEqual(resultados[identidades[2]].status, "nao_encontrado")
+        self.assertEqual(resultados[identidades[3]].status, "nao_encontrado")
+        self.assertEqual(resultados[identidades[3]].candidatos_invalidos, (documento_invalido,))
+
+    def test_resolver_lote_vazio_nao_consulta_banco(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(DocumentoIdentidadeService.resolver_lote([]), {})
+
+    def test_resolver_lote_exige_objetos_de_identidade(self):
+        with self.assertRaisesMessage(TypeError, "DocumentoIdentidade completo"):
+            DocumentoIdentidadeService.resolver_lote(["matricula:123:1"])
+
 
 class OrigensDisponiveisTabelaTest(IdentidadeDocumentoFixture):
     def test_ct16_origem_disponivel_usa_documento_do_cartorio_informado(self):
@@ -0,0 +1,357 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from dominial.models import Cartorios, ImportacaoCartorios, ImportacaoCartoriosCidade
+from dominial.services.busca_nome_service import BuscaNomeService
+from dominial.services.onr_cartorios_service import TIMEOUT_ONR, LimitadorTaxa, OnrCartoriosService
+
+
+class RespostaFalsa:
+    def __init__(self, dados=None, status=200):
+        self.dados = dados
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+    def json(self):
+        return self.dados
+
+
+class SessaoFalsa:
+    """Responde por cidade; listas de respostas são consumidas em ordem."""
+
+    def __init__(self, cidades, respostas):
+        self.cidades = cidades
+        self.respostas = respostas
+        self.chamadas = []
+        self.timeouts = set()
+
+    def post(self, url, data=None, timeout=None):
+        cidade = data.get('cidade')
+        self.chamadas.append(cidade)
+        self.timeouts.add(timeout)
+        if cidade is None:
+            return RespostaFalsa(self.cidades)
+        resposta = self.respostas[cidade]
+        return resposta.pop(0) if isinstance(resposta, list) else resposta
+
+    def close(self):
+        pass
+
+
+def _cartorio(cns, nome, cidade='Rio Branco'):
+    return {
+        'codigo_cns': cns,
+        'nome_serventia': nome,
+        'telefone_1': '68 3000-0000',
+        'publico_email': 'cri@example.com',
+        'endereco_logradouro': 'Rua A',
+        'endereco_numero': '10',
+        'endereco_bairro': cidade,
+    }
+
+
+class LimitadorTaxaTest(TestCase):
+    def test_token_bucket_e_pausa(self):
+        agora = [0.0]
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(round(segundos, 3))
+            agora[0] += segundos
+
+        limitador = LimitadorTaxa(2, capacidade=1, relogio=lambda: agora[0], dormir=dormir)
+        limitador.aguardar()
+        limitador.aguardar()
+        self.assertEqual(esperas, [0.5])
+
+        limitador.pausar(3)
+        limitador.aguardar()
+        self.assertEqual(esperas, [0.5, 3.0])
+
+
+@patch.object(OnrCartoriosService, 'ESPERA_403', 0)
+class ImportarCartoriosEstadoTest(TestCase):
+    def setUp(self):
+        self.existente = Cartorios.objects.create(
+            nome='Antigo Nome', cns='010001', cidade='Rio Branco', estado='AC'
+        )
+        self.sessao = SessaoFalsa(
+            [{'value': 'Rio Branco'}, 'Xapuri', {'value': 'Brasileia'}, {'value': ''}],
+            {
+                'Rio Branco': RespostaFalsa([
+                    _cartorio('010001', '1º Ofício de Registro de Imóveis de Rio Branco'),
+                    _cartorio('010002', 'Tabelionato de Notas de Rio Branco'),
+                    _cartorio('', 'Registro de Imóveis sem CNS'),
+                ]),
+                # Um 403 e depois sucesso: a cidade é repetida
+                'Xapuri': [
+                    RespostaFalsa(status=403),
+                    RespostaFalsa([_cartorio('010003', 'Registro de Imóveis de Xapuri')]),
+                ],
+                'Brasileia': RespostaFalsa(status=500),
+            },
+        )
+
+    def _importar(self, **opcoes):
+        limitador = LimitadorTaxa(1000, capacidade=10)
+        return OnrCartoriosService.importar_estado(
+            'AC', self.sessao, limitador, log=lambda mensagem: None, **opcoes
+        )
+
+    def test_importa_em_lotes_com_upsert_por_cns(self):
+        with CaptureQueriesContext(connection) as consultas:
+            relatorio = self._importar(workers=3, tamanho_lote=1)
+
+        self.assertEqual(relatorio['cidades'], 3)
+        self.assertEqual(relatorio['cidades_com_erro'], 1)
+        self.assertEqual(relatorio['cartorios_imoveis'], 2)
+        self.assertEqual(relatorio['ignorados'], 1)
+        self.assertEqual(relatorio['gravados'], 2)
+        self.assertEqual(relatorio['lotes'], 2)
+        escritas = [c for c in consultas.captured_queries if 'INSERT' in c['sql']]
+        self.assertEqual(len(escritas), 2)
+
+        self.assertEqual(self.sessao.chamadas.count('Xapuri'), 2)
+        self.assertEqual(self.sessao.chamadas.count('Brasileia'), 1)
+        self.assertEqual(self.sessao.timeouts, {TIMEOUT_ONR})
+
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nome, '1º Ofício de Registro de Imóveis de Rio Branco')
+        self.assertEqual(self.existente.endereco, 'Rua A, 10 Rio Branco')
+        self.assertTrue(self.existente.eh_cartorio_imoveis)
+        self.assertEqual(Cartorios.objects.count(), 2)
+        self.assertFalse(Cartorios.objects.filter(cns='010002').exists())
+
+        novo = Cartorios.objects.get(cns='010003')
+        self.assertEqual((novo.estado, novo.cidade), ('AC', 'Xapuri'))
+        self.assertEqual(
+            list(BuscaNomeService.filtrar(Cartorios.objects.all(), 'oficio')), [self.existente]
+        )
+        self.assertEqual(list(BuscaNomeService.filtrar(Cartorios.objects.all(), 'xapuri')), [novo])
+
+    def test_campos_longos_sao_cortados(self):
+        cartorio = _cartorio('010001', 'Registro de Imóveis de Rio Branco')
+        cartorio['telefone_1'] = '(68) 3000-0000 / (68) 3000-0001'
+        cartorio['endereco_complemento'] = 'Sala ' * 60
+        self.sessao.respostas['Rio Branco'] = RespostaFalsa([cartorio])
+
+        relatorio = self._importar()
+
+        self.assertEqual(relatorio['rejeitados'], 0)
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.telefone, '(68) 3000-0000 / (68')
+        self.assertLessEqual(len(self.existente.endereco), 200)
+        self.assertTrue(self.existente.endereco.startswith('Rua A, 10 Sala Sala'))
+        self.assertIsNone(OnrCartoriosService.dados_cartorio(
+            _cartorio('0' * 21, 'Registro de Imóveis'), 'AC', 'Rio Branco'
+        ))
+
+    def test_lote_rejeitado_e_gravado_linha_a_linha(self):
+        upsert = OnrCartoriosService._upsert
+
+        def upsert_falho(cartorios):
+            if any(cartorio.cns == '010003' for cartorio in cartorios):
+                raise DatabaseError('value too long for type character varying(20)')
+            upsert(cartorios)
+
+        with patch.object(OnrCartoriosService, '_upsert', side_effect=upsert_falho):
+            relatorio = self._importar(tamanho_lote=500)
+
+        self.assertEqual((relatorio['gravados'], relatorio['rejeitados']), (1, 1))
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nome, '1º Ofício de Registro de Imóveis de Rio Branco')
+        self.assertFalse(Cartorios.objects.filter(cns='010003').exists())
+
+    def test_erro_ao_gravar_cancela_as_cidades_restantes(self):
+        self.sessao.cidades = [f'Cidade {numero}' for numero in range(20)]
+        self.sessao.respostas = {
+            cidade: RespostaFalsa([_cartorio(f'02{numero:04d}', 'Registro de Imóveis')])
+            for numero, cidade in enumerate(self.sessao.cidades)
+        }
+
+        with patch.object(
+            OnrCartoriosService, 'gravar_lote', side_effect=RuntimeError('banco fora do ar')
+        ), self.assertRaisesMessage(RuntimeError, 'banco fora do ar'):
+            self._importar(workers=1, tamanho_lote=1)
+
+        self.assertLess(len(self.sessao.chamadas), 21)
+
+    def test_dry_run_nao_grava(self):
+        relatorio = self._importar(dry_run=True)
+
+        self.assertEqual(relatorio['cartorios_imoveis'], 2)
+        self.assertEqual(relatorio['gravados'], 0)
+        self.assertEqual(Cartorios.objects.count(), 1)
+
+    def test_comando_emite_relatorio_json(self):
+        saida = StringIO()
+        with patch.object(OnrCartoriosService, 'criar_sessao', return_value=self.sessao):
+            call_command('importar_cartorios_estado', 'AC', '--taxa', '1000', '--json', stdout=saida)
+
+        relatorio = json.loads(saida.getvalue())
+        self.assertEqual(relatorio['gravados'], 2)
+        self.assertEqual(relatorio['modo'], 'importacao')
+
+    def test_retomar_pula_cidades_ja_gravadas(self):
+        importacao = ImportacaoCartorios.objects.create(estado='AC')
+        relatorio = OnrCartoriosService.executar_importacao(
+            importacao, self.sessao, LimitadorTaxa(1000, capacidade=10), log=lambda mensagem: None
+        )
+
+        importacao.refresh_from_db()
+        self.assertEqual(relatorio['cidades_com_erro'], 1)
+        self.assertEqual(importacao.status, 'erro')
+        self.assertEqual(importacao.total_cidades, 3)
+        self.assertEqual(
+            dict(importacao.cidades.values_list('cidade', 'status')),
+            {'Rio Branco': 'gravada', 'Xapuri': 'gravada', 'Brasileia': 'erro'},
+        )
+        gravada = importacao.cidades.get(cidade='Rio Branco')
+        self.assertEqual(gravada.cartorios, 1)
+        self.assertIsNotNone(gravada.buscada_em)
+        self.assertIsNotNone(gravada.gravada_em)
+        progresso = importacao.progresso()
+        self.assertEqual(progresso['cidades_concluidas'], 2)
+        self.assertEqual(progresso['cidades_com_erro'], 1)
+        self.assertEqual(progresso['percentual'], 66.7)
+
+        self.sessao.respostas['Brasileia'] = RespostaFalsa(
+            [_cartorio('010004', 'Registro de Imóveis de Brasileia')]
+        )
+        self.sessao.chamadas.clear()
+        saida = StringIO()
+        with patch.object(OnrCartoriosService, 'criar_sessao', return_value=self.sessao):
+            call_command('importar_cartorios_estado', 'AC', '--retomar', '--json', stdout=saida)
+
+        relatorio = json.loads(saida.getvalue())
+        self.assertEqual(relatorio['importacao_id'], importacao.id)
+        self.assertEqual(relatorio['cidades_puladas'], 2)
+        self.assertEqual(self.sessao.chamadas, [None, 'Brasileia'])
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, 'concluido')
+        self.assertEqual(importacao.total_cartorios, 3)
+        self.assertEqual(importacao.progresso()['percentual'], 100.0)
+
+        # A última execução foi concluída: retomar não consulta o ONR
+        self.sessao.chamadas.clear()
+        with patch.object(OnrCartoriosService, 'criar_sessao', return_value=self.sessao):
+            call_command('importar_cartorios_estado', 'AC', '--retomar', stdout=StringIO())
+        self.assertEqual(self.sessao.chamadas, [])
+
+
+@patch.object(OnrCartoriosService, 'ESPERA_403', 0)
+class FilaImportacaoCartoriosTest(TestCase):
+    def setUp(self):
+        self.sessao = SessaoFalsa(
+            [{'value': 'Rio Branco'}, {'value': 'Xapuri'}],
+            {
+                'Rio Branco': RespostaFalsa([_cartorio('010001', 'Registro de Imóveis de Rio Branco')]),
+                'Xapuri': RespostaFalsa([_cartorio('010003', 'Registro de Imóveis de Xapuri')]),
+            },
+        )
+        self.client.force_login(
+            User.objects.create_superuser('admin_fila', 'fila@example.com', 'fila123')
+        )
+
+    def _processar_fila(self):
+        saida = StringIO()
+        with patch.object(OnrCartoriosService, 'criar_sessao', return_value=self.sessao):
+            call_command(
+                'processar_importacoes_cartorios', '--uma-vez', '--taxa', '1000', '--json', stdout=saida
+            )
+        return json.loads(saida.getvalue())
+
+    def test_admin_enfileira_sem_consultar_o_onr(self):
+        importacao = ImportacaoCartorios.objects.create(estado='AC')
+        with patch.object(OnrCartoriosService, 'criar_sessao', side_effect=AssertionError):
+            resposta = self.client.get(
+                reverse('admin:iniciar-importacao', args=[importacao.id])
+            ).json()
+        self.assertEqual(resposta['status'], 'success')
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, 'pendente')
+
+        relatorio = self._processar_fila()
+        self.assertEqual((relatorio['processados'], relatorio['concluidos']), (1, 1))
+
+        progresso = self.client.get(
+            reverse('admin:verificar-progresso', args=[importacao.id])
+        ).json()
+        self.assertEqual(progresso['status'], 'concluido')
+        self.assertEqual(progresso['total_cartorios'], 2)
+        self.assertEqual(progresso['cidades_concluidas'], 2)
+        self.assertEqual(progresso['percentual'], 100.0)
+
+        resposta = self.client.get(reverse('admin:iniciar-importacao', args=[importacao.id])).json()
+        self.assertEqual(resposta['status'], 'error')
+
+    def test_ajax_enfileira_e_expoe_progresso(self):
+        with patch.object(OnrCartoriosService, 'criar_sessao', side_effect=AssertionError):
+            primeira = self.client.post(reverse('importar_cartorios_estado'), {'estado': 'AC'}).json()
+            segunda = self.client.post(reverse('importar_cartorios_estado'), {'estado': 'AC'}).json()
+
+        self.assertTrue(primeira['em_fila'])
+        self.assertEqual(primeira['total_cartorios'], 0)
+        self.assertEqual(segunda['importacao_id'], primeira['importacao_id'])
+        self.assertEqual(ImportacaoCartorios.objects.count(), 1)
+        self.assertEqual(self.client.get(primeira['status_url']).json()['status'], 'pendente')
+
+        self._processar_fila()
+        status = self.client.get(primeira['status_url']).json()
+        self.assertTrue(status['concluido'])
+        self.assertEqual(Cartorios.objects.filter(estado='AC').count(), 2)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(primeira['status_url']).status_code, 302)
+
+    def test_erro_volta_para_fila_pela_acao_do_admin(self):
+        importacao = ImportacaoCartorios.objects.create(estado='AC')
+        self.sessao.respostas['Xapuri'] = RespostaFalsa(status=500)
+        relatorio = self._processar_fila()
+        importacao.refresh_from_db()
+        self.assertEqual(relatorio['erros'], 1)
+        self.assertEqual(importacao.status, 'erro')
+
+        self.client.post(
+            reverse('admin:dominial_importacaocartorios_changelist'),
+            {'action': 'importar_cartorios', '_selected_action': [importacao.id]},
+        )
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, 'pendente')
+
+        self.sessao.respostas['Xapuri'] = RespostaFalsa([_cartorio('010003', 'Registro de Imóveis de Xapuri')])
+        self.sessao.chamadas.clear()
+        self._processar_fila()
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.status, 'concluido')
+        self.assertEqual(self.sessao.chamadas, [None, 'Xapuri'])
+
+    def test_libera_execucoes_abandonadas(self):
+        antigo = timezone.now() - timedelta(hours=1)
+        abandonada = ImportacaoCartorios.objects.create(
+            estado='AC', status='em_andamento', data_reserva=antigo
+        )
+        ativa = ImportacaoCartorios.objects.create(
+            estado='AM', status='em_andamento', data_reserva=antigo
+        )
+        ImportacaoCartoriosCidade.objects.create(importacao=ativa, cidade='Manaus')
+
+        self.assertEqual(OnrCartoriosService.liberar_abandonados(), 1)
+        abandonada.refresh_from_db()
+        ativa.refresh_from_db()
+        self.assertEqual(abandonada.status, 'pendente')
+        self.assertEqual(ativa.status, 'em_andamento')
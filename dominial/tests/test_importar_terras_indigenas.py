@@ -0,0 +1,147 @@
+import json
+import tracemalloc
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from dominial.models import TerraIndigenaReferencia, TIs
+from dominial.services.cache_service import CacheService
+from dominial.services.terra_indigena_referencia_service import URL_WFS
+from dominial.tests.test_snapshot_referencia import _feature
+from dominial.utils.geojson_stream_utils import iterar_features
+
+
+class RespostaWfsFalsa:
+    """Corpo entregue em blocos de bytes, como ``iter_content`` com stream=True."""
+
+    def __init__(self, corpo, tamanho_bloco=256):
+        self.corpo = corpo.encode('utf-8')
+        self.tamanho_bloco = tamanho_bloco
+        self.fechada = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for inicio in range(0, len(self.corpo), self.tamanho_bloco):
+            yield self.corpo[inicio:inicio + self.tamanho_bloco]
+
+    def close(self):
+        self.fechada = True
+
+
+class IgnorarGeometriaTest(SimpleTestCase):
+    def test_geometria_descartada_durante_a_leitura(self):
+        features = [
+            _feature(101, 'Antes da geometria'),
+            {'type': 'Feature', 'properties': {'terrai_codigo': 102, 'geometry': 'texto'},
+             'geometry': {'type': 'Point', 'coordinates': [1, 2]}, 'geometry_name': 'geom'},
+            {'type': 'Feature', 'geometry': None, 'properties': {'terrai_codigo': 103}},
+        ]
+        texto = json.dumps({'type': 'FeatureCollection', 'features': features})
+
+        for tamanho in (1, 5, 64):
+            blocos = (texto[i:i + tamanho] for i in range(0, len(texto), tamanho))
+            lidas = list(iterar_features(blocos, ignorar=('geometry',)))
+            self.assertEqual(lidas, [{**feature, 'geometry': None} for feature in features])
+
+    def test_memoria_independe_do_poligono(self):
+        coordenadas = '[-68.123456,-10.123456],' * 2000
+
+        def blocos():
+            yield '{"type":"FeatureCollection","features":[{"type":"Feature","geometry":'
+            yield '{"type":"MultiPolygon","coordinates":[[['
+            for _ in range(500):
+                yield coordenadas
+            yield '[0,0]]]]},"properties":{"terrai_codigo":101}}]}'
+
+        tracemalloc.start()
+        try:
+            lidas = list(iterar_features(blocos(), ignorar=('geometry',)))
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lidas, [{'type': 'Feature', 'geometry': None, 'properties': {'terrai_codigo': 101}}])
+        # ~24 MB de coordenadas; o buffer guarda no máximo alguns blocos.
+        self.assertLess(pico, 2 * 1024 * 1024)
+
+
+class ImportarTerrasIndigenasWfsTest(TestCase):
+    def setUp(self):
+        self.referencia = TerraIndigenaReferencia.objects.create(
+            codigo='101', nome='Nome Antigo', etnia='Kaxinawá', estado='AC', area_ha=10.0
+        )
+        self.vinculada = TIs.objects.create(terra_referencia=self.referencia)
+        self.manual = TIs.objects.create(nome='Aldeia Nova', codigo='999', etnia='Guarani')
+
+    def _importar(self, features, *args):
+        corpo = json.dumps({'type': 'FeatureCollection', 'features': features, 'totalFeatures': len(features)})
+        resposta = RespostaWfsFalsa(corpo)
+        saida = StringIO()
+        with patch('requests.get', return_value=resposta) as get:
+            call_command('importar_terras_indigenas', '--json', *args, stdout=saida)
+        self.assertEqual(get.call_args.args, (URL_WFS,))
+        self.assertTrue(get.call_args.kwargs['stream'])
+        self.assertTrue(resposta.fechada)
+        return json.loads(saida.getvalue())
+
+    def test_upsert_em_lote_e_propagacao_para_tis(self):
+        features = [
+            _feature(101, 'Kaxinawá do Rio Jordão'),
+            _feature(102, 'Mamoadate'),
+            _feature(103, 'Cabeceira do Rio Acre'),
+            _feature(999, 'Aldeia Nova'),
+        ]
+        with CaptureQueriesContext(connection) as consultas:
+            relatorio = self._importar(features)
+
+        self.assertEqual(
+            (relatorio['inseridos'], relatorio['atualizados'], relatorio['tis_criadas'], relatorio['tis_atualizadas']),
+            (3, 1, 2, 1),
+        )
+        escritas = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(len(escritas), 3)
+
+        self.vinculada.refresh_from_db()
+        self.assertEqual(self.vinculada.nome, 'Kaxinawá do Rio Jordão')
+        self.assertEqual(str(self.vinculada.area), '1234.50')
+        self.manual.refresh_from_db()
+        self.assertIsNone(self.manual.terra_referencia)
+        self.assertEqual(TIs.objects.filter(codigo='999').count(), 1)
+        self.assertEqual(TIs.objects.get(codigo='102').terra_referencia.nome, 'Mamoadate')
+
+        relatorio = self._importar(features, '--apenas-referencia')
+        self.assertEqual((relatorio['inalterados'], relatorio['tis_atualizadas']), (4, 0))
+
+    def test_area_invalida_ignora_so_a_feature(self):
+        invalida = _feature(102, 'Mamoadate')
+        invalida['properties']['superficie_perimetro_ha'] = 'n/d'
+
+        relatorio = self._importar([invalida, _feature(103, 'Cabeceira do Rio Acre')])
+
+        self.assertEqual((relatorio['ignoradas'], relatorio['inseridos']), (1, 1))
+        self.assertFalse(TerraIndigenaReferencia.objects.filter(codigo='102').exists())
+
+    def test_lote_gravado_invalida_a_pagina_inicial(self):
+        with patch.object(CacheService, 'invalidar_home') as invalidar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._importar(
+                    [_feature(101, 'Kaxinawá do Rio Jordão'), _feature(102, 'Mamoadate')],
+                    '--lote', '1',
+                )
+            self.assertEqual(invalidar.call_count, 2)
+
+            invalidar.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                self._importar([_feature(101, 'Kaxinawá do Rio Jordão')])
+            invalidar.assert_not_called()
+
+    def test_dry_run_nao_grava(self):
+        relatorio = self._importar([_feature(101, 'Kaxinawá do Rio Jordão')], '--dry-run')
+        self.assertEqual((relatorio['atualizados'], relatorio['tis_atualizadas']), (1, 1))
+        self.vinculada.refresh_from_db()
+        self.assertEqual(self.vinculada.nome, 'Nome Antigo')
@@ -0,0 +1,143 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.models import Lancamento
+from dominial.services.lancamento_consulta_service import LancamentoConsultaService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+
+
+# numero_lancamento -> número simples esperado
+NUMEROS_SIMPLES = {
+    'R4M235': 4, 'AV12M235': 12, 'AV4 M2725': 4, 'M235': 0, None: 0, '': 0,
+    'R': 0, 'r5': 0, 'RX3': 0, 'AVR2': 0, 'R10-M1': 10, 'AV007': 7,
+    'R4M236': 4, 'R12': 12,
+    # Além de 9 dígitos só os primeiros são lidos (integer do PostgreSQL).
+    'R12345678901': 123456789, 'AV98765432109M1': 987654321,
+}
+NUMEROS = list(NUMEROS_SIMPLES)
+
+
+class LancamentoConsultaOrdenacaoTest(ArestaTestMixin, TestCase):
+    def _criar(self, numeros):
+        return [self._criar_lancamento(numero_lancamento=numero) for numero in numeros]
+
+    def _ordem_python(self):
+        return [
+            lancamento.id
+            for lancamento in sorted(
+                Lancamento.objects.all(),
+                key=lambda lancamento: (
+                    -NUMEROS_SIMPLES[lancamento.numero_lancamento],
+                    lancamento.id,
+                ),
+            )
+        ]
+
+    def test_numero_simples_gerado_no_banco(self):
+        self._criar(NUMEROS)
+
+        anotados = LancamentoConsultaService.ordenados_por_numero_simples(
+            Lancamento.objects.all()
+        )
+
+        for lancamento in anotados:
+            self.assertEqual(
+                lancamento.numero_simples,
+                NUMEROS_SIMPLES[lancamento.numero_lancamento],
+                lancamento.numero_lancamento,
+            )
+        self.assertEqual([lancamento.id for lancamento in anotados], self._ordem_python())
+
+    def test_numero_simples_acompanha_o_numero_lancamento(self):
+        lancamento = self._criar_lancamento(numero_lancamento='R3M500')
+        lancamento.refresh_from_db()
+        self.assertEqual(lancamento.numero_simples, 3)
+
+        lancamento.numero_lancamento = 'AV15M500'
+        lancamento.save()
+        lancamento.refresh_from_db()
+        self.assertEqual(lancamento.numero_simples, 15)
+
+    def test_paginas_seguem_a_ordem_por_numero_simples(self):
+        self._criar(NUMEROS * 2)
+
+        vistos = []
+        cursores = []
+        depois = None
+        while True:
+            resultado = LancamentoConsultaService.filtrar_lancamentos(
+                depois=depois, itens_por_pagina=4
+            )
+            vistos += [lancamento.id for lancamento in resultado['lancamentos']]
+            cursores.append(resultado['cursor_anterior'])
+            depois = resultado['cursor_proximo']
+            if depois is None:
+                break
+
+        self.assertEqual(vistos, self._ordem_python())
+        self.assertEqual(resultado['total_registros'], len(NUMEROS) * 2)
+        self.assertIsNone(cursores[0])
+        self.assertTrue(all(cursores[1:]))
+
+        # Voltando a partir da última página, as páginas completas se repetem.
+        anterior = LancamentoConsultaService.filtrar_lancamentos(
+            antes=resultado['cursor_anterior'], itens_por_pagina=4
+        )
+        self.assertEqual(
+            [lancamento.id for lancamento in anterior['lancamentos']],
+            vistos[-len(resultado['lancamentos']) - 4:-len(resultado['lancamentos'])],
+        )
+        self.assertIsNotNone(anterior['cursor_proximo'])
+
+    def test_voltar_ate_o_inicio_mostra_a_primeira_pagina_completa(self):
+        self._criar(NUMEROS)
+        primeira = LancamentoConsultaService.filtrar_lancamentos(itens_por_pagina=5)
+        segunda = LancamentoConsultaService.filtrar_lancamentos(
+            depois=primeira['cursor_proximo'], itens_por_pagina=5
+        )
+        # Cursor no meio da primeira página: sobram só 2 itens antes dele.
+        terceiro = primeira['lancamentos'][2]
+        cursor = f"{terceiro.numero_simples}_{terceiro.id}"
+
+        resultado = LancamentoConsultaService.filtrar_lancamentos(
+            antes=cursor, itens_por_pagina=5
+        )
+
+        self.assertEqual(resultado['lancamentos'], primeira['lancamentos'])
+        self.assertIsNone(resultado['cursor_anterior'])
+        self.assertIsNotNone(segunda['cursor_anterior'])
+
+    def test_custo_da_pagina_nao_depende_da_posicao(self):
+        self._criar(NUMEROS * 3)
+        primeira = LancamentoConsultaService.filtrar_lancamentos(itens_por_pagina=5)
+        with self.assertNumQueries(3):
+            LancamentoConsultaService.filtrar_lancamentos(itens_por_pagina=5)
+        with self.assertNumQueries(3):
+            LancamentoConsultaService.filtrar_lancamentos(
+                depois=primeira['cursor_proximo'], itens_por_pagina=5
+            )
+
+    def test_cursor_invalido_volta_para_a_primeira_pagina(self):
+        self._criar(NUMEROS)
+
+        resultado = LancamentoConsultaService.filtrar_lancamentos(
+            depois='abc', itens_por_pagina=3
+        )
+
+        self.assertIsNone(resultado['cursor_anterior'])
+        self.assertEqual(
+            [lancamento.id for lancamento in resultado['lancamentos']],
+            self._ordem_python()[:3],
+        )
+
+    def test_pagina_de_lancamentos_tem_links_por_cursor(self):
+        self._criar(NUMEROS)
+        self.client.force_login(User.objects.create_user(username='consulta', password='x12345678'))
+
+        resposta = self.client.get(reverse('lancamentos'), {'busca': 'M500'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['lancamentos']), 10)
+        self.assertContains(resposta, f"depois={resposta.context['cursor_proximo']}")
+        self.assertContains(resposta, 'busca=M500')
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dominial.models import Cartorios, Pessoas
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+from dominial.views.autocomplete_views import ITENS_POR_PAGINA
+
+
+class LancamentoFormPickersTest(ArestaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user(username='pickers', password='pickers123'))
+        self.pessoas = [
+            Pessoas.objects.create(nome=f'Silva {i:02d}', cpf=f'200000000{i:02d}') for i in range(25)
+        ]
+        for i in range(25):
+            Cartorios.objects.create(
+                nome=f'Cartório Extra {i:02d}', cns=f'74{i:04d}', cidade='X', estado='GO'
+            )
+
+    def test_formulario_nao_carrega_listas_completas(self):
+        url = reverse('novo_lancamento_documento', kwargs={
+            'tis_id': self.imovel.terra_indigena_id_id,
+            'imovel_id': self.imovel.id,
+            'documento_id': self.documento.id,
+        })
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotIn('cartorios', resposta.context)
+        for consulta in consultas.captured_queries:
+            self.assertNotRegex(consulta['sql'], r'FROM "dominial_(pessoas|cartorios)" ORDER BY')
+        self.assertNotContains(resposta, 'Cartório Extra')
+        self.assertNotContains(resposta, 'Silva 00')
+
+    def test_autocomplete_paginado(self):
+        url = reverse('pessoa-autocomplete')
+
+        primeira = self.client.get(url, {'q': 'silva'}).json()
+        terceira = self.client.get(url, {'q': 'silva', 'pagina': 3}).json()
+
+        self.assertEqual(len(primeira['results']), ITENS_POR_PAGINA)
+        self.assertTrue(primeira['pagination']['more'])
+        self.assertEqual([p['nome'] for p in terceira['results']], ['Silva 20', 'Silva 21', 'Silva 22', 'Silva 23', 'Silva 24'])
+        self.assertFalse(terceira['pagination']['more'])
+
+        cartorios = self.client.get(reverse('cartorio-autocomplete'), {'q': 'extra', 'pagina': 2}).json()
+        self.assertEqual(cartorios['results'][0]['nome'], 'Cartório Extra 10')
+        self.assertTrue(cartorios['pagination']['more'])
+
+    def test_pre_selecionados_por_id_em_uma_consulta(self):
+        ids = [self.pessoas[3].id, self.pessoas[7].id]
+
+        with self.assertNumQueries(1):
+            resposta = self.client.get(
+                reverse('pessoa-autocomplete'), {'ids': f'{ids[0]},{ids[1]},x'}
+            )
+
+        self.assertEqual(sorted(p['id'] for p in resposta.json()['results']), sorted(ids))
+        cartorio = self.client.get(
+            reverse('cartorio-autocomplete'), {'ids': str(self.cartorio_b.id)}
+        ).json()
+        self.assertEqual(cartorio['results'][0]['nome'], self.cartorio_b.nome)
@@ -399,9 +399,10 @@ def _hash_tabelas_sqlite():
         )
         tabelas = [linha[0] for linha in cursor.fetchall()]
         for tabela in tabelas:
-            cursor.execute(f'SELECT * FROM "{tabela}" ORDER BY rowid')
+            # Sem ORDER BY rowid: as tabelas internas do FTS5 são WITHOUT ROWID.
+            cursor.execute(f'SELECT * FROM "{tabela}"')
             digest.update(tabela.encode())
-            digest.update(repr(cursor.fetchall()).encode())
+            digest.update(repr(sorted(map(repr, cursor.fetchall()))).encode())
     return digest.hexdigest()
 
 
@@ -0,0 +1,79 @@
+import os
+import time
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from dominial.services import renderizador_pdf_service
+from dominial.services.renderizador_pdf_service import (
+    FOLHAS_DE_ESTILO,
+    RenderizadorPdfService,
+)
+
+
+def _demorado(html_string, css_nome, base_url):
+    time.sleep(30)
+
+
+def _invalido(html_string, css_nome, base_url):
+    raise ValueError('documento inválido')
+
+
+class RenderizadorPdfServiceTest(SimpleTestCase):
+    def setUp(self):
+        RenderizadorPdfService.encerrar()
+        self.addCleanup(RenderizadorPdfService.encerrar)
+
+    @override_settings(PDF_RENDERIZADORES=0)
+    @patch.object(renderizador_pdf_service, 'HTML')
+    @patch.object(renderizador_pdf_service, 'FontConfiguration')
+    @patch.object(renderizador_pdf_service, 'CSS')
+    def test_folhas_de_estilo_sao_carregadas_uma_vez(self, css_mock, fontes_mock, html_mock):
+        html_mock.return_value.write_pdf.return_value = b'%PDF-teste'
+
+        for _ in range(3):
+            pdf = RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_completa_pdf.css')
+
+        self.assertEqual(pdf, b'%PDF-teste')
+        self.assertEqual(css_mock.call_count, len(FOLHAS_DE_ESTILO))
+        fontes_mock.assert_called_once_with()
+        html_mock.return_value.write_pdf.assert_called_with(
+            stylesheets=[css_mock.return_value],
+            font_config=fontes_mock.return_value,
+        )
+
+    @override_settings(PDF_RENDERIZADORES=1)
+    def test_pool_renderiza_em_outro_processo(self):
+        pdf = RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_dominial_pdf.css')
+
+        self.assertEqual(pdf[:4], b'%PDF')
+        self.assertIsNone(renderizador_pdf_service._fontes)
+
+    @override_settings(PDF_RENDERIZADORES=1, PDF_RENDERIZACOES_POR_PROCESSO=2)
+    def test_processos_sao_reciclados(self):
+        pool = RenderizadorPdfService._obter_pool(1)
+
+        pids = [pool.apply(os.getpid) for _ in range(4)]
+
+        self.assertEqual(len(set(pids)), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    @override_settings(PDF_RENDERIZADORES=1, PDF_RENDERIZACAO_TIMEOUT=1)
+    def test_renderizacao_travada_descarta_o_pool(self):
+        with patch.object(renderizador_pdf_service, '_renderizar', _demorado):
+            with self.assertRaises(TimeoutError):
+                RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_dominial_pdf.css')
+
+        self.assertIsNone(renderizador_pdf_service._pool)
+        pdf = RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_dominial_pdf.css')
+        self.assertEqual(pdf[:4], b'%PDF')
+
+    @override_settings(PDF_RENDERIZADORES=1)
+    def test_erro_do_weasyprint_chega_ao_chamador(self):
+        RenderizadorPdfService._obter_pool(1)
+        with patch.object(renderizador_pdf_service, '_renderizar', _invalido):
+            with self.assertRaisesMessage(ValueError, 'documento inválido'):
+                RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_dominial_pdf.css')
+
+        pdf = RenderizadorPdfService.renderizar('<p>x</p>', 'cadeia_dominial_pdf.css')
+        self.assertEqual(pdf[:4], b'%PDF')
@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from dominial.models import Cartorios, TerraIndigenaReferencia, TIs
+from dominial.services.cache_service import CacheService
+from dominial.utils.geojson_stream_utils import iterar_features
+
+
+def _feature(codigo, nome, **propriedades):
+    return {
+        'type': 'Feature',
+        'id': f'tis_poligonais_portarias.{codigo}',
+        'geometry': {
+            'type': 'MultiPolygon',
+            'coordinates': [[[[-68.1, -10.2], [-68.3, -10.4], [-68.1, -10.2]]]],
+        },
+        'properties': {
+            'terrai_codigo': codigo,
+            'terrai_nome': nome,
+            'etnia_nome': 'Kaxinawá',
+            'uf_sigla': 'AC',
+            'superficie_perimetro_ha': 1234.5,
+            'fase_ti': 'Regularizada',
+            'data_homologada': '2001-05-10Z',
+            **propriedades,
+        },
+    }
+
+
+class IterarFeaturesTest(SimpleTestCase):
+    def test_features_em_blocos_pequenos(self):
+        colecao = {
+            'type': 'FeatureCollection',
+            'versao': 1,
+            'features': [_feature(i, f'TI {i} "}}{{" \\ ç') for i in range(5)],
+            'totalFeatures': 5,
+        }
+        texto = json.dumps(colecao, ensure_ascii=False).encode('utf-8')
+
+        for tamanho in (1, 7, 4096):
+            cabecalho = {}
+            blocos = (texto[i:i + tamanho] for i in range(0, len(texto), tamanho))
+            self.assertEqual(list(iterar_features(blocos, cabecalho)), colecao['features'])
+            self.assertEqual(cabecalho, {'type': 'FeatureCollection', 'versao': 1})
+
+    def test_documento_truncado(self):
+        texto = json.dumps({'features': [_feature(1, 'A')]})
+        with self.assertRaises(ValueError):
+            list(iterar_features([texto[:-10]]))
+
+
+class SnapshotTestMixin:
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _comando(self, nome, *args):
+        saida = StringIO()
+        call_command(nome, *args, '--json', stdout=saida)
+        return json.loads(saida.getvalue())
+
+
+class SnapshotCartoriosTest(SnapshotTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Cartorios.objects.create(
+            nome='1º Registro de Imóveis de Rio Branco', cns='010001', cidade='Rio Branco', estado='AC',
+            endereco='Rua A, 10', telefone='68 3000-0000', email='cri@example.com',
+        )
+        Cartorios.objects.create(nome='Registro de Imóveis de Xapuri', cns='010003', cidade='Xapuri', estado='AC')
+        Cartorios.objects.create(nome='Registro de Imóveis de Manaus', cns='040001', cidade='Manaus', estado='AM')
+
+    def test_exporta_e_ingere_com_diff(self):
+        exportacao = self._comando('importar_cartorios_estado', 'AC', '--exportar-snapshot', self.diretorio)
+        caminho = os.path.join(self.diretorio, 'cartorios_AC.jsonl')
+        self.assertEqual((exportacao['arquivo'], exportacao['registros']), (caminho, 2))
+        with open(caminho, encoding='utf-8') as arquivo:
+            cabecalho = json.loads(arquivo.readline())
+        self.assertEqual((cabecalho['versao'], cabecalho['estado']), (1, 'AC'))
+
+        Cartorios.objects.filter(cns='010003').delete()
+        Cartorios.objects.filter(cns='010001').update(nome='Nome Antigo')
+
+        relatorio = self._comando('importar_cartorios_estado', 'AC', '--snapshot', self.diretorio, '--dry-run')
+        self.assertEqual((relatorio['inseridos'], relatorio['atualizados']), (1, 1))
+        self.assertFalse(Cartorios.objects.filter(cns='010003').exists())
+
+        relatorio = self._comando('importar_cartorios_estado', 'AC', '--snapshot', caminho)
+        self.assertEqual(
+            (relatorio['inseridos'], relatorio['atualizados'], relatorio['inalterados'], relatorio['gravados']),
+            (1, 1, 0, 2),
+        )
+        rio_branco = Cartorios.objects.get(cns='010001')
+        self.assertEqual(rio_branco.nome, '1º Registro de Imóveis de Rio Branco')
+        self.assertTrue(rio_branco.eh_cartorio_imoveis)
+        self.assertEqual(Cartorios.objects.get(cns='010003').cidade, 'Xapuri')
+
+        relatorio = self._comando('importar_cartorios_estado', 'AC', '--snapshot', caminho)
+        self.assertEqual((relatorio['inalterados'], relatorio['gravados']), (2, 0))
+
+    def test_recusa_versao_ou_estado_diferente(self):
+        caminho = os.path.join(self.diretorio, 'cartorios.jsonl')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps({'formato': 'cadeia-dominial/cartorios', 'versao': 99, 'estado': 'AC'}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'Versão de snapshot não suportada'):
+            self._comando('importar_cartorios_estado', 'AC', '--snapshot', caminho)
+
+        self._comando('importar_cartorios_estado', 'AM', '--exportar-snapshot', caminho)
+        with self.assertRaisesMessage(CommandError, 'Snapshot é do estado AM'):
+            self._comando('importar_cartorios_estado', 'AC', '--snapshot', caminho)
+
+
+class SnapshotTerrasIndigenasTest(SnapshotTestMixin, TestCase):
+    def _gravar_funai(self, features):
+        caminho = os.path.join(self.diretorio, 'funai.geojson')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'type': 'FeatureCollection', 'features': features, 'totalFeatures': len(features)}, arquivo)
+        return caminho
+
+    def test_ingere_geojson_da_funai_e_reexporta(self):
+        caminho = self._gravar_funai([
+            _feature(101, 'Kaxinawá do Rio Jordão'),
+            _feature(102, 'Mamoadate', etnia_nome='Manchineri', data_homologada=None),
+            _feature('', 'Sem código'),
+        ])
+
+        relatorio = self._comando('importar_terras_indigenas', '--snapshot', caminho, '--lote', '1')
+        self.assertEqual(relatorio['features'], 3)
+        self.assertEqual(relatorio['ignoradas'], 1)
+        self.assertEqual((relatorio['inseridos'], relatorio['tis_criadas'], relatorio['lotes']), (2, 2, 2))
+        self.assertIsNone(relatorio['versao'])
+
+        referencia = TerraIndigenaReferencia.objects.get(codigo='101')
+        self.assertEqual(referencia.data_homologada, date(2001, 5, 10))
+        ti = TIs.objects.get(codigo='102')
+        self.assertEqual((ti.terra_referencia.codigo, ti.etnia, ti.nome), ('102', 'Manchineri', 'Mamoadate'))
+        self.assertEqual(str(ti.area), '1234.50')
+
+        self._comando('importar_terras_indigenas', '--exportar-snapshot', self.diretorio)
+        TerraIndigenaReferencia.objects.filter(codigo='101').update(fase='Declarada')
+        relatorio = self._comando(
+            'importar_terras_indigenas', '--snapshot', self.diretorio, '--apenas-referencia'
+        )
+        self.assertEqual(relatorio['versao'], 1)
+        self.assertEqual(
+            (relatorio['inseridos'], relatorio['atualizados'], relatorio['inalterados'], relatorio['tis_criadas']),
+            (0, 1, 1, 0),
+        )
+        self.assertEqual(TerraIndigenaReferencia.objects.get(codigo='101').fase, 'Regularizada')
+
+    def test_dry_run_nao_grava(self):
+        caminho = self._gravar_funai([_feature(101, 'Kaxinawá do Rio Jordão')])
+        relatorio = self._comando('importar_terras_indigenas', '--snapshot', caminho, '--dry-run')
+        self.assertEqual((relatorio['inseridos'], relatorio['tis_criadas']), (1, 1))
+        self.assertFalse(TerraIndigenaReferencia.objects.exists())
+        self.assertFalse(TIs.objects.exists())
+
+    def test_ingestao_invalida_a_pagina_inicial(self):
+        caminho = self._gravar_funai([_feature(101, 'Kaxinawá do Rio Jordão')])
+        with patch.object(CacheService, 'invalidar_home') as invalidar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._comando('importar_terras_indigenas', '--snapshot', caminho)
+        invalidar.assert_called_once()
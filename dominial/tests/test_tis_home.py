@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from dominial.models import Cartorios, Imovel, Pessoas, TerraIndigenaReferencia, TIs
+from dominial.services.tis_consulta_service import TisConsultaService
+
+
+class TisHomeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username='home', password='home12345'))
+        self.pessoa = Pessoas.objects.create(nome='Pessoa Home', cpf='11122233344')
+        self.cartorio = Cartorios.objects.create(
+            nome='Cartório Home', cns='720001', cidade='C', estado='MT'
+        )
+        self.referencias = [
+            TerraIndigenaReferencia.objects.create(codigo=f'REF{i}', nome=f'Terra {i}', etnia='Etnia')
+            for i in range(5)
+        ]
+        self.ti_a = TIs.objects.create(
+            nome='Terra 0', codigo='REF0', etnia='Etnia', terra_referencia=self.referencias[0]
+        )
+        self.ti_b = TIs.objects.create(nome='Beta', codigo='REF1', etnia='Etnia')
+        self.ti_c = TIs.objects.create(nome='Gama', codigo='OUTRA', etnia='Outra')
+        for matricula in ('1', '2'):
+            self._criar_imovel(self.ti_b, matricula)
+        self._criar_imovel(self.ti_a, '3')
+
+    def _criar_imovel(self, tis, matricula):
+        return Imovel.objects.create(
+            terra_indigena_id=tis,
+            nome=f'Imóvel {matricula}',
+            proprietario=self.pessoa,
+            matricula=matricula,
+            tipo_documento_principal='matricula',
+            cartorio=self.cartorio,
+        )
+
+    def test_tis_ordenadas_pelo_total_de_imoveis(self):
+        dados = TisConsultaService.dados_home()
+
+        self.assertEqual(
+            [tis.nome for tis in dados['terras_indigenas']], ['Beta', 'Terra 0', 'Gama']
+        )
+        self.assertEqual(
+            dados['tis_com_imoveis'], {self.ti_b.id: 2, self.ti_a.id: 1, self.ti_c.id: 0}
+        )
+        self.assertEqual(dados['total_tis_cadastradas'], 3)
+        self.assertEqual(dados['total_terras_referencia'], 3)
+
+    def test_referencias_nao_cadastradas_por_anti_join(self):
+        self.assertEqual(
+            list(
+                TisConsultaService.terras_referencia_nao_cadastradas()
+                .values_list('codigo', flat=True)
+            ),
+            ['REF2', 'REF3', 'REF4'],
+        )
+        self.assertEqual(
+            list(
+                TisConsultaService.terras_referencia_nao_cadastradas('Terra 1')
+                .values_list('codigo', flat=True)
+            ),
+            ['REF1'],
+        )
+
+    def test_consultas_nao_dependem_do_numero_de_tis(self):
+        with self.assertNumQueries(2):
+            TisConsultaService.dados_home()
+
+        for i in range(5):
+            self._criar_imovel(TIs.objects.create(nome=f'Nova {i}', codigo=f'N{i}', etnia='E'), f'N{i}')
+        cache.clear()
+        with self.assertNumQueries(2):
+            dados = TisConsultaService.dados_home()
+        self.assertEqual(dados['total_tis_cadastradas'], 8)
+
+    def test_cache_invalidado_por_alteracoes(self):
+        TisConsultaService.dados_home()
+        with self.assertNumQueries(0):
+            TisConsultaService.dados_home()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._criar_imovel(self.ti_c, '4')
+        dados = TisConsultaService.dados_home()
+        self.assertEqual(dados['tis_com_imoveis'][self.ti_c.id], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TIs.objects.create(nome='Delta', codigo='REF2', etnia='Etnia')
+        self.assertEqual(TisConsultaService.dados_home()['total_terras_referencia'], 2)
+
+    def test_view_home(self):
+        resposta = self.client.get(reverse('home'), {'busca': 'Beta'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(list(resposta.context['terras_indigenas']), [self.ti_b])
+        self.assertContains(resposta, '2 imóveis')
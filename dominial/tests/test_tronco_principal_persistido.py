@@ -0,0 +1,146 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from dominial.models import Lancamento, TroncoPrincipal, TroncoPrincipalDocumento
+from dominial.services.hierarquia_service import HierarquiaService
+from dominial.services.tronco_principal_service import TroncoPrincipalService
+from dominial.tests.test_documento_origem_aresta import ArestaTestMixin
+from dominial.utils import hierarquia_utils
+
+
+class TroncoPrincipalPersistidoTest(ArestaTestMixin, TestCase):
+    """Cadeia M500 -> T10 -> {T11, T20}; o padrão segue o maior número (T20)."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.t11 = self._criar_documento('T11', self.cartorio_b)
+        self.t20 = self._criar_documento('T20', self.cartorio_b)
+        self._ligar(self.documento, 'T10')
+        self._ligar(self.documento_pai, 'T11', 'T20')
+
+    def _ligar(self, filho, *numeros):
+        lancamento = Lancamento.objects.create(
+            documento=filho,
+            tipo=self.tipo_registro,
+            data=timezone.now().date(),
+        )
+        for indice, numero in enumerate(numeros):
+            self._criar_origem(lancamento, numero=numero, indice=indice)
+        return lancamento
+
+    def _persistidos(self):
+        return list(
+            TroncoPrincipalDocumento.objects.filter(tronco__imovel=self.imovel)
+            .order_by('posicao')
+            .values_list('documento_id', flat=True)
+        )
+
+    def test_tronco_padrao_e_persistido_e_relido_sem_travessia(self):
+        tronco = TroncoPrincipalService.obter(self.imovel)
+
+        self.assertEqual(tronco, [self.documento, self.documento_pai, self.t20])
+        self.assertEqual(self._persistidos(), [doc.id for doc in tronco])
+        self.assertTrue(TroncoPrincipal.objects.get(imovel=self.imovel).completo)
+
+        with patch.object(
+            hierarquia_utils, 'identificar_tronco_principal'
+        ) as travessia, self.assertNumQueries(2):
+            self.assertEqual(TroncoPrincipalService.obter(self.imovel), tronco)
+        travessia.assert_not_called()
+
+    def test_alteracao_de_origem_trunca_apenas_depois_do_documento(self):
+        TroncoPrincipalService.obter(self.imovel)
+        t30 = self._criar_documento('T30', self.cartorio_b)
+        lancamento = self._ligar(self.t20, 'T30')
+
+        self.assertEqual(
+            self._persistidos(),
+            [self.documento.id, self.documento_pai.id, self.t20.id],
+        )
+        self.assertFalse(TroncoPrincipal.objects.get(imovel=self.imovel).completo)
+
+        tronco = TroncoPrincipalService.obter(self.imovel)
+        self.assertEqual(tronco, [self.documento, self.documento_pai, self.t20, t30])
+
+        lancamento.delete()
+        self.assertEqual(
+            TroncoPrincipalService.obter(self.imovel),
+            [self.documento, self.documento_pai, self.t20],
+        )
+
+    def test_origem_intermediaria_alterada_recalcula_a_partir_dela(self):
+        TroncoPrincipalService.obter(self.imovel)
+        t40 = self._criar_documento('T40', self.cartorio_b)
+        self._ligar(self.documento_pai, 'T40')
+
+        self.assertEqual(
+            self._persistidos(), [self.documento.id, self.documento_pai.id]
+        )
+        self.assertEqual(
+            TroncoPrincipalService.obter(self.imovel),
+            [self.documento, self.documento_pai, t40],
+        )
+
+    def test_exclusao_de_documento_do_tronco(self):
+        TroncoPrincipalService.obter(self.imovel)
+
+        self.t20.delete()
+
+        self.assertEqual(
+            TroncoPrincipalService.obter(self.imovel),
+            [self.documento, self.documento_pai, self.t11],
+        )
+
+    def test_escolha_de_origem_reaproveita_o_prefixo_persistido(self):
+        TroncoPrincipalService.obter(self.imovel)
+        escolhas = {str(self.documento_pai.id): 'T11'}
+
+        with patch.object(
+            hierarquia_utils,
+            '_identificar_inicio_tronco',
+            side_effect=AssertionError('travessia recomeçou pela raiz'),
+        ):
+            tronco = HierarquiaService.obter_tronco_principal(self.imovel, escolhas)
+
+        self.assertEqual(tronco, [self.documento, self.documento_pai, self.t11])
+        # A escolha da sessão não altera o tronco padrão persistido.
+        self.assertEqual(
+            self._persistidos(),
+            [self.documento.id, self.documento_pai.id, self.t20.id],
+        )
+
+    def test_escolha_fora_do_tronco_devolve_o_tronco_padrao(self):
+        escolhas = {str(self.t11.id): 'T99'}
+
+        self.assertEqual(
+            HierarquiaService.obter_tronco_principal(self.imovel, escolhas),
+            [self.documento, self.documento_pai, self.t20],
+        )
+
+    def test_truncamento_durante_a_leitura_nao_e_sobrescrito(self):
+        TroncoPrincipalService.obter(self.imovel)
+        TroncoPrincipalService.invalidar_origens([self.documento_pai.id])
+        identificar = hierarquia_utils.identificar_tronco_principal
+
+        def travessia_concorrente(*args, **kwargs):
+            # Um escritor trunca o tronco enquanto a leitura calcula.
+            documentos = identificar(*args, **kwargs)
+            TroncoPrincipalService.invalidar_imovel(self.imovel.id)
+            return documentos
+
+        with patch.object(
+            hierarquia_utils, 'identificar_tronco_principal', side_effect=travessia_concorrente
+        ):
+            tronco = TroncoPrincipalService.obter(self.imovel)
+
+        self.assertEqual(tronco, [self.documento, self.documento_pai, self.t20])
+        registro = TroncoPrincipal.objects.get(imovel=self.imovel)
+        self.assertFalse(registro.completo)
+        self.assertEqual(self._persistidos(), [])
+
+        self.assertEqual(TroncoPrincipalService.obter(self.imovel), tronco)
+        self.assertTrue(TroncoPrincipal.objects.get(imovel=self.imovel).completo)
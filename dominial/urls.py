@@ -9,9 +9,10 @@ from .views.imovel_views import imovel_form
 from .views.documento_views import novo_documento, documento_lancamentos, selecionar_documento_lancamento, editar_documento, criar_documento_automatico, ajustar_nivel_documento
 from .views.lancamento_views import novo_lancamento, editar_lancamento, excluir_lancamento, lancamento_detail, lancamento_resumo_partial
 from .views.duplicata_views import verificar_duplicata_ajax, importar_duplicata, cancelar_importacao_duplicata
-from .views.cadeia_dominial_views import cadeia_dominial_arvore, tronco_principal, cadeia_dominial_tabela, cadeia_dominial_d3, documento_detalhado, exportar_cadeia_completa_pdf, exportar_cadeia_dominial_pdf, exportar_cadeia_dominial_excel, obter_arvore_cadeia_dominial
+from .views.cadeia_dominial_views import cadeia_dominial_arvore, tronco_principal, cadeia_dominial_tabela, cadeia_dominial_d3, documento_detalhado, exportar_cadeia_completa_pdf, exportar_cadeia_dominial_pdf, exportar_cadeia_dominial_excel, exportar_cadeias_tis, obter_arvore_cadeia_dominial
+from .views.exportacao_views import exportacao_acompanhar, exportacao_status, exportacao_download
 from .views.documento_digital_views import upload_documento_digital, servir_documento_digital, excluir_documento_digital
-from .views.api_views import buscar_cidades, buscar_cartorios, verificar_cartorios_estado, importar_cartorios_estado, criar_cartorio, cartorios, pessoas, alteracoes, lancamentos, escolher_origem_documento, escolher_origem_lancamento, get_cadeia_dominial_atualizada, limpar_escolhas_origem
+from .views.api_views import buscar_cidades, buscar_cartorios, verificar_cartorios_estado, importar_cartorios_estado, importacao_cartorios_status, criar_cartorio, cartorios, pessoas, alteracoes, lancamentos, escolher_origem_documento, escolher_origem_lancamento, get_cadeia_dominial_atualizada, limpar_escolhas_origem
 from .views.autocomplete_views import pessoa_autocomplete, cartorio_autocomplete, cartorio_imoveis_autocomplete
 
 urlpatterns = [
@@ -23,6 +24,7 @@ urlpatterns = [
     path('tis/<int:tis_id>/', tis_detail, name='tis_detail'),
     path('tis/<int:tis_id>/excluir/', tis_delete, name='tis_delete'),
     path('tis/<int:tis_id>/imoveis/', imoveis, name='imoveis'),
+    path('tis/<int:tis_id>/exportar-cadeias/', exportar_cadeias_tis, name='exportar_cadeias_tis'),
 
     # Imóveis
     path('tis/<int:tis_id>/imovel/cadastro/', imovel_form, name='imovel_cadastro'),
@@ -37,6 +39,9 @@ urlpatterns = [
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/cadeia-tabela/', cadeia_dominial_tabela, name='cadeia_dominial_tabela'),
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/cadeia-completa/pdf/', exportar_cadeia_completa_pdf, name='exportar_cadeia_completa_pdf'),
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/cadeia-tabela/pdf/', exportar_cadeia_dominial_pdf, name='exportar_cadeia_dominial_pdf'),
+    path('exportacoes/<uuid:job_id>/', exportacao_acompanhar, name='exportacao_acompanhar'),
+    path('exportacoes/<uuid:job_id>/status/', exportacao_status, name='exportacao_status'),
+    path('exportacoes/<uuid:job_id>/download/', exportacao_download, name='exportacao_download'),
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/cadeia-tabela/excel/', exportar_cadeia_dominial_excel, name='exportar_cadeia_dominial_excel'),
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/arvore-cadeia-dominial/', obter_arvore_cadeia_dominial, name='obter_arvore_cadeia_dominial'),
     path('tis/<int:tis_id>/imovel/<int:imovel_id>/documento/<int:documento_id>/detalhado/', documento_detalhado, name='documento_detalhado'),
@@ -81,6 +86,7 @@ urlpatterns = [
     path('buscar-cartorios/', buscar_cartorios, name='buscar_cartorios'),
     path('verificar-cartorios/', verificar_cartorios_estado, name='verificar_cartorios_estado'),
     path('importar-cartorios/', importar_cartorios_estado, name='importar_cartorios_estado'),
+    path('importar-cartorios/<int:importacao_id>/status/', importacao_cartorios_status, name='importacao_cartorios_status'),
     path('criar-cartorio/', criar_cartorio, name='criar_cartorio'),
     path('pessoa-autocomplete/', pessoa_autocomplete, name='pessoa-autocomplete'),
     path('cartorio-autocomplete/', cartorio_autocomplete, name='cartorio-autocomplete'),
@@ -0,0 +1,194 @@
+"""Leitura incremental de GeoJSON (FeatureCollection).
+
+O documento é lido em blocos (arquivo ou corpo HTTP em streaming) e as
+features são decodificadas uma a uma: só a feature corrente fica em
+memória, nunca a coleção inteira. Nenhuma função aqui acessa o banco.
+"""
+
+import codecs
+import json
+import re
+
+TAMANHO_BLOCO = 64 * 1024
+
+_INICIO_FEATURES = re.compile(r'"features"\s*:\s*\[')
+_SEPARADORES = re.compile(r'[\s,]*')
+_ESPACOS = re.compile(r'\s*')
+# Fora de strings só interessam delimitadores e aspas; dentro, aspas e escapes.
+_ESPECIAIS = re.compile(r'[{}\[\]"]')
+_FIM_STRING = re.compile(r'["\\]')
+
+
+def ler_blocos(arquivo, tamanho=TAMANHO_BLOCO):
+    """Blocos de ``tamanho`` caracteres (ou bytes) de um arquivo aberto."""
+    return iter(lambda: arquivo.read(tamanho), arquivo.read(0))
+
+
+def _texto(pedacos):
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    for pedaco in pedacos:
+        if isinstance(pedaco, bytes):
+            pedaco = decodificador.decode(pedaco)
+        if pedaco:
+            yield pedaco
+    final = decodificador.decode(b'', final=True)
+    if final:
+        yield final
+
+
+def iterar_features(pedacos, cabecalho=None, ignorar=()):
+    """
+    Gera as features de uma FeatureCollection a partir de ``pedacos`` de
+    texto ou bytes UTF-8. Os membros do topo que precedem ``features``
+    (ex.: ``versao`` dos snapshots) são copiados para ``cabecalho``.
+
+    Os membros da feature listados em ``ignorar`` (ex.: ``geometry``) são
+    descartados enquanto chegam e viram ``null``: o buffer nunca guarda o
+    polígono, qualquer que seja o seu tamanho.
+
+    Levanta ValueError se o documento não tem ``features`` ou termina no
+    meio de uma feature.
+    """
+    chaves_ignoradas = {json.dumps(chave) for chave in ignorar}
+    pedacos = _texto(pedacos)
+    buffer = ''
+    while True:
+        achado = _INICIO_FEATURES.search(buffer)
+        if achado:
+            break
+        pedaco = next(pedacos, None)
+        if pedaco is None:
+            raise ValueError('GeoJSON sem o membro "features"')
+        buffer += pedaco
+
+    if cabecalho is not None:
+        prefixo = buffer[:achado.start()].strip().lstrip('\ufeff').rstrip(',')
+        try:
+            cabecalho.update(json.loads(prefixo + '}'))
+        except ValueError:
+            # Membros anteriores que não formam um objeto simples são ignorados.
+            pass
+
+    buffer = buffer[achado.end():]
+    pos = 0
+    inicio = None           # início da feature corrente no buffer
+    profundidade = 0
+    em_string = False
+    inicio_string = 0
+    chave = None            # fim de uma chave ignorada, aguardando o ':'
+    descarte = None         # início do valor ignorado que está sendo descartado
+
+    while True:
+        completa = False
+        if inicio is None:
+            pos = _SEPARADORES.match(buffer, pos).end()
+            if pos < len(buffer):
+                caractere = buffer[pos]
+                if caractere == ']':
+                    return
+                if caractere != '{':
+                    raise ValueError(f'GeoJSON inválido: esperado uma feature, encontrado {caractere!r}')
+                inicio = pos
+                profundidade = 1
+                pos += 1
+
+        while inicio is not None:
+            if chave is not None:
+                fim = _ESPACOS.match(buffer, chave).end()
+                if fim == len(buffer):
+                    break
+                if buffer[fim] != ':':
+                    chave = None
+                    continue
+                fim = _ESPACOS.match(buffer, fim + 1).end()
+                if fim == len(buffer):
+                    break
+                chave = None
+                pos = fim
+                if buffer[fim] in '{[':
+                    descarte = fim
+                continue
+
+            if em_string:
+                achado = _FIM_STRING.search(buffer, pos)
+                if achado is None:
+                    pos = len(buffer)
+                    break
+                if achado.group() == '\\':
+                    if achado.end() >= len(buffer):
+                        # O caractere escapado ainda não chegou.
+                        pos = achado.start()
+                        break
+                    pos = achado.end() + 1
+                    continue
+                em_string = False
+                pos = achado.end()
+                if (
+                    descarte is None and profundidade == 1 and chaves_ignoradas
+                    and buffer[inicio_string:pos] in chaves_ignoradas
+                ):
+                    chave = pos
+                continue
+
+            if descarte is not None:
+                # Atalho: um trecho sem strings que não fecha o valor
+                # descartado (coordenadas) é só contado.
+                trecho = buffer[pos:]
+                if '"' not in trecho:
+                    nova = (
+                        profundidade + trecho.count('{') + trecho.count('[')
+                        - trecho.count('}') - trecho.count(']')
+                    )
+                    if nova > 1:
+                        profundidade = nova
+                        pos = len(buffer)
+                        break
+
+            achado = _ESPECIAIS.search(buffer, pos)
+            if achado is None:
+                pos = len(buffer)
+                break
+            caractere = achado.group()
+            pos = achado.end()
+            if caractere == '"':
+                em_string = True
+                inicio_string = achado.start()
+            elif caractere in '{[':
+                profundidade += 1
+            else:
+                profundidade -= 1
+                if descarte is not None and profundidade == 1:
+                    buffer = buffer[:descarte] + 'null' + buffer[pos:]
+                    pos = descarte + 4
+                    descarte = None
+                elif profundidade == 0:
+                    completa = True
+                    break
+
+        if completa:
+            yield json.loads(buffer[inicio:pos])
+            buffer = buffer[pos:]
+            pos = 0
+            inicio = None
+            continue
+
+        pedaco = next(pedacos, None)
+        if pedaco is None:
+            raise ValueError('GeoJSON truncado: a coleção de features não foi fechada')
+        if inicio is not None:
+            if descarte is not None:
+                # O que já foi lido do valor ignorado sai do buffer.
+                buffer = buffer[:descarte] + buffer[pos:]
+                pos = descarte
+            buffer = buffer[inicio:]
+            pos -= inicio
+            inicio_string -= inicio
+            if chave is not None:
+                chave -= inicio
+            if descarte is not None:
+                descarte -= inicio
+            inicio = 0
+        else:
+            buffer = buffer[pos:]
+            pos = 0
+        buffer += pedaco
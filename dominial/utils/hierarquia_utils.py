@@ -7,14 +7,24 @@ from ..models import Documento, DocumentoTipo
 from .documento_identidade_utils import DocumentoIdentidade
 
 
-def _obter_origens_lancamento(lancamento):
+def _arestas_por_documento(documento_ids):
     # Import tardio evita o ciclo models -> utils -> services -> utils durante
     # a inicialização do Django.
-    from ..services.lancamento_origem_leitura_service import (
-        LancamentoOrigemLeituraService,
-    )
+    from ..services.cadeia_aresta_service import CadeiaArestaService
+
+    return CadeiaArestaService.arestas_por_documento(documento_ids)
+
+
+def _arestas_da_cadeia(documento_id):
+    from ..services.cadeia_aresta_service import CadeiaArestaService
+
+    return CadeiaArestaService.arestas_da_cadeia(documento_id)
+
+
+def _documentos_importados_fechamento(imovel):
+    from ..services.cadeia_fechamento_service import CadeiaFechamentoService
 
-    return LancamentoOrigemLeituraService.obter_origens(lancamento)
+    return CadeiaFechamentoService.documentos_importados(imovel)
 
 
 def _tipo_do_codigo(codigo):
@@ -29,6 +39,19 @@ def _tipo_do_codigo(codigo):
     return None
 
 
+def _identidade_do_codigo(codigo, cartorio):
+    """Monta a identidade completa de um código M/T no cartório informado."""
+    if not cartorio:
+        return None
+    tipo = _tipo_do_codigo(codigo)
+    if not tipo:
+        return None
+    try:
+        return DocumentoIdentidade(tipo, codigo, cartorio.pk)
+    except (TypeError, ValueError):
+        return None
+
+
 def _resolver_documento_por_codigo(codigo, cartorio):
     """
     Resolve um documento pela identidade completa (tipo, número normalizado e
@@ -37,14 +60,8 @@ def _resolver_documento_por_codigo(codigo, cartorio):
     """
     from ..services.documento_identidade_service import DocumentoIdentidadeService
 
-    if not cartorio:
-        return None
-    tipo = _tipo_do_codigo(codigo)
-    if not tipo:
-        return None
-    try:
-        identidade = DocumentoIdentidade(tipo, codigo, cartorio.pk)
-    except (TypeError, ValueError):
+    identidade = _identidade_do_codigo(codigo, cartorio)
+    if identidade is None:
         return None
     resultado = DocumentoIdentidadeService.resolver(identidade)
     return resultado.documento if resultado.status == 'encontrado' else None
@@ -89,25 +106,23 @@ def calcular_niveis_hierarquicos_otimizada(documentos, conexoes):
     pass
 
 
-def identificar_tronco_principal(imovel, escolhas_origem=None):
-    """
-    Identifica o tronco principal da cadeia dominial de um imóvel.
-    """
-    if escolhas_origem is None:
-        escolhas_origem = {}
-    
-    documentos = Documento.objects.filter(imovel=imovel).order_by('data')
+def _identificar_inicio_tronco(imovel, grafo=None):
+    """Documento pelo qual o tronco principal do imóvel começa."""
+    if grafo is not None:
+        documentos = grafo.documentos_do_imovel()
+        documentos_importados = grafo.documentos_importados()
+    else:
+        documentos = Documento.objects.filter(imovel=imovel).order_by('data')
     
-    # Buscar documentos importados que são referenciados pelos lançamentos deste imóvel
-    documentos_importados = identificar_documentos_importados(imovel)
+        # Buscar documentos importados que são referenciados pelos lançamentos deste imóvel
+        documentos_importados = identificar_documentos_importados(imovel)
     
     # Adicionar documentos importados à lista
     documentos = list(documentos) + documentos_importados
     
     if not documentos:
-        return []
+        return None
 
-    tronco_principal = []
     # Começar pelo documento que representa a identidade registral do imóvel.
     # A busca inclui tipo, número canônico e cartório, sem depender da forma do
     # prefixo nem da ordem da lista de documentos importados.
@@ -134,8 +149,36 @@ def identificar_tronco_principal(imovel, escolhas_origem=None):
             transcricoes = [doc for doc in documentos if doc.tipo.tipo == 'transcricao']
             if transcricoes:
                 documento_atual = max(transcricoes, key=lambda x: x.data)
-            else:
-                return []
+    return documento_atual
+
+
+def identificar_tronco_principal(imovel, escolhas_origem=None, grafo=None, prefixo=None):
+    """
+    Identifica o tronco principal da cadeia dominial de um imóvel.
+
+    Com ``grafo`` (CadeiaGrafo já carregado), documentos e arestas são lidos
+    do snapshot em memória, sem novas consultas. Com ``prefixo`` (documentos
+    iniciais de um tronco já conhecido), a travessia continua a partir do
+    último documento do prefixo em vez de recomeçar pela raiz.
+    """
+    if escolhas_origem is None:
+        escolhas_origem = {}
+
+    if prefixo:
+        tronco_principal = list(prefixo[:-1])
+        documento_atual = prefixo[-1]
+    else:
+        tronco_principal = []
+        documento_atual = _identificar_inicio_tronco(imovel, grafo)
+        if not documento_atual:
+            return []
+
+    # No PostgreSQL a cadeia inteira vem de uma consulta recursiva; nos demais
+    # bancos as arestas são lidas a cada salto.
+    if grafo is not None:
+        arestas_cadeia = grafo.arestas
+    else:
+        arestas_cadeia = _arestas_da_cadeia(documento_atual.id)
 
     while documento_atual:
         tronco_principal.append(documento_atual)
@@ -143,24 +186,21 @@ def identificar_tronco_principal(imovel, escolhas_origem=None):
         # Verificar se há escolha de origem para este documento
         escolha_atual = escolhas_origem.get(str(documento_atual.id))
         
-        # Buscar lançamentos do documento atual que têm origens
-        lancamentos_com_origem = documento_atual.lancamentos.all()
-        
-        # Se não há lançamentos com origens, verificar se há uma escolha de origem
-        # Extrair códigos de origem dos lançamentos (apenas origens normais, não fim de cadeia)
+        # Origens já resolvidas nas arestas materializadas do documento
+        # (apenas origens normais, não fim de cadeia)
+        if arestas_cadeia is None:
+            arestas_documento = _arestas_por_documento([documento_atual.id])[documento_atual.id]
+        else:
+            arestas_documento = arestas_cadeia.get(documento_atual.id, [])
         origens_identificadas = []
-        for lancamento in lancamentos_com_origem:
-            for origem in _obter_origens_lancamento(lancamento):
-                doc_existente = _resolver_documento_por_codigo(
-                    origem.codigo,
-                    origem.cartorio,
-                )
-                if (
-                    doc_existente
-                    and doc_existente.pk
-                    not in {doc.pk for doc in origens_identificadas}
-                ):
-                    origens_identificadas.append(doc_existente)
+        for aresta in arestas_documento:
+            doc_existente = aresta.documento_pai
+            if (
+                doc_existente
+                and doc_existente.pk
+                not in {doc.pk for doc in origens_identificadas}
+            ):
+                origens_identificadas.append(doc_existente)
 
         if not origens_identificadas:
             break
@@ -212,52 +252,9 @@ def identificar_documentos_importados(imovel):
     Returns:
         list: Lista de documentos compartilhados (que pertencem a outros imóveis)
     """
-    from ..models import Documento, Lancamento
-    import re
-
-    # Buscar todos os lançamentos do imóvel que têm origens
-    lancamentos_com_origem = Lancamento.objects.filter(documento__imovel=imovel)
-
-    # Coletar códigos de origem referenciados, cada um com o cartório do
-    # lançamento que o informou (a resolução nunca cruza cartórios)
-    codigos_origem = []
-    for lancamento in lancamentos_com_origem:
-        for origem in _obter_origens_lancamento(lancamento):
-            codigos_origem.append((origem.codigo, origem.cartorio))
-
-    documentos_compartilhados = []
-    documentos_processados = set()
-
-    def expandir_documentos_recursivamente(codigos_com_cartorio):
-        """Função recursiva para expandir documentos compartilhados"""
-        for codigo, cartorio in codigos_com_cartorio:
-            chave = (codigo, cartorio.pk if cartorio else None)
-            if chave in documentos_processados:
-                continue
-            documentos_processados.add(chave)
-
-            doc_compartilhado = _resolver_documento_por_codigo(codigo, cartorio)
-
-            if doc_compartilhado and doc_compartilhado.imovel_id != imovel.id:
-                if doc_compartilhado.id not in {doc.id for doc in documentos_compartilhados}:
-                    documentos_compartilhados.append(doc_compartilhado)
-
-                # Buscar origens deste documento compartilhado
-                lancamentos_doc = doc_compartilhado.lancamentos.all()
-
-                codigos_origem_doc = []
-                for lancamento in lancamentos_doc:
-                    for origem in _obter_origens_lancamento(lancamento):
-                        codigos_origem_doc.append((origem.codigo, origem.cartorio))
-
-                # Expandir recursivamente
-                if codigos_origem_doc:
-                    expandir_documentos_recursivamente(codigos_origem_doc)
-
-    # Expandir recursivamente todos os documentos compartilhados
-    expandir_documentos_recursivamente(codigos_origem)
-
-    return documentos_compartilhados
+    # Uma consulta indexada ao fechamento transitivo das arestas de origem,
+    # do documento mais próximo ao mais distante da cadeia do imóvel.
+    return _documentos_importados_fechamento(imovel)
 
 
 def processar_origens_para_documentos(origem_texto, imovel, lancamento):
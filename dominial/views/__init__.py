@@ -55,6 +55,7 @@ from .api_views import (
     buscar_cartorios,
     verificar_cartorios_estado,
     importar_cartorios_estado,
+    importacao_cartorios_status,
     criar_cartorio,
     cartorios,
     pessoas,
@@ -116,6 +117,7 @@ __all__ = [
     'buscar_cartorios',
     'verificar_cartorios_estado',
     'importar_cartorios_estado',
+    'importacao_cartorios_status',
     'criar_cartorio',
     'cartorios',
     'pessoas',
@@ -1,18 +1,21 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods, require_POST
 from django.http import JsonResponse
 from django.core.paginator import Paginator
+from django.urls import reverse
 from django.core.management import call_command
-from django.db.models import Q
-from ..models import Cartorios, Pessoas, Alteracoes, Imovel, TIs, Documento, Lancamento, DocumentoTipo, LancamentoTipo
-from ..utils import normalizar_texto_opcional
+from ..models import Cartorios, Pessoas, Alteracoes, Imovel, TIs, Documento, Lancamento, DocumentoTipo, LancamentoTipo, ImportacaoCartorios
 from ..services.lancamento_consulta_service import LancamentoConsultaService
 from ..services.cartorio_verificacao_service import CartorioVerificacaoService
 from ..services.keyword_alerta_service import buscar_keyword
 from django.views.decorators.csrf import csrf_exempt
 from .cadeia_dominial_views import cadeia_dominial_tabela
 from ..services.cadeia_dominial_tabela_service import CadeiaDominialTabelaService
+from ..services.cadeia_tabela_serializer_service import CadeiaTabelaSerializerService
+from ..services.cache_service import CacheService
+from ..services.compressao_service import CompressaoService
+from ..services.onr_cartorios_service import OnrCartoriosService
 import json
 
 @require_http_methods(["POST"])
@@ -25,14 +28,7 @@ def buscar_cidades(request):
     
     # Buscar cidades únicas que têm cartórios de imóveis
     cidades = Cartorios.objects.filter(
-        estado=estado
-    ).filter(
-        Q(nome__icontains='imovel') | 
-        Q(nome__icontains='imoveis') | 
-        Q(nome__icontains='imóveis') |
-        Q(nome__icontains='imobiliario') |
-        Q(nome__icontains='imobiliária') |
-        Q(nome__icontains='Registro de Imóveis')
+        estado=estado, eh_cartorio_imoveis=True
     ).values_list('cidade', flat=True).distinct().order_by('cidade')
     
     cidades_list = []
@@ -58,14 +54,8 @@ def buscar_cartorios(request):
     # Filtrar apenas cartórios de imóveis (que tenham palavras relacionadas a imóveis)
     cartorios = Cartorios.objects.filter(
         estado=estado, 
-        cidade=cidade
-    ).filter(
-        Q(nome__icontains='imovel') | 
-        Q(nome__icontains='imoveis') | 
-        Q(nome__icontains='imóveis') |
-        Q(nome__icontains='imobiliario') |
-        Q(nome__icontains='imobiliária') |
-        Q(nome__icontains='Registro de Imóveis')
+        cidade=cidade,
+        eh_cartorio_imoveis=True
     ).order_by('nome')
     
     cartorios_list = []
@@ -108,8 +98,17 @@ def importar_cartorios_estado(request):
     if not resultado['success']:
         return JsonResponse(resultado, status=500)
     
+    resultado['status_url'] = reverse(
+        'importacao_cartorios_status', kwargs={'importacao_id': resultado['importacao_id']}
+    )
     return JsonResponse(resultado)
 
+@login_required
+def importacao_cartorios_status(request, importacao_id):
+    """Progresso da importação enfileirada (polling do modal de cartórios)."""
+    importacao = get_object_or_404(ImportacaoCartorios, id=importacao_id)
+    return JsonResponse(OnrCartoriosService.status(importacao))
+
 @require_POST
 def criar_cartorio(request):
     """View para criar um novo cartório via AJAX"""
@@ -205,7 +204,8 @@ def lancamentos(request):
     # Usar o service para filtrar lançamentos
     resultado = LancamentoConsultaService.filtrar_lancamentos(
         filtros=filtros,
-        pagina=request.GET.get('page'),
+        depois=request.GET.get('depois'),
+        antes=request.GET.get('antes'),
         itens_por_pagina=10
     )
     
@@ -217,6 +217,9 @@ def lancamentos(request):
 
     return render(request, 'dominial/lancamentos.html', {
         'lancamentos': resultado['lancamentos'],
+        'total_registros': resultado['total_registros'],
+        'cursor_anterior': resultado['cursor_anterior'],
+        'cursor_proximo': resultado['cursor_proximo'],
         'tipos_documento': tipos['tipos_documento'],
         'tipos_lancamento': tipos['tipos_lancamento'],
     })
@@ -313,115 +316,27 @@ def escolher_origem_lancamento(request):
 @require_http_methods(["GET"])
 def get_cadeia_dominial_atualizada(request, tis_id, imovel_id):
     """
-    API para obter cadeia dominial atualizada com escolhas da sessão
+    API para obter cadeia dominial atualizada com escolhas da sessão.
+
+    Responde no formato compacto de ``CadeiaTabelaSerializerService``:
+    cartórios, pessoas e rótulos de tipo vêm em tabelas de consulta e são
+    referenciados por id nos itens da cadeia.
     """
+    imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis_id)
     try:
-        service = CadeiaDominialTabelaService()
-        
         # Extrair escolhas de origem da sessão
         escolhas_origem = {}
         for key, value in request.session.items():
             if key.startswith('origem_documento_'):
                 documento_id = key.replace('origem_documento_', '')
                 escolhas_origem[documento_id] = value
-        
-        # Usar a mesma lógica da view tronco_principal
-        if escolhas_origem:
-            cadeia_data = service.get_cadeia_dominial_tabela(tis_id, imovel_id, request.session, escolhas_origem)
-        else:
-            # Se não há escolhas, usar o método simples (tronco principal)
-            from ..models import Imovel
-            imovel = Imovel.objects.get(id=imovel_id)
-            cadeia_simples = service.obter_cadeia_tabela(imovel, escolhas_origem)
-            cadeia_data = {'cadeia': cadeia_simples}
-        
-        # Serializar dados para JSON
-        cadeia_serializada = []
-        for idx, item in enumerate(cadeia_data['cadeia']):
-            documento = item['documento']
 
-            # Issue #120: data apenas no primeiro documento da cadeia
-            is_primeiro = idx == 0
+        chave = CacheService.chave_cadeia_tabela(imovel.id, escolhas_origem)
+        conteudo = CadeiaTabelaSerializerService.serializar_json(
+            tis_id, imovel, escolhas_origem, chave=chave
+        )
+        return CompressaoService.resposta_cacheada(request, conteudo, chave)
 
-            # Verificar se o documento tem todos os campos necessários
-            try:
-                documento_serializado = {
-                    'id': documento.id,
-                    'numero': documento.numero,
-                    'data': documento.data_exibicao.strftime('%d/%m/%Y') if is_primeiro else None,
-                    'label_data': 'Análise iniciada em:' if is_primeiro else '',
-                    'tipo': documento.tipo.tipo if documento.tipo else '',
-                    'tipo_display': documento.tipo.get_tipo_display() if documento.tipo else '',
-                    'cartorio_nome': documento.cartorio.nome if documento.cartorio else '',
-                    'livro': documento.livro,
-                    'folha': documento.folha,
-                    'is_compartilhado': item.get('is_compartilhado', False),
-                    'grupo_importacao': item.get('grupo_importacao') is not None,
-                    'is_primeiro_grupo': item.get('is_primeiro_grupo', False)
-                }
-            except Exception as e:
-                # Se houver erro ao serializar o documento, pular
-                continue
-            
-            lancamentos_serializados = []
-            try:
-                for lancamento in item['lancamentos']:
-                    lancamento_serializado = {
-                        'id': lancamento.id,
-                        'tipo': lancamento.tipo.tipo if lancamento.tipo else '',
-                        'tipo_tipo': lancamento.tipo.tipo if lancamento.tipo else '',  # Adicionar para compatibilidade
-                        'tipo_display': lancamento.tipo.get_tipo_display() if lancamento.tipo else '',
-                        'numero_lancamento': normalizar_texto_opcional(lancamento.numero_lancamento),
-                        'data': lancamento.data.strftime('%d/%m/%Y') if lancamento.data else '',
-                        'forma': normalizar_texto_opcional(lancamento.forma),
-                        'titulo': normalizar_texto_opcional(lancamento.titulo),
-                        'descricao': normalizar_texto_opcional(lancamento.descricao),
-                        'area': lancamento.area,
-                        'origem': normalizar_texto_opcional(lancamento.origem),
-                        'observacoes': normalizar_texto_opcional(lancamento.observacoes),
-                        'keyword_encontrada': getattr(lancamento, 'keyword_encontrada', None),
-                        'cartorio_transmissao_nome': lancamento.cartorio_transmissao_compat.nome if lancamento.cartorio_transmissao_compat else None,
-                        'cartorio_origem_nome': lancamento.cartorio_origem.nome if lancamento.cartorio_origem else None,
-                        'livro_transacao': normalizar_texto_opcional(lancamento.livro_transacao),
-                        'folha_transacao': normalizar_texto_opcional(lancamento.folha_transacao),
-                        'data_transacao': lancamento.data_transacao.strftime('%d/%m/%Y') if lancamento.data_transacao else None,
-                        'pessoas': []
-                    }
-                    
-                    # Serializar pessoas
-                    try:
-                        for lancamento_pessoa in lancamento.pessoas.all():
-                            lancamento_serializado['pessoas'].append({
-                                'pessoa_nome': lancamento_pessoa.pessoa.nome,
-                                'tipo': lancamento_pessoa.tipo
-                            })
-                    except Exception as e:
-                        # Se houver erro ao serializar pessoas, continuar sem pessoas
-                        pass
-                    
-                    lancamentos_serializados.append(lancamento_serializado)
-            except Exception as e:
-                # Se houver erro ao serializar lançamentos, continuar sem lançamentos
-                pass
-            
-            item_serializado = {
-                'documento': documento_serializado,
-                'lancamentos': lancamentos_serializados,
-                'origens_disponiveis': item.get('origens_disponiveis', []),
-                'tem_multiplas_origens': item.get('tem_multiplas_origens', False),
-                'escolha_atual': item.get('escolha_atual'),
-                'is_compartilhado': item.get('is_compartilhado', False),
-                'grupo_importacao': item.get('grupo_importacao'),
-                'is_primeiro_grupo': item.get('is_primeiro_grupo', False)
-            }
-            
-            cadeia_serializada.append(item_serializado)
-        
-        return JsonResponse({
-            'success': True,
-            'cadeia': cadeia_serializada
-        })
-        
     except Exception as e:
         import traceback
         traceback.print_exc()
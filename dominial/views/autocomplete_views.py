@@ -1,19 +1,53 @@
 from django.http import JsonResponse
 from ..models import Pessoas, Cartorios, Imovel
+from ..services.busca_nome_service import BuscaNomeService
 from django.db.models import Q
 from django.db import models
 
+# Sugestões por página do autocomplete
+ITENS_POR_PAGINA = 10
+# Máximo de valores pré-selecionados resolvidos por requisição
+MAX_IDS = 100
+
+
+def _ids_solicitados(request):
+    """IDs de ``?ids=1,2,3`` (valores pré-selecionados do formulário)."""
+    valores = request.GET.get('ids', '').split(',')
+    return [int(valor) for valor in valores if valor.strip().isdigit()][:MAX_IDS]
+
+
+def _paginar(request, queryset):
+    """
+    Página ``?pagina=N`` do queryset e se há mais resultados; busca um item
+    a mais em vez de contar o total.
+    """
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        pagina = 1
+    inicio = (pagina - 1) * ITENS_POR_PAGINA
+    itens = list(queryset[inicio:inicio + ITENS_POR_PAGINA + 1])
+    return itens[:ITENS_POR_PAGINA], len(itens) > ITENS_POR_PAGINA
+
+
 def pessoa_autocomplete(request):
     """View para autocomplete de pessoas"""
     query = request.GET.get('q', '').strip()
+    ids = _ids_solicitados(request)
     
+    if ids:
+        pessoas = Pessoas.objects.filter(id__in=ids).values('id', 'nome', 'cpf')
+        return JsonResponse({'results': list(pessoas)})
+
     if len(query) < 2:
         return JsonResponse({'results': []})
     
-    # Otimização: limitar resultados e usar select_related se necessário
-    pessoas = Pessoas.objects.filter(nome__icontains=query)\
-        .order_by('nome')\
-        .values('id', 'nome', 'cpf')[:10]  # Usar values() para reduzir overhead
+    pessoas, mais = _paginar(
+        request,
+        BuscaNomeService.filtrar(Pessoas.objects.all(), query)
+        .order_by('nome', 'id')
+        .values('id', 'nome', 'cpf'),  # Usar values() para reduzir overhead
+    )
     
     results = []
     for pessoa in pessoas:
@@ -23,13 +57,18 @@ def pessoa_autocomplete(request):
             'cpf': pessoa['cpf']
         })
     
-    return JsonResponse({'results': results})
+    return JsonResponse({'results': results, 'pagination': {'more': mais}})
 
 def cartorio_autocomplete(request):
     """View para autocomplete de cartórios"""
     query = request.GET.get('q', '').strip()
     imovel_id = request.GET.get('imovel_id')
     sugestoes = request.GET.get('sugestoes') == 'true'
+    ids = _ids_solicitados(request)
+    
+    if ids:
+        cartorios = Cartorios.objects.filter(id__in=ids).values('id', 'nome', 'cidade', 'estado')
+        return JsonResponse({'results': list(cartorios)})
     
     # Se for para mostrar sugestões (sem query) e há imovel_id
     if sugestoes and not query and imovel_id:
@@ -62,10 +101,12 @@ def cartorio_autocomplete(request):
     if len(query) < 2:
         return JsonResponse({'results': []})
     
-    # Otimização: limitar resultados e usar select_related se necessário
-    cartorios = Cartorios.objects.filter(nome__icontains=query)\
-        .order_by('nome')\
-        .values('id', 'nome', 'cidade', 'estado')[:10]  # Usar values() para reduzir overhead
+    cartorios, mais = _paginar(
+        request,
+        BuscaNomeService.filtrar(Cartorios.objects.all(), query)
+        .order_by('nome', 'id')
+        .values('id', 'nome', 'cidade', 'estado'),  # Usar values() para reduzir overhead
+    )
     
     results = []
     for cartorio in cartorios:
@@ -76,7 +117,7 @@ def cartorio_autocomplete(request):
             'estado': cartorio['estado']
         })
     
-    return JsonResponse({'results': results})
+    return JsonResponse({'results': results, 'pagination': {'more': mais}})
 
 def cartorio_imoveis_autocomplete(request):
     """View para autocomplete de cartórios de imóveis (filtrados)"""
@@ -85,15 +126,9 @@ def cartorio_imoveis_autocomplete(request):
     if len(query) < 2:
         return JsonResponse([], safe=False)
     
-    # Filtrar apenas cartórios que tenham palavras relacionadas a imóveis
-    cartorios = Cartorios.objects.filter(
-        Q(nome__icontains=query) &
-        (Q(nome__icontains='imovel') | 
-         Q(nome__icontains='imoveis') | 
-         Q(nome__icontains='imóveis') |
-         Q(nome__icontains='imobiliario') |
-         Q(nome__icontains='imobiliária') |
-         Q(nome__icontains='Registro de Imóveis'))
+    # Apenas cartórios cujo nome indica registro de imóveis
+    cartorios = BuscaNomeService.filtrar(
+        Cartorios.objects.filter(eh_cartorio_imoveis=True), query
     ).order_by('nome')[:10]
     
     results = []
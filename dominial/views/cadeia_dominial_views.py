@@ -1,44 +1,28 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
-from ..models import Imovel, TIs, Documento, Lancamento, Cartorios, DocumentoTipo
+from django.http import FileResponse, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
+from ..models import Imovel, TIs, Documento, ExportacaoJob, Lancamento, Cartorios, DocumentoTipo
 from ..utils import normalizar_texto_opcional
 from ..services import HierarquiaService
 from ..services.hierarquia_arvore_service import HierarquiaArvoreService
+from ..services.cadeia_grafo_service import CadeiaGrafo
 from ..services.cache_service import CacheService
+from ..services.compressao_service import CompressaoService
 from ..services.cadeia_dominial_tabela_service import CadeiaDominialTabelaService
+from ..services.cadeia_excel_service import CadeiaExcelService
+from ..services.exportacao_service import ExportacaoService
+from ..services.exportacao_tis_service import ExportacaoTisService
 from ..services.keyword_alerta_service import buscar_keyword
+from .exportacao_views import responder_exportacao
 from datetime import date
 import json
-from weasyprint import HTML
-from django.template.loader import render_to_string
-from django.conf import settings
-import os
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def _buscar_keyword_prioritaria(lancamentos):
-    keyword_doc = None
-    for lancamento in lancamentos:
-        observacoes = (
-            lancamento.get('observacoes', '')
-            if isinstance(lancamento, dict)
-            else lancamento.observacoes
-        )
-        keyword = buscar_keyword(observacoes)
-        if keyword and (
-            keyword_doc is None
-            or keyword['priority'] < keyword_doc['priority']
-        ):
-            keyword_doc = keyword
-    return keyword_doc
-
-
 @login_required
 def cadeia_dominial(request, tis_id, imovel_id):
     # Otimização: usar select_related para reduzir queries
@@ -77,48 +61,46 @@ def cadeia_dominial(request, tis_id, imovel_id):
     else:
         return render(request, 'dominial/cadeia_dominial_arvore.html', context)
 
+def _chave_arvore(request, imovel_id):
+    """
+    Chave de cache da árvore, lida uma vez por requisição: ETag, leitura e
+    gravação do cache usam a mesma geração do imóvel.
+    """
+    if not hasattr(request, '_chave_arvore'):
+        request._chave_arvore = CacheService.chave_arvore_imovel(imovel_id)
+    return request._chave_arvore
+
+
+def _etag_arvore(request, tis_id, imovel_id):
+    """A árvore só muda quando muda a geração de cache do imóvel."""
+    return f"arvore-{imovel_id}-{_chave_arvore(request, imovel_id).rsplit(':', 1)[-1]}"
+
+
 @login_required
+@condition(etag_func=_etag_arvore)
 def cadeia_dominial_arvore(request, tis_id, imovel_id):
     """Retorna os dados da cadeia dominial em formato de árvore para o diagrama"""
     try:
         tis = get_object_or_404(TIs, id=tis_id)
         imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
-        # Delegar a construção da árvore para um service/utilitário
-        # criar_documentos_automaticos=False: não criar documentos fantasma ao
-        # carregar a árvore (estanca a geração de ramos espúrios).
-        arvore = HierarquiaArvoreService.construir_arvore_cadeia_dominial(imovel, criar_documentos_automaticos=False)
-
-        # Expor no JSON consumido pelo D3 a keyword de maior prioridade de
-        # cada documento.
-        documentos_por_id = {
-            documento.id: documento
-            for documento in Documento.objects.filter(
-                id__in=[
-                    documento['id']
-                    for documento in arvore.get('documentos', [])
-                    if not documento.get('is_fim_cadeia')
-                ]
-            ).prefetch_related('lancamentos')
-        }
-        for documento_node in arvore.get('documentos', []):
-            documento = documentos_por_id.get(documento_node['id'])
-            documento_node['keyword_encontrada'] = (
-                _buscar_keyword_prioritaria(documento.lancamentos.all())
-                if documento
-                else None
-            )
-        
-        # Adicionar headers para evitar cache
-        response = JsonResponse(arvore, safe=False)
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
+
+        chave = _chave_arvore(request, imovel.id)
+        conteudo = CacheService.get_cached_arvore_imovel(imovel.id, chave=chave)
+        if conteudo is None:
+            conteudo = HierarquiaArvoreService.serializar_arvore(imovel)
+            CacheService.set_cached_arvore_imovel(imovel.id, conteudo, chave=chave)
+
+        # O navegador guarda a resposta, mas revalida a cada abertura; o ETag
+        # responde 304 enquanto a cadeia não mudar.
+        response = CompressaoService.resposta_cacheada(request, conteudo, chave)
+        response['Cache-Control'] = 'private, no-cache'
         return response
     except Exception as e:
         import traceback
         traceback.print_exc()
         return JsonResponse({'error': str(e)}, status=500)
 
+
 @login_required
 def tronco_principal(request, tis_id, imovel_id):
     """Exibe o tronco principal da cadeia dominial em formato de tabela"""
@@ -308,18 +290,12 @@ def documento_detalhado(request, tis_id, imovel_id, documento_id):
             from django.http import Http404
             raise Http404("Documento não encontrado")
     
-    # Carregar lançamentos do documento
-    lancamentos = documento.lancamentos.select_related('tipo').prefetch_related(
-        'pessoas__pessoa'
-    ).order_by('id')
-    
-    # Aplicar ordenação personalizada por número simples (decrescente)
-    from ..services.lancamento_consulta_service import LancamentoConsultaService
-    lancamentos_list = list(lancamentos)
-    lancamentos_list.sort(key=lambda x: (
-        -LancamentoConsultaService._extrair_numero_simples(x.numero_lancamento),
-        x.id
-    ))
+    # Carregar lançamentos do documento por número simples (decrescente)
+    lancamentos_list = list(
+        documento.lancamentos.select_related('tipo').prefetch_related(
+            'pessoas__pessoa'
+        ).order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
+    )
     for lanc in lancamentos_list:
         lanc.keyword_encontrada = buscar_keyword(lanc.observacoes)
     lancamentos = lancamentos_list
@@ -342,108 +318,43 @@ def documento_detalhado(request, tis_id, imovel_id, documento_id):
 @login_required
 def exportar_cadeia_dominial_pdf(request, tis_id, imovel_id):
     """
-    Exporta a cadeia dominial em formato PDF
+    Enfileira a exportação da cadeia dominial em PDF (com as escolhas de
+    origem da sessão) e acompanha o job até o download.
     """
-    try:
-        tis = get_object_or_404(TIs, id=tis_id)
-        imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
-        
-        # Obter dados da cadeia dominial
-        service = CadeiaDominialTabelaService()
-        context = service.get_cadeia_dominial_tabela(tis_id, imovel_id, request.session)
-        
-        # Adicionar estatísticas
-        if context['cadeia']:
-            context['estatisticas'] = service.get_estatisticas_cadeia(context['cadeia'])
-        
-        # Renderizar template HTML para PDF
-        html_string = render_to_string('dominial/cadeia_dominial_pdf.html', context)
-        
-        # Configurar CSS para PDF
-        css_path = os.path.join(settings.STATIC_ROOT, 'dominial', 'css', 'cadeia_dominial_pdf.css')
-        if not os.path.exists(css_path):
-            css_path = os.path.join(settings.STATICFILES_DIRS[0], 'dominial', 'css', 'cadeia_dominial_pdf.css')
-        
-        # Gerar PDF
-        pdf = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf(
-            stylesheets=[css_path] if os.path.exists(css_path) else None
-        )
-        
-        # Configurar resposta HTTP
-        response = HttpResponse(pdf, content_type='application/pdf')
-        filename = f"cadeia_dominial_{imovel.matricula}_{date.today().strftime('%Y%m%d')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
-        
-    except Exception as e:
-        # Em caso de erro, retornar uma página de erro simples
-        error_html = f"""
-        <html>
-        <head><title>Erro na Geração do PDF</title></head>
-        <body>
-            <h1>Erro na Geração do PDF</h1>
-            <p>Ocorreu um erro ao gerar o PDF da cadeia dominial.</p>
-            <p>Erro: {str(e)}</p>
-            <p><a href="javascript:history.back()">Voltar</a></p>
-        </body>
-        </html>
-        """
-        return HttpResponse(error_html, content_type='text/html')
+    tis = get_object_or_404(TIs, id=tis_id)
+    imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
+
+    escolhas_origem = {
+        key.replace('origem_documento_', ''): value
+        for key, value in request.session.items()
+        if key.startswith('origem_documento_')
+    }
+    job = ExportacaoService.enfileirar(
+        ExportacaoJob.TIPO_CADEIA_DOMINIAL_PDF,
+        imovel,
+        {'escolhas_origem': escolhas_origem},
+        usuario=request.user,
+        base_url=request.build_absolute_uri('/'),
+    )
+    return responder_exportacao(request, job)
 
 @login_required
 def exportar_cadeia_completa_pdf(request, tis_id, imovel_id):
-    try:
-        tis = get_object_or_404(TIs, id=tis_id)
-        imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
-        
-        # Verificar se há sequência personalizada
-        sequencia_ids = request.GET.get('sequencia')
-        
-        from ..services.cadeia_completa_service import CadeiaCompletaService
-        service = CadeiaCompletaService()
-        
-        if sequencia_ids:
-            # Usar sequência personalizada
-            context = service.get_cadeia_completa_com_sequencia_personalizada(tis_id, imovel_id, sequencia_ids)
-        else:
-            # Usar sequência padrão
-            context = service.get_cadeia_completa(tis_id, imovel_id)
-        
-        html_string = render_to_string('dominial/cadeia_completa_pdf.html', context)
-        css_path = os.path.join(settings.STATIC_ROOT, 'dominial', 'css', 'cadeia_completa_pdf.css')
-        if not os.path.exists(css_path):
-            css_path = os.path.join(settings.STATICFILES_DIRS[0], 'dominial', 'css', 'cadeia_completa_pdf.css')
-        pdf = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf(
-            stylesheets=[css_path] if os.path.exists(css_path) else None
-        )
-        response = HttpResponse(pdf, content_type='application/pdf')
-        filename = f"cadeia_completa_{imovel.matricula}_{date.today().strftime('%Y%m%d')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
-    except Exception as e:
-        logger.exception(
-            "Erro ao gerar PDF da cadeia completa (tis_id=%s, imovel_id=%s)",
-            tis_id, imovel_id
-        )
-        error_html = f"""
-        <html>
-        <head><title>Erro na Geração do PDF</title></head>
-        <body style="font-family: Arial, sans-serif; padding: 20px; background-color: #f8f9fa;">
-            <div style="max-width: 600px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                <h1 style="color: #dc3545; margin-bottom: 20px;">❌ Erro na Geração do PDF</h1>
-                <p style="color: #6c757d; margin-bottom: 15px;">Ocorreu um erro ao gerar o PDF da cadeia dominial completa.</p>
-                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 4px; border-left: 4px solid #dc3545;">
-                    <strong>Erro:</strong> {str(e)}
-                </div>
-                <div style="margin-top: 20px;">
-                    <a href="javascript:history.back()" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 4px;">← Voltar</a>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        return HttpResponse(error_html, content_type='text/html')
+    """
+    Enfileira a exportação da cadeia completa em PDF (sequência padrão ou
+    personalizada via ``?sequencia=``) e acompanha o job até o download.
+    """
+    tis = get_object_or_404(TIs, id=tis_id)
+    imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
+
+    job = ExportacaoService.enfileirar(
+        ExportacaoJob.TIPO_CADEIA_COMPLETA_PDF,
+        imovel,
+        {'sequencia': request.GET.get('sequencia') or None},
+        usuario=request.user,
+        base_url=request.build_absolute_uri('/'),
+    )
+    return responder_exportacao(request, job)
 
 @login_required
 def exportar_cadeia_dominial_excel(request, tis_id, imovel_id):
@@ -459,197 +370,23 @@ def exportar_cadeia_dominial_excel(request, tis_id, imovel_id):
         service = CadeiaCompletaService()
         context = service.get_cadeia_completa(tis_id, imovel_id)
         
-        # Criar workbook Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Cadeia Dominial Geral"
-        
-        # Estilos
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        center_alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Cabeçalho principal
-        ws.merge_cells('A1:P1')
-        ws['A1'] = f"CADEIA DOMINIAL GERAL - {imovel.nome}"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws['A1'].alignment = center_alignment
-        
-        # Informações do imóvel
-        ws['A3'] = "TIS:"
-        ws['B3'] = tis.nome
-        ws['A4'] = "Matrícula:"
-        ws['B4'] = imovel.matricula
-        ws['A5'] = "Nome:"
-        ws['B5'] = imovel.nome
-        ws['A6'] = "Proprietário:"
-        ws['B6'] = imovel.proprietario.nome if imovel.proprietario else ""
-        ws['A7'] = "Cartório:"
-        ws['B7'] = imovel.cartorio.nome if imovel.cartorio else ""
-        ws['A8'] = "Data de Exportação:"
-        ws['B8'] = date.today().strftime('%d/%m/%Y')
-        
-        # Inicializar linha atual
-        row = 10
-        
-        # Processar a cadeia completa (mesma estrutura do PDF)
-        cadeia_completa = context['cadeia_completa']
-        
-        for tronco in cadeia_completa:
-            # Processar documentos do tronco
-            for item in tronco['documentos']:
-                documento = item['documento']
-                lancamentos = item['lancamentos']
-                is_importado = item.get('is_importado', False)
-            
-                # Título do documento
-                row += 1
-                prefixo_importado = "📥 " if is_importado else ""
-                ws.merge_cells(f'A{row}:P{row}')
-                ws.cell(row=row, column=1, value=f"{prefixo_importado}{documento.tipo.get_tipo_display()}: {documento.numero}").font = Font(bold=True, size=12)
-                ws.cell(row=row, column=1).fill = PatternFill(start_color="e3f2fd", end_color="e3f2fd", fill_type="solid")
-                ws.cell(row=row, column=1).alignment = center_alignment
-                row += 1
-            
-                # Cabeçalho da tabela de lançamentos (igual ao template)
-                # Primeira linha de cabeçalho (agrupamentos)
-                ws.merge_cells(f'A{row}:E{row}')
-                ws.cell(row=row, column=1, value="MATRÍCULA").font = header_font
-                ws.cell(row=row, column=1).fill = header_fill
-                ws.cell(row=row, column=1).alignment = center_alignment
-                
-                ws.merge_cells(f'F{row}:G{row}')
-                ws.cell(row=row, column=6, value="").fill = header_fill
-                
-                ws.merge_cells(f'H{row}:M{row}')
-                ws.cell(row=row, column=8, value="TRANSMISSÃO").font = header_font
-                ws.cell(row=row, column=8).fill = header_fill
-                ws.cell(row=row, column=8).alignment = center_alignment
-                
-                ws.cell(row=row, column=14, value="Área (ha)").font = header_font
-                ws.cell(row=row, column=14).fill = header_fill
-                ws.cell(row=row, column=14).alignment = center_alignment
-                
-                ws.cell(row=row, column=15, value="Origem").font = header_font
-                ws.cell(row=row, column=15).fill = header_fill
-                ws.cell(row=row, column=15).alignment = center_alignment
-                
-                ws.cell(row=row, column=16, value="Observações").font = header_font
-                ws.cell(row=row, column=16).fill = header_fill
-                ws.cell(row=row, column=16).alignment = center_alignment
-                row += 1
-            
-                # Segunda linha de cabeçalho (colunas específicas)
-                headers_detalhados = [
-                    'Nº', 'L', 'Fls.', 'Cartório', 'Data',  # Matrícula
-                    'Transmitente', 'Adquirente',  # Pessoas
-                    'Forma', 'Título', 'Cartório', 'L', 'Fls.', 'Data',  # Transmissão
-                    'Área (ha)', 'Origem', 'Observações'
-                ]
-                
-                for col, header in enumerate(headers_detalhados, 1):
-                    cell = ws.cell(row=row, column=col, value=header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.border = border
-                    cell.alignment = center_alignment
-                row += 1
-            
-                # Adicionar lançamentos
-                for lancamento in lancamentos:
-                    # Nº (usando o filtro numero_documento_criado)
-                    from ..templatetags.dominial_extras import numero_documento_criado
-                    numero_formatado = numero_documento_criado(lancamento)
-                    ws.cell(row=row, column=1, value=numero_formatado).border = border
-                    
-                    # L, Fls., Cartório, Data (do documento)
-                    ws.cell(row=row, column=2, value=documento.livro or "-").border = border
-                    folha_valor = "-" if documento.tipo and documento.tipo.tipo == 'matricula' else (documento.folha or "-")
-                    ws.cell(row=row, column=3, value=folha_valor).border = border
-                    ws.cell(row=row, column=4, value=documento.cartorio.nome if documento.cartorio else "-").border = border
-                    ws.cell(row=row, column=5, value=lancamento.data.strftime('%d/%m/%Y') if lancamento.data else "-").border = border
-                    
-                    # Transmitente
-                    transmitentes = [p.pessoa.nome for p in lancamento.transmitentes.all()]
-                    ws.cell(row=row, column=6, value=", ".join(transmitentes) if transmitentes else "-").border = border
-                    
-                    # Adquirente
-                    adquirentes = [p.pessoa.nome for p in lancamento.adquirentes.all()]
-                    ws.cell(row=row, column=7, value=", ".join(adquirentes) if adquirentes else "-").border = border
-                    
-                    # Transmissão
-                    if lancamento.tipo.tipo == 'averbacao':
-                        # Para averbação, mesclar colunas e mostrar descrição
-                        ws.merge_cells(f'H{row}:M{row}')
-                        ws.cell(row=row, column=8, value=lancamento.descricao or "-").border = border
-                    else:
-                        # Para outros tipos, mostrar campos específicos
-                        ws.cell(row=row, column=8, value=lancamento.forma or "-").border = border
-                        ws.cell(row=row, column=9, value=normalizar_texto_opcional(lancamento.titulo, "-")).border = border
-                        ws.cell(row=row, column=10, value=lancamento.cartorio_transmissao_compat.nome if lancamento.cartorio_transmissao_compat else "-").border = border
-                        ws.cell(row=row, column=11, value=lancamento.livro_transacao or "-").border = border
-                        ws.cell(row=row, column=12, value=lancamento.folha_transacao or "-").border = border
-                        ws.cell(row=row, column=13, value=lancamento.data_transacao.strftime('%d/%m/%Y') if lancamento.data_transacao else "-").border = border
-                    
-                    # Área, Origem, Observações
-                    ws.cell(row=row, column=14, value=lancamento.area if lancamento.area is not None else "-").border = border
-                    ws.cell(row=row, column=15, value=lancamento.origem or "-").border = border
-                    ws.cell(row=row, column=16, value=lancamento.observacoes or "-").border = border
-                    
-                    row += 1
-                
-                # Adicionar linha em branco entre documentos
-                row += 1
-        
-        # Adicionar estatísticas (se disponíveis)
-        if 'estatisticas' in context:
-            row += 1
-            estatisticas = context['estatisticas']
-            
-            # Título das estatísticas
-            ws.merge_cells(f'A{row}:P{row}')
-            ws.cell(row=row, column=1, value="📊 ESTATÍSTICAS").font = Font(bold=True, size=14, color="FFFFFF")
-            ws.cell(row=row, column=1).fill = PatternFill(start_color="28a745", end_color="28a745", fill_type="solid")
-            ws.cell(row=row, column=1).alignment = center_alignment
-            row += 1
-            
-            # Estatísticas
-            if 'total_documentos' in estatisticas:
-                ws.cell(row=row, column=1, value="Total de Documentos:").font = Font(bold=True)
-                ws.cell(row=row, column=2, value=estatisticas['total_documentos']).border = border
-                row += 1
-            
-            if 'total_lancamentos' in estatisticas:
-                ws.cell(row=row, column=1, value="Total de Lançamentos:").font = Font(bold=True)
-                ws.cell(row=row, column=2, value=estatisticas['total_lancamentos']).border = border
-                row += 1
-            
-            if 'documentos_compartilhados' in estatisticas:
-                ws.cell(row=row, column=1, value="Documentos Compartilhados:").font = Font(bold=True)
-                ws.cell(row=row, column=2, value=estatisticas['documentos_compartilhados']).border = border
-                row += 1
-        
-        # Ajustar largura das colunas (16 colunas)
-        column_widths = [12, 8, 8, 20, 12, 20, 20, 15, 15, 20, 8, 8, 12, 12, 20, 30]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(i)].width = width
-        
-        # Configurar resposta HTTP
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        # A planilha é gravada em um arquivo temporário (write-only) e enviada
+        # em blocos; FileResponse fecha o arquivo ao final do envio.
+        arquivo = tempfile.TemporaryFile()
+        try:
+            CadeiaExcelService.gerar(tis, imovel, context, arquivo)
+            arquivo.seek(0)
+        except Exception:
+            arquivo.close()
+            raise
+
         filename = f"cadeia_dominial_geral_{imovel.matricula}_{date.today().strftime('%Y%m%d')}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Salvar workbook
-        wb.save(response)
-        return response
+        return FileResponse(
+            arquivo,
+            as_attachment=True,
+            filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
         
     except Exception as e:
         # Em caso de erro, retornar uma resposta de erro
@@ -664,6 +401,43 @@ def exportar_cadeia_dominial_excel(request, tis_id, imovel_id):
         error_response.status_code = 500
         return error_response
 
+@login_required
+def exportar_cadeias_tis(request, tis_id):
+    """
+    Exporta em um ZIP, enviado em blocos, as cadeias de todos os imóveis da TI
+    (``?formatos=xlsx,json``; padrão os dois) e uma planilha de resumo.
+    Imóveis arquivados entram com ``?arquivados=1``.
+
+    O PDF não é aceito aqui: renderizar todos os imóveis prenderia o worker
+    web. O ZIP com PDFs é gerado pelo comando ``exportar_cadeias_tis``.
+    """
+    tis = get_object_or_404(TIs, id=tis_id)
+    try:
+        formatos = ExportacaoTisService.formatos(request.GET.get('formatos'))
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+    if 'pdf' in formatos:
+        return HttpResponse(
+            'O ZIP com PDFs é gerado pelo comando exportar_cadeias_tis '
+            '(--formatos xlsx,pdf,json); o PDF de cada imóvel está na página da cadeia.',
+            status=400,
+            content_type='text/plain',
+        )
+
+    response = StreamingHttpResponse(
+        ExportacaoTisService.gerar_zip(
+            tis,
+            formatos,
+            base_url=request.build_absolute_uri('/'),
+            incluir_arquivados=request.GET.get('arquivados') == '1',
+        ),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{ExportacaoTisService.nome_arquivo(tis, date.today())}"'
+    )
+    return response
+
 @login_required
 def obter_arvore_cadeia_dominial(request, tis_id, imovel_id):
     """Retorna os dados da árvore da cadeia dominial para o modal de seleção de sequência"""
@@ -671,11 +445,13 @@ def obter_arvore_cadeia_dominial(request, tis_id, imovel_id):
         tis = get_object_or_404(TIs, id=tis_id)
         imovel = get_object_or_404(Imovel, id=imovel_id, terra_indigena_id=tis)
         
+        grafo = CadeiaGrafo.carregar(imovel)
+
         # 1. Primeiro obter o tronco principal na sequência correta
-        tronco_principal = HierarquiaService.obter_tronco_principal(imovel)
+        tronco_principal = HierarquiaService.obter_tronco_principal(imovel, grafo=grafo)
         
         # 2. Obter todos os documentos da árvore
-        arvore = HierarquiaService.construir_arvore_cadeia_dominial(imovel)
+        arvore = HierarquiaService.construir_arvore_cadeia_dominial(imovel, grafo=grafo)
         
         # 3. Organizar documentos: tronco principal primeiro, depois o resto
         documentos_organizados = []
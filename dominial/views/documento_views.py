@@ -1,4 +1,3 @@
-import re
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -8,29 +7,9 @@ from django.views.decorators.http import require_http_methods, require_POST
 from ..models import Documento, DocumentoTipo, Imovel, TIs, Cartorios, Lancamento
 from ..forms import ImovelForm
 from ..services.documento_service import DocumentoService
-from ..services.cache_service import CacheService
 import json
 
 
-def _extrair_numero_simples(numero_lancamento):
-    """
-    Extrai o número simples do numero_lancamento para ordenação
-    Ex: "R4M235" -> 4, "AV12M235" -> 12, "AV4 M2725" -> 4, "M235" -> 0 (início de matrícula)
-    """
-    if not numero_lancamento:
-        return 0
-    
-    # Para início de matrícula, retornar 0 para ficar por último
-    if not numero_lancamento.startswith(('R', 'AV')):
-        return 0
-    
-    # Extrair número após R ou AV (com ou sem espaço)
-    match = re.search(r'^(R|AV)(\d+)', numero_lancamento)
-    if match:
-        return int(match.group(2))
-    
-    return 0
-
 @login_required
 def documentos(request, tis_id, imovel_id):
     """Lista todos os documentos de um imóvel"""
@@ -67,9 +46,6 @@ def novo_documento(request, tis_id, imovel_id):
         
         if sucesso:
             messages.success(request, f'Documento "{mensagem}" criado com sucesso!')
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
             return redirect('documentos', tis_id=tis.id, imovel_id=imovel.id)
         else:
             messages.error(request, mensagem)
@@ -99,9 +75,6 @@ def editar_documento(request, tis_id, imovel_id, documento_id):
         
         if sucesso:
             messages.success(request, f'Documento "{mensagem}" atualizado com sucesso!')
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
             return redirect('documentos', tis_id=tis.id, imovel_id=imovel.id)
         else:
             messages.error(request, mensagem)
@@ -129,9 +102,6 @@ def excluir_documento(request, tis_id, imovel_id, documento_id):
             numero_documento = documento.numero
             documento.delete()
             messages.success(request, f'Documento "{numero_documento}" excluído com sucesso!')
-            # Invalidar cache do imóvel
-            CacheService.invalidate_documentos_imovel(imovel.id)
-            CacheService.invalidate_tronco_principal(imovel.id)
             return redirect('documentos', tis_id=tis.id, imovel_id=imovel.id)
         except Exception as e:
             messages.error(request, f'Erro ao excluir documento: {str(e)}')
@@ -153,15 +123,7 @@ def documento_lancamentos(request, tis_id, imovel_id, documento_id):
     lancamentos = documento.lancamentos.all()\
         .select_related('tipo', 'transmitente', 'adquirente')\
         .prefetch_related('pessoas')\
-        .order_by('id')
-    
-    # Ordenar por número simples (decrescente), com início de matrícula por último
-    lancamentos_list = list(lancamentos)
-    lancamentos_list.sort(key=lambda x: (
-        -_extrair_numero_simples(x.numero_lancamento),
-        x.id
-    ))
-    lancamentos = lancamentos_list
+        .order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
     
     # Verificar se o usuário é admin para permitir edição
     pode_editar = request.user.is_staff or request.user.is_superuser
@@ -364,10 +326,6 @@ def ajustar_nivel_documento(request, documento_id):
         documento.nivel_manual = nivel_manual
         documento.save()
         
-        # Invalidar cache do imóvel
-        CacheService.invalidate_documentos_imovel(documento.imovel.id)
-        CacheService.invalidate_tronco_principal(documento.imovel.id)
-        
         return JsonResponse({
             'success': True,
             'message': f'Nível do documento {documento.numero} ajustado para {nivel_manual if nivel_manual is not None else "automático"}'
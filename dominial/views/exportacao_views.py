@@ -0,0 +1,83 @@
+"""
+Acompanhamento e download das exportações processadas em segundo plano.
+"""
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from ..models import ExportacaoJob
+from ..services.exportacao_service import ExportacaoService
+
+
+def responder_exportacao(request, job):
+    """
+    Resposta de uma view de exportação após enfileirar o job: JSON com o id
+    e as URLs de acompanhamento (``Accept: application/json`` ou
+    ``?formato=json``) ou redirecionamento para a página de acompanhamento.
+    Sem worker (EXPORTACOES_EM_SEGUNDO_PLANO=False) o job é processado aqui.
+    """
+    if not settings.EXPORTACOES_EM_SEGUNDO_PLANO and ExportacaoService.reservar(job.pk):
+        job.refresh_from_db()
+        ExportacaoService.processar(job)
+
+    if _quer_json(request):
+        dados = _dados_status(job)
+        return JsonResponse(dados, status=200 if dados['concluido'] else 202)
+    if job.status == ExportacaoJob.STATUS_CONCLUIDO:
+        return redirect('exportacao_download', job_id=job.id)
+    return redirect('exportacao_acompanhar', job_id=job.id)
+
+
+@login_required
+def exportacao_acompanhar(request, job_id):
+    """Página que acompanha o job e inicia o download ao concluir."""
+    job = get_object_or_404(ExportacaoJob.objects.select_related('imovel__terra_indigena_id'), id=job_id)
+    return render(request, 'dominial/exportacao_job.html', {
+        'job': job,
+        'imovel': job.imovel,
+        'tis': job.imovel.terra_indigena_id,
+        'status_url': reverse('exportacao_status', kwargs={'job_id': job.id}),
+    })
+
+
+@login_required
+def exportacao_status(request, job_id):
+    """Status do job em JSON (polling da página de acompanhamento)."""
+    job = get_object_or_404(ExportacaoJob, id=job_id)
+    return JsonResponse(_dados_status(job))
+
+
+@login_required
+def exportacao_download(request, job_id):
+    """Entrega o arquivo gerado (nunca pela URL pública de MEDIA)."""
+    job = get_object_or_404(ExportacaoJob, id=job_id, status=ExportacaoJob.STATUS_CONCLUIDO)
+    try:
+        arquivo = job.arquivo.open('rb')
+    except (FileNotFoundError, ValueError):
+        raise Http404("Arquivo da exportação não encontrado no storage.")
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=job.nome_arquivo,
+        content_type='application/pdf',
+    )
+
+
+def _dados_status(job):
+    dados = ExportacaoService.status(job)
+    dados['status_url'] = reverse('exportacao_status', kwargs={'job_id': job.id})
+    dados['download_url'] = (
+        reverse('exportacao_download', kwargs={'job_id': job.id})
+        if dados['concluido']
+        else None
+    )
+    return dados
+
+
+def _quer_json(request):
+    return (
+        request.GET.get('formato') == 'json'
+        or 'application/json' in request.headers.get('Accept', '')
+    )
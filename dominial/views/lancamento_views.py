@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.views.decorators.http import require_http_methods, require_POST
 from django.http import Http404, JsonResponse
 from django.db.models import Prefetch
-from ..models import TIs, Imovel, Lancamento, Pessoas, Cartorios, Documento, LancamentoPessoa, FimCadeia
+from ..models import TIs, Imovel, Lancamento, Documento, LancamentoPessoa, FimCadeia
 from ..services.lancamento_service import LancamentoService
 from ..utils.hierarquia_utils import processar_origens_para_documentos
 from datetime import date
@@ -13,7 +13,6 @@ import uuid
 from ..services.lancamento_heranca_service import LancamentoHerancaService
 from ..services.lancamento_duplicata_service import LancamentoDuplicataService
 from ..services.documento_service import DocumentoService
-from ..services.lancamento_consulta_service import LancamentoConsultaService
 
 
 def _build_fim_cadeia_opcoes():
@@ -35,17 +34,14 @@ def _build_fim_cadeia_opcoes():
 def _build_documento_lancamentos(documento, current_lancamento_id=None):
     """Constrói lista de lançamentos do documento para o sidebar de navegação.
        Ordem: do maior número simples para o menor (igual à tabela detalhada)."""
-    lancamentos = list(
+    # Mesma ordenação do documento_detalhado:
+    # número simples decrescente, depois id crescente
+    lancamentos = (
         Lancamento.objects
         .filter(documento=documento)
-        .select_related('tipo')
+        .only('id', 'numero_lancamento')
+        .order_by(*Lancamento.ORDEM_NUMERO_SIMPLES)
     )
-    # Mesma ordenação do documento_detalhado:
-    # número extraído decrescente, depois id crescente
-    lancamentos.sort(key=lambda x: (
-        -LancamentoConsultaService._extrair_numero_simples(x.numero_lancamento),
-        x.id
-    ))
     return [
         {
             'id': lanc.id,
@@ -93,9 +89,8 @@ def novo_lancamento(request, tis_id, imovel_id, documento_id=None):
             messages.error(request, '❌ Nenhum documento encontrado para este imóvel.')
             return redirect('imoveis', tis_id=tis.id)
     
-    # Obter dados para o formulário
-    pessoas = Pessoas.objects.all().order_by('nome')
-    cartorios = Cartorios.objects.all().order_by('nome')
+    # Obter dados para o formulário (pessoas e cartórios vêm dos
+    # endpoints de autocomplete, sob demanda)
     tipos_lancamento = LancamentoService.obter_tipos_lancamento_por_documento(documento_ativo)
     
     # Processar POST
@@ -243,8 +238,6 @@ def novo_lancamento(request, tis_id, imovel_id, documento_id=None):
                 'tis': tis,
                 'imovel': imovel,
                 'documento': documento_ativo,
-                'pessoas': pessoas,
-                'cartorios': cartorios,
                 'tipos_lancamento': tipos_lancamento,
                 'form_data': {
                     'tipo_lancamento': request.POST.get('tipo_lancamento'),
@@ -323,8 +316,6 @@ def novo_lancamento(request, tis_id, imovel_id, documento_id=None):
         'tis': tis,
         'imovel': imovel,
         'documento': documento_ativo,
-        'pessoas': pessoas,
-        'cartorios': cartorios,
         'duplicata_cancelada': duplicata_cancelada,
         'duplicata_origem': duplicata_origem,
         'duplicata_cartorio': duplicata_cartorio,
@@ -452,9 +443,8 @@ def editar_lancamento(request, tis_id, imovel_id, lancamento_id):
         except Lancamento.DoesNotExist:
             raise Http404("Lançamento não encontrado")
     
-    # Obter dados para o formulário
-    pessoas = Pessoas.objects.all().order_by('nome')
-    cartorios = Cartorios.objects.all().order_by('nome')
+    # Obter dados para o formulário (pessoas e cartórios vêm dos
+    # endpoints de autocomplete, sob demanda)
     tipos_lancamento = LancamentoService.obter_tipos_lancamento_por_documento(lancamento.documento)
     
     # Processar POST
@@ -482,8 +472,8 @@ def editar_lancamento(request, tis_id, imovel_id, lancamento_id):
             messages.error(request, mensagem_origens)
     
     # Obter pessoas do lançamento para exibição no formulário
-    transmitentes = lancamento.pessoas.filter(tipo='transmitente')
-    adquirentes = lancamento.pessoas.filter(tipo='adquirente')
+    transmitentes = lancamento.pessoas.filter(tipo='transmitente').select_related('pessoa')
+    adquirentes = lancamento.pessoas.filter(tipo='adquirente').select_related('pessoa')
     
     # CORREÇÃO: Para o formulário de edição, usar o cartório do documento atual
     # O cartório de origem deve ser o cartório do próprio documento (que foi definido quando ele foi criado)
@@ -494,8 +484,6 @@ def editar_lancamento(request, tis_id, imovel_id, lancamento_id):
         'imovel': imovel,
         'lancamento': lancamento,
         'documento': lancamento.documento,
-        'pessoas': pessoas,
-        'cartorios': cartorios,
         'tipos_lancamento': tipos_lancamento,
         'transmitentes': transmitentes,
         'adquirentes': adquirentes,
@@ -745,8 +733,8 @@ def lancamento_resumo_partial(request, tis_id, imovel_id, lancamento_id):
         ),
         id=lancamento_id, documento__imovel=imovel
     )
-    transmitentes = lancamento.pessoas.filter(tipo='transmitente')
-    adquirentes = lancamento.pessoas.filter(tipo='adquirente')
+    transmitentes = lancamento.pessoas.filter(tipo='transmitente').select_related('pessoa')
+    adquirentes = lancamento.pessoas.filter(tipo='adquirente').select_related('pessoa')
     return render(request, 'dominial/components/_lancamento_resumo_card.html', {
         'lancamento': lancamento,
         'documento': lancamento.documento,
@@ -765,8 +753,8 @@ def lancamento_detail(request, tis_id, imovel_id, lancamento_id):
     lancamento = get_object_or_404(Lancamento, id=lancamento_id, documento__imovel=imovel)
     
     # Obter pessoas do lançamento
-    transmitentes = lancamento.pessoas.filter(tipo='transmitente')
-    adquirentes = lancamento.pessoas.filter(tipo='adquirente')
+    transmitentes = lancamento.pessoas.filter(tipo='transmitente').select_related('pessoa')
+    adquirentes = lancamento.pessoas.filter(tipo='adquirente').select_related('pessoa')
     
     context = {
         'tis': tis,
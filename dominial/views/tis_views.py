@@ -1,38 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from ..models import TIs, TerraIndigenaReferencia, Imovel
+from ..models import TIs, Imovel
 from ..forms import TIsForm, ImovelForm
-from django.db.models import Q
+from ..services.tis_consulta_service import TisConsultaService
 
 @login_required
 def home(request):
     busca = request.GET.get('busca', '').strip()
-    tis_cadastradas = TIs.objects.all()
-    terras_referencia = TerraIndigenaReferencia.objects.all()
-    if busca:
-        tis_cadastradas = tis_cadastradas.filter(
-            Q(nome__icontains=busca) | Q(etnia__icontains=busca) | Q(codigo__icontains=busca)
-        )
-        terras_referencia = terras_referencia.filter(
-            Q(nome__icontains=busca) | Q(etnia__icontains=busca) | Q(codigo__icontains=busca)
-        )
-    tis_com_imoveis = {tis.id: Imovel.objects.filter(terra_indigena_id=tis).count() for tis in tis_cadastradas}
-    tis_ordenadas = sorted(
-        tis_cadastradas,
-        key=lambda x: (tis_com_imoveis.get(x.id, 0), x.nome),
-        reverse=True
-    )
-    terras_referencia = terras_referencia.order_by('nome')
-    codigos_tis_cadastradas = set(tis.codigo for tis in tis_cadastradas)
-    terras_referencia_nao_cadastradas = [tr for tr in terras_referencia if tr.codigo not in codigos_tis_cadastradas]
     return render(request, 'dominial/home.html', {
-        'terras_indigenas': tis_ordenadas,
-        'terras_referencia': terras_referencia_nao_cadastradas,
+        **TisConsultaService.dados_home(busca),
         'busca': busca,
-        'total_tis_cadastradas': tis_cadastradas.count(),
-        'total_terras_referencia': len(terras_referencia_nao_cadastradas),
-        'tis_com_imoveis': tis_com_imoveis,
     })
 
 @login_required
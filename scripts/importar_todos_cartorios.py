@@ -2,8 +2,14 @@
 """
 Script para importar cartórios de todos os estados do Brasil
 Executa a importação de forma organizada com logs detalhados
+
+Cada estado tem uma execução (ImportacaoCartorios) com checkpoint por
+cidade. Se o script for interrompido, rode-o de novo com --retomar: os
+estados concluídos são pulados e os demais continuam da última cidade
+gravada.
 """
 
+import argparse
 import os
 import sys
 import django
@@ -17,7 +23,7 @@ import html
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadeia_dominial.settings_prod')
 django.setup()
 
-from dominial.models import Cartorios
+from dominial.models import Cartorios, ImportacaoCartorios
 
 # Configurar logging
 logging.basicConfig(
@@ -49,8 +55,9 @@ def executar_importacao_estado(estado):
     try:
         logger.info(f"🚀 Iniciando importação do estado {estado}")
         
-        # Comando para executar a importação
-        comando = f"python manage.py importar_cartorios_estado {estado}"
+        # Comando para executar a importação (continua a execução pendente
+        # do estado; não faz nada se ela já foi concluída)
+        comando = f"python manage.py importar_cartorios_estado {estado} --retomar"
         
         # Executar o comando
         resultado = subprocess.run(
@@ -93,24 +100,35 @@ def verificar_cartorios_estado(estado):
         logger.error(f"❌ Erro ao verificar cartórios do estado {estado}: {str(e)}")
         return 0
 
-def verificar_estado_ja_importado(estado):
-    """Verifica se um estado já foi importado recentemente"""
-    try:
-        # Verificar se há cartórios para este estado
-        count = Cartorios.objects.filter(estado=estado).count()
-        if count > 0:
-            logger.info(f"📋 Estado {estado} já possui {count} cartórios")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"❌ Erro ao verificar estado {estado}: {str(e)}")
-        return False
+def criar_execucoes_pendentes():
+    """Inicia uma nova atualização nacional: uma execução pendente por estado"""
+    ImportacaoCartorios.objects.bulk_create(
+        [ImportacaoCartorios(estado=estado) for estado in ESTADOS]
+    )
+
+def estado_concluido(estado):
+    """Verifica se a última execução do estado já foi concluída"""
+    ultima = ImportacaoCartorios.objects.filter(estado=estado).order_by('-data_inicio', '-id').first()
+    return ultima is not None and ultima.status == 'concluido'
 
 def main():
     """Função principal do script"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--retomar',
+        action='store_true',
+        help='Continua a última atualização nacional em vez de iniciar outra',
+    )
+    args = parser.parse_args()
+
     logger.info("=" * 60)
     logger.info("🏛️  INICIANDO IMPORTAÇÃO DE TODOS OS CARTÓRIOS DO BRASIL")
     logger.info("=" * 60)
+
+    if args.retomar:
+        logger.info("🔁 Retomando a última atualização nacional")
+    else:
+        criar_execucoes_pendentes()
     
     # Verificar cartórios existentes antes da importação
     total_inicial = Cartorios.objects.count()
@@ -136,9 +154,9 @@ def main():
     for i, estado in enumerate(ESTADOS, 1):
         logger.info(f"🔄 [{i}/{len(ESTADOS)}] Processando estado: {estado}")
         
-        # Verificar se já foi importado
-        if verificar_estado_ja_importado(estado):
-            logger.info(f"⏭️  Estado {estado} já possui cartórios. Pulando...")
+        # Verificar se já foi importado nesta atualização
+        if estado_concluido(estado):
+            logger.info(f"⏭️  Estado {estado} já concluído. Pulando...")
             estados_pulados.append(estado)
             continue
         
@@ -148,7 +166,8 @@ def main():
             time.sleep(10)
         
         # Executar importação
-        sucesso = executar_importacao_estado(estado)
+        # Cidades com erro deixam a execução aberta para ser retomada
+        sucesso = executar_importacao_estado(estado) and estado_concluido(estado)
         
         if sucesso:
             estados_sucesso.append(estado)
@@ -115,6 +115,8 @@ create_default_types() {
 run_migrations() {
     echo "🔄 Executando migrações..."
     python manage.py migrate
+    # Tabela do cache compartilhado (CACHE_BACKEND=database); idempotente.
+    python manage.py createcachetable
     echo "✅ Migrações concluídas!"
 }
 
@@ -81,6 +81,7 @@ fi
 # Executar migrações
 log_step "Executando migrações do banco de dados..."
 docker-compose exec web python manage.py migrate
+docker-compose exec web python manage.py createcachetable
 
 # Coletar arquivos estáticos
 log_step "Coletando arquivos estáticos..."
@@ -163,7 +163,7 @@ function escolherOrigem(documentoId, origemNumero) {
     .then(cadeiaData => {
         if (cadeiaData && cadeiaData.success && cadeiaData.cadeia) {
             // Atualizar a tabela com os novos dados (sempre expandido)
-            atualizarTabelaCadeia(cadeiaData.cadeia);
+            atualizarTabelaCadeia(expandirCadeiaCompacta(cadeiaData));
             
             // Mostrar mensagem de sucesso
             mostrarNotificacao('Cadeia atualizada com sucesso!', 'success');
@@ -184,6 +184,43 @@ function escolherOrigem(documentoId, origemNumero) {
     });
 }
 
+/**
+ * A API responde no formato compacto: cartórios, pessoas e rótulos de tipo
+ * vêm uma vez em tabelas de consulta e os itens os referenciam por id.
+ * Reconstrói os campos com nomes usados na montagem da tabela.
+ */
+function expandirCadeiaCompacta(dados) {
+    const cartorios = dados.cartorios || {};
+    const pessoas = dados.pessoas || {};
+    const tipos = dados.tipos || {};
+    const nomeCartorio = id => (id !== null && id !== undefined ? cartorios[id] : null) || null;
+
+    return dados.cadeia.map(item => {
+        const documento = item.documento;
+        return {
+            ...item,
+            documento: {
+                ...documento,
+                label_data: documento.data ? 'Análise iniciada em:' : '',
+                tipo_display: tipos[documento.tipo] || '',
+                cartorio_nome: nomeCartorio(documento.cartorio) || '',
+                is_compartilhado: item.is_compartilhado
+            },
+            lancamentos: item.lancamentos.map(lancamento => ({
+                ...lancamento,
+                tipo_tipo: lancamento.tipo,
+                tipo_display: tipos[lancamento.tipo] || '',
+                cartorio_transmissao_nome: nomeCartorio(lancamento.cartorio_transmissao),
+                cartorio_origem_nome: nomeCartorio(lancamento.cartorio_origem),
+                pessoas: lancamento.pessoas.map(([pessoaId, tipo]) => ({
+                    pessoa_nome: pessoas[pessoaId] || '',
+                    tipo: tipo
+                }))
+            }))
+        };
+    });
+}
+
 function atualizarTabelaCadeia(cadeia) {
     console.log('=== DEBUG: Dados recebidos na atualizarTabelaCadeia ===');
     console.log('Cadeia:', cadeia);
@@ -719,7 +756,7 @@ function limparEscolhas() {
     .then(cadeiaData => {
         if (cadeiaData && cadeiaData.success && cadeiaData.cadeia) {
             // Atualizar a tabela com os novos dados (sempre expandido)
-            atualizarTabelaCadeia(cadeiaData.cadeia);
+            atualizarTabelaCadeia(expandirCadeiaCompacta(cadeiaData));
             
             // Mostrar mensagem de sucesso
             mostrarNotificacao('Cadeia atualizada com sucesso!', 'success');
@@ -69,6 +69,17 @@ class CartorioVerificacaoService {
             throw error;
         }
     }
+
+    /**
+     * Consulta o progresso de uma importação enfileirada
+     */
+    async consultarImportacao(statusUrl) {
+        const response = await fetch(statusUrl, { credentials: 'same-origin' });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        return await response.json();
+    }
 }
 
 class CartorioModalService {
@@ -137,7 +148,7 @@ class CartorioModalService {
                     <div class="progress-details" id="progress-details">
                         <p><strong>Status:</strong> <span id="status-text">Conectando ao servidor...</span></p>
                         <p><strong>Tempo decorrido:</strong> <span id="tempo-decorrido">0s</span></p>
-                        <p><strong>Observação:</strong> A importação está sendo processada no servidor. O progresso será atualizado quando concluído.</p>
+                        <p><strong>Observação:</strong> A importação é processada em segundo plano no servidor. O progresso é atualizado conforme as cidades são gravadas.</p>
                     </div>
                 </div>
             </div>
@@ -315,12 +326,11 @@ class CartorioModalService {
             // Mostrar progresso
             this.mostrarProgresso(estado);
 
-            // Fazer a importação
+            // Enfileirar a importação (o worker a executa fora da requisição)
             const resultado = await cartorioVerificacaoService.importarCartoriosEstado(estado);
 
             if (resultado.success) {
-                // Mostrar conclusão
-                this.mostrarConclusao(estado, resultado.total_cartorios);
+                this.acompanharImportacao(estado, resultado.status_url);
             } else {
                 this.mostrarErro('Erro na importação: ' + (resultado.error || 'Erro desconhecido'));
             }
@@ -330,6 +340,53 @@ class CartorioModalService {
         }
     }
 
+    /**
+     * Acompanha a importação pelo progresso real (cidades gravadas)
+     */
+    acompanharImportacao(estado, statusUrl) {
+        const consultar = async () => {
+            if (!this.modal || !this.modal.classList.contains('show')) return;
+            try {
+                const dados = await cartorioVerificacaoService.consultarImportacao(statusUrl);
+                if (dados.status === 'concluido') {
+                    this.mostrarConclusao(estado, dados.total_cartorios);
+                    return;
+                }
+                if (dados.status === 'erro') {
+                    this.mostrarErro('Erro na importação: ' + (dados.erro || 'Erro desconhecido'));
+                    return;
+                }
+                if (dados.status === 'em_andamento' && dados.total_cidades) {
+                    this.mostrarProgressoReal(dados);
+                }
+            } catch (error) {
+                console.error('Erro ao consultar importação:', error);
+            }
+            setTimeout(consultar, 2000);
+        };
+        consultar();
+    }
+
+    /**
+     * Substitui a animação estimada pelo progresso informado pelo servidor
+     */
+    mostrarProgressoReal(dados) {
+        this.pararAnimacaoProgresso();
+
+        const progressFill = document.getElementById('progress-fill');
+        const progressText = document.getElementById('progress-text');
+        const statusText = document.getElementById('status-text');
+        const tempoDecorrido = document.getElementById('tempo-decorrido');
+        if (!progressFill) return;
+
+        progressFill.style.animation = 'none';
+        progressFill.style.width = `${dados.percentual}%`;
+        progressText.innerHTML = `⏳ Progresso: ${Math.round(dados.percentual)}%`;
+        statusText.textContent = `Cidades concluídas: ${dados.cidades_concluidas}/${dados.total_cidades}`
+            + (dados.cidades_por_minuto ? ` (${dados.cidades_por_minuto} cidades/min)` : '');
+        tempoDecorrido.textContent = `${Math.floor((Date.now() - this.startTime) / 1000)}s`;
+    }
+
     /**
      * Mostra erro na importação
      */
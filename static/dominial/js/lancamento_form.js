@@ -220,6 +220,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Configurar autocomplete para pessoas existentes e adicionar listeners para novos campos
     setupPessoaAutocomplete();
     
+    // Nomes dos valores pré-selecionados que vieram só com o ID
+    preencherSelecionadosPorId();
+    
     // Configurar autocomplete para origens existentes
     setupOrigemAutocomplete();
     
@@ -413,43 +416,57 @@ function adicionarAdquirente() {
 function setupPessoaAutocompleteField(input, hidden, suggestions, tipo) {
     let currentIndex = -1;
     let currentSuggestions = [];
+    let consultaAtual = '';
     
-    input.addEventListener('input', function() {
-        const query = this.value.trim();
-        if (query.length < 2) {
-            suggestions.style.display = 'none';
-            currentIndex = -1;
-            return;
-        }
-        
-        fetch(`/dominial/pessoa-autocomplete/?q=${encodeURIComponent(query)}`)
+    // Busca uma página de sugestões; a partir da segunda, acrescenta à lista
+    function buscarPessoas(query, pagina) {
+        fetch(`/dominial/pessoa-autocomplete/?q=${encodeURIComponent(query)}&pagina=${pagina}`)
             .then(response => response.json())
             .then(data => {
-                suggestions.innerHTML = '';
-                currentSuggestions = data.results || [];
-                currentIndex = -1;
+                if (query !== consultaAtual) {
+                    return; // Resposta de uma busca já substituída
+                }
+                if (pagina === 1) {
+                    suggestions.innerHTML = '';
+                    currentSuggestions = [];
+                    currentIndex = -1;
+                }
                 
-                if (currentSuggestions.length > 0) {
-                    currentSuggestions.forEach((pessoa, index) => {
-                        const div = document.createElement('div');
-                        div.className = 'autocomplete-suggestion';
-                        div.textContent = pessoa.nome;
-                        div.setAttribute('data-index', index);
-                        div.addEventListener('click', function() {
-                            selectSuggestion(index);
-                        });
-                        suggestions.appendChild(div);
+                (data.results || []).forEach(pessoa => {
+                    const index = currentSuggestions.length;
+                    currentSuggestions.push(pessoa);
+                    const div = document.createElement('div');
+                    div.className = 'autocomplete-suggestion';
+                    div.textContent = pessoa.nome;
+                    div.setAttribute('data-index', index);
+                    div.addEventListener('click', function() {
+                        selectSuggestion(index);
                     });
-                    suggestions.style.display = 'block';
-                } else {
-                    suggestions.style.display = 'none';
+                    suggestions.appendChild(div);
+                });
+                
+                if (data.pagination && data.pagination.more) {
+                    adicionarCarregarMais(suggestions, () => buscarPessoas(query, pagina + 1));
                 }
+                suggestions.style.display = currentSuggestions.length > 0 ? 'block' : 'none';
             })
             .catch(error => {
                 console.error('Erro ao buscar pessoas:', error);
                 suggestions.style.display = 'none';
                 currentIndex = -1;
             });
+    }
+    
+    input.addEventListener('input', function() {
+        const query = this.value.trim();
+        consultaAtual = query;
+        if (query.length < 2) {
+            suggestions.style.display = 'none';
+            currentIndex = -1;
+            return;
+        }
+        
+        buscarPessoas(query, 1);
     });
     
     // Função para selecionar uma sugestão
@@ -496,7 +513,7 @@ function setupPessoaAutocompleteField(input, hidden, suggestions, tipo) {
     
     // Função para atualizar o destaque da sugestão
     function updateHighlight() {
-        const suggestionElements = suggestions.querySelectorAll('.autocomplete-suggestion');
+        const suggestionElements = suggestions.querySelectorAll('.autocomplete-suggestion:not(.carregar-mais)');
         suggestionElements.forEach((element, index) => {
             if (index === currentIndex) {
                 element.classList.add('highlighted');
@@ -520,51 +537,65 @@ function setupPessoaAutocompleteField(input, hidden, suggestions, tipo) {
 function setupCartorioAutocomplete(input, hidden, suggestions) {
     let currentIndex = -1;
     let currentSuggestions = [];
+    let consultaAtual = '';
     
-    input.addEventListener('input', function() {
-        const query = this.value.trim();
-        if (query.length < 2) {
-            suggestions.style.display = 'none';
-            currentIndex = -1;
-            // Limpar campo hidden se não há seleção válida
-            hidden.value = '';
-            return;
-        }
-        
-        fetch(`/dominial/cartorio-autocomplete/?q=${encodeURIComponent(query)}`)
+    // Busca uma página de sugestões; a partir da segunda, acrescenta à lista
+    function buscarCartorios(query, pagina) {
+        fetch(`/dominial/cartorio-autocomplete/?q=${encodeURIComponent(query)}&pagina=${pagina}`)
             .then(response => response.json())
             .then(data => {
-                suggestions.innerHTML = '';
-                currentSuggestions = data.results || [];
-                currentIndex = -1;
+                if (query !== consultaAtual) {
+                    return; // Resposta de uma busca já substituída
+                }
+                if (pagina === 1) {
+                    suggestions.innerHTML = '';
+                    currentSuggestions = [];
+                    currentIndex = -1;
+                }
                 
-                if (currentSuggestions.length > 0) {
-                    currentSuggestions.forEach((cartorio, index) => {
-                        const div = document.createElement('div');
-                        div.className = 'autocomplete-suggestion';
-                        div.textContent = cartorio.nome;
-                        div.setAttribute('data-index', index);
-                        div.addEventListener('click', function() {
-                            selectCartorioSuggestion(index);
-                        });
-                        suggestions.appendChild(div);
+                (data.results || []).forEach(cartorio => {
+                    const index = currentSuggestions.length;
+                    currentSuggestions.push(cartorio);
+                    const div = document.createElement('div');
+                    div.className = 'autocomplete-suggestion';
+                    div.textContent = cartorio.nome;
+                    div.setAttribute('data-index', index);
+                    div.addEventListener('click', function() {
+                        selectCartorioSuggestion(index);
                     });
-                    suggestions.style.display = 'block';
-                } else {
-                    suggestions.style.display = 'none';
+                    suggestions.appendChild(div);
+                });
+                
+                if (currentSuggestions.length === 0) {
                     // Mostrar mensagem de "Nenhum cartório encontrado"
                     const noResultsDiv = document.createElement('div');
                     noResultsDiv.className = 'autocomplete-suggestion no-results';
                     noResultsDiv.textContent = 'Nenhum cartório encontrado. Digite para buscar...';
                     suggestions.appendChild(noResultsDiv);
-                    suggestions.style.display = 'block';
+                } else if (data.pagination && data.pagination.more) {
+                    adicionarCarregarMais(suggestions, () => buscarCartorios(query, pagina + 1));
                 }
+                suggestions.style.display = 'block';
             })
             .catch(error => {
                 console.error('Erro ao buscar cartórios:', error);
                 suggestions.style.display = 'none';
                 currentIndex = -1;
             });
+    }
+    
+    input.addEventListener('input', function() {
+        const query = this.value.trim();
+        consultaAtual = query;
+        if (query.length < 2) {
+            suggestions.style.display = 'none';
+            currentIndex = -1;
+            // Limpar campo hidden se não há seleção válida
+            hidden.value = '';
+            return;
+        }
+        
+        buscarCartorios(query, 1);
     });
     
     // Função para selecionar uma sugestão de cartório
@@ -613,7 +644,7 @@ function setupCartorioAutocomplete(input, hidden, suggestions) {
     
     // Função para atualizar o destaque da sugestão de cartório
     function updateCartorioHighlight() {
-        const suggestionElements = suggestions.querySelectorAll('.autocomplete-suggestion:not(.no-results)');
+        const suggestionElements = suggestions.querySelectorAll('.autocomplete-suggestion:not(.no-results):not(.carregar-mais)');
         suggestionElements.forEach((element, index) => {
             if (index === currentIndex) {
                 element.classList.add('highlighted');
@@ -646,6 +677,62 @@ function setupCartorioAutocomplete(input, hidden, suggestions) {
     });
 }
 
+// Item "Carregar mais" ao fim de uma lista de sugestões paginada
+function adicionarCarregarMais(suggestions, carregar) {
+    const div = document.createElement('div');
+    div.className = 'autocomplete-suggestion carregar-mais';
+    div.textContent = 'Carregar mais...';
+    div.addEventListener('click', function(e) {
+        // Sem propagar: o item sai da lista e o clique seria tomado como "fora"
+        e.stopPropagation();
+        div.remove();
+        carregar();
+    });
+    suggestions.appendChild(div);
+}
+
+// Preenche em lote os nomes de pessoas/cartórios pré-selecionados apenas
+// pelo ID (uma requisição por tipo, em vez de listas completas na página)
+function preencherSelecionadosPorId() {
+    const pendentes = { pessoa: [], cartorio: [] };
+    
+    document.querySelectorAll('.autocomplete-container').forEach(container => {
+        const texto = container.querySelector('input[type="text"]');
+        const hidden = container.querySelector('input[type="hidden"]');
+        if (!texto || !hidden || !hidden.value || texto.value.trim()) {
+            return;
+        }
+        if (/cartorio/.test(hidden.name)) {
+            pendentes.cartorio.push({ texto, id: hidden.value });
+        } else if (/transmitente|adquirente/.test(hidden.name)) {
+            pendentes.pessoa.push({ texto, id: hidden.value });
+        }
+    });
+    
+    Object.entries(pendentes).forEach(([tipo, campos]) => {
+        if (campos.length === 0) {
+            return;
+        }
+        const ids = [...new Set(campos.map(campo => campo.id))].join(',');
+        fetch(`/dominial/${tipo}-autocomplete/?ids=${encodeURIComponent(ids)}`)
+            .then(response => response.json())
+            .then(data => {
+                const nomes = {};
+                (data.results || []).forEach(item => {
+                    nomes[item.id] = item.nome;
+                });
+                campos.forEach(campo => {
+                    if (nomes[campo.id]) {
+                        campo.texto.value = nomes[campo.id];
+                    }
+                });
+            })
+            .catch(error => {
+                console.error(`Erro ao carregar ${tipo}s selecionados:`, error);
+            });
+    });
+}
+
 // Função para configurar autocomplete geral de pessoas
 function setupPessoaAutocomplete() {
     const transmitenteInputs = document.querySelectorAll('.transmitente-nome');